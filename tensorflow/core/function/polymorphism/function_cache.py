@@ -96,6 +96,13 @@ class FunctionCache:
     else:
       return function_type
 
+  def function_types(self, context: FunctionContext):
+    """Returns the FunctionTypes of the concrete functions of a context."""
+    return [
+        function_type for (function_context, function_type) in self._primary
+        if function_context == context
+    ]
+
   # TODO(b/205971333): Remove this function.
   def clear(self):
     """Removes all concrete functions from the cache."""
@@ -39,8 +39,6 @@ from tensorflow.python.eager import context
 # pylint: enable=wildcard-import
 
 # Bring in subpackages.
-from tensorflow.python import data
-from tensorflow.python import distribute
 # from tensorflow.python import keras
 from tensorflow.python.feature_column import feature_column_lib as feature_column
 # from tensorflow.python.layers import layers
@@ -54,7 +52,6 @@ from tensorflow.python.ops import image_ops as image
 from tensorflow.python.ops import manip_ops as manip
 from tensorflow.python.ops import metrics
 from tensorflow.python.ops import nn
-from tensorflow.python.ops import numpy_ops
 from tensorflow.python.ops import ragged
 from tensorflow.python.ops import sets
 from tensorflow.python.ops import stateful_random_ops
@@ -67,14 +64,31 @@ from tensorflow.python.ops.ragged import ragged_ops as _ragged_ops
 from tensorflow.python.ops.signal import signal
 from tensorflow.python.ops.structured import structured_ops as _structured_ops
 from tensorflow.python.profiler import profiler
-from tensorflow.python.profiler import profiler_client
-from tensorflow.python.profiler import profiler_v2
-from tensorflow.python.profiler import trace
 from tensorflow.python.saved_model import saved_model
 from tensorflow.python.summary import summary
 from tensorflow.python.tpu import api
 from tensorflow.python.user_ops import user_ops
 from tensorflow.python.util import compat
+from tensorflow.python.util.lazy_loader import LazyLoader as _LazyLoader
+
+# Subpackages that neither register ops, gradients nor dispatchers are only
+# imported when first used, which keeps them out of the import of tensorflow
+# until the public API modules that export them are accessed. Modules bound to
+# the name of another subpackage, like `saved_model`, are not loaded lazily, as
+# importing that subpackage would replace them. The API generator imports the
+# lazily loaded modules explicitly to find their exported symbols. Note that
+# `data` and `distribute` are still imported by eagerly loaded modules, e.g.
+# `nn_impl`, `stateful_random_ops` and `saved_model`.
+data = _LazyLoader("data", globals(), "tensorflow.python.data")
+distribute = _LazyLoader("distribute", globals(),
+                         "tensorflow.python.distribute")
+numpy_ops = _LazyLoader("numpy_ops", globals(),
+                        "tensorflow.python.ops.numpy_ops")
+profiler_client = _LazyLoader("profiler_client", globals(),
+                              "tensorflow.python.profiler.profiler_client")
+profiler_v2 = _LazyLoader("profiler_v2", globals(),
+                          "tensorflow.python.profiler.profiler_v2")
+trace = _LazyLoader("trace", globals(), "tensorflow.python.profiler.trace")
 
 # Update the RaggedTensor package docs w/ a list of ops that support dispatch.
 ragged.__doc__ += _ragged_ops.ragged_dispatch.ragged_op_list()
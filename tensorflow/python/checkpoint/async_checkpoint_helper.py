@@ -23,6 +23,7 @@ import weakref
 
 from absl import logging
 
+from tensorflow.python.checkpoint import functional_saver
 from tensorflow.python.distribute import device_util
 from tensorflow.python.distribute.sharded_variable import ShardedVariable
 from tensorflow.python.eager import context
@@ -101,6 +102,10 @@ class AsyncCheckpointHelper:
     # The mapping between the original and the copied resource variables.
     # The copied variables are used for the underlying checkpointing.
     self._object_map = None
+    # The mapping between the original variables and their copies on their own
+    # devices, which are used instead for the saves streamed through a staging
+    # buffer. Created by the first streamed save.
+    self._device_object_map = None
     # A list of TPUEmbedding objects included in the checkpoint items.
     self._tpu_embedding_objects = None
 
@@ -109,6 +114,12 @@ class AsyncCheckpointHelper:
 
     self._save_file_prefix = None
     self._use_checkpoint_save = False
+    # Whether the cpu-copied variables hold values, i.e. whether a save that
+    # is not streamed has run.
+    self._cpu_copies_initialized = False
+    # The progress of the last save, if it was streamed through a staging
+    # buffer.
+    self._save_progress = None
     self._async_save_thread = None
     self._async_save_thread_shutdown = False
     # Semaphores for writing/reading the cpu-copied variables (self._var_pairs)
@@ -156,6 +167,70 @@ class AsyncCheckpointHelper:
     for tpu_embedding in self._tpu_embedding_objects:
       tpu_embedding._retrieve_variables()  # pylint: disable=protected-access
 
+  @def_function.function
+  def _copy_on_device(self):
+    """Copy the checkpointed variables to their copies on the same devices."""
+    for original_var, device_var in self._device_object_map.items():
+      if not isinstance(original_var, Variable):
+        # The sub-variables of ShardedVariables are copied separately, and
+        # TPUEmbedding values are retrieved instead.
+        continue
+      with ops.device(original_var.device):
+        device_var.assign(original_var.read_value())
+    for tpu_embedding in self._tpu_embedding_objects:
+      tpu_embedding._retrieve_variables()  # pylint: disable=protected-access
+
+  def _ensure_device_copies(self):
+    """Creates the copies of the variables on their own devices."""
+    if self._device_object_map is not None:
+      return
+    self._device_object_map = object_identity.ObjectIdentityDictionary()
+    for original, copied in self._object_map.items():
+      if isinstance(original, Variable):
+        with ops.device(original.device):
+          self._device_object_map[original] = UninitializedVariable(
+              trainable=original.trainable,
+              shape=original.shape,
+              dtype=original.dtype,
+              name=original._shared_name)  # pylint: disable=protected-access
+      elif not isinstance(original, ShardedVariable):
+        # The TPUEmbedding placeholders hold no values.
+        self._device_object_map[original] = copied
+    for original in self._object_map:
+      if isinstance(original, ShardedVariable):
+        self._device_object_map[original] = ShardedVariable(
+            [self._device_object_map[v] for v in original._variables],  # pylint: disable=protected-access
+            name=original.name)
+
+  def _prepare_save(self, options):
+    """Prepares the variable values to be read by the async save thread.
+
+    The variable values are copied to the host CPU, unless the save is
+    streamed through a staging buffer (see
+    `CheckpointOptions.experimental_staging_buffer_bytes`). In that case they
+    are copied on their own devices, and the async save thread streams these
+    copies to the host and the checkpoint files through the buffer while
+    training continues.
+
+    Args:
+      options: Optional CheckpointOption instance.
+    """
+    # pylint: disable=protected-access
+    saver = self._checkpoint._saver
+    if options and options.experimental_staging_buffer_bytes:
+      self._ensure_device_copies()
+      self._save_progress = functional_saver.StreamingSaveProgress()
+      saver._object_map = self._device_object_map
+      saver._streaming_save_progress = self._save_progress
+      self._copy_on_device()
+    else:
+      self._save_progress = None
+      saver._object_map = self._object_map
+      saver._streaming_save_progress = None
+      self._copy_to_cpu()
+      self._cpu_copies_initialized = True
+    # pylint: enable=protected-access
+
   def _traverse_variables(self, to_traverse, visited):
     """Create the copied nodes and variables while traversing the nodes.
 
@@ -271,14 +346,20 @@ class AsyncCheckpointHelper:
         # placement, while the main thread's default placement would be the
         # master worker's CPU:0.
         with ops.device(self._default_device):
-          if self._use_checkpoint_save:
-            self._checkpoint.save(self._save_file_prefix,
-                                  self._checkpoint_options)
-          else:
-            self._checkpoint._write(  # pylint: disable=protected-access
-                self._save_file_prefix,
-                options=self._checkpoint_options,
-                write_done_callback=self._async_write_done_callback)
+          try:
+            if self._use_checkpoint_save:
+              self._checkpoint.save(self._save_file_prefix,
+                                    self._checkpoint_options)
+            else:
+              self._checkpoint._write(  # pylint: disable=protected-access
+                  self._save_file_prefix,
+                  options=self._checkpoint_options,
+                  write_done_callback=self._async_write_done_callback)
+          finally:
+            # Do not keep waiters on a streamed save that failed before
+            # reading the variables.
+            if self._save_progress is not None:
+              self._save_progress._finish()  # pylint: disable=protected-access
         # Allow the next checkpoint event to overwrite the cpu-copied variables.
         self._writer_sem.release()
 
@@ -390,6 +471,16 @@ class AsyncCheckpointHelper:
     self._ensure_initialized()
     return self._checkpoint.save_counter
 
+  @property
+  def save_progress(self):
+    """The progress of the last save, if it was streamed, or None.
+
+    Returns:
+      A `functional_saver.StreamingSaveProgress`, if the last save was
+      streamed through a staging buffer, or None.
+    """
+    return self._save_progress
+
   def write(self, save_path, options=None):
     """Save the checkpointed variables.
 
@@ -422,9 +513,10 @@ class AsyncCheckpointHelper:
 
     write_start_time = time.time()
 
-    # Copy the variable values to the host CPU.
+    # Copy the variable values to the host CPU, or on their devices if the
+    # save is streamed.
     if self._writer_sem.acquire():
-      self._copy_to_cpu()
+      self._prepare_save(options)
 
     # Trigger the async thread to checkpoint the cpu-copied variables.
     # Need to wait until the weight copying finishes before checkpoint save.
@@ -471,9 +563,10 @@ class AsyncCheckpointHelper:
 
     save_start_time = time.time()
 
-    # Copy the variable values to the host CPU.
+    # Copy the variable values to the host CPU, or on their devices if the
+    # save is streamed.
     if self._writer_sem.acquire():
-      self._copy_to_cpu()
+      self._prepare_save(options)
 
     # Retrieve the save counter from the underlying checkpoint object to
     # re-construct the full path of the checkpoint file.
@@ -551,8 +644,10 @@ class AsyncCheckpointHelper:
       # Restore the values of the cpu-copied variables.
       status = self._checkpoint.restore(save_path, self._checkpoint_options)
 
-      # Restore the values of the original model.
-      self._copy_from_cpu()
+      # Restore the values of the original model. The cpu-copied variables
+      # hold no values if all the saves were streamed.
+      if self._cpu_copies_initialized:
+        self._copy_from_cpu()
       return status
 
   def sync(self):
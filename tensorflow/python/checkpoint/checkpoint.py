@@ -26,6 +26,7 @@ import weakref
 from tensorflow.core.protobuf import trackable_object_graph_pb2
 from tensorflow.python.checkpoint import checkpoint_management
 from tensorflow.python.checkpoint import checkpoint_options
+from tensorflow.python.checkpoint import delta_checkpoint
 from tensorflow.python.checkpoint import functional_saver
 from tensorflow.python.checkpoint import graph_view as graph_view_lib
 from tensorflow.python.checkpoint import restore as restore_lib
@@ -274,6 +275,9 @@ class _CheckpointRestoreCoordinator:
     # this checkpoint.
     self.restore_ops = []
     self.restore_ops_by_name = restore_op_cache
+    # The `ShardReadStats` of the values read by parallel restores, see
+    # `CheckpointOptions.experimental_num_restore_threads`.
+    self.read_stats = []
     self.graph_view = graph_view
     self.new_restore_ops_callback = None
     # A mapping from optimizer proto ids to lists of slot variables to be
@@ -356,7 +360,8 @@ class _CheckpointRestoreCoordinator:
           tensor_saveables)
       new_restore_ops = functional_saver.MultiDeviceSaver.from_saveables(
           flat_saveables,
-          registered_savers).restore(self.save_path_tensor, self.options)
+          registered_savers).restore(self.save_path_tensor, self.options,
+                                     read_stats=self.read_stats)
       if not context.executing_eagerly():
         for name, restore_op in sorted(new_restore_ops.items()):
           restore_ops.append(restore_op)
@@ -770,6 +775,19 @@ class CheckpointLoadStatus(_LoadStatus):
     # weakref.
     self._root = graph_view.root
 
+  @property
+  def read_stats(self):
+    """The `ShardReadStats` of the reads of parallel restores.
+
+    Only restores with `CheckpointOptions.experimental_num_restore_threads`
+    read values in parallel. Restorations deferred until the objects are
+    created add their reads to this list.
+
+    Returns:
+      A list of `functional_saver.ShardReadStats`, in the order of the reads.
+    """
+    return self._checkpoint.read_stats
+
   def assert_consumed(self):
     """Asserts that all objects in the checkpoint have been created/matched.
 
@@ -1187,6 +1205,12 @@ class TrackableSaver:
     # objects for checkpoint saving.
     self._object_map = None
 
+    # Progress of the streamed saves. This attribute is to be overridden by a
+    # Checkpoint subclass, e.g., AsyncCheckpoint, to observe the saves streamed
+    # through a staging buffer, see
+    # `CheckpointOptions.experimental_staging_buffer_bytes`.
+    self._streaming_save_progress = None
+
   def _gather_serialized_tensors(self, object_graph_tensor=None):
     """Gathers tensors to save to ckpt and includes the object graph proto."""
     serialized_tensors, feed_additions, registered_savers, graph_proto = (
@@ -1239,7 +1263,8 @@ class TrackableSaver:
         or context.executing_eagerly() or ops.inside_function()):
       saver = functional_saver.MultiDeviceSaver(serialized_tensors,
                                                 registered_savers)
-      save_op = saver.save(file_prefix, options=options)
+      save_op = saver.save(file_prefix, options=options,
+                           progress=self._streaming_save_progress)
       with ops.device("/cpu:0"):
         with ops.control_dependencies([save_op]):
           self._cached_save_operation = array_ops.identity(file_prefix)
@@ -1403,6 +1428,9 @@ class TrackableSaver:
       _ASYNC_CHECKPOINT_THREAD.join()
 
     reader = py_checkpoint_reader.NewCheckpointReader(save_path)
+    if reader.has_tensor(delta_checkpoint._DELTA_METADATA_KEY):  # pylint: disable=protected-access
+      # Delta checkpoints only hold the values changed since their base.
+      return delta_checkpoint.restore_chain(self, save_path, options)
     graph_building = not context.executing_eagerly()
     if graph_building:
       dtype_map = None
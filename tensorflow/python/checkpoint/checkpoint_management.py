@@ -23,6 +23,7 @@ import time
 from google.protobuf import text_format
 
 from tensorflow.core.protobuf import saver_pb2
+from tensorflow.python.checkpoint import delta_checkpoint
 from tensorflow.python.eager import context
 from tensorflow.python.framework import errors
 from tensorflow.python.framework import ops
@@ -543,7 +544,8 @@ class CheckpointManager(object):
                checkpoint_name="ckpt",
                step_counter=None,
                checkpoint_interval=None,
-               init_fn=None):
+               init_fn=None,
+               experimental_full_checkpoint_interval=None):
     """Configure a `CheckpointManager` for use in `directory`.
 
     If a `CheckpointManager` was previously used in `directory`, its
@@ -586,6 +588,17 @@ class CheckpointManager(object):
     >>> # checkpoint in `directory`.
     >>> manager.restore_or_initialize()
 
+    With `experimental_full_checkpoint_interval`, `save` writes delta
+    checkpoints, which only hold the values that changed since the previous
+    checkpoint. Unchanged variables are not written, and only the changed
+    blocks of rows are written for the large variables, such as embedding
+    tables trained with sparse updates. One save in
+    `experimental_full_checkpoint_interval` writes a full checkpoint instead,
+    bounding the chains of deltas to restore. The checkpoints that the active
+    or preserved checkpoints are deltas of are not deleted, and
+    `tf.train.Checkpoint.restore` restores the whole chain of a delta
+    checkpoint.
+
     Args:
       checkpoint: The `tf.train.Checkpoint` instance to save and manage
         checkpoints for.
@@ -611,9 +624,15 @@ class CheckpointManager(object):
         between two checkpoints.
       init_fn: Callable. A function to do customized intialization if no
         checkpoints are in the directory.
+      experimental_full_checkpoint_interval: An integer. If set, one save in
+        `experimental_full_checkpoint_interval` writes a full checkpoint, and
+        the other saves write delta checkpoints of the previous checkpoint.
+        Delta checkpoints can only be written when executing eagerly.
 
     Raises:
-      ValueError: If `max_to_keep` is not a positive integer.
+      ValueError: If `max_to_keep` is not a positive integer, or if
+        `experimental_full_checkpoint_interval` is not a positive integer or is
+        set when not executing eagerly.
     """
     self._checkpoint = checkpoint
     self._save_counter_assign = None
@@ -638,6 +657,23 @@ class CheckpointManager(object):
       self._step_counter = step_counter
     self._checkpoint_interval = checkpoint_interval
 
+    self._delta_checkpointer = None
+    if experimental_full_checkpoint_interval is not None:
+      if experimental_full_checkpoint_interval <= 0:
+        raise ValueError(
+            "Expected a positive integer or `None` for "
+            "`experimental_full_checkpoint_interval`, got "
+            f"{experimental_full_checkpoint_interval}.")
+      if not context.executing_eagerly():
+        raise ValueError("`experimental_full_checkpoint_interval` is only "
+                         "supported when executing eagerly.")
+      self._delta_checkpointer = delta_checkpoint.DeltaCheckpointer(checkpoint)
+    self._full_checkpoint_interval = experimental_full_checkpoint_interval
+    self._saves_since_full_checkpoint = 0
+    # Maps the checkpoints read or written to the checkpoint they are a delta
+    # of, or to None for full checkpoints.
+    self._delta_bases = {}
+
     recovered_state = get_checkpoint_state(directory)
     current_clock = time.time()
     self._maybe_delete = collections.OrderedDict()
@@ -703,12 +739,33 @@ class CheckpointManager(object):
     """
     return list(self._maybe_delete.keys())
 
+  def _delta_base(self, filename):
+    """Returns the checkpoint `filename` is a delta of, or None."""
+    if filename not in self._delta_bases:
+      try:
+        self._delta_bases[filename] = delta_checkpoint.base_checkpoint(filename)
+      except errors.NotFoundError:
+        self._delta_bases[filename] = None
+    return self._delta_bases[filename]
+
+  def _delta_chain_bases(self, filenames):
+    """Returns the checkpoints needed to restore `filenames`."""
+    bases = set()
+    for filename in filenames:
+      base = self._delta_base(filename)
+      while base is not None and base not in bases:
+        bases.add(base)
+        base = self._delta_base(base)
+    return bases
+
   def _sweep(self):
     """Deletes or preserves managed checkpoints."""
     if not self._max_to_keep:
       # Does not update self._last_preserved_timestamp, since everything is kept
       # in the active set.
       return
+    removed = []
+    preserved = []
     while len(self._maybe_delete) > self._max_to_keep:
       filename, timestamp = self._maybe_delete.popitem(last=False)
       # Even if we're keeping this checkpoint due to
@@ -718,9 +775,26 @@ class CheckpointManager(object):
           and (timestamp - self._keep_checkpoint_every_n_hours * 3600.
                >= self._last_preserved_timestamp)):
         self._last_preserved_timestamp = timestamp
+        preserved.append(filename)
         continue
-      _delete_file_if_exists(filename + ".index")
-      _delete_file_if_exists(filename + ".data-?????-of-?????")
+      removed.append((filename, timestamp))
+
+    if self._delta_checkpointer is not None:
+      # The checkpoints that active or preserved delta checkpoints depend on
+      # are kept, and stay in the active set while active checkpoints depend
+      # on them so that they are deleted once no longer needed.
+      needed_by_active = self._delta_chain_bases(self._maybe_delete)
+      needed_by_preserved = self._delta_chain_bases(preserved)
+    else:
+      needed_by_active = needed_by_preserved = set()
+    for filename, timestamp in reversed(removed):
+      if filename in needed_by_active:
+        self._maybe_delete[filename] = timestamp
+        self._maybe_delete.move_to_end(filename, last=False)
+      elif filename not in needed_by_preserved:
+        self._delta_bases.pop(filename, None)
+        _delete_file_if_exists(filename + ".index")
+        _delete_file_if_exists(filename + ".data-?????-of-?????")
 
   def _record_state(self):
     """Saves the `CheckpointManager`'s state in `directory`."""
@@ -832,7 +906,10 @@ class CheckpointManager(object):
       # checkpoints.
       self._record_state()
 
-    if options is None:
+    if self._delta_checkpointer is not None:
+      save_path = self._write_delta_or_full(prefix, options,
+                                            _record_and_sweep_state)
+    elif options is None:
       save_path = self._checkpoint._write(  # pylint: disable=protected-access
           prefix, write_done_callback=_record_and_sweep_state)
     else:
@@ -841,6 +918,22 @@ class CheckpointManager(object):
 
     return save_path
 
+  def _write_delta_or_full(self, prefix, options, write_done_callback):
+    """Writes a delta checkpoint, or a full one once per interval."""
+    base = self._delta_checkpointer.base
+    if (base is None or self._saves_since_full_checkpoint + 1 >=
+        self._full_checkpoint_interval):
+      self._delta_bases[prefix] = None
+      save_path = self._delta_checkpointer.write_full(
+          prefix, options=options, write_done_callback=write_done_callback)
+      self._saves_since_full_checkpoint = 0
+    else:
+      self._delta_bases[prefix] = base
+      save_path = self._delta_checkpointer.write_delta(
+          prefix, options=options, write_done_callback=write_done_callback)
+      self._saves_since_full_checkpoint += 1
+    return save_path
+
   def restore_or_initialize(self):
     """Restore items in `checkpoint` from the latest checkpoint file.
 
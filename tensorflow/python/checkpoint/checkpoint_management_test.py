@@ -25,6 +25,7 @@ from google.protobuf import text_format
 from tensorflow.core.protobuf import saver_pb2
 from tensorflow.python.checkpoint import checkpoint as util
 from tensorflow.python.checkpoint import checkpoint_management
+from tensorflow.python.checkpoint import delta_checkpoint
 from tensorflow.python.eager import context
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops as ops_lib
@@ -703,6 +704,46 @@ class CheckpointManagerTest(test.TestCase):
     path = manager.save()
     self.assertIsNone(path)
 
+  def testDeltaCheckpoints(self):
+    directory = self.get_temp_dir()
+    v = variables.Variable(0.0)
+    checkpoint = util.Checkpoint(v=v)
+    manager = checkpoint_management.CheckpointManager(
+        checkpoint,
+        directory,
+        max_to_keep=2,
+        experimental_full_checkpoint_interval=3)
+    paths = []
+    for _ in range(4):
+      v.assign_add(1.0)
+      paths.append(manager.save())
+    self.assertEqual([False, True, True, False],
+                     [delta_checkpoint.is_delta(path) for path in paths])
+    # The checkpoints the active deltas depend on are kept.
+    self.assertEqual(paths, manager.checkpoints)
+
+    v.assign_add(1.0)
+    paths.append(manager.save())
+    self.assertTrue(delta_checkpoint.is_delta(paths[-1]))
+    self.assertEqual(paths[3:], manager.checkpoints)
+    for path in paths[:3]:
+      self.assertFalse(checkpoint_management.checkpoint_exists(path))
+
+    # The chain of the latest checkpoint is restored.
+    restored_v = variables.Variable(0.0)
+    restored_manager = checkpoint_management.CheckpointManager(
+        util.Checkpoint(v=restored_v), directory, max_to_keep=2)
+    self.assertEqual(paths[-1], restored_manager.restore_or_initialize())
+    self.assertEqual(5.0, self.evaluate(restored_v))
+
+  def testInvalidFullCheckpointInterval(self):
+    with self.assertRaisesRegex(ValueError, "positive integer"):
+      checkpoint_management.CheckpointManager(
+          util.Checkpoint(),
+          self.get_temp_dir(),
+          max_to_keep=2,
+          experimental_full_checkpoint_interval=0)
+
 
 if __name__ == "__main__":
   test.main()
@@ -41,6 +41,8 @@ class CheckpointOptions(object):
       "experimental_io_device",
       "experimental_enable_async_checkpoint",
       "enable_async",
+      "experimental_staging_buffer_bytes",
+      "experimental_num_restore_threads",
   )
 
   @deprecated_args(
@@ -51,6 +53,8 @@ class CheckpointOptions(object):
       experimental_io_device=None,
       experimental_enable_async_checkpoint=False,
       enable_async=False,
+      experimental_staging_buffer_bytes=None,
+      experimental_num_restore_threads=None,
   ):
     """Creates an object that stores options for a Checkpoint.
 
@@ -76,7 +80,46 @@ class CheckpointOptions(object):
         writing runs in the background. Async checkpoint reduces TPU device idle
         cycles and speeds up model training process, while memory consumption
         may increase.
+
+      experimental_staging_buffer_bytes: int. Applies when saving eagerly. If
+        `None` (default), all the values to save are read in one step per
+        device. If specified, the save is streamed: the values are copied to
+        the host and written to the checkpoint files in chunks, and at most
+        this many bytes of copied values wait to be written at any time, in
+        addition to the value being copied. A chunk is written while the
+        next one is copied.
+
+        This bounds the host memory used by the save, in particular by async
+        checkpoints, which otherwise hold a host copy of every variable. With
+        async checkpointing, the variables are instead copied on their own
+        devices, which takes as much free device memory as the variables,
+        and the save returns once they are copied: these copies are streamed
+        to the checkpoint files while training continues.
+
+      experimental_num_restore_threads: int. Applies when restoring eagerly.
+        If `None` (default), the values of each device are read by a single
+        restore op. If specified, the values of each device are split into read
+        shards of similar size, which are read concurrently by this many
+        threads. The values of each read shard are assigned to their variables
+        as soon as it is read, while the other shards are still being read.
+        The size and duration of each read are logged at verbosity 1.
+
+    Raises:
+      ValueError: If `experimental_staging_buffer_bytes` or
+        `experimental_num_restore_threads` is not positive.
     """
+    if (experimental_staging_buffer_bytes is not None and
+        experimental_staging_buffer_bytes <= 0):
+      raise ValueError(
+          "`experimental_staging_buffer_bytes` must be positive. Received: "
+          f"{experimental_staging_buffer_bytes}.")
+    if (experimental_num_restore_threads is not None and
+        experimental_num_restore_threads <= 0):
+      raise ValueError(
+          "`experimental_num_restore_threads` must be positive. Received: "
+          f"{experimental_num_restore_threads}.")
     self.experimental_io_device = experimental_io_device
     self.enable_async = experimental_enable_async_checkpoint or enable_async
     self.experimental_enable_async_checkpoint = self.enable_async
+    self.experimental_staging_buffer_bytes = experimental_staging_buffer_bytes
+    self.experimental_num_restore_threads = experimental_num_restore_threads
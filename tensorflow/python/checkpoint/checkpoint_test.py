@@ -374,6 +374,50 @@ class CheckpointingTests(parameterized.TestCase, test.TestCase):
         self.fail("%s should have suffix %s" % (path, expected_suffix))
       self.evaluate(step.assign_add(2))
 
+  def testAsyncStreamingSave(self):
+    with context.eager_mode():
+      v = variables_lib.Variable([1., 2., 3., 4.])
+      step = variables_lib.Variable(7)
+      checkpoint = trackable_utils.Checkpoint(v=v, step=step)
+      ckpt_options = checkpoint_options.CheckpointOptions(
+          enable_async=True, experimental_staging_buffer_bytes=16)
+      save_path = checkpoint.save(
+          os.path.join(self.get_temp_dir(), "ckpt"), options=ckpt_options)
+      progress = checkpoint._async_checkpointer().save_progress
+      # The variables may be modified as soon as the save returns, while
+      # their copies are being written.
+      v.assign([0., 0., 0., 0.])
+      step.assign(0)
+      checkpoint._async_checkpointer().sync()
+
+      self.assertTrue(progress.done)
+      self.assertEqual(16, progress.buffer_bytes)
+      self.assertEqual(progress.staged_bytes, progress.written_bytes)
+      self.assertGreater(progress.num_shards_written, 1)
+      checkpoint.restore(save_path).assert_consumed()
+      self.assertAllEqual([1., 2., 3., 4.], v)
+      self.assertEqual(7, self.evaluate(step))
+
+  def testParallelRestore(self):
+    with context.eager_mode():
+      v = variables_lib.Variable([1., 2., 3., 4.])
+      step = variables_lib.Variable(7)
+      checkpoint = trackable_utils.Checkpoint(v=v, step=step)
+      save_path = checkpoint.save(os.path.join(self.get_temp_dir(), "ckpt"))
+      v.assign([0., 0., 0., 0.])
+      step.assign(0)
+
+      ckpt_options = checkpoint_options.CheckpointOptions(
+          experimental_num_restore_threads=2)
+      status = checkpoint.restore(save_path, options=ckpt_options)
+      status.assert_consumed()
+      self.assertAllEqual([1., 2., 3., 4.], v)
+      self.assertEqual(7, self.evaluate(step))
+      self.assertNotEmpty(status.read_stats)
+      # `v` and `step` are read, along with the save counter.
+      self.assertGreaterEqual(
+          sum(stats.num_bytes for stats in status.read_stats), 16 + 4)
+
   def testPartialRestoreWarningAttribute(self):
     with context.eager_mode():
       original_root = trackable_utils.Checkpoint(v1=variables_lib.Variable(2.),
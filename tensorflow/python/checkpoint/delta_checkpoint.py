@@ -0,0 +1,481 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Writes and restores checkpoints holding only the values changed by training.
+
+A delta checkpoint holds the values that changed since the checkpoint it was
+written after, its base. The variables are compared with fingerprints computed
+on their devices when checkpoints are written: unchanged variables are not
+written, and only the changed blocks of rows are written for the large
+variables, such as embedding tables trained with sparse updates. The values of
+the other objects, which have no cheap fingerprint, are always written.
+
+A delta checkpoint is restored by restoring the full checkpoint its chain of
+bases starts from, then each delta of the chain in order. Delta checkpoints
+hold the object graph of their checkpoint like full ones, and are recognized by
+`tf.train.Checkpoint.restore`, which restores their chain.
+"""
+
+import json
+import os
+
+from tensorflow.python.checkpoint import functional_saver
+from tensorflow.python.checkpoint import save_util
+from tensorflow.python.eager import context
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import errors
+from tensorflow.python.framework import ops
+from tensorflow.python.trackable import base as trackable_base
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import io_ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import resource_variable_ops
+from tensorflow.python.training import py_checkpoint_reader
+from tensorflow.python.training.saving import saveable_object
+from tensorflow.python.training.saving import saveable_object_util
+
+# The checkpoint key of the JSON metadata of delta checkpoints: the name of
+# their base checkpoint, and the row ranges written for each checkpoint key
+# whose value is only partially written.
+_DELTA_METADATA_KEY = "_CHECKPOINTABLE_DELTA"
+
+# The default number of rows of the large variables sharing a fingerprint.
+_DEFAULT_ROWS_PER_BLOCK = 1024
+
+
+def _fingerprint(variable, rows_per_block):
+  """Fingerprints the value of `variable` on its device.
+
+  Args:
+    variable: A resource variable.
+    rows_per_block: The number of rows sharing a fingerprint.
+
+  Returns:
+    A (shape, fingerprints) tuple, where fingerprints is an [n, 8] uint8 array
+    holding the fingerprint of each block of `rows_per_block` rows of the
+    value, or a single fingerprint if the value has at most `rows_per_block`
+    rows.
+  """
+  with ops.device(variable.device):
+    value = variable.read_value_no_copy()
+    shape = tuple(value.shape.as_list())
+    num_rows = shape[0] if shape else 1
+    if num_rows <= rows_per_block:
+      fingerprints = array_ops.fingerprint(array_ops.reshape(value, [1, -1]))
+    else:
+      num_blocks = -(-num_rows // rows_per_block)
+      row_fingerprints = array_ops.pad(
+          array_ops.fingerprint(value),
+          [[0, num_blocks * rows_per_block - num_rows], [0, 0]])
+      fingerprints = array_ops.fingerprint(
+          array_ops.reshape(row_fingerprints, [num_blocks, -1]))
+  return shape, fingerprints.numpy()
+
+
+def _changed_row_ranges(old, new, rows_per_block):
+  """Compares fingerprints computed by `_fingerprint`.
+
+  Args:
+    old: The fingerprint when the base checkpoint was written, or None.
+    new: The current fingerprint.
+    rows_per_block: The number of rows sharing a fingerprint.
+
+  Returns:
+    None if the whole value must be written, or a list of [start, stop) row
+    ranges to write, empty if the value did not change.
+  """
+  if old is None or old[0] != new[0]:
+    return None
+  changed = (old[1] != new[1]).any(axis=1)
+  if not changed.any():
+    return []
+  if changed.all():
+    return None
+  num_rows = new[0][0]
+  row_ranges = []
+  for block in changed.nonzero()[0]:
+    start = int(block) * rows_per_block
+    stop = min(start + rows_per_block, num_rows)
+    if row_ranges and row_ranges[-1][1] == start:
+      row_ranges[-1][1] = stop
+    else:
+      row_ranges.append([start, stop])
+  return row_ranges
+
+
+def _row_slice_spec(shape, start, stop):
+  """Returns the slice spec of the rows [start, stop) of a `shape` value."""
+  extents = ["%d,%d" % (start, stop - start)] + ["-"] * (len(shape) - 1)
+  return "%s %s" % (" ".join(str(dim) for dim in shape), ":".join(extents))
+
+
+def _read_rows(variable, shape, start, stop, checkpoint_key):
+  """Returns a `SaveSpec` reading the rows [start, stop) of `variable`."""
+
+  def _read_rows_closure():
+    with ops.device(variable.device):
+      rows = variable.sparse_read(math_ops.range(start, stop))
+    # Copy the rows to the CPU of the same machine, as when saving variables.
+    with ops.device(saveable_object_util.set_cpu0(variable.device)):
+      return array_ops.identity(rows)
+
+  return saveable_object.SaveSpec(
+      _read_rows_closure, _row_slice_spec(shape, start, stop), checkpoint_key,
+      dtype=variable.dtype, device=variable.device)
+
+
+def _serialize(graph_view):
+  """Returns the serialized tensors, registered savers and object graph."""
+  serialized_tensors, _, registered_savers, object_graph_proto = (
+      save_util.serialize_graph_view(graph_view))
+  return serialized_tensors, registered_savers, object_graph_proto
+
+
+def _variables(serialized_tensors):
+  """Returns the initialized resource variables to fingerprint, by key."""
+  variables = {}
+  for trackable, tensor_dict in serialized_tensors.items():
+    if (not isinstance(trackable, resource_variable_ops.BaseResourceVariable)
+        or len(tensor_dict) != 1):
+      continue
+    checkpoint_key, tensor = next(iter(tensor_dict.items()))
+    if not isinstance(tensor, dict) and trackable.is_initialized():
+      variables[checkpoint_key] = trackable
+  return variables
+
+
+class DeltaCheckpointer(object):
+  """Writes full and delta checkpoints of a `tf.train.Checkpoint`.
+
+  Each checkpoint written is the base of the next delta checkpoint:
+
+  ```python
+  checkpointer = DeltaCheckpointer(checkpoint)
+  checkpointer.write_full("/tmp/ckpt/ckpt-1")
+  # Train...
+  checkpointer.write_delta("/tmp/ckpt/ckpt-2")  # Only the changes since ckpt-1.
+  # Train...
+  checkpointer.write_delta("/tmp/ckpt/ckpt-3")  # Only the changes since ckpt-2.
+  checkpoint.restore("/tmp/ckpt/ckpt-3")  # Restores ckpt-1, ckpt-2 and ckpt-3.
+  ```
+
+  The chains of deltas get longer to restore as more deltas are written, so
+  full checkpoints should be written periodically to compact them.
+  `tf.train.CheckpointManager` does so when created with
+  `experimental_full_checkpoint_interval`.
+  """
+
+  def __init__(self, checkpoint, rows_per_block=_DEFAULT_ROWS_PER_BLOCK):
+    """Creates a `DeltaCheckpointer`.
+
+    Args:
+      checkpoint: The `tf.train.Checkpoint` to write.
+      rows_per_block: The number of rows of the large variables sharing a
+        fingerprint. The changed blocks of rows of the variables with more rows
+        are written instead of their whole value.
+
+    Raises:
+      ValueError: If `rows_per_block` is not positive.
+    """
+    if rows_per_block <= 0:
+      raise ValueError(
+          f"`rows_per_block` must be positive, got {rows_per_block}.")
+    self._checkpoint = checkpoint
+    self._graph_view = checkpoint._saver._graph_view  # pylint: disable=protected-access
+    self._rows_per_block = rows_per_block
+    self._base = None
+    # The fingerprints of the variables when `self._base` was written.
+    self._fingerprints = {}
+
+  @property
+  def base(self):
+    """The last checkpoint written, the base of the next delta checkpoint."""
+    return self._base
+
+  def _fingerprint_variables(self, variables):
+    return {
+        checkpoint_key: _fingerprint(variable, self._rows_per_block)
+        for checkpoint_key, variable in variables.items()
+    }
+
+  def write_full(self, file_prefix, options=None, write_done_callback=None):
+    """Writes a full checkpoint, see `tf.train.Checkpoint.write`.
+
+    Args:
+      file_prefix: A prefix to use for the checkpoint filenames.
+      options: Optional `tf.train.CheckpointOptions` object.
+      write_done_callback: Optional callback function called with the path of
+        the checkpoint once it is written.
+
+    Returns:
+      The path of the checkpoint (i.e. `file_prefix`).
+    """
+    fingerprints = self._fingerprint_variables(
+        _variables(_serialize(self._graph_view)[0]))
+    save_path = self._checkpoint._write(  # pylint: disable=protected-access
+        file_prefix, options=options, write_done_callback=write_done_callback)
+    self._base = save_path
+    self._fingerprints = fingerprints
+    return save_path
+
+  def write_delta(self, file_prefix, options=None, write_done_callback=None):
+    """Writes the values changed since `base` was written.
+
+    Delta checkpoints are written synchronously, even if asynchronous
+    checkpointing is enabled in `options`, and in the directory of their base.
+
+    Args:
+      file_prefix: A prefix to use for the checkpoint filenames.
+      options: Optional `tf.train.CheckpointOptions` object.
+      write_done_callback: Optional callback function called with the path of
+        the checkpoint once it is written.
+
+    Returns:
+      The path of the checkpoint (i.e. `file_prefix`).
+
+    Raises:
+      ValueError: If not executing eagerly, if no checkpoint was written yet, if
+        `file_prefix` is not in the directory of `base`, or if the checkpoint
+        has objects saved with registered savers.
+    """
+    if not context.executing_eagerly():
+      raise ValueError(
+          "Delta checkpoints can only be written when executing eagerly.")
+    if self._base is None:
+      raise ValueError(
+          "A full checkpoint must be written with `write_full` before writing "
+          "delta checkpoints.")
+    if os.path.dirname(file_prefix) != os.path.dirname(self._base):
+      raise ValueError(
+          f"Delta checkpoints must be written in the directory of their base "
+          f"checkpoint {self._base}, got {file_prefix}.")
+    # Make sure that the base is written before its delta.
+    async_checkpointer = getattr(self._checkpoint, "_async_checkpointer_impl",
+                                 None)
+    if async_checkpointer is not None:
+      async_checkpointer.sync()
+
+    serialized_tensors, registered_savers, object_graph_proto = _serialize(
+        self._graph_view)
+    if registered_savers:
+      raise ValueError(
+          "Delta checkpoints do not support objects saved with registered "
+          f"savers, got {list(registered_savers)}.")
+    variables = _variables(serialized_tensors)
+    fingerprints = self._fingerprint_variables(variables)
+
+    delta_tensors = {}
+    all_row_ranges = {}
+    for tensor_dict in serialized_tensors.values():
+      for checkpoint_key, tensor in tensor_dict.items():
+        if checkpoint_key not in variables:
+          delta_tensors[checkpoint_key] = tensor
+          continue
+        row_ranges = _changed_row_ranges(
+            self._fingerprints.get(checkpoint_key),
+            fingerprints[checkpoint_key], self._rows_per_block)
+        if row_ranges is None:
+          delta_tensors[checkpoint_key] = tensor
+        elif row_ranges:
+          shape = fingerprints[checkpoint_key][0]
+          delta_tensors[checkpoint_key] = {}
+          for start, stop in row_ranges:
+            spec = _read_rows(variables[checkpoint_key], shape, start, stop,
+                              checkpoint_key)
+            delta_tensors[checkpoint_key][spec.slice_spec] = spec
+          all_row_ranges[checkpoint_key] = row_ranges
+    metadata = {
+        "base": os.path.basename(self._base),
+        "row_ranges": all_row_ranges
+    }
+    with ops.device("/cpu:0"):
+      delta_tensors[trackable_base.OBJECT_GRAPH_PROTO_KEY] = (
+          constant_op.constant(
+              object_graph_proto.SerializeToString(), dtype=dtypes.string))
+      delta_tensors[_DELTA_METADATA_KEY] = constant_op.constant(
+          json.dumps(metadata), dtype=dtypes.string)
+
+    functional_saver.MultiDeviceSaver({None: delta_tensors}).save(
+        file_prefix, options)
+    context.async_wait()
+    if write_done_callback:
+      write_done_callback(file_prefix)
+    self._base = file_prefix
+    self._fingerprints = fingerprints
+    return file_prefix
+
+
+def _read_metadata(reader):
+  """Returns the metadata of a delta checkpoint, or None for full ones."""
+  if not reader.has_tensor(_DELTA_METADATA_KEY):
+    return None
+  return json.loads(reader.get_tensor(_DELTA_METADATA_KEY))
+
+
+def base_checkpoint(save_path):
+  """Returns the base of the delta checkpoint `save_path`.
+
+  Args:
+    save_path: The path of a checkpoint.
+
+  Returns:
+    The path of the base checkpoint, or None if `save_path` is a full
+    checkpoint.
+
+  Raises:
+    NotFoundError: If the checkpoint does not exist.
+  """
+  metadata = _read_metadata(py_checkpoint_reader.NewCheckpointReader(save_path))
+  if metadata is None:
+    return None
+  return os.path.join(os.path.dirname(save_path), metadata["base"])
+
+
+def is_delta(save_path):
+  """Returns whether `save_path` is a delta checkpoint."""
+  return base_checkpoint(save_path) is not None
+
+
+def resolve_chain(save_path):
+  """Returns the checkpoints to restore to restore `save_path`.
+
+  Args:
+    save_path: The path of a checkpoint.
+
+  Returns:
+    The paths of a full checkpoint and of the deltas up to `save_path`, in the
+    order they are restored.
+
+  Raises:
+    ValueError: If a checkpoint of the chain is missing or the chain is a cycle.
+  """
+  chain = [save_path]
+  while True:
+    try:
+      base = base_checkpoint(chain[-1])
+    except errors.NotFoundError as e:
+      raise ValueError(
+          f"Checkpoint {chain[-1]}, needed to restore {save_path}, was not "
+          "found.") from e
+    if base is None:
+      return chain[::-1]
+    if base in chain:
+      raise ValueError(
+          f"The chain of delta checkpoints of {save_path} has a cycle: "
+          f"{chain + [base]}.")
+    chain.append(base)
+
+
+def _restore_delta(delta_path, serialized_tensors, trackables, options):
+  """Restores the values written in the delta checkpoint `delta_path`."""
+  reader = py_checkpoint_reader.NewCheckpointReader(delta_path)
+  all_row_ranges = _read_metadata(reader)["row_ranges"]
+  checkpoint_keys = [
+      checkpoint_key for checkpoint_key in reader.get_variable_to_shape_map()
+      if checkpoint_key not in (_DELTA_METADATA_KEY,
+                                trackable_base.OBJECT_GRAPH_PROTO_KEY)
+  ]
+  unmatched_keys = [
+      checkpoint_key for checkpoint_key in checkpoint_keys
+      if checkpoint_key not in trackables
+  ]
+  if unmatched_keys:
+    raise ValueError(
+        f"Delta checkpoint {delta_path} has values without a matching object: "
+        f"{unmatched_keys}. Create all the objects of the checkpoint before "
+        "restoring delta checkpoints.")
+
+  whole_values = {}
+  for checkpoint_key in checkpoint_keys:
+    if checkpoint_key not in all_row_ranges:
+      trackable = trackables[checkpoint_key]
+      whole_values[trackable] = serialized_tensors[trackable]
+  if whole_values:
+    functional_saver.MultiDeviceSaver(whole_values).restore(
+        delta_path, options)
+
+  for checkpoint_key, row_ranges in all_row_ranges.items():
+    variable = trackables[checkpoint_key]
+    shape = variable.shape.as_list()
+    slice_specs = [
+        _row_slice_spec(shape, start, stop) for start, stop in row_ranges
+    ]
+    with ops.device("/cpu:0"):
+      restored_rows = io_ops.restore_v2(delta_path,
+                                        [checkpoint_key] * len(row_ranges),
+                                        slice_specs,
+                                        [variable.dtype] * len(row_ranges))
+    for (start, stop), rows in zip(row_ranges, restored_rows):
+      with ops.device(variable.device):
+        variable[start:stop].assign(rows)
+
+
+def restore_chain(saver, save_path, options):
+  """Restores the objects of a `TrackableSaver` from a delta checkpoint.
+
+  Called by `TrackableSaver.restore` for delta checkpoints: the full checkpoint
+  the chain of `save_path` starts from is restored with `saver`, then the
+  values written in each delta are restored in order. Unlike full checkpoints,
+  the restoration of delta checkpoints is not deferred: all the objects with
+  values in the deltas must be created before restoring.
+
+  Args:
+    saver: The `TrackableSaver` restoring `save_path`.
+    save_path: The path of a delta checkpoint.
+    options: A `tf.train.CheckpointOptions` object.
+
+  Returns:
+    The load status of the full checkpoint of the chain.
+
+  Raises:
+    ValueError: If not executing eagerly, if the chain of `save_path` cannot be
+      resolved, or if a delta has values without a matching object.
+  """
+  if not context.executing_eagerly():
+    raise ValueError(
+        f"Delta checkpoints can only be restored when executing eagerly, got "
+        f"{save_path}.")
+  chain = resolve_chain(save_path)
+  status = saver.restore(chain[0], options=options)
+  serialized_tensors = _serialize(saver._graph_view)[0]  # pylint: disable=protected-access
+  trackables = {}
+  for trackable, tensor_dict in serialized_tensors.items():
+    for checkpoint_key in tensor_dict:
+      trackables[checkpoint_key] = trackable
+  for delta_path in chain[1:]:
+    _restore_delta(delta_path, serialized_tensors, trackables, options)
+  return status
+
+
+def restore(checkpoint, save_path, options=None):
+  """Restores `checkpoint` from a full or delta checkpoint.
+
+  Equivalent to `checkpoint.restore(save_path, options)`, which restores the
+  chain of delta checkpoints, see `restore_chain`.
+
+  Args:
+    checkpoint: The `tf.train.Checkpoint` to restore.
+    save_path: The path of a checkpoint.
+    options: Optional `tf.train.CheckpointOptions` object.
+
+  Returns:
+    The load status returned by `tf.train.Checkpoint.restore` for the full
+    checkpoint of the chain.
+
+  Raises:
+    ValueError: If the chain of `save_path` cannot be resolved, or if a delta
+      has values without a matching object.
+  """
+  return checkpoint.restore(save_path, options=options)
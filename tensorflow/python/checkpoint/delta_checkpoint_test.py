@@ -0,0 +1,160 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for delta checkpoints."""
+
+import os
+
+from tensorflow.python.checkpoint import checkpoint as util
+from tensorflow.python.checkpoint import delta_checkpoint
+from tensorflow.python.eager import test
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import resource_variable_ops
+from tensorflow.python.trackable import constants
+from tensorflow.python.training import py_checkpoint_reader
+
+
+def _variable_key(name):
+  return f"{name}/.ATTRIBUTES/VARIABLE_VALUE"
+
+
+class DeltaCheckpointTest(test.TestCase):
+
+  def _checkpoint(self):
+    embeddings = resource_variable_ops.ResourceVariable(
+        array_ops.zeros([10, 2]))
+    bias = resource_variable_ops.ResourceVariable(1.)
+    scale = resource_variable_ops.ResourceVariable(2.)
+    checkpoint = util.Checkpoint(embeddings=embeddings, bias=bias, scale=scale)
+    return checkpoint, embeddings, bias, scale
+
+  def test_writes_changed_values(self):
+    checkpoint, embeddings, bias, _ = self._checkpoint()
+    checkpointer = delta_checkpoint.DeltaCheckpointer(
+        checkpoint, rows_per_block=2)
+    prefix = os.path.join(self.get_temp_dir(), "ckpt")
+    base = checkpointer.write_full(prefix + "-1")
+    self.assertFalse(delta_checkpoint.is_delta(base))
+
+    embeddings[4:6].assign(array_ops.ones([2, 2]))
+    embeddings[7:8].assign(array_ops.ones([1, 2]))
+    bias.assign(3.)
+    delta = checkpointer.write_delta(prefix + "-2")
+    self.assertEqual(delta, checkpointer.base)
+    self.assertTrue(delta_checkpoint.is_delta(delta))
+    self.assertEqual(base, delta_checkpoint.base_checkpoint(delta))
+
+    reader = py_checkpoint_reader.NewCheckpointReader(delta)
+    keys = reader.get_variable_to_shape_map()
+    self.assertIn(_variable_key("embeddings"), keys)
+    self.assertIn(_variable_key("bias"), keys)
+    self.assertNotIn(_variable_key("scale"), keys)
+    self.assertIn(constants.OBJECT_GRAPH_PROTO_KEY, keys)
+    metadata = delta_checkpoint._read_metadata(reader)
+    self.assertEqual({_variable_key("embeddings"): [[4, 8]]},
+                     metadata["row_ranges"])
+
+  def test_restore_chain(self):
+    checkpoint, embeddings, bias, scale = self._checkpoint()
+    checkpointer = delta_checkpoint.DeltaCheckpointer(
+        checkpoint, rows_per_block=2)
+    prefix = os.path.join(self.get_temp_dir(), "ckpt")
+    base = checkpointer.write_full(prefix + "-1")
+    embeddings[0:1].assign([[1., 1.]])
+    first_delta = checkpointer.write_delta(prefix + "-2")
+    embeddings[9:10].assign([[2., 2.]])
+    scale.assign(4.)
+    second_delta = checkpointer.write_delta(prefix + "-3")
+    self.assertEqual([base, first_delta, second_delta],
+                     delta_checkpoint.resolve_chain(second_delta))
+    expected = self.evaluate(embeddings)
+
+    restored, restored_embeddings, restored_bias, restored_scale = (
+        self._checkpoint())
+    restored_embeddings.assign(array_ops.ones([10, 2]) * 5.)
+    restored_bias.assign(0.)
+    delta_checkpoint.restore(restored, second_delta)
+    self.assertAllEqual(expected, restored_embeddings)
+    self.assertEqual(self.evaluate(bias), self.evaluate(restored_bias))
+    self.assertEqual(4., self.evaluate(restored_scale))
+
+    delta_checkpoint.restore(restored, first_delta)
+    self.assertAllEqual([1., 1.], restored_embeddings[0])
+    self.assertAllEqual([0., 0.], restored_embeddings[9])
+    self.assertEqual(2., self.evaluate(restored_scale))
+
+  def test_checkpoint_restore_resolves_chain(self):
+    checkpoint, embeddings, _, scale = self._checkpoint()
+    checkpointer = delta_checkpoint.DeltaCheckpointer(
+        checkpoint, rows_per_block=2)
+    prefix = os.path.join(self.get_temp_dir(), "ckpt")
+    checkpointer.write_full(prefix + "-1")
+    embeddings[3:4].assign([[1., 1.]])
+    scale.assign(4.)
+    delta = checkpointer.write_delta(prefix + "-2")
+    expected = self.evaluate(embeddings)
+
+    restored, restored_embeddings, _, restored_scale = self._checkpoint()
+    restored.restore(delta)
+    self.assertAllEqual(expected, restored_embeddings)
+    self.assertEqual(4., self.evaluate(restored_scale))
+
+  def test_full_checkpoint_compacts_chain(self):
+    checkpoint, embeddings, _, _ = self._checkpoint()
+    checkpointer = delta_checkpoint.DeltaCheckpointer(checkpoint)
+    prefix = os.path.join(self.get_temp_dir(), "ckpt")
+    checkpointer.write_full(prefix + "-1")
+    embeddings.assign_add(array_ops.ones([10, 2]))
+    checkpointer.write_delta(prefix + "-2")
+    full = checkpointer.write_full(prefix + "-3")
+    embeddings.assign_add(array_ops.ones([10, 2]))
+    delta = checkpointer.write_delta(prefix + "-4")
+    self.assertEqual([full, delta], delta_checkpoint.resolve_chain(delta))
+
+  def test_missing_base(self):
+    checkpoint, _, bias, _ = self._checkpoint()
+    checkpointer = delta_checkpoint.DeltaCheckpointer(checkpoint)
+    prefix = os.path.join(self.get_temp_dir(), "ckpt")
+    with self.assertRaisesRegex(ValueError, "must be written with"):
+      checkpointer.write_delta(prefix + "-1")
+    checkpointer.write_full(prefix + "-1")
+    bias.assign(2.)
+    delta = checkpointer.write_delta(prefix + "-2")
+    for filename in os.listdir(self.get_temp_dir()):
+      if filename.startswith("ckpt-1."):
+        os.remove(os.path.join(self.get_temp_dir(), filename))
+    with self.assertRaisesRegex(ValueError, "was not found"):
+      delta_checkpoint.resolve_chain(delta)
+
+  def test_restore_unmatched_object(self):
+    checkpoint, _, bias, _ = self._checkpoint()
+    checkpointer = delta_checkpoint.DeltaCheckpointer(checkpoint)
+    prefix = os.path.join(self.get_temp_dir(), "ckpt")
+    checkpointer.write_full(prefix + "-1")
+    bias.assign(2.)
+    delta = checkpointer.write_delta(prefix + "-2")
+
+    restored = util.Checkpoint(
+        embeddings=resource_variable_ops.ResourceVariable(
+            array_ops.zeros([10, 2])))
+    with self.assertRaisesRegex(ValueError, "without a matching object"):
+      delta_checkpoint.restore(restored, delta)
+
+  def test_invalid_rows_per_block(self):
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      delta_checkpoint.DeltaCheckpointer(util.Checkpoint(), rows_per_block=0)
+
+
+if __name__ == "__main__":
+  test.main()
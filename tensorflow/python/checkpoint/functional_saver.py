@@ -14,6 +14,13 @@
 # ==============================================================================
 """Saves and restore variables inside traced @tf.functions."""
 
+import collections
+import concurrent.futures
+import heapq
+import queue
+import threading
+import time
+
 from tensorflow.core.protobuf import saver_pb2
 from tensorflow.python.checkpoint import checkpoint_options
 from tensorflow.python.eager import context
@@ -27,8 +34,10 @@ from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import gen_io_ops
 from tensorflow.python.ops import io_ops
 from tensorflow.python.ops import string_ops
+from tensorflow.python.platform import tf_logging as logging
 from tensorflow.python.saved_model import registration
 from tensorflow.python.trackable import trackable_utils
+from tensorflow.python.training import py_checkpoint_reader
 from tensorflow.python.training.saving import saveable_object
 from tensorflow.python.training.saving import saveable_object_util
 from tensorflow.python.util import nest
@@ -48,6 +57,23 @@ class _SingleDeviceSaver(object):
     """
     self._tensor_slice_dict = tensor_slice_dict
 
+  def tensors_to_save(self):
+    """Yields the tensor name, slice spec and tensor of the values to save.
+
+    The values of `SaveSpec`s are read as they are yielded.
+    """
+    for checkpoint_key, tensor_slices in self._tensor_slice_dict.items():
+      for slice_spec, tensor in tensor_slices.items():
+        if isinstance(tensor, saveable_object.SaveSpec):
+          tensor_value = tensor.tensor
+          # A tensor value of `None` indicates that this SaveableObject gets
+          # recorded in the object graph, but that no value is saved in the
+          # checkpoint.
+          if tensor_value is not None:
+            yield tensor.name, tensor.slice_spec, tensor_value
+        else:
+          yield checkpoint_key, slice_spec, tensor
+
   def save(self, file_prefix, options=None):
     """Save the saveable objects to a checkpoint with `file_prefix`.
 
@@ -62,21 +88,10 @@ class _SingleDeviceSaver(object):
     tensor_names = []
     tensors = []
     slice_specs = []
-    for checkpoint_key, tensor_slices in self._tensor_slice_dict.items():
-      for slice_spec, tensor in tensor_slices.items():
-        if isinstance(tensor, saveable_object.SaveSpec):
-          tensor_value = tensor.tensor
-          # A tensor value of `None` indicates that this SaveableObject gets
-          # recorded in the object graph, but that no value is saved in the
-          # checkpoint.
-          if tensor_value is not None:
-            tensor_names.append(tensor.name)
-            tensors.append(tensor_value)
-            slice_specs.append(tensor.slice_spec)
-        else:
-          tensor_names.append(checkpoint_key)
-          tensors.append(tensor)
-          slice_specs.append(slice_spec)
+    for tensor_name, slice_spec, tensor in self.tensors_to_save():
+      tensor_names.append(tensor_name)
+      tensors.append(tensor)
+      slice_specs.append(slice_spec)
     save_device = options.experimental_io_device or (
         len(tensors) and saveable_object_util.set_cpu0(tensors[0].device))
     save_device = save_device or "cpu:0"
@@ -95,32 +110,47 @@ class _SingleDeviceSaver(object):
       A restored tensor dict (maps checkpoint_key -> slice_spec -> tensor).
     """
     options = options or checkpoint_options.CheckpointOptions()
-    tensor_names = []
-    tensor_dtypes = []
-    slice_specs = []
+    restore_specs = self.restore_specs()
+    restore_device = options.experimental_io_device or "cpu:0"
+    with ops.device(restore_device):
+      restored_tensors = _restore_v2(file_prefix, restore_specs)
+
+    restored_tensor_dict = {}
+    for spec, restored_tensor in zip(restore_specs, restored_tensors):
+      restored_tensor_dict.setdefault(spec.checkpoint_key, {})[
+          spec.slice_spec] = restored_tensor
+    return restored_tensor_dict
 
+  def restore_specs(self):
+    """Returns a `_RestoreSpec` for each value to restore."""
+    restore_specs = []
     for checkpoint_key, tensor_slices in self._tensor_slice_dict.items():
       for slice_spec, tensor in tensor_slices.items():
-        tensor_dtypes.append(tensor.dtype)
         if isinstance(tensor, saveable_object.SaveSpec):
-          slice_specs.append(tensor.slice_spec)
-          tensor_names.append(tensor.name)
+          restore_specs.append(
+              _RestoreSpec(checkpoint_key, slice_spec, tensor.name,
+                           tensor.slice_spec, tensor.dtype))
         else:
-          slice_specs.append(slice_spec)
-          tensor_names.append(checkpoint_key)
+          restore_specs.append(
+              _RestoreSpec(checkpoint_key, slice_spec, checkpoint_key,
+                           slice_spec, tensor.dtype))
+    return restore_specs
 
-    restore_device = options.experimental_io_device or "cpu:0"
-    with ops.device(restore_device):
-      restored_tensors = io_ops.restore_v2(
-          file_prefix, tensor_names, slice_specs, tensor_dtypes)
 
-    restored_tensor_dict = {}
-    for checkpoint_key, tensor_slices in self._tensor_slice_dict.items():
-      for slice_spec in tensor_slices:
-        restored_tensor = restored_tensors.pop(0)
-        restored_tensor_dict.setdefault(checkpoint_key, {})[slice_spec] = (
-            restored_tensor)
-    return restored_tensor_dict
+# A value to restore: `tensor_name` and `tensor_slice_spec` are read from the
+# checkpoint, and restored as `checkpoint_key` and `slice_spec`.
+_RestoreSpec = collections.namedtuple(
+    "_RestoreSpec",
+    ["checkpoint_key", "slice_spec", "tensor_name", "tensor_slice_spec",
+     "dtype"])
+
+
+def _restore_v2(file_prefix, restore_specs):
+  """Reads the values of `restore_specs` from a checkpoint."""
+  return io_ops.restore_v2(
+      file_prefix, [spec.tensor_name for spec in restore_specs],
+      [spec.tensor_slice_spec for spec in restore_specs],
+      [spec.dtype for spec in restore_specs])
 
 
 def sharded_filename(filename_tensor, shard, num_shards):
@@ -182,6 +212,252 @@ def _get_mapped_registered_restore_fn(fn, trackables,
 _restore_noop = lambda *args, **kwargs: None
 
 
+def _num_bytes(tensor):
+  """Returns the size in bytes of the value of an eager tensor."""
+  if tensor.dtype == dtypes.string:
+    value = tensor.numpy()
+    if isinstance(value, bytes):
+      return len(value)
+    return sum(len(element) for element in value.flat)
+  return tensor.shape.num_elements() * tensor.dtype.size
+
+
+class StreamingSaveProgress(object):
+  """The progress of a save streamed through a staging buffer.
+
+  See `CheckpointOptions.experimental_staging_buffer_bytes`. A streaming save
+  copies the values to save to the host and writes them in chunks, each to its
+  own checkpoint shard. The copied values are held in a staging buffer until
+  they are written. The properties of this object are updated as the save
+  goes, and may be read from any thread.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._staged = threading.Event()
+    self._done = threading.Event()
+    self._buffer_bytes = None
+    self._buffered_bytes = 0
+    self._peak_buffered_bytes = 0
+    self._staged_bytes = 0
+    self._written_bytes = 0
+    self._num_shards_written = 0
+
+  @property
+  def buffer_bytes(self):
+    """The size of the staging buffer, or None if the save has not started."""
+    return self._buffer_bytes
+
+  @property
+  def buffered_bytes(self):
+    """The bytes of copied values currently waiting to be written."""
+    with self._lock:
+      return self._buffered_bytes
+
+  @property
+  def peak_buffered_bytes(self):
+    """The largest number of bytes held in the staging buffer."""
+    with self._lock:
+      return self._peak_buffered_bytes
+
+  @property
+  def staged_bytes(self):
+    """The total bytes of values copied to the host so far."""
+    with self._lock:
+      return self._staged_bytes
+
+  @property
+  def written_bytes(self):
+    """The total bytes of values written to checkpoint shards so far."""
+    with self._lock:
+      return self._written_bytes
+
+  @property
+  def num_shards_written(self):
+    """The number of checkpoint shards written so far."""
+    with self._lock:
+      return self._num_shards_written
+
+  @property
+  def staged(self):
+    """Whether all the values to save have been read."""
+    return self._staged.is_set()
+
+  @property
+  def done(self):
+    """Whether the save has finished."""
+    return self._done.is_set()
+
+  def wait_until_staged(self, timeout=None):
+    """Waits until all the values to save have been read.
+
+    The saved variables may be modified once this returns, as only copies of
+    their values remain to be written.
+
+    Args:
+      timeout: Optional timeout in seconds.
+
+    Returns:
+      Whether all the values have been read, which is only False on timeout.
+    """
+    return self._staged.wait(timeout)
+
+  def wait_until_done(self, timeout=None):
+    """Waits until the save has finished, and returns False on timeout."""
+    return self._done.wait(timeout)
+
+  def _start(self, buffer_bytes):
+    self._buffer_bytes = buffer_bytes
+
+  def _on_staged(self, num_bytes):
+    with self._lock:
+      self._staged_bytes += num_bytes
+      self._buffered_bytes += num_bytes
+      self._peak_buffered_bytes = max(self._peak_buffered_bytes,
+                                      self._buffered_bytes)
+
+  def _on_written(self, num_bytes):
+    with self._lock:
+      self._written_bytes += num_bytes
+      self._buffered_bytes -= num_bytes
+      self._num_shards_written += 1
+
+  def _finish_staging(self):
+    self._staged.set()
+
+  def _finish(self):
+    self._staged.set()
+    self._done.set()
+
+
+class _StagingBuffer(object):
+  """Bounds the bytes of the values copied but not yet written by a save."""
+
+  def __init__(self, buffer_bytes, progress):
+    self._buffer_bytes = buffer_bytes
+    self._progress = progress
+    self._condition = threading.Condition()
+    self._buffered_bytes = 0
+    self._closed = False
+
+  def acquire(self, num_bytes):
+    """Waits until there is room for `num_bytes` in the buffer and takes it.
+
+    A value larger than the buffer is admitted once the buffer is empty.
+
+    Args:
+      num_bytes: The size of a copied value.
+
+    Returns:
+      False if the buffer was closed, True otherwise.
+    """
+    with self._condition:
+      self._condition.wait_for(
+          lambda: (self._closed or not self._buffered_bytes or
+                   self._buffered_bytes + num_bytes <= self._buffer_bytes))
+      if self._closed:
+        return False
+      self._buffered_bytes += num_bytes
+    self._progress._on_staged(num_bytes)  # pylint: disable=protected-access
+    return True
+
+  def release(self, num_bytes):
+    with self._condition:
+      self._buffered_bytes -= num_bytes
+      self._condition.notify_all()
+    self._progress._on_written(num_bytes)  # pylint: disable=protected-access
+
+  def close(self):
+    """Makes the pending and future `acquire` calls return False."""
+    with self._condition:
+      self._closed = True
+      self._condition.notify_all()
+
+
+# A chunk of copied values, written to the checkpoint shard `prefix`.
+_StagedShard = collections.namedtuple(
+    "_StagedShard",
+    ["prefix", "device", "tensor_names", "slice_specs", "tensors",
+     "num_bytes"])
+
+
+def _write_staged_shards(shard_queue, staging_buffer, errors):
+  """Writes the shards of `shard_queue` until it yields None."""
+  while True:
+    shard = shard_queue.get()
+    if shard is None:
+      return
+    num_bytes = shard.num_bytes
+    try:
+      with ops.device(shard.device):
+        io_ops.save_v2(shard.prefix, shard.tensor_names, shard.slice_specs,
+                       shard.tensors)
+    except Exception as e:  # pylint: disable=broad-except
+      errors.append(e)
+      staging_buffer.close()
+      return
+    # Drop the references to the copied values before releasing their room in
+    # the buffer.
+    del shard
+    staging_buffer.release(num_bytes)
+
+
+class ShardReadStats(
+    collections.namedtuple("ShardReadStats",
+                           ["device", "num_tensors", "num_bytes", "seconds"])):
+  """The size and duration of a read of a parallel restore.
+
+  See `CheckpointOptions.experimental_num_restore_threads`.
+
+  Attributes:
+    device: The device of the variables restored from the read shard.
+    num_tensors: The number of values read.
+    num_bytes: The size in bytes of the values read.
+    seconds: The time taken by the read.
+  """
+
+  __slots__ = ()
+
+  @property
+  def bytes_per_second(self):
+    """The throughput of the read."""
+    return self.num_bytes / self.seconds if self.seconds else float("inf")
+
+
+def _partition_restore_specs(restore_specs, num_shards, dtype_map, shape_map):
+  """Splits `restore_specs` into up to `num_shards` shards of similar size.
+
+  Args:
+    restore_specs: A list of `_RestoreSpec`s.
+    num_shards: The maximum number of shards.
+    dtype_map: A dict mapping the tensor names in the checkpoint to dtypes.
+    shape_map: A dict mapping the tensor names in the checkpoint to shapes.
+
+  Returns:
+    A list of non-empty lists of `_RestoreSpec`s, largest first.
+  """
+
+  def estimated_bytes(spec):
+    # Slices are estimated by the size of their full value.
+    shape = shape_map.get(spec.tensor_name)
+    dtype = dtype_map.get(spec.tensor_name)
+    if shape is None or dtype is None:
+      return 0
+    num_elements = 1
+    for dim in shape:
+      num_elements *= dim
+    return num_elements * dtype.size
+
+  # Assigns the largest remaining value to the smallest shard.
+  shards = [[0, i, []] for i in range(min(num_shards, len(restore_specs)))]
+  for spec in sorted(restore_specs, key=estimated_bytes, reverse=True):
+    shard = heapq.heappop(shards)
+    shard[0] += estimated_bytes(spec)
+    shard[2].append(spec)
+    heapq.heappush(shards, shard)
+  return [shard[2] for shard in sorted(shards, reverse=True)]
+
+
 class MultiDeviceSaver(object):
   """Saves checkpoints directly from multiple devices.
 
@@ -294,13 +570,31 @@ class MultiDeviceSaver(object):
       with ops.control_dependencies(restore_ops.values()):
         return array_ops.identity(file_prefix)
 
-  def save(self, file_prefix, options=None):
+  def _save_registered_savers(self, registered_paths):
+    """Saves with the registered savers and returns the saved prefixes."""
+    saved_prefixes = []
+    for saver_name, (save_fn, _) in self._registered_savers.items():
+      maybe_saved_prefixes = save_fn(registered_paths[saver_name])
+      if maybe_saved_prefixes is not None:
+        flattened_saved_prefixes = nest.flatten(maybe_saved_prefixes)
+        if not all(
+            tensor_util.is_tf_type(x) and x.dtype == dtypes.string
+            for x in flattened_saved_prefixes):
+          raise ValueError(
+              "Registered saver must return a (maybe empty) list of "
+              f"string type tensors. Got {maybe_saved_prefixes}.")
+        saved_prefixes.extend(flattened_saved_prefixes)
+    return saved_prefixes
+
+  def save(self, file_prefix, options=None, progress=None):
     """Save the saveable objects to a checkpoint with `file_prefix`.
 
     Args:
       file_prefix: A string or scalar string Tensor containing the prefix to
         save under.
       options: Optional `CheckpointOptions` object.
+      progress: Optional `StreamingSaveProgress` to update when the save is
+        streamed, see `CheckpointOptions.experimental_staging_buffer_bytes`.
     Returns:
       An `Operation`, or None when executing eagerly.
     """
@@ -346,21 +640,17 @@ class MultiDeviceSaver(object):
           for saver_name in self._registered_savers
       }
 
+    if (context.executing_eagerly() and
+        options.experimental_staging_buffer_bytes):
+      self._save_streaming(file_prefix, tmp_checkpoint_prefix,
+                           registered_paths, options,
+                           progress or StreamingSaveProgress())
+      return None
+
     def save_fn():
-      saved_prefixes = []
       # Save with the registered savers. These run before default savers due to
       # the API contract.
-      for saver_name, (save_fn, _) in self._registered_savers.items():
-        maybe_saved_prefixes = save_fn(registered_paths[saver_name])
-        if maybe_saved_prefixes is not None:
-          flattened_saved_prefixes = nest.flatten(maybe_saved_prefixes)
-          if not all(
-              tensor_util.is_tf_type(x) and x.dtype == dtypes.string
-              for x in flattened_saved_prefixes):
-            raise ValueError(
-                "Registered saver must return a (maybe empty) list of "
-                f"string type tensors. Got {maybe_saved_prefixes}.")
-          saved_prefixes.extend(flattened_saved_prefixes)
+      saved_prefixes = self._save_registered_savers(registered_paths)
 
       # (Default saver) Save with single device savers.
       num_shards = len(self._single_device_savers)
@@ -406,13 +696,228 @@ class MultiDeviceSaver(object):
     else:
       return save_fn()
 
-  def restore(self, file_prefix, options=None):
+  def _save_streaming(self, file_prefix, tmp_checkpoint_prefix,
+                      registered_paths, options, progress):
+    """Saves eagerly, streaming the values through a staging buffer.
+
+    The values of each device are copied to its host and grouped in chunks of
+    up to half the staging buffer. Each chunk is written to its own shard by a
+    writer thread while the next chunk is copied, and the copying waits while
+    the buffer is full. The shards are merged once all of them are written.
+
+    Args:
+      file_prefix: A string or scalar string Tensor containing the prefix to
+        save under.
+      tmp_checkpoint_prefix: The prefix of the temporary shards.
+      registered_paths: A dict mapping registered saver names to their prefix.
+      options: `CheckpointOptions` object.
+      progress: The `StreamingSaveProgress` to update.
+
+    Raises:
+      The first error raised when writing a shard.
+    """
+    buffer_bytes = options.experimental_staging_buffer_bytes
+    chunk_bytes = max(buffer_bytes // 2, 1)
+    progress._start(buffer_bytes)  # pylint: disable=protected-access
+    staging_buffer = _StagingBuffer(buffer_bytes, progress)
+    shard_queue = queue.Queue()
+    errors = []
+    writer = threading.Thread(
+        target=_write_staged_shards,
+        args=(shard_queue, staging_buffer, errors),
+        daemon=True)
+    writer.start()
+    try:
+      saved_prefixes = self._save_registered_savers(registered_paths)
+      last_device = None
+      staged = []
+      staged_bytes = 0
+
+      def flush(save_device):
+        nonlocal staged, staged_bytes
+        if not staged:
+          return
+        with ops.device("CPU"):
+          shard_prefix = string_ops.string_join(
+              [tmp_checkpoint_prefix,
+               constant_op.constant("-%05d" % len(saved_prefixes))])
+        saved_prefixes.append(shard_prefix)
+        tensor_names, slice_specs, tensors = zip(*staged)
+        shard_queue.put(
+            _StagedShard(shard_prefix, save_device, list(tensor_names),
+                         list(slice_specs), list(tensors), staged_bytes))
+        staged = []
+        staged_bytes = 0
+
+      for device, saver in sorted(self._single_device_savers.items()):
+        last_device = device
+        host_device = saveable_object_util.set_cpu0(device)
+        save_device = options.experimental_io_device or host_device
+        with ops.device(device):
+          for tensor_name, slice_spec, tensor in saver.tensors_to_save():
+            with ops.device(host_device):
+              tensor = array_ops.identity(tensor)
+            num_bytes = _num_bytes(tensor)
+            # Write the values staged so far first if the chunk would
+            # overflow, so that only values held by the writer can keep this
+            # one waiting for room in the buffer.
+            if staged_bytes + num_bytes > chunk_bytes:
+              flush(save_device)
+            if not staging_buffer.acquire(num_bytes):
+              break
+            staged.append((tensor_name, slice_spec, tensor))
+            staged_bytes += num_bytes
+            del tensor
+            if staged_bytes >= chunk_bytes:
+              flush(save_device)
+        flush(save_device)
+        if errors:
+          break
+      progress._finish_staging()  # pylint: disable=protected-access
+
+      shard_queue.put(None)
+      writer.join()
+      if errors:
+        raise errors[0]
+
+      # Merge on the io_device if specified, otherwise co-locates the merge op
+      # with the last device used.
+      merge_device = options.experimental_io_device or (
+          saveable_object_util.set_cpu0(last_device) if last_device
+          else "cpu:0")
+      with ops.device(merge_device):
+        gen_io_ops.merge_v2_checkpoints(
+            saved_prefixes, file_prefix, delete_old_dirs=True)
+    finally:
+      staging_buffer.close()
+      shard_queue.put(None)
+      progress._finish()  # pylint: disable=protected-access
+
+  def _restored_tensor_consumer(self, restore_ops):
+    """Returns a function passing restored tensors to the restore functions.
+
+    The restore function of a `Trackable` is called once all of its tensors
+    have been passed, and the restore ops that it returns are added to
+    `restore_ops`.
+
+    Args:
+      restore_ops: A dict to update with the restore ops.
+
+    Returns:
+      A function taking the checkpoint key, slice spec and restored tensor.
+    """
+    restore_fn_inputs = {}
+    restore_fn_input_count = {
+        fn: len(keys) for fn, keys in self._restore_fn_to_keys.items()}
+
+    def consume(checkpoint_key, slice_spec, tensor):
+      restore_fn = self._keys_to_restore_fn[(checkpoint_key, slice_spec)]
+
+      # Processing the returned restored_tensor_dict to prepare for the
+      # Trackable `restore` function. The `restore` function expects a
+      # map of `string name (checkpoint_key) -> Tensor`. Unless there is
+      # a slice_spec, in which case the map will be of
+      # `string name (checkpoint_key)-> slice_spec -> Tensor`.
+      if slice_spec:
+        (restore_fn_inputs.setdefault(restore_fn, {}).setdefault(
+            checkpoint_key, {})[slice_spec]) = tensor
+      else:
+        restore_fn_inputs.setdefault(restore_fn, {})[checkpoint_key] = tensor
+      restore_fn_input_count[restore_fn] -= 1
+
+      if restore_fn_input_count[restore_fn] == 0:
+        restored_tensors = {}
+        # Extracts the substring after the "/.ATTRIBUTES/" in the
+        # ckpt_key from restore_fn_inputs[restore_fn] to
+        # restored_tensors. For example, if restore_fn_input[restore_fn]
+        # is dict { "/.ATTIBUTES/a": Tensor}, restored_tensors will be
+        # changed to dict {"a": Tensor}
+        for ckpt_key, tensor in restore_fn_inputs.pop(restore_fn).items():
+          restored_tensors[trackable_utils.extract_local_name(
+              ckpt_key)] = tensor
+        ret = restore_fn(restored_tensors)
+        if isinstance(ret, dict):
+          restore_ops.update(ret)
+
+    return consume
+
+  def _restore_parallel(self, file_prefix, options, read_stats):
+    """Restores eagerly, reading shards of the values concurrently.
+
+    The values of each device are split into shards of similar size, largest
+    first, which are read by a pool of `experimental_num_restore_threads`
+    threads. The values of each shard are passed to the restore functions
+    once it is read, so that they are placed on their devices while the
+    other shards are read.
+
+    Args:
+      file_prefix: A string or scalar string Tensor containing the prefix for
+        files to read from.
+      options: `CheckpointOptions` object.
+      read_stats: Optional list to which a `ShardReadStats` is appended for
+        each shard read.
+
+    Returns:
+      A dictionary mapping from SaveableObject names to restore operations.
+    """
+    num_threads = options.experimental_num_restore_threads
+    restore_device = options.experimental_io_device or "cpu:0"
+    reader = py_checkpoint_reader.NewCheckpointReader(
+        file_prefix.numpy() if tensor_util.is_tf_type(file_prefix)
+        else file_prefix)
+    dtype_map = reader.get_variable_to_dtype_map()
+    shape_map = reader.get_variable_to_shape_map()
+
+    def read(device, restore_specs):
+      start_time = time.time()
+      with ops.device(device), ops.device(restore_device):
+        restored_tensors = _restore_v2(file_prefix, restore_specs)
+      stats = ShardReadStats(device, len(restore_specs),
+                             sum(_num_bytes(t) for t in restored_tensors),
+                             time.time() - start_time)
+      logging.vlog(1, "Read %d values (%d bytes) for %s in %.3fs (%.1f MB/s).",
+                   stats.num_tensors, stats.num_bytes, device, stats.seconds,
+                   stats.bytes_per_second / 1e6)
+      return restored_tensors, stats
+
+    restore_ops = {}
+    consume = self._restored_tensor_consumer(restore_ops)
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=num_threads,
+        thread_name_prefix="restore_shards") as executor:
+      futures = {}
+      # Sort by device name to avoid propagating non-deterministic dictionary
+      # ordering in some Python versions.
+      for device, saver in sorted(self._single_device_savers.items()):
+        # Splitting the values of a device in more shards than threads lets
+        # the values read first be placed while the others are read.
+        for shard in _partition_restore_specs(
+            saver.restore_specs(), 2 * num_threads, dtype_map, shape_map):
+          futures[executor.submit(read, device, shard)] = (device, shard)
+      for future in concurrent.futures.as_completed(futures):
+        restored_tensors, stats = future.result()
+        if read_stats is not None:
+          read_stats.append(stats)
+        device, shard = futures[future]
+        with ops.device(device):
+          for spec, tensor in zip(shard, restored_tensors):
+            consume(spec.checkpoint_key, spec.slice_spec, tensor)
+
+    # Run registered restore methods after the default restore ops.
+    for _, (_, restore_fn) in self._registered_savers.items():
+      restore_fn(file_prefix)
+    return restore_ops
+
+  def restore(self, file_prefix, options=None, read_stats=None):
     """Restore the saveable objects from a checkpoint with `file_prefix`.
 
     Args:
       file_prefix: A string or scalar string Tensor containing the prefix for
         files to read from.
       options: Optional `CheckpointOptions` object.
+      read_stats: Optional list to which a `ShardReadStats` is appended for
+        each shard read when the restore is parallel, see
+        `CheckpointOptions.experimental_num_restore_threads`.
 
     Returns:
       When not run eagerly or when saving on a single device, returns a
@@ -422,11 +927,8 @@ class MultiDeviceSaver(object):
     options = options or checkpoint_options.CheckpointOptions()
 
     def restore_fn():
-      restore_fn_inputs = {}
-      restore_fn_input_count = {
-          fn: len(keys) for fn, keys in self._restore_fn_to_keys.items()}
-
       restore_ops = {}
+      consume = self._restored_tensor_consumer(restore_ops)
       # Sort by device name to avoid propagating non-deterministic dictionary
       # ordering in some Python versions.
       for device, saver in sorted(self._single_device_savers.items()):
@@ -438,35 +940,7 @@ class MultiDeviceSaver(object):
           # inputs have all been loaded. Call `restore_fn` if that is the case.
           for checkpoint_key, slice_and_tensor in restored_tensor_dict.items():
             for slice_spec, tensor in slice_and_tensor.items():
-              restore_fn = self._keys_to_restore_fn[(checkpoint_key,
-                                                     slice_spec)]
-
-              # Processing the returned restored_tensor_dict to prepare for the
-              # Trackable `restore` function. The `restore` function expects a
-              # map of `string name (checkpoint_key) -> Tensor`. Unless there is
-              # a slice_spec, in which case the map will be of
-              # `string name (checkpoint_key)-> slice_spec -> Tensor`.
-              if slice_spec:
-                (restore_fn_inputs.setdefault(restore_fn, {}).setdefault(
-                    checkpoint_key, {})[slice_spec]) = tensor
-              else:
-                restore_fn_inputs.setdefault(restore_fn,
-                                             {})[checkpoint_key] = tensor
-              restore_fn_input_count[restore_fn] -= 1
-
-              if restore_fn_input_count[restore_fn] == 0:
-                restored_tensors = {}
-                # Extracts the substring after the "/.ATTRIBUTES/" in the
-                # ckpt_key from restore_fn_inputs[restore_fn] to
-                # restored_tensors. For example, if restore_fn_input[restore_fn]
-                # is dict { "/.ATTIBUTES/a": Tensor}, restored_tensors will be
-                # changed to dict {"a": Tensor}
-                for ckpt_key, tensor in restore_fn_inputs[restore_fn].items():
-                  restored_tensors[trackable_utils.extract_local_name(
-                      ckpt_key)] = tensor
-                ret = restore_fn(restored_tensors)
-                if isinstance(ret, dict):
-                  restore_ops.update(ret)
+              consume(checkpoint_key, slice_spec, tensor)
       # Run registered restore methods after the default restore ops.
       for _, (_, restore_fn) in self._registered_savers.items():
         restore_fn(file_prefix)
@@ -475,6 +949,11 @@ class MultiDeviceSaver(object):
     has_custom_device_saver = any([
         context.is_custom_device(d) for d in self._single_device_savers.keys()
     ])
+    if (context.executing_eagerly() and
+        options.experimental_num_restore_threads and
+        not has_custom_device_saver):
+      return self._restore_parallel(file_prefix, options, read_stats)
+
     # Since this will cause a function re-trace on each restore, limit this to
     # cases where it is needed: eager and when there are multiple tasks/single
     # device savers or any single device saver is a custom device. Note that the
@@ -24,8 +24,10 @@ from tensorflow.python.eager import test
 from tensorflow.python.eager import wrap_function
 from tensorflow.python.framework import config
 from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import test_util
+from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import resource_variable_ops
 from tensorflow.python.platform import gfile
 from tensorflow.python.training import server_lib
@@ -186,6 +188,89 @@ class SaverTest(test.TestCase):
         if op.type in ("SaveV2", "RestoreV2", "MergeV2Checkpoints"):
           self.assertEqual(LOCALHOST, op.device)
 
+  def test_streaming_save(self):
+    with ops.device("cpu:0"):
+      v0 = resource_variable_ops.ResourceVariable(array_ops.zeros([64]))
+      v1 = resource_variable_ops.ResourceVariable(array_ops.ones([64]))
+    with ops.device("cpu:1"):
+      v2 = resource_variable_ops.ResourceVariable(array_ops.fill([128], 2.))
+    saver = functional_saver.MultiDeviceSaver.from_saveables(
+        list(saveable_object_util.saveable_objects_for_op(v0, "v0")) +
+        list(saveable_object_util.saveable_objects_for_op(v1, "v1")) +
+        list(saveable_object_util.saveable_objects_for_op(v2, "v2")))
+    prefix = os.path.join(self.get_temp_dir(), "ckpt")
+    options = checkpoint_options.CheckpointOptions(
+        experimental_staging_buffer_bytes=512)
+    progress = functional_saver.StreamingSaveProgress()
+    saver.save(constant_op.constant(prefix), options, progress=progress)
+
+    self.assertTrue(progress.done)
+    self.assertEqual(512, progress.buffer_bytes)
+    self.assertEqual(1024, progress.staged_bytes)
+    self.assertEqual(1024, progress.written_bytes)
+    self.assertEqual(0, progress.buffered_bytes)
+    self.assertLessEqual(progress.peak_buffered_bytes, 512)
+    # Each value fills a chunk of half the buffer, and is written to its own
+    # shard.
+    self.assertEqual(3, progress.num_shards_written)
+    self.assertLen(gfile.Glob(prefix + ".data-*"), 3)
+
+    self.evaluate(v0.assign(array_ops.fill([64], -1.)))
+    self.evaluate(v1.assign(array_ops.fill([64], -1.)))
+    self.evaluate(v2.assign(array_ops.fill([128], -1.)))
+    saver.restore(constant_op.constant(prefix))
+    self.assertAllEqual(array_ops.zeros([64]), v0)
+    self.assertAllEqual(array_ops.ones([64]), v1)
+    self.assertAllEqual(array_ops.fill([128], 2.), v2)
+
+  def test_parallel_restore(self):
+    variables = []
+    for i in range(6):
+      with ops.device("cpu:%d" % (i % 2)):
+        variables.append(
+            resource_variable_ops.ResourceVariable(
+                array_ops.fill([2**i], float(i))))
+    saver = functional_saver.MultiDeviceSaver.from_saveables([
+        saveable for i, v in enumerate(variables)
+        for saveable in saveable_object_util.saveable_objects_for_op(
+            v, "v%d" % i)
+    ])
+    prefix = os.path.join(self.get_temp_dir(), "ckpt")
+    saver.save(constant_op.constant(prefix))
+    for v in variables:
+      v.assign(array_ops.zeros_like(v))
+
+    options = checkpoint_options.CheckpointOptions(
+        experimental_num_restore_threads=2)
+    read_stats = []
+    saver.restore(constant_op.constant(prefix), options, read_stats=read_stats)
+    for i, v in enumerate(variables):
+      self.assertAllEqual(array_ops.fill([2**i], float(i)), v)
+    # The values of each device are read in up to 4 shards.
+    self.assertLen(read_stats, 6)
+    self.assertEqual(6, sum(stats.num_tensors for stats in read_stats))
+    self.assertEqual(4 * (2**6 - 1),
+                     sum(stats.num_bytes for stats in read_stats))
+
+  def test_partition_restore_specs(self):
+    specs = [
+        functional_saver._RestoreSpec(name, "", name, "", dtypes.float32)
+        for name in ("a", "b", "c", "d")
+    ]
+    shards = functional_saver._partition_restore_specs(
+        specs, 2, {name: dtypes.float32 for name in "abcd"}, {
+            "a": [8],
+            "b": [5],
+            "c": [4],
+            "d": [2, 2]
+        })
+    self.assertEqual([["a", "d"], ["b", "c"]],
+                     [[spec.tensor_name for spec in shard] for shard in shards])
+
+  def test_streaming_save_invalid_buffer(self):
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      checkpoint_options.CheckpointOptions(experimental_staging_buffer_bytes=0)
+
 
 if __name__ == "__main__":
   ops.enable_eager_execution()
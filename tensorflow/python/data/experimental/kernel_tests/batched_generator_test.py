@@ -0,0 +1,97 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for `from_batched_generator()`."""
+from absl.testing import parameterized
+import numpy as np
+
+from tensorflow.python.data.experimental.ops import batched_generator
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.framework import combinations
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import errors
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.ops.ragged import ragged_tensor
+from tensorflow.python.platform import test
+
+
+class FromBatchedGeneratorTest(test_base.DatasetTestBase,
+                               parameterized.TestCase):
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testSplitsBatches(self):
+    features = np.arange(30, dtype=np.float32).reshape([10, 3])
+    labels = np.arange(10, dtype=np.int64)
+
+    def gen():
+      # Batches of uneven sizes, including an empty one.
+      for start, stop in [(0, 4), (4, 4), (4, 9), (9, 10)]:
+        yield {"x": features[start:stop], "y": labels[start:stop]}
+
+    dataset = batched_generator.from_batched_generator(
+        gen,
+        output_signature={
+            "x": tensor_spec.TensorSpec([3], dtypes.float32),
+            "y": tensor_spec.TensorSpec([], dtypes.int64)
+        })
+    self.assertEqual([3], dataset.element_spec["x"].shape)
+    self.assertDatasetProduces(
+        dataset, [{"x": features[i], "y": labels[i]} for i in range(10)])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testConvertsLists(self):
+    dataset = batched_generator.from_batched_generator(
+        lambda: iter([[1, 2, 3], [4, 5]]),
+        output_signature=tensor_spec.TensorSpec([], dtypes.int32))
+    self.assertDatasetProduces(dataset, [1, 2, 3, 4, 5])
+
+    dataset = batched_generator.from_batched_generator(
+        lambda: iter([[b"a", b"b"], [b"c"]]),
+        output_signature=tensor_spec.TensorSpec([], dtypes.string))
+    self.assertDatasetProduces(dataset, [b"a", b"b", b"c"])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testMismatchedBatchSizes(self):
+
+    def gen():
+      yield np.zeros([3]), np.zeros([2])
+
+    dataset = batched_generator.from_batched_generator(
+        gen,
+        output_signature=(tensor_spec.TensorSpec([], dtypes.float64),
+                          tensor_spec.TensorSpec([], dtypes.float64)))
+    self.assertDatasetProduces(
+        dataset,
+        expected_error=(errors.InvalidArgumentError,
+                        "different batch sizes"))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testUnbatchedValue(self):
+    dataset = batched_generator.from_batched_generator(
+        lambda: iter([np.int64(1)]),
+        output_signature=tensor_spec.TensorSpec([], dtypes.int64))
+    self.assertDatasetProduces(
+        dataset, expected_error=(errors.InvalidArgumentError, "shape"))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testRequiresTensorSpecs(self):
+    with self.assertRaisesRegex(TypeError, "tf.TensorSpec"):
+      batched_generator.from_batched_generator(
+          lambda: iter([]),
+          output_signature=ragged_tensor.RaggedTensorSpec([None, None],
+                                                          dtypes.int32))
+
+
+if __name__ == "__main__":
+  test.main()
@@ -0,0 +1,159 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for `caching.shared_cache`."""
+
+import gc
+import os
+import socket
+import time
+
+from absl.testing import parameterized
+
+from tensorflow.python.data.experimental.ops import caching
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.data.ops import readers
+from tensorflow.python.framework import combinations
+from tensorflow.python.ops import random_ops
+from tensorflow.python.platform import test
+
+
+class SharedCacheTest(test_base.DatasetTestBase, parameterized.TestCase):
+
+  def setUp(self):
+    super(SharedCacheTest, self).setUp()
+    self._cache_dir = os.path.join(self.get_temp_dir(), "cache")
+
+  def _write_lines(self, filename, lines):
+    path = os.path.join(self.get_temp_dir(), filename)
+    with open(path, "w") as f:
+      f.write("\n".join(lines))
+    return path
+
+  def _entries(self):
+    if not os.path.isdir(self._cache_dir):
+      return []
+    return sorted(os.listdir(self._cache_dir))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testFingerprintIsStable(self):
+
+    def make_dataset(offset):
+      return dataset_ops.Dataset.range(10).map(lambda x: x + offset).batch(2)
+
+    self.assertEqual(
+        caching.dataset_fingerprint(make_dataset(1)),
+        caching.dataset_fingerprint(make_dataset(1)))
+    self.assertNotEqual(
+        caching.dataset_fingerprint(make_dataset(1)),
+        caching.dataset_fingerprint(make_dataset(2)))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testFingerprintTracksInputFiles(self):
+    path = self._write_lines("input.txt", ["a", "b"])
+    before = caching.dataset_fingerprint(readers.TextLineDataset(path))
+    # Make sure the modification time changes even on coarse clocks.
+    time.sleep(0.01)
+    self._write_lines("input.txt", ["a", "b", "c"])
+    after = caching.dataset_fingerprint(readers.TextLineDataset(path))
+    self.assertNotEqual(before, after)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testReusesCompleteEntry(self):
+
+    def make_dataset():
+      return dataset_ops.Dataset.range(5).map(lambda x: x * x).apply(
+          caching.shared_cache(self._cache_dir))
+
+    self.assertDatasetProduces(make_dataset(), [0, 1, 4, 9, 16])
+    entries = self._entries()
+    self.assertLen(entries, 1)
+    self.assertTrue(
+        os.path.exists(os.path.join(self._cache_dir, entries[0],
+                                    "cache.index")))
+
+    self.assertDatasetProduces(make_dataset(), [0, 1, 4, 9, 16])
+    self.assertEqual(entries, self._entries())
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testEvictsLeastRecentlyUsed(self):
+
+    def make_dataset(offset, max_bytes=None):
+      return dataset_ops.Dataset.range(100).map(lambda x: x + offset).apply(
+          caching.shared_cache(self._cache_dir, max_bytes=max_bytes))
+
+    self.getDatasetOutput(make_dataset(1))
+    first = self._entries()
+    self.getDatasetOutput(make_dataset(2))
+    self.assertLen(self._entries(), 2)
+    # Releases the leases of the datasets.
+    gc.collect()
+    # A budget of one byte only keeps the entry being applied.
+    self.getDatasetOutput(make_dataset(3, max_bytes=1))
+    entries = self._entries()
+    self.assertLen(entries, 1)
+    self.assertNotIn(first[0], entries)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testDoesNotEvictLeasedEntries(self):
+
+    def make_dataset(offset, max_bytes=None):
+      return dataset_ops.Dataset.range(100).map(lambda x: x + offset).apply(
+          caching.shared_cache(self._cache_dir, max_bytes=max_bytes))
+
+    dataset = make_dataset(1)
+    self.getDatasetOutput(dataset)
+    first = self._entries()
+    self.getDatasetOutput(make_dataset(2, max_bytes=1))
+    self.assertIn(first[0], self._entries())
+    self.getDatasetOutput(dataset)
+
+    del dataset
+    gc.collect()
+    self.getDatasetOutput(make_dataset(3, max_bytes=1))
+    self.assertNotIn(first[0], self._entries())
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testIgnoresLeasesOfStoppedProcesses(self):
+    entry = caching._CacheEntry(self._cache_dir, "entry")
+    leases = os.path.join(entry.path, caching._LEASES)
+    os.makedirs(leases)
+    # Larger than the maximum pid on Linux.
+    lease = os.path.join(leases, f"{socket.gethostname()}-{2**22 + 1}-a")
+    with open(lease, "w") as f:
+      f.write(repr(time.time() + 60))
+    self.assertEqual(os.name != "posix", entry.is_leased())
+
+    expired = os.path.join(leases, "other-host-1-b")
+    with open(expired, "w") as f:
+      f.write(repr(time.time() - 60))
+    entry.is_leased()
+    self.assertFalse(os.path.exists(expired))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testStatefulPipelineRaises(self):
+    dataset = dataset_ops.Dataset.range(5).map(
+        lambda x: random_ops.random_uniform([]))
+    with self.assertRaisesRegex(ValueError, "external state"):
+      dataset.apply(caching.shared_cache(self._cache_dir))
+
+  @combinations.generate(test_base.graph_only_combinations())
+  def testGraphModeRaises(self):
+    with self.assertRaisesRegex(RuntimeError, "eager mode"):
+      dataset_ops.Dataset.range(5).apply(caching.shared_cache(self._cache_dir))
+
+
+if __name__ == "__main__":
+  test.main()
@@ -0,0 +1,139 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for `columnar.make_parquet_dataset`."""
+
+import os
+
+from absl.testing import parameterized
+import numpy as np
+
+from tensorflow.python.data.experimental.ops import columnar
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.framework import combinations
+from tensorflow.python.framework import dtypes
+from tensorflow.python.platform import test
+
+try:
+  import pyarrow  # pylint: disable=g-import-not-at-top
+  import pyarrow.parquet as pq  # pylint: disable=g-import-not-at-top
+except ImportError:
+  pyarrow = None
+  pq = None
+
+
+class MakeParquetDatasetTest(test_base.DatasetTestBase, parameterized.TestCase):
+
+  def setUp(self):
+    super(MakeParquetDatasetTest, self).setUp()
+    if pq is None:
+      self.skipTest("pyarrow is not installed.")
+    self._filenames = []
+    for i in range(2):
+      start = i * 10
+      table = pyarrow.table({
+          "id": pyarrow.array(range(start, start + 10), pyarrow.int64()),
+          "score": pyarrow.array([float(x) / 2 for x in range(10)],
+                                 pyarrow.float32()),
+          "name": pyarrow.array(["name_%d" % x for x in range(10)]),
+          "label": pyarrow.array([x % 2 == 0 if x != 3 else None
+                                  for x in range(10)]),
+      })
+      filename = os.path.join(self.get_temp_dir(), "data_%d.parquet" % i)
+      pq.write_table(table, filename, row_group_size=5)
+      self._filenames.append(filename)
+
+  def _read_column(self, dataset, column):
+    return np.concatenate(
+        [element[column] for element in self.getDatasetOutput(dataset)])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testReadsRowGroupsAsBatches(self):
+    dataset = columnar.make_parquet_dataset(self._filenames)
+    self.assertEqual(dtypes.int64, dataset.element_spec["id"].dtype)
+    self.assertEqual(dtypes.float32, dataset.element_spec["score"].dtype)
+    self.assertEqual(dtypes.string, dataset.element_spec["name"].dtype)
+    self.assertEqual(dtypes.bool, dataset.element_spec["label"].dtype)
+    output = self.getDatasetOutput(dataset)
+    # Two files with two row groups each.
+    self.assertLen(output, 4)
+    self.assertAllEqual(np.arange(20),
+                        np.concatenate([e["id"] for e in output]))
+    self.assertEqual(b"name_0", output[0]["name"][0])
+    # Nulls are replaced by `False`.
+    self.assertFalse(output[0]["label"][3])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testProjection(self):
+    dataset = columnar.make_parquet_dataset(
+        self._filenames, columns=["score"], batch_size=3)
+    self.assertEqual(["score"], list(dataset.element_spec))
+    output = self.getDatasetOutput(dataset)
+    sizes = [len(e["score"]) for e in output]
+    self.assertEqual(20, sum(sizes))
+    self.assertLessEqual(max(sizes), 3)
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testFilters(self):
+    dataset = columnar.make_parquet_dataset(
+        self._filenames, columns=["id"], filters=[("id", ">=", 12),
+                                                  ("id", "<", 16)])
+    self.assertAllEqual([12, 13, 14, 15], self._read_column(dataset, "id"))
+
+    dataset = columnar.make_parquet_dataset(
+        self._filenames,
+        columns=["id"],
+        filters=[("name", "in", ["name_1", "name_8"])])
+    self.assertAllEqual([1, 8, 11, 18], self._read_column(dataset, "id"))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testFiltersAfterNestedAndBinaryColumns(self):
+    # The nested column shifts the Parquet column indices of the next columns.
+    table = pyarrow.table({
+        "tags": pyarrow.array([[x, x + 1] for x in range(10)]),
+        "key": pyarrow.array([b"key_%d" % x for x in range(10)],
+                             pyarrow.binary()),
+        "id": pyarrow.array(range(10), pyarrow.int64()),
+    })
+    filename = os.path.join(self.get_temp_dir(), "nested.parquet")
+    pq.write_table(table, filename, row_group_size=5)
+
+    dataset = columnar.make_parquet_dataset(
+        filename, columns=["id"], filters=[("id", ">=", 7)])
+    self.assertAllEqual([7, 8, 9], self._read_column(dataset, "id"))
+
+    dataset = columnar.make_parquet_dataset(
+        filename, columns=["id"], filters=[("key", "in", ["key_2", "key_6"])])
+    self.assertAllEqual([2, 6], self._read_column(dataset, "id"))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testParallelReads(self):
+    dataset = columnar.make_parquet_dataset(
+        self._filenames, columns=["id"], num_parallel_reads=2)
+    self.assertCountEqual(np.arange(20), self._read_column(dataset, "id"))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testInvalidArguments(self):
+    with self.assertRaisesRegex(ValueError, "not in the schema"):
+      columnar.make_parquet_dataset(self._filenames, columns=["missing"])
+    with self.assertRaisesRegex(ValueError, "Unsupported filter op"):
+      columnar.make_parquet_dataset(
+          self._filenames, filters=[("id", "~", 1)])
+    with self.assertRaisesRegex(ValueError, "No files match"):
+      columnar.make_parquet_dataset(
+          os.path.join(self.get_temp_dir(), "*.missing"))
+
+
+if __name__ == "__main__":
+  test.main()
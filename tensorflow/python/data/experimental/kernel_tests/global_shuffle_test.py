@@ -0,0 +1,136 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for `global_shuffle()` and `shuffled_tf_record_dataset()`."""
+import os
+
+from absl.testing import parameterized
+import numpy as np
+
+from tensorflow.python.data.experimental.ops import shuffle_ops
+from tensorflow.python.data.kernel_tests import checkpoint_test_base
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.framework import combinations
+from tensorflow.python.framework import errors
+from tensorflow.python.lib.io import tf_record
+from tensorflow.python.platform import test
+
+
+def _write_tf_records(directory, num_files=3, num_records=10):
+  filenames = []
+  for i in range(num_files):
+    filename = os.path.join(directory, "tf_record.%d" % i)
+    with tf_record.TFRecordWriter(filename) as writer:
+      for j in range(num_records):
+        writer.write(b"record_%d_%d" % (i, j))
+    filenames.append(filename)
+  return filenames
+
+
+class GlobalShuffleTest(test_base.DatasetTestBase, parameterized.TestCase):
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testPermutesAllElements(self):
+    dataset = dataset_ops.Dataset.range(100).apply(
+        shuffle_ops.global_shuffle(seed=42))
+    output = self.getDatasetOutput(dataset)
+    self.assertNotEqual(list(range(100)), output)
+    self.assertAllEqual(np.arange(100), sorted(output))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testSameSeed(self):
+
+    def build():
+      return dataset_ops.Dataset.from_tensor_slices(np.arange(50) * 2).apply(
+          shuffle_ops.global_shuffle(seed=7, num_epochs=2))
+
+    self.assertEqual(self.getDatasetOutput(build()),
+                     self.getDatasetOutput(build()))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testEpochsUseDifferentPermutations(self):
+    dataset = dataset_ops.Dataset.range(50).apply(
+        shuffle_ops.global_shuffle(seed=7, num_epochs=2))
+    output = self.getDatasetOutput(dataset)
+    self.assertLen(output, 100)
+    self.assertNotEqual(output[:50], output[50:])
+    self.assertAllEqual(sorted(output[:50]), sorted(output[50:]))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testInfiniteEpochs(self):
+    dataset = dataset_ops.Dataset.range(10).apply(
+        shuffle_ops.global_shuffle(seed=7, num_epochs=None)).take(35)
+    output = self.getDatasetOutput(dataset)
+    for epoch in range(3):
+      self.assertAllEqual(np.arange(10),
+                          sorted(output[epoch * 10:(epoch + 1) * 10]))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testUnknownCardinality(self):
+    dataset = dataset_ops.Dataset.range(10).filter(lambda x: x > 2)
+    with self.assertRaisesRegex(ValueError, "known, finite cardinality"):
+      dataset.apply(shuffle_ops.global_shuffle(seed=7))
+
+  @combinations.generate(test_base.graph_only_combinations())
+  def testUnknownCardinalityInGraphMode(self):
+    dataset = dataset_ops.Dataset.range(10).filter(lambda x: x > 2).apply(
+        shuffle_ops.global_shuffle(seed=7))
+    with self.assertRaisesRegex(errors.InvalidArgumentError,
+                                "known, finite cardinality"):
+      self.getDatasetOutput(dataset)
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testTFRecords(self):
+    filenames = _write_tf_records(self.get_temp_dir())
+    expected = [b"record_%d_%d" % (i, j) for i in range(3) for j in range(10)]
+    dataset = shuffle_ops.shuffled_tf_record_dataset(
+        filenames, seed=3, num_epochs=2)
+    output = self.getDatasetOutput(dataset)
+    self.assertCountEqual(expected * 2, output)
+    self.assertNotEqual(expected, output[:30])
+    self.assertNotEqual(output[:30], output[30:])
+    self.assertEqual(
+        output,
+        self.getDatasetOutput(
+            shuffle_ops.shuffled_tf_record_dataset(
+                filenames, seed=3, num_epochs=2)))
+
+
+class GlobalShuffleCheckpointTest(checkpoint_test_base.CheckpointTestBase,
+                                  parameterized.TestCase):
+
+  @combinations.generate(
+      combinations.times(test_base.default_test_combinations(),
+                         checkpoint_test_base.default_test_combinations()))
+  def test(self, verify_fn):
+    num_elements = 20
+    num_epochs = 3
+    verify_fn(
+        self, lambda: dataset_ops.Dataset.range(num_elements).apply(
+            shuffle_ops.global_shuffle(seed=42, num_epochs=num_epochs)),
+        num_elements * num_epochs)
+
+  @combinations.generate(
+      combinations.times(test_base.eager_only_combinations(),
+                         checkpoint_test_base.default_test_combinations()))
+  def testTFRecords(self, verify_fn):
+    filenames = _write_tf_records(self.get_temp_dir())
+    verify_fn(
+        self, lambda: shuffle_ops.shuffled_tf_record_dataset(
+            filenames, seed=3, num_epochs=2), 60)
+
+
+if __name__ == "__main__":
+  test.main()
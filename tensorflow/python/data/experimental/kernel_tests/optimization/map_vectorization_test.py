@@ -0,0 +1,135 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for the `MapVectorization` optimization."""
+from absl.testing import parameterized
+
+from tensorflow.python.data.experimental.ops import testing
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.data.ops import options as options_lib
+from tensorflow.python.framework import combinations
+from tensorflow.python.framework import dtypes
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import random_ops
+from tensorflow.python.ops import variables
+from tensorflow.python.platform import test
+
+
+def _vectorization_options(enabled=True):
+  options = options_lib.Options()
+  options.experimental_optimization.apply_default_optimizations = False
+  options.experimental_optimization.map_vectorization = enabled
+  return options
+
+
+class MapVectorizationTest(test_base.DatasetTestBase, parameterized.TestCase):
+
+  @combinations.generate(
+      combinations.times(test_base.eager_only_combinations(),
+                         combinations.combine(drop_remainder=[True, False])))
+  def testVectorizesMapBeforeBatch(self, drop_remainder):
+    dataset = dataset_ops.Dataset.range(10).with_options(
+        _vectorization_options()).apply(
+            testing.assert_next(["Batch", "Map"])).map(
+                lambda x: x * 2 + 1).batch(4, drop_remainder=drop_remainder)
+    expected = [[1, 3, 5, 7], [9, 11, 13, 15]]
+    if not drop_remainder:
+      expected.append([17, 19])
+    self.assertEqual([4 if drop_remainder else None],
+                     dataset.element_spec.shape.as_list())
+    self.assertDatasetProduces(dataset, expected_output=expected)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testTupleElements(self):
+    dataset = dataset_ops.Dataset.zip(
+        (dataset_ops.Dataset.range(4), dataset_ops.Dataset.range(4)))
+    dataset = dataset.with_options(_vectorization_options()).apply(
+        testing.assert_next(["Batch", "Map"])).map(
+            lambda x, y: {"sum": x + y, "cast": math_ops.cast(y, dtypes.int32)}
+        ).batch(2)
+    self.assertDatasetProduces(
+        dataset,
+        expected_output=[{"sum": [0, 2], "cast": [0, 1]},
+                         {"sum": [4, 6], "cast": [2, 3]}])
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testParallelMapStaysParallel(self):
+    dataset = dataset_ops.Dataset.range(6).with_options(
+        _vectorization_options()).apply(
+            testing.assert_next(["Batch", "ParallelMap"])).map(
+                lambda x: x * x, num_parallel_calls=2).batch(3)
+    self.assertDatasetProduces(
+        dataset, expected_output=[[0, 1, 4], [9, 16, 25]])
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testStatefulFunctionIsNotVectorized(self):
+    dataset = dataset_ops.Dataset.range(4).with_options(
+        _vectorization_options()).apply(
+            testing.assert_next(["Map", "Batch"])).map(
+                lambda x: random_ops.random_uniform([]) + 1.0).batch(2)
+    self.assertLen(self.getDatasetOutput(dataset), 2)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testCapturedVariableIsNotSnapshotted(self):
+    threshold = variables.Variable(0, dtype=dtypes.int64)
+    dataset = dataset_ops.Dataset.range(4).filter(
+        lambda x: x >= threshold).with_options(_vectorization_options()).apply(
+            testing.assert_next(["Map", "Batch"])).map(lambda x: x + 1).batch(2)
+    self.assertDatasetProduces(dataset, expected_output=[[1, 2], [3, 4]])
+    threshold.assign(2)
+    self.assertDatasetProduces(dataset, expected_output=[[3, 4]])
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testRewriteIsReused(self):
+    dataset = dataset_ops.Dataset.range(4).with_options(
+        _vectorization_options()).map(lambda x: x + 1).batch(2)
+    rewritten = dataset._apply_debug_options()
+    self.assertIsNot(dataset, rewritten)
+    self.assertIs(rewritten, dataset._apply_debug_options())
+    self.assertDatasetProduces(dataset, expected_output=[[1, 2], [3, 4]])
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testOptionsSetAfterBatch(self):
+    dataset = dataset_ops.Dataset.range(4).apply(
+        testing.assert_next(["Batch", "Map"])).map(lambda x: x + 1).batch(2)
+    dataset = dataset.with_options(_vectorization_options())
+    self.assertDatasetProduces(dataset, expected_output=[[1, 2], [3, 4]])
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testOptionsDisabledAfterBatch(self):
+    dataset = dataset_ops.Dataset.range(4).with_options(
+        _vectorization_options()).apply(
+            testing.assert_next(["Map", "Batch"])).map(lambda x: x + 1).batch(2)
+    dataset = dataset.with_options(_vectorization_options(enabled=False))
+    self.assertDatasetProduces(dataset, expected_output=[[1, 2], [3, 4]])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testDisabledByDefault(self):
+    options = options_lib.Options()
+    options.experimental_optimization.apply_default_optimizations = False
+    dataset = dataset_ops.Dataset.range(4).with_options(options).apply(
+        testing.assert_next(["Map", "Batch"])).map(lambda x: x + 1).batch(2)
+    self.assertDatasetProduces(dataset, expected_output=[[1, 2], [3, 4]])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testExplicitlyDisabled(self):
+    dataset = dataset_ops.Dataset.range(4).with_options(
+        _vectorization_options(enabled=False)).apply(
+            testing.assert_next(["Map", "Batch"])).map(lambda x: x + 1).batch(2)
+    self.assertDatasetProduces(dataset, expected_output=[[1, 2], [3, 4]])
+
+
+if __name__ == "__main__":
+  test.main()
@@ -0,0 +1,137 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for `process_map()`."""
+import os
+
+from absl.testing import parameterized
+import numpy as np
+
+from tensorflow.python.data.experimental.ops import process_map
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.framework import combinations
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import errors
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.ops.ragged import ragged_tensor
+from tensorflow.python.platform import test
+
+
+# Map functions are sent to the workers by pickling, so they must be defined
+# at the top level of the module.
+def _square_and_pid(x):
+  return x * x, np.int64(os.getpid())
+
+
+def _add(x, y):
+  return x + y
+
+
+def _scale_image(features):
+  return {"image": features["image"] * 2, "label": features["label"]}
+
+
+def _halve(x):
+  # Returns float64 arrays and Python floats.
+  return x / 2, float(x)
+
+
+def _fail(x):
+  if x == 3:
+    raise ValueError("Element 3 is invalid")
+  return x
+
+
+class ProcessMapTest(test_base.DatasetTestBase, parameterized.TestCase):
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testRunsInWorkersInOrder(self):
+    dataset = dataset_ops.Dataset.range(20).apply(
+        process_map.process_map(
+            _square_and_pid,
+            output_signature=(tensor_spec.TensorSpec([], dtypes.int64),
+                              tensor_spec.TensorSpec([], dtypes.int64)),
+            num_workers=2))
+    output = self.getDatasetOutput(dataset)
+    self.assertEqual([x * x for x in range(20)], [o[0] for o in output])
+    self.assertNotIn(os.getpid(), [o[1] for o in output])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testTupleElements(self):
+    dataset = dataset_ops.Dataset.zip(
+        (dataset_ops.Dataset.range(5), dataset_ops.Dataset.range(5))).apply(
+            process_map.process_map(
+                _add,
+                output_signature=tensor_spec.TensorSpec([], dtypes.int64),
+                num_workers=2))
+    self.assertDatasetProduces(dataset, [0, 2, 4, 6, 8])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testLargeArraysThroughSharedMemory(self):
+    images = np.random.rand(4, 128, 128, 3).astype(np.float32)
+    self.assertGreater(images[0].nbytes,
+                       process_map._SHARED_MEMORY_MIN_BYTES)
+    dataset = dataset_ops.Dataset.from_tensor_slices({
+        "image": images,
+        "label": np.arange(4)
+    }).apply(
+        process_map.process_map(
+            _scale_image,
+            output_signature={
+                "image": tensor_spec.TensorSpec([128, 128, 3], dtypes.float32),
+                "label": tensor_spec.TensorSpec([], dtypes.int64)
+            },
+            num_workers=2))
+    self.assertEqual([128, 128, 3], dataset.element_spec["image"].shape)
+    self.assertDatasetProduces(
+        dataset, [{"image": images[i] * 2, "label": i} for i in range(4)])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testConvertsOutputsToSignatureTypes(self):
+    dataset = dataset_ops.Dataset.range(4).apply(
+        process_map.process_map(
+            _halve,
+            output_signature=(tensor_spec.TensorSpec([], dtypes.float32),
+                              tensor_spec.TensorSpec([], dtypes.float32)),
+            num_workers=2))
+    self.assertDatasetProduces(dataset, [(x / 2, float(x)) for x in range(4)])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testWorkerError(self):
+    dataset = dataset_ops.Dataset.range(5).apply(
+        process_map.process_map(
+            _fail,
+            output_signature=tensor_spec.TensorSpec([], dtypes.int64),
+            num_workers=1))
+    self.assertDatasetProduces(
+        dataset,
+        expected_error=(errors.InvalidArgumentError, "Element 3 is invalid"))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testInvalidArguments(self):
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      process_map.process_map(
+          _fail,
+          output_signature=tensor_spec.TensorSpec([], dtypes.int64),
+          num_workers=0)
+    with self.assertRaisesRegex(TypeError, "tf.TensorSpec"):
+      process_map.process_map(
+          _fail,
+          output_signature=ragged_tensor.RaggedTensorSpec([None, None],
+                                                          dtypes.int64))
+
+
+if __name__ == "__main__":
+  test.main()
@@ -0,0 +1,108 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for `tf.data` input pipeline profiling."""
+
+from absl.testing import parameterized
+
+from tensorflow.python.data.experimental.ops import profiling
+from tensorflow.python.data.experimental.ops import testing
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.framework import combinations
+from tensorflow.python.platform import test
+
+
+class ProfileTest(test_base.DatasetTestBase, parameterized.TestCase):
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testStageNames(self):
+    dataset = dataset_ops.Dataset.range(100).map(lambda x: x + 1).batch(
+        4).prefetch(2)
+    report = profiling.profile(dataset, num_steps=5, warmup_steps=1)
+    self.assertEqual(
+        ["Prefetch", "Prefetch/Batch", "Prefetch/Batch/Map",
+         "Prefetch/Batch/Map/Range"], [stage.name for stage in report.stages])
+    self.assertEqual(5, report.num_steps)
+    self.assertIsNotNone(report.stage("Prefetch").buffer_hit_rate)
+    self.assertIsNone(report.stage("Prefetch/Batch").buffer_hit_rate)
+    self.assertAlmostEqual(
+        1.0, sum(stage.cost_share for stage in report.stages), places=5)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testMultipleInputs(self):
+    dataset = dataset_ops.Dataset.zip(
+        (dataset_ops.Dataset.range(10), dataset_ops.Dataset.range(10)))
+    report = profiling.profile(dataset, num_steps=5, warmup_steps=0)
+    self.assertEqual(["Zip", "Zip[0]/Range", "Zip[1]/Range"],
+                     [stage.name for stage in report.stages])
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testFindsBottleneck(self):
+    dataset = dataset_ops.Dataset.range(1000).apply(
+        testing.sleep(10000)).map(lambda x: x * 2).prefetch(1)
+    report = profiling.profile(dataset, num_steps=10, warmup_steps=1)
+    self.assertEqual("Prefetch/Map/Sleep", report.bottleneck.name)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testWaitTime(self):
+    dataset = dataset_ops.Dataset.range(1000).apply(testing.sleep(10000))
+    report = profiling.profile(dataset, num_steps=5, warmup_steps=0)
+    self.assertGreater(report.wait_time, 0.04)
+    self.assertGreater(report.wait_fraction, 0.5)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testReportRoundTrip(self):
+    dataset = dataset_ops.Dataset.range(100).map(lambda x: x + 1)
+    report = profiling.profile(dataset, num_steps=10, warmup_steps=0)
+    restored = profiling.PipelineProfile.from_json(report.to_json())
+    self.assertEqual(report.to_dict(), restored.to_dict())
+    ratios = restored.compare(report)
+    self.assertEqual({"Map", "Map/Range"}, set(ratios))
+    self.assertAllClose([1.0, 1.0], sorted(ratios.values()))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testShortDataset(self):
+    dataset = dataset_ops.Dataset.range(3)
+    report = profiling.profile(dataset, num_steps=10, warmup_steps=0)
+    self.assertEqual(3, report.num_steps)
+    self.assertEqual(3, report.stage("Range").num_elements)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testWarmupCappedForShortDataset(self):
+    dataset = dataset_ops.Dataset.range(6).map(lambda x: x + 1)
+    report = profiling.profile(dataset, num_steps=10, warmup_steps=10)
+    self.assertEqual(3, report.stage("Map").num_elements)
+    self.assertGreater(report.stage("Map").mean_latency, 0.0)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testWarmupCappedForUnknownCardinality(self):
+    dataset = dataset_ops.Dataset.range(6).filter(lambda x: x < 4)
+    report = profiling.profile(dataset, num_steps=10, warmup_steps=10)
+    self.assertEqual(2, report.stage("Filter").num_elements)
+    self.assertGreater(report.stage("Filter").mean_latency, 0.0)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testInvalidNumSteps(self):
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      profiling.profile(dataset_ops.Dataset.range(3), num_steps=0)
+
+  @combinations.generate(test_base.graph_only_combinations())
+  def testRequiresEagerMode(self):
+    with self.assertRaisesRegex(RuntimeError, "eager mode"):
+      profiling.profile(dataset_ops.Dataset.range(3), num_steps=1)
+
+
+if __name__ == "__main__":
+  test.main()
@@ -0,0 +1,202 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for the shared memory tf.data service transport."""
+import os
+import threading
+import time
+from unittest import mock
+
+from absl.testing import parameterized
+
+from tensorflow.python.data.experimental.ops import data_service_ops
+from tensorflow.python.data.experimental.ops import local_data_service
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.framework import combinations
+from tensorflow.python.framework import errors
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import script_ops
+from tensorflow.python.ops import string_ops
+from tensorflow.python.platform import test
+
+
+def _sleep(x):
+  # Slower than the heartbeat timeout of `testWorkerStopsBeating`.
+  time.sleep(1)
+  return x
+
+
+class SharedMemoryServiceTest(test_base.DatasetTestBase,
+                              parameterized.TestCase):
+
+  def setUp(self):
+    super(SharedMemoryServiceTest, self).setUp()
+    self._directory = os.path.join(self.get_temp_dir(), "shm")
+    self._service = "shm://" + self._directory
+
+  @combinations.generate(
+      combinations.times(
+          test_base.eager_only_combinations(),
+          combinations.combine(
+              processing_mode=["parallel_epochs", "distributed_epoch"])))
+  def testAnonymousJob(self, processing_mode):
+    dataset = dataset_ops.Dataset.range(100).map(lambda x: x * 2)
+    dataset = dataset.apply(
+        data_service_ops.distribute(processing_mode, self._service))
+    self.assertDatasetProduces(dataset, list(range(0, 200, 2)))
+    # The files of anonymous jobs are deleted after use.
+    self.assertEmpty(os.listdir(self._directory))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testSharedJob(self):
+
+    def make_dataset():
+      return dataset_ops.Dataset.range(50).apply(
+          data_service_ops.distribute(
+              "distributed_epoch", self._service, job_name="shared_job"))
+
+    iterators = [iter(make_dataset()), iter(make_dataset())]
+    results = []
+    while iterators:
+      for iterator in list(iterators):
+        try:
+          results.append(next(iterator).numpy())
+        except StopIteration:
+          iterators.remove(iterator)
+    self.assertCountEqual(list(range(50)), results)
+    # The files of a job are deleted once all its consumers are done.
+    self.assertEmpty(os.listdir(self._directory))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testRerunSharedJob(self):
+    dataset = dataset_ops.Dataset.range(10).apply(
+        data_service_ops.distribute(
+            "distributed_epoch", self._service, job_name="rerun_job"))
+    self.assertDatasetProduces(dataset, list(range(10)))
+    self.assertDatasetProduces(dataset, list(range(10)))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testReplacesJobOfDeadWorker(self):
+    os.makedirs(self._directory)
+    # A job whose worker died without cleaning up its files.
+    job = local_data_service._LocalJob(self._directory, "dead_job")
+    self.assertTrue(job.claim())
+    ring = local_data_service._RingBuffer.create(job.ring_path, 1024)
+    ring._update(heartbeat=0.)
+    ring.close()
+    dataset = local_data_service.distribute(
+        dataset_ops.Dataset.range(10), self._directory, job_name="dead_job")
+    self.assertDatasetProduces(dataset, list(range(10)))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testWorkerStopsBeating(self):
+    os.makedirs(self._directory)
+    job = local_data_service._LocalJob(self._directory, "stopped_job")
+    with mock.patch.object(local_data_service, "_HEARTBEAT_INTERVAL_SECONDS",
+                           3600.), mock.patch.object(
+                               local_data_service,
+                               "_HEARTBEAT_TIMEOUT_SECONDS", 0.5):
+      dataset = local_data_service.distribute(
+          dataset_ops.Dataset.range(10).map(
+              lambda x: script_ops.numpy_function(_sleep, [x], x.dtype)),
+          self._directory,
+          job_name="stopped_job")
+      with self.assertRaisesRegex(errors.OpError, "stopped responding"):
+        self.getDatasetOutput(dataset)
+    self.assertFalse(os.path.exists(job.ring_path))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testBufferWrapsAround(self):
+    dataset = dataset_ops.Dataset.range(200).map(
+        lambda x: array_ops.fill([x % 17], x))
+    expected = [[i] * (i % 17) for i in range(200)]
+    dataset = local_data_service.distribute(
+        dataset, self._directory, buffer_bytes=1024)
+    self.assertDatasetProduces(dataset, expected)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testStructuredElements(self):
+    dataset = dataset_ops.Dataset.range(5).map(
+        lambda x: {"id": x, "name": string_ops.as_string(x) + "\x00"})
+    dataset = local_data_service.distribute(dataset, self._directory)
+    self.assertDatasetProduces(
+        dataset, [{"id": i, "name": b"%d\x00" % i} for i in range(5)])
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testConcurrentHeartbeats(self):
+    os.makedirs(self._directory)
+    ring = local_data_service._RingBuffer.create(
+        os.path.join(self._directory, "ring"), 1024)
+    done = threading.Event()
+    heartbeat = threading.Thread(
+        target=local_data_service._beat, args=(ring, done))
+    with mock.patch.object(local_data_service, "_HEARTBEAT_INTERVAL_SECONDS",
+                           0.):
+      heartbeat.start()
+      try:
+        for i in range(1000):
+          self.assertTrue(ring.put(b"%d" % i))
+          self.assertEqual(b"%d" % i, ring.get())
+      finally:
+        done.set()
+        heartbeat.join()
+    ring.close()
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testElementLargerThanBuffer(self):
+    dataset = dataset_ops.Dataset.from_tensors(array_ops.zeros([1024]))
+    dataset = local_data_service.distribute(
+        dataset, self._directory, buffer_bytes=1024)
+    with self.assertRaisesRegex(errors.OpError, "does not fit"):
+      self.getDatasetOutput(dataset)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testWorkerError(self):
+    dataset = dataset_ops.Dataset.from_tensor_slices(["1", "2", "x"]).map(
+        string_ops.string_to_number)
+    dataset = dataset.apply(
+        data_service_ops.distribute("distributed_epoch", self._service))
+    with self.assertRaisesRegex(errors.OpError, "StringToNumber"):
+      self.getDatasetOutput(dataset)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testUnsupportedArguments(self):
+    with self.assertRaisesRegex(ValueError, "Coordinated reads"):
+      data_service_ops.distribute(
+          "distributed_epoch",
+          self._service,
+          job_name="job",
+          consumer_index=0,
+          num_consumers=2)
+    with self.assertRaisesRegex(ValueError, "processing modes"):
+      data_service_ops.distribute(data_service_ops.ShardingPolicy.FILE,
+                                  self._service)
+    with self.assertRaisesRegex(ValueError, "`compression` is not supported"):
+      data_service_ops.distribute(
+          "distributed_epoch", self._service, compression=None)
+    with self.assertRaisesRegex(ValueError,
+                                "`target_workers` is not supported"):
+      data_service_ops.distribute(
+          "distributed_epoch", self._service, target_workers="LOCAL")
+
+  @combinations.generate(test_base.graph_only_combinations())
+  def testGraphMode(self):
+    with self.assertRaisesRegex(RuntimeError, "eager mode"):
+      dataset_ops.Dataset.range(5).apply(
+          data_service_ops.distribute("distributed_epoch", self._service))
+
+
+if __name__ == "__main__":
+  test.main()
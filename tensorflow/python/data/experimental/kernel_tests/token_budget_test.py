@@ -0,0 +1,130 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for `bucket_by_token_budget()` and `pack_sequences()`."""
+from absl.testing import parameterized
+import numpy as np
+
+from tensorflow.python.data.experimental.ops import grouping
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.framework import combinations
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.ops import array_ops
+from tensorflow.python.platform import test
+
+
+def _sequences(lengths):
+  return dataset_ops.Dataset.from_generator(
+      lambda: [np.arange(1, n + 1, dtype=np.int32) for n in lengths],
+      output_signature=tensor_spec.TensorSpec([None], dtypes.int32))
+
+
+class BucketByTokenBudgetTest(test_base.DatasetTestBase,
+                              parameterized.TestCase):
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testBatchesStayUnderBudget(self):
+    lengths = [3, 50, 7, 12, 1, 33, 64, 5, 20, 9, 17, 2, 40, 8]
+    dataset = _sequences(lengths).apply(
+        grouping.bucket_by_token_budget(
+            lambda x: array_ops.shape(x)[0], max_tokens=64,
+            max_padding_ratio=0.25))
+    batches = self.getDatasetOutput(dataset)
+    self.assertCountEqual(lengths, [np.count_nonzero(row)
+                                    for batch in batches for row in batch])
+    for batch in batches:
+      self.assertLessEqual(batch.size, 64)
+      for row in batch:
+        self.assertLessEqual(batch.shape[1] - np.count_nonzero(row),
+                             0.25 * batch.shape[1])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testBoundaries(self):
+    self.assertEqual([1, 3, 7, 15],
+                     grouping._token_budget_boundaries(8, 0.5))
+    dataset = dataset_ops.Dataset.range(1, 9).map(
+        lambda n: array_ops.ones([n]))
+    dataset = dataset.apply(
+        grouping.bucket_by_token_budget(
+            lambda x: array_ops.shape(x)[0], max_tokens=8,
+            bucket_boundaries=[5]))
+    self.assertEqual([(2, 2), (2, 4), (1, 5)],
+                     [b.shape for b in self.getDatasetOutput(dataset)][:3])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testInvalidArguments(self):
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      grouping.bucket_by_token_budget(lambda x: 1, max_tokens=0)
+    with self.assertRaisesRegex(ValueError, r"must be in \(0, 1\)"):
+      grouping.bucket_by_token_budget(
+          lambda x: 1, max_tokens=8, max_padding_ratio=1.0)
+
+
+class PackSequencesTest(test_base.DatasetTestBase, parameterized.TestCase):
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testPack(self):
+    dataset = _sequences([3, 2, 1, 4, 8]).apply(
+        grouping.pack_sequences(row_length=6))
+    self.assertEqual([6], dataset.element_spec[0].shape)
+    self.assertDatasetProduces(
+        dataset,
+        [([1, 2, 3, 1, 2, 1], [1, 1, 1, 2, 2, 3], [0, 1, 2, 0, 1, 0]),
+         ([1, 2, 3, 4, 0, 0], [1, 1, 1, 1, 0, 0], [0, 1, 2, 3, 0, 0]),
+         ([1, 2, 3, 4, 5, 6], [1, 1, 1, 1, 1, 1], [0, 1, 2, 3, 4, 5])])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testPackingWindow(self):
+    dataset = _sequences([2, 2, 2]).apply(
+        grouping.pack_sequences(row_length=6, packing_window=2))
+    self.assertDatasetProduces(
+        dataset,
+        [([1, 2, 1, 2, 0, 0], [1, 1, 2, 2, 0, 0], [0, 1, 0, 1, 0, 0]),
+         ([1, 2, 0, 0, 0, 0], [1, 1, 0, 0, 0, 0], [0, 1, 0, 0, 0, 0])])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testPackStructure(self):
+
+    def make_element(n):
+      return {"ids": array_ops.fill([n], n), "features": array_ops.ones([n, 2])}
+
+    dataset = dataset_ops.Dataset.range(1, 4).map(make_element)
+    dataset = dataset.apply(grouping.pack_sequences(row_length=4))
+    packed, segment_ids, _ = self.getDatasetOutput(dataset)[0]
+    self.assertAllEqual([1, 2, 2, 0], packed["ids"])
+    self.assertAllEqual([[1, 1]] * 3 + [[0, 0]], packed["features"])
+    self.assertAllEqual([1, 2, 2, 0], segment_ids)
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testFixedLengthSequences(self):
+    dataset = dataset_ops.Dataset.from_tensor_slices(
+        np.arange(6).reshape([3, 2]))
+    dataset = dataset.apply(grouping.pack_sequences(row_length=5))
+    self.assertDatasetProduces(
+        dataset,
+        [([0, 1, 2, 3, 0], [1, 1, 2, 2, 0], [0, 1, 0, 1, 0]),
+         ([4, 5, 0, 0, 0], [1, 1, 0, 0, 0], [0, 1, 0, 0, 0])])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testInvalidArguments(self):
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      grouping.pack_sequences(row_length=0)
+    with self.assertRaisesRegex(TypeError, "dense sequences"):
+      dataset_ops.Dataset.range(5).apply(grouping.pack_sequences(4))
+
+
+if __name__ == "__main__":
+  test.main()
@@ -0,0 +1,68 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Python API for creating a dataset from a generator of batches."""
+
+from tensorflow.python.data.ops import from_generator_op
+
+
+def from_batched_generator(generator, output_signature, args=None, name=None):
+  """Creates a `Dataset` from a generator that yields batches of elements.
+
+  `tf.data.Dataset.from_generator` calls back into Python, and holds the GIL,
+  once per element. When `generator` can produce many elements at once, for
+  example by slicing NumPy arrays, yielding whole batches instead amortizes
+  that cost: each value yielded by `generator` is a batch of elements whose
+  components have an additional leading dimension, and the batches are split
+  into elements by the tf.data runtime without holding the GIL.
+
+  ```python
+  def gen():
+    for start in range(0, len(features), 1024):
+      yield features[start:start + 1024], labels[start:start + 1024]
+
+  dataset = from_batched_generator(
+      gen,
+      output_signature=(tf.TensorSpec(shape=(28, 28), dtype=tf.float32),
+                        tf.TensorSpec(shape=(), dtype=tf.int64)))
+  ```
+
+  Batches may have different sizes, but all components of a batch must have
+  the same batch size.
+
+  Args:
+    generator: A callable object that returns an object that supports the
+      `iter()` protocol, as for `tf.data.Dataset.from_generator`.
+    output_signature: A (nested) structure of `tf.TensorSpec` objects
+      describing a single element, without the batch dimension.
+    args: (Optional.) A tuple of `tf.Tensor` objects that will be evaluated and
+      passed to `generator` as NumPy-array arguments.
+    name: (Optional.) A name for the tf.data operations used.
+
+  Returns:
+    A `Dataset` of the elements of the yielded batches.
+
+  Raises:
+    TypeError: If `output_signature` contains specs other than
+      `tf.TensorSpec`.
+  """
+  # pylint: disable=protected-access
+  return from_generator_op._from_generator(
+      generator,
+      output_types=None,
+      output_shapes=None,
+      args=args,
+      output_signature=output_signature,
+      name=name,
+      batched=True)
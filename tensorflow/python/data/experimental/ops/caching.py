@@ -0,0 +1,381 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Content-addressed file caches shared across jobs."""
+
+import hashlib
+import os
+import socket
+import time
+import uuid
+import weakref
+
+from tensorflow.core.framework import graph_pb2
+from tensorflow.python.data.ops import options as options_lib
+from tensorflow.python.eager import context
+from tensorflow.python.framework import errors
+from tensorflow.python.lib.io import file_io
+from tensorflow.python.platform import tf_logging as logging
+
+# Name of the cache file prefix inside an entry directory, of the file
+# recording when an entry was last used, and of the directory holding the
+# leases of the jobs using the entry.
+_CACHE_PREFIX = "cache"
+_LAST_USED = "last_used"
+_LEASES = "leases"
+# Leases of jobs that did not release them, for example because they were
+# killed on another host, expire after this many seconds.
+_LEASE_SECONDS = 7 * 24 * 3600
+_GLOB_CHARACTERS = frozenset("*?[")
+
+
+def _canonicalize_attr(attr, canonical_names):
+  """Replaces function names referenced by `attr` with canonical names."""
+  if attr.HasField("func"):
+    attr.func.name = canonical_names.get(attr.func.name, attr.func.name)
+    for value in attr.func.attr.values():
+      _canonicalize_attr(value, canonical_names)
+  for func in attr.list.func:
+    func.name = canonical_names.get(func.name, func.name)
+    for value in func.attr.values():
+      _canonicalize_attr(value, canonical_names)
+
+
+def _canonicalize_nodes(nodes, canonical_names):
+  for node in nodes:
+    node.op = canonical_names.get(node.op, node.op)
+    for value in node.attr.values():
+      _canonicalize_attr(value, canonical_names)
+
+
+def _referenced_functions(nodes):
+  """Returns the names of functions referenced by `nodes`."""
+  names = set()
+
+  def visit(attr):
+    if attr.HasField("func"):
+      names.add(attr.func.name)
+      for value in attr.func.attr.values():
+        visit(value)
+    for func in attr.list.func:
+      names.add(func.name)
+      for value in func.attr.values():
+        visit(value)
+
+  for node in nodes:
+    names.add(node.op)
+    for value in node.attr.values():
+      visit(value)
+  return names
+
+
+def graph_fingerprint(graph_def):
+  """Returns a fingerprint of a dataset `GraphDef`.
+
+  Function names generated by tracing depend on how many functions the process
+  traced before, so every function is renamed after a hash of its body before
+  the graph is hashed. Two processes that build the same input pipeline thus
+  compute the same fingerprint.
+
+  Args:
+    graph_def: A `tf.compat.v1.GraphDef`.
+
+  Returns:
+    A hexadecimal string.
+  """
+  functions = {f.signature.name: f for f in graph_def.library.function}
+  canonical_names = {}
+
+  def canonical_name(name):
+    if name in canonical_names:
+      return canonical_names[name]
+    # Guards against recursive functions.
+    canonical_names[name] = name
+    function = type(functions[name])()
+    function.CopyFrom(functions[name])
+    for dependency in sorted(
+        _referenced_functions(function.node_def) & set(functions)):
+      if dependency != name:
+        canonical_name(dependency)
+    function.signature.name = ""
+    _canonicalize_nodes(function.node_def, canonical_names)
+    for value in function.attr.values():
+      _canonicalize_attr(value, canonical_names)
+    canonical_names[name] = "fn_" + hashlib.sha256(
+        function.SerializeToString(deterministic=True)).hexdigest()
+    return canonical_names[name]
+
+  for name in sorted(functions):
+    canonical_name(name)
+
+  canonical = graph_pb2.GraphDef()
+  canonical.node.extend(graph_def.node)
+  _canonicalize_nodes(canonical.node, canonical_names)
+  canonical.versions.CopyFrom(graph_def.versions)
+  hasher = hashlib.sha256(canonical.SerializeToString(deterministic=True))
+  for name in sorted(canonical_names.values()):
+    hasher.update(name.encode("utf-8"))
+  return hasher.hexdigest()
+
+
+def _string_constants(graph_def):
+  """Yields the string values of the top-level constants of `graph_def`."""
+  for node in graph_def.node:
+    if node.op != "Const" or "value" not in node.attr:
+      continue
+    tensor = node.attr["value"].tensor
+    for value in tensor.string_val:
+      try:
+        yield value.decode("utf-8")
+      except UnicodeDecodeError:
+        continue
+
+
+def _input_files(graph_def, input_files):
+  """Returns the sorted files whose contents the pipeline may depend on."""
+  candidates = set(input_files or [])
+  candidates.update(_string_constants(graph_def))
+  files = set()
+  for candidate in candidates:
+    if not candidate or len(candidate) > 4096:
+      continue
+    try:
+      if _GLOB_CHARACTERS & set(candidate):
+        matches = file_io.get_matching_files(candidate)
+      else:
+        matches = [candidate] if file_io.file_exists(candidate) else []
+      files.update(m for m in matches if not file_io.is_directory(m))
+    except errors.OpError:
+      continue
+  return sorted(files)
+
+
+def dataset_fingerprint(dataset, input_files=None):
+  """Returns a fingerprint of `dataset`'s graph and its input files.
+
+  The fingerprint covers the serialized graph of the pipeline and the name,
+  size and modification time of every file it reads: files and glob patterns
+  that appear as string constants in the graph, plus `input_files`.
+
+  Args:
+    dataset: A `tf.data.Dataset`.
+    input_files: (optional) Additional files or glob patterns that the
+      pipeline depends on, for example files read by a lookup table.
+
+  Returns:
+    A hexadecimal string.
+
+  Raises:
+    RuntimeError: If not executing eagerly.
+    ValueError: If the pipeline depends on external state, such as Python
+      functions or stateful random ops, and so cannot be fingerprinted.
+  """
+  if not context.executing_eagerly():
+    raise RuntimeError("Fingerprinting a dataset is only supported in eager "
+                       "mode.")
+  # pylint: disable=protected-access
+  try:
+    serialized = dataset._as_serialized_graph(
+        external_state_policy=options_lib.ExternalStatePolicy.FAIL)
+    graph_def = graph_pb2.GraphDef.FromString(serialized.numpy())
+  except errors.FailedPreconditionError as e:
+    raise ValueError(
+        "The input pipeline depends on external state and cannot be cached "
+        f"by content: {e.message}") from e
+
+  hasher = hashlib.sha256(graph_fingerprint(graph_def).encode("utf-8"))
+  for path in _input_files(graph_def, input_files):
+    stat = file_io.stat(path)
+    hasher.update(f"{path}:{stat.length}:{stat.mtime_nsec}\n".encode("utf-8"))
+  return hasher.hexdigest()
+
+
+class _CacheEntry(object):
+  """A cache entry directory and its bookkeeping."""
+
+  def __init__(self, directory, fingerprint):
+    self.fingerprint = fingerprint
+    self.path = file_io.join(directory, fingerprint)
+
+  @property
+  def prefix(self):
+    return file_io.join(self.path, _CACHE_PREFIX)
+
+  def is_complete(self):
+    return file_io.file_exists(self.prefix + ".index")
+
+  def is_being_written(self):
+    return bool(file_io.get_matching_files(self.prefix + "*.lockfile"))
+
+  def last_used(self):
+    try:
+      return float(
+          file_io.read_file_to_string(file_io.join(self.path, _LAST_USED)))
+    except (errors.OpError, ValueError):
+      return 0.0
+
+  def touch(self):
+    file_io.atomic_write_string_to_file(
+        file_io.join(self.path, _LAST_USED), repr(time.time()))
+
+  def acquire_lease(self):
+    """Records that this process uses the entry, and returns the lease path.
+
+    The lease is named after the host and process holding it, and contains
+    the time at which it expires.
+    """
+    leases = file_io.join(self.path, _LEASES)
+    file_io.recursive_create_dir(leases)
+    lease = file_io.join(
+        leases, f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex}")
+    file_io.atomic_write_string_to_file(lease,
+                                        repr(time.time() + _LEASE_SECONDS))
+    return lease
+
+  def is_leased(self):
+    """Whether a running job holds a lease on the entry."""
+    leases = file_io.join(self.path, _LEASES)
+    try:
+      names = file_io.list_directory(leases)
+    except errors.NotFoundError:
+      return False
+    for name in names:
+      lease = file_io.join(leases, name)
+      if _is_lease_valid(name, lease):
+        return True
+      logging.info("Removing stale tf.data cache lease %s.", lease)
+      _release_lease(lease)
+    return False
+
+  def size(self):
+    total = 0
+    for root, _, filenames in file_io.walk(self.path):
+      for filename in filenames:
+        total += file_io.stat(file_io.join(root, filename)).length
+    return total
+
+
+def _is_process_running(pid):
+  try:
+    os.kill(pid, 0)
+  except ProcessLookupError:
+    return False
+  except PermissionError:
+    # The process exists but belongs to another user.
+    return True
+  return True
+
+
+def _is_lease_valid(name, lease):
+  """Whether `lease` has not expired and its process may still be running."""
+  try:
+    expires = float(file_io.read_file_to_string(lease))
+  except errors.NotFoundError:
+    return False
+  except (errors.OpError, ValueError):
+    # Being written by `acquire_lease`.
+    return True
+  if expires < time.time():
+    return False
+  host, _, pid = name.rsplit("-", 1)[0].rpartition("-")
+  # `os.kill(pid, 0)` would interrupt the process on Windows.
+  if host == socket.gethostname() and pid.isdigit() and os.name == "posix":
+    return _is_process_running(int(pid))
+  return True
+
+
+def _release_lease(lease):
+  try:
+    file_io.delete_file(lease)
+  except errors.NotFoundError:
+    pass
+
+
+def _evict(directory, max_bytes, keep):
+  """Deletes least recently used entries until they fit in `max_bytes`."""
+  entries = []
+  for name in file_io.list_directory(directory):
+    path = file_io.join(directory, name)
+    if file_io.is_directory(path):
+      entries.append(_CacheEntry(directory, name.rstrip("/")))
+  sizes = {entry.fingerprint: entry.size() for entry in entries}
+  total = sum(sizes.values())
+  for entry in sorted(entries, key=lambda e: e.last_used()):
+    if total <= max_bytes:
+      break
+    if (entry.fingerprint == keep or entry.is_being_written() or
+        entry.is_leased()):
+      continue
+    logging.info("Evicting tf.data cache entry %s (%d bytes).", entry.path,
+                 sizes[entry.fingerprint])
+    try:
+      file_io.delete_recursively(entry.path)
+    except errors.NotFoundError:
+      # Already evicted by a concurrent job.
+      pass
+    total -= sizes[entry.fingerprint]
+
+
+def shared_cache(directory, max_bytes=None, input_files=None):
+  """Caches a dataset in a directory shared by jobs with the same pipeline.
+
+  Unlike `tf.data.Dataset.cache(filename)`, the cache file is not named by the
+  user but by a fingerprint of the upstream pipeline and of the files it
+  reads. Jobs that build an identical pipeline over unchanged inputs reuse the
+  cache written by the first of them, while any change to the preprocessing
+  or its inputs transparently results in a new cache entry.
+
+  ```python
+  dataset = tf.data.TFRecordDataset(filenames).map(preprocess)
+  dataset = dataset.apply(shared_cache("/tmp/tf_data_cache", max_bytes=100e9))
+  ```
+
+  When `max_bytes` is set, the least recently used entries are deleted when
+  the cache is applied until the directory fits in the budget. Entries that
+  are being written are never evicted, nor are entries leased by a job: the
+  dataset returned by the transformation holds a lease on its entry until it
+  is garbage collected. Leases of processes that are no longer running on the
+  same host are ignored, and all leases expire after a week.
+
+  As with `tf.data.Dataset.cache`, a cache entry is only complete once the
+  dataset has been iterated through in its entirety, and only one job at a
+  time can write a given entry.
+
+  Args:
+    directory: The directory holding the cache entries.
+    max_bytes: (optional) The maximum total size of the cache entries.
+    input_files: (optional) Additional files or glob patterns whose contents
+      the pipeline depends on. Files and patterns that appear as string
+      constants in the pipeline are detected automatically.
+
+  Returns:
+    A `Dataset` transformation function, which can be passed to
+    `tf.data.Dataset.apply`.
+  """
+
+  def _apply_fn(dataset):
+    fingerprint = dataset_fingerprint(dataset, input_files=input_files)
+    entry = _CacheEntry(directory, fingerprint)
+    file_io.recursive_create_dir(entry.path)
+    if entry.is_complete():
+      logging.info("Reading tf.data cache entry %s.", entry.path)
+    lease = entry.acquire_lease()
+    entry.touch()
+    if max_bytes is not None:
+      _evict(directory, max_bytes, keep=fingerprint)
+    cached = dataset.cache(entry.prefix)
+    weakref.finalize(cached, _release_lease, lease)
+    return cached
+
+  return _apply_fn
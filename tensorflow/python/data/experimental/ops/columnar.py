@@ -0,0 +1,296 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Columnar (Parquet) file-backed dataset sources."""
+
+import operator
+
+import numpy as np
+
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.platform import gfile
+from tensorflow.python.util import compat
+
+try:
+  import pyarrow  # pylint: disable=g-import-not-at-top
+  import pyarrow.parquet as pq  # pylint: disable=g-import-not-at-top
+except ImportError:
+  pyarrow = None
+  pq = None
+
+_COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_SUPPORTED_FILTER_OPS = frozenset(_COMPARISONS) | {"in"}
+
+
+def _arrow_type_to_dtype(arrow_type):
+  """Returns the `tf.DType` for a primitive Arrow column type."""
+  types = pyarrow.types
+  if types.is_boolean(arrow_type):
+    return dtypes.bool
+  if types.is_string(arrow_type) or types.is_large_string(arrow_type):
+    return dtypes.string
+  if types.is_binary(arrow_type) or types.is_large_binary(arrow_type):
+    return dtypes.string
+  if (types.is_integer(arrow_type) or types.is_floating(arrow_type)):
+    return dtypes.as_dtype(arrow_type.to_pandas_dtype())
+  if types.is_timestamp(arrow_type) or types.is_date64(arrow_type):
+    return dtypes.int64
+  if types.is_date32(arrow_type):
+    return dtypes.int32
+  raise ValueError(
+      f"Unsupported column type {arrow_type}. Only boolean, integer, "
+      "floating point, string, binary, date and timestamp columns can be "
+      "read.")
+
+
+def _column_to_numpy(column, dtype):
+  """Converts an Arrow column to a NumPy array, replacing nulls."""
+  if isinstance(column, pyarrow.ChunkedArray):
+    column = column.combine_chunks()
+  if dtype == dtypes.string:
+    column = column.cast(pyarrow.binary())
+    fill_value = b""
+  elif dtype == dtypes.bool:
+    fill_value = False
+  else:
+    if not (pyarrow.types.is_integer(column.type) or
+            pyarrow.types.is_floating(column.type)):
+      column = column.cast(pyarrow.from_numpy_dtype(dtype.as_numpy_dtype))
+    fill_value = 0
+  if column.null_count:
+    column = column.fill_null(fill_value)
+  return column.to_numpy(zero_copy_only=False)
+
+
+def _validate_filters(filters, schema):
+  """Checks that `filters` are well-formed `(column, op, value)` tuples."""
+  for f in filters:
+    if not isinstance(f, (tuple, list)) or len(f) != 3:
+      raise ValueError(f"Each filter must be a `(column, op, value)` tuple, "
+                       f"got {f}.")
+    column, op, _ = f
+    if op not in _SUPPORTED_FILTER_OPS:
+      raise ValueError(f"Unsupported filter op {op!r}. Supported ops are "
+                       f"{sorted(_SUPPORTED_FILTER_OPS)}.")
+    if schema.get_field_index(column) < 0:
+      raise ValueError(f"Filter column {column!r} is not in the file schema.")
+
+
+def _parquet_column_indices(parquet_file):
+  """Maps the paths of the Parquet leaf columns to their column index.
+
+  The columns of the Arrow schema are not numbered like the Parquet leaf
+  columns holding the statistics as soon as a column is nested, so the
+  statistics are looked up by column path.
+  """
+  parquet_schema = parquet_file.metadata.schema
+  return {
+      parquet_schema.column(i).path: i
+      for i in range(parquet_file.metadata.num_columns)
+  }
+
+
+def _row_group_may_match(metadata, column_indices, filters):
+  """Returns `False` if statistics prove no row of a row group matches."""
+  for column, op, value in filters:
+    if column not in column_indices:
+      # Nested columns have no statistics of their own.
+      continue
+    stats = metadata.column(column_indices[column]).statistics
+    if stats is None or not stats.has_min_max:
+      continue
+    lo, hi = stats.min, stats.max
+    if isinstance(lo, bytes):
+      if op == "in":
+        value = [compat.as_bytes(v) if isinstance(v, str) else v for v in value]
+      elif isinstance(value, str):
+        value = compat.as_bytes(value)
+    if op == "==" and (value < lo or value > hi):
+      return False
+    if op == "!=" and lo == hi == value:
+      return False
+    if op == "<" and lo >= value:
+      return False
+    if op == "<=" and lo > value:
+      return False
+    if op == ">" and hi <= value:
+      return False
+    if op == ">=" and hi < value:
+      return False
+    if op == "in" and all(v < lo or v > hi for v in value):
+      return False
+  return True
+
+
+def _filter_mask(columns, filters, num_rows):
+  """Returns a boolean mask of the rows that satisfy all `filters`."""
+  mask = np.ones([num_rows], dtype=bool)
+  for column, op, value in filters:
+    values = columns[column]
+    if values.dtype.kind in ("O", "S") and isinstance(value, str):
+      value = compat.as_bytes(value)
+    if op == "in":
+      value = [compat.as_bytes(v) if isinstance(v, str) else v for v in value]
+      mask &= np.isin(values, value)
+    else:
+      mask &= _COMPARISONS[op](values, value)
+  return mask
+
+
+def _read_row_groups(filename, columns, dtypes_by_column, filters,
+                     batch_size):
+  """Yields dicts of batched NumPy columns read from a single Parquet file."""
+  parquet_file = pq.ParquetFile(compat.as_str_any(filename))
+  column_indices = _parquet_column_indices(parquet_file)
+  filter_columns = [f[0] for f in filters if f[0] not in columns]
+  read_columns = list(columns) + sorted(set(filter_columns))
+  row_groups = [
+      i for i in range(parquet_file.num_row_groups)
+      if _row_group_may_match(parquet_file.metadata.row_group(i),
+                              column_indices, filters)
+  ]
+  if not row_groups:
+    return
+
+  if batch_size is None:
+    batches = (parquet_file.read_row_group(i, columns=read_columns)
+               for i in row_groups)
+  else:
+    batches = parquet_file.iter_batches(
+        batch_size=batch_size, row_groups=row_groups, columns=read_columns)
+  for batch in batches:
+    values = {
+        name: _column_to_numpy(batch.column(name), dtypes_by_column[name])
+        for name in read_columns
+    }
+    if filters:
+      mask = _filter_mask(values, filters, batch.num_rows)
+      if not mask.any():
+        continue
+      if not mask.all():
+        values = {name: value[mask] for name, value in values.items()}
+    yield {name: values[name] for name in columns}
+
+
+def make_parquet_dataset(file_pattern,
+                         columns=None,
+                         filters=None,
+                         batch_size=None,
+                         num_parallel_reads=None,
+                         deterministic=None):
+  """Reads Parquet files into a dataset of batched columns.
+
+  Unlike `tf.data.TFRecordDataset` followed by `tf.io.parse_example`, the
+  columns of a Parquet file are decoded a whole row group at a time straight
+  into dense tensors, and only the projected `columns` are read from disk.
+  Each element of the returned dataset is a dictionary mapping column names
+  to 1-D tensors holding a batch of rows. Simple `filters` are pushed down:
+  row groups whose statistics rule out every row are skipped without being
+  read, and the remaining rows are filtered after decoding.
+
+  For example:
+
+  ```python
+  dataset = make_parquet_dataset(
+      "/data/clicks-*.parquet",
+      columns=["user_id", "ad_id", "clicked"],
+      filters=[("country", "==", "NZ"), ("age", ">=", 18)],
+      batch_size=1024)
+  for batch in dataset:
+    print(batch["clicked"].shape)  # (1024,) for all but the last batches.
+  ```
+
+  Reading requires the `pyarrow` package. Null values are replaced by zero,
+  `False` or the empty string depending on the column type. Nested columns
+  are not supported.
+
+  Args:
+    file_pattern: File glob pattern, or list of glob patterns or file names.
+    columns: (optional) The names of the columns to read. Defaults to all the
+      columns of the first file.
+    filters: (optional) A list of `(column, op, value)` tuples, all of which a
+      row must satisfy. `op` is one of `==`, `!=`, `<`, `<=`, `>`, `>=` or
+      `in`, in which case `value` is a list of values. Filter columns do not
+      need to be in `columns`.
+    batch_size: (optional) The maximum number of rows per element. Defaults to
+      one element per row group.
+    num_parallel_reads: (optional) The number of files to read in parallel.
+      Defaults to reading files sequentially.
+    deterministic: (optional) When `num_parallel_reads` is set, whether the
+      order of elements across files must be deterministic.
+
+  Returns:
+    A `Dataset` of dictionaries of 1-D tensors.
+
+  Raises:
+    ImportError: If `pyarrow` is not installed.
+    ValueError: If no files match `file_pattern`, a column does not exist or
+      has an unsupported type, or a filter is malformed.
+  """
+  if pq is None:
+    raise ImportError(
+        "`make_parquet_dataset` requires the `pyarrow` package. Install it "
+        "with `pip install pyarrow`.")
+  patterns = file_pattern if isinstance(file_pattern, list) else [file_pattern]
+  filenames = []
+  for pattern in patterns:
+    filenames.extend(sorted(gfile.Glob(pattern)))
+  if not filenames:
+    raise ValueError(f"No files match `file_pattern` {file_pattern}.")
+  if batch_size is not None and batch_size <= 0:
+    raise ValueError(f"`batch_size` must be positive, got {batch_size}.")
+
+  schema = pq.read_schema(filenames[0])
+  if columns is None:
+    columns = list(schema.names)
+  columns = list(columns)
+  filters = [tuple(f) for f in filters or []]
+  _validate_filters(filters, schema)
+  dtypes_by_column = {}
+  for name in set(columns) | {f[0] for f in filters}:
+    index = schema.get_field_index(name)
+    if index < 0:
+      raise ValueError(f"Column {name!r} is not in the schema of "
+                       f"{filenames[0]}.")
+    dtypes_by_column[name] = _arrow_type_to_dtype(schema.field(index).type)
+  output_signature = {
+      name: tensor_spec.TensorSpec([None], dtypes_by_column[name], name=name)
+      for name in columns
+  }
+
+  def generator(filename):
+    return _read_row_groups(filename, columns, dtypes_by_column, filters,
+                            batch_size)
+
+  def file_dataset(filename):
+    return dataset_ops.Dataset.from_generator(
+        generator, args=(filename,), output_signature=output_signature)
+
+  filename_dataset = dataset_ops.Dataset.from_tensor_slices(filenames)
+  if num_parallel_reads is None:
+    return filename_dataset.flat_map(file_dataset)
+  return filename_dataset.interleave(
+      file_dataset,
+      cycle_length=num_parallel_reads,
+      num_parallel_calls=num_parallel_reads,
+      deterministic=deterministic)
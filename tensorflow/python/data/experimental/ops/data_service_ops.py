@@ -47,6 +47,11 @@ _DISTRIBUTED_EPOCH = "distributed_epoch"
 nested_structure_coder = lazy_loader.LazyLoader(
     "nested_structure_coder", globals(),
     "tensorflow.python.saved_model.nested_structure_coder")
+# Only loaded by jobs using the shared memory protocol.
+local_data_service = lazy_loader.LazyLoader(
+    "local_data_service", globals(),
+    "tensorflow.python.data.experimental.ops.local_data_service")
+_SHARED_MEMORY_PROTOCOL = "shm"
 
 
 @tf_export("data.experimental.service.ShardingPolicy")
@@ -513,6 +518,33 @@ def _distribute(processing_mode,
   """
   processing_mode = _get_validated_sharding_policy(processing_mode)
   _validate_compression(compression)
+  protocol, address = (
+      service if isinstance(service, tuple) else _parse_service(service))
+  if protocol == _SHARED_MEMORY_PROTOCOL:
+    if consumer_index is not None or num_consumers is not None:
+      raise ValueError("Coordinated reads are not supported by the shared "
+                       "memory tf.data service.")
+    # There is a single local worker per job, which produces every element
+    # once, so only the processing modes without static sharding apply.
+    if processing_mode not in (ShardingPolicy.OFF, ShardingPolicy.DYNAMIC):
+      raise ValueError(
+          "The shared memory tf.data service only supports the "
+          "`ShardingPolicy.OFF` and `ShardingPolicy.DYNAMIC` processing modes. "
+          f"Got {processing_mode!r}.")
+    unsupported = {
+        "cross_trainer_cache": (cross_trainer_cache, None),
+        "max_outstanding_requests": (max_outstanding_requests, None),
+        "task_refresh_interval_hint_ms": (task_refresh_interval_hint_ms, None),
+        "data_transfer_protocol": (data_transfer_protocol, None),
+        "compression": (compression, COMPRESSION_AUTO),
+        "target_workers": (target_workers, "AUTO"),
+    }
+    for name, (value, default) in unsupported.items():
+      if value != default:
+        raise ValueError(f"`{name}` is not supported by the shared memory "
+                         f"tf.data service. Got {value!r}.")
+    return functools.partial(
+        local_data_service.distribute, directory=address, job_name=job_name)
 
   def _apply_fn(dataset):  # pylint: disable=missing-docstring
     dataset_id = _register_dataset(service, dataset, compression=compression)
@@ -699,6 +731,33 @@ def distribute(processing_mode,
   the dataset have infinite cardinality. You can get this by adding `.repeat()`
   at the end of the dataset definition.
 
+  **Shared memory jobs**
+
+  When all consumers of a job run on the same host, the dispatcher and the
+  workers can be replaced by shared memory: pass a directory on a memory file
+  system as `service`, with the `"shm"` protocol.
+
+  ```
+  dataset = dataset.apply(tf.data.experimental.service.distribute(
+      "distributed_epoch", "shm:///dev/shm/tf_data", job_name="train"))
+  ```
+
+  The first process to read from the job iterates the input dataset in a
+  background thread and publishes its elements to a ring buffer in the
+  directory. All processes reading from the job, including that one, take
+  elements from the ring buffer on a first-come first-served basis, so the
+  input is processed once for the whole host. Once a job has ended and all of
+  its consumers are done, its files are deleted, and the next iteration with
+  the same `job_name` starts a new job. If the process producing a job dies,
+  the job fails after a minute without heartbeats.
+
+  Shared memory jobs are only supported on platforms with `flock`, in eager
+  mode, for datasets of dense tensors, and with the `"parallel_epochs"` or
+  `"distributed_epoch"` processing modes. The arguments that configure the
+  dispatcher or the workers, such as `consumer_index`, `num_consumers`,
+  `compression`, `target_workers` and `cross_trainer_cache`, must be left
+  unset.
+
   **Keras and Distribution Strategies**
 
   The dataset produced by the `distribute` transformation can be passed to
@@ -727,6 +786,9 @@ def distribute(processing_mode,
       `[<protocol>://]<address>`, where `<address>` identifies the dispatcher
         address and `<protocol>` can optionally be used to override the default
         protocol to use. If it's a tuple, it should be (protocol, address).
+        With the `"shm"` protocol, `<address>` is a local directory through
+        which the processes of a host share jobs in shared memory instead
+        (see **Shared memory jobs** above).
     job_name: (Optional.) The name of the job. If provided, it must be a
       non-empty string. This argument makes it possible for multiple datasets to
       share the same job. The default behavior is that the dataset creates
@@ -20,7 +20,12 @@ from tensorflow.python.data.util import structure
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_spec
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import check_ops
+from tensorflow.python.ops import functional_ops
 from tensorflow.python.ops import gen_experimental_dataset_ops as ged_ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops.ragged import ragged_tensor
 from tensorflow.python.util import deprecation
 from tensorflow.python.util.tf_export import tf_export
 
@@ -257,6 +262,243 @@ def bucket_by_sequence_length(element_length_func,
   return _apply_fn
 
 
+def _token_budget_boundaries(max_tokens, max_padding_ratio):
+  """Returns bucket boundaries bounding the padding of each element.
+
+  An element of length `n` in the bucket `[lower, upper)` is padded to at most
+  `upper - 1`, so its padding fraction is below `max_padding_ratio` as long as
+  `upper - 1 <= lower / (1 - max_padding_ratio)`. The boundaries thus grow
+  geometrically, up to the first boundary above `max_tokens`.
+
+  Args:
+    max_tokens: The token budget of a batch.
+    max_padding_ratio: The maximum fraction of padding of an element.
+
+  Returns:
+    A list of increasing boundaries, starting at 1.
+  """
+  boundaries = [1]
+  while boundaries[-1] <= max_tokens:
+    lower = boundaries[-1]
+    boundaries.append(
+        max(lower + 1, int(lower / (1.0 - max_padding_ratio)) + 1))
+  return boundaries
+
+
+def bucket_by_token_budget(element_length_func,
+                           max_tokens,
+                           bucket_boundaries=None,
+                           max_padding_ratio=0.1,
+                           padded_shapes=None,
+                           padding_values=None,
+                           drop_remainder=False):
+  """Batches elements of similar lengths under a budget of tokens per batch.
+
+  Unlike `tf.data.Dataset.bucket_by_sequence_length`, which uses a fixed batch
+  size per bucket, the batch size of each bucket is chosen so that a padded
+  batch holds at most `max_tokens` tokens: buckets of short elements get
+  large batches and buckets of long elements small ones, which keeps the
+  memory and compute of every batch about constant.
+
+  Unless `bucket_boundaries` are given, they are derived from
+  `max_padding_ratio`: the buckets are made narrow enough that no element is
+  padded by more than that fraction of its padded length, so the fraction of
+  padding in the batches is at most `max_padding_ratio`.
+
+  >>> dataset = tf.data.Dataset.range(1, 9).map(lambda n: tf.ones([n]))
+  >>> dataset = dataset.apply(
+  ...     bucket_by_token_budget(lambda x: tf.shape(x)[0], max_tokens=8,
+  ...                            max_padding_ratio=0.5))
+  >>> for batch in dataset.as_numpy_iterator():
+  ...   print(batch.shape)
+  (1, 3)
+  (1, 4)
+  (1, 5)
+  (1, 6)
+  (1, 7)
+  (1, 8)
+  (2, 2)
+
+  The budget can also be expressed in bytes, by having `element_length_func`
+  return the size of an element in bytes.
+
+  Args:
+    element_length_func: A function mapping an element to its length, a
+      `tf.int32` or `tf.int64` scalar, in the unit of `max_tokens`.
+    max_tokens: The maximum number of (padded) tokens of a batch. Elements
+      longer than `max_tokens` are batched alone.
+    bucket_boundaries: (Optional.) A list of increasing upper length
+      boundaries of the buckets. Overrides `max_padding_ratio`.
+    max_padding_ratio: (Optional.) The maximum fraction of padding of an
+      element, which determines the bucket boundaries.
+    padded_shapes: (Optional.) See `tf.data.Dataset.padded_batch`.
+    padding_values: (Optional.) See `tf.data.Dataset.padded_batch`.
+    drop_remainder: (Optional.) Whether to drop the last batch of each bucket
+      if it has fewer elements than the batch size of the bucket.
+
+  Returns:
+    A `Dataset` transformation function, which can be passed to
+    `tf.data.Dataset.apply`.
+
+  Raises:
+    ValueError: If `max_tokens` is not positive or `max_padding_ratio` is not
+      in `(0, 1)`.
+  """
+  if max_tokens < 1:
+    raise ValueError(f"`max_tokens` must be positive, got {max_tokens}.")
+  if bucket_boundaries is None:
+    if not 0 < max_padding_ratio < 1:
+      raise ValueError(f"`max_padding_ratio` must be in (0, 1), got "
+                       f"{max_padding_ratio}.")
+    bucket_boundaries = _token_budget_boundaries(max_tokens, max_padding_ratio)
+  bucket_boundaries = list(bucket_boundaries)
+  # A bucket `[lower, upper)` pads elements to at most `upper - 1` tokens.
+  bucket_batch_sizes = [
+      max(1, max_tokens // max(1, upper - 1)) for upper in bucket_boundaries
+  ] + [1]
+
+  def _apply_fn(dataset):
+    return dataset.bucket_by_sequence_length(
+        element_length_func=element_length_func,
+        bucket_boundaries=bucket_boundaries,
+        bucket_batch_sizes=bucket_batch_sizes,
+        padded_shapes=padded_shapes,
+        padding_values=padding_values,
+        drop_remainder=drop_remainder)
+
+  return _apply_fn
+
+
+def _pack_window(window, row_length):
+  """Packs a ragged batch of sequences into rows of `row_length` tokens."""
+  components = []
+  for component in nest.flatten(window):
+    if not isinstance(component, ragged_tensor.RaggedTensor):
+      # Sequences of a fixed length are batched as dense tensors.
+      component = ragged_tensor.RaggedTensor.from_tensor(component)
+    components.append(component[:, :row_length])
+  lengths = components[0].row_lengths()
+  for component in components[1:]:
+    check = check_ops.assert_equal(
+        component.row_lengths(), lengths,
+        message="All components of an element must have the same length.")
+    with ops.control_dependencies([check]):
+      lengths = array_ops.identity(lengths)
+
+  zero = array_ops.zeros([], dtypes.int64)
+
+  def assign_row(previous, length):
+    row, _, end = previous
+    starts_row = end + length > row_length
+    row += math_ops.cast(starts_row, dtypes.int64)
+    start = array_ops.where_v2(starts_row, zero, end)
+    return row, start, start + length
+
+  # The row of each sequence and its offset in the row.
+  rows, starts, _ = functional_ops.scan(
+      assign_row, lengths, initializer=(zero, zero, zero))
+  num_rows = rows[-1] + 1
+  # The 1-based index of each sequence within its row.
+  segments = math_ops.range(array_ops.size(rows, out_type=dtypes.int64)) - (
+      array_ops.searchsorted(rows, rows, side="left", out_type=dtypes.int64))
+  segments += 1
+
+  # The sequence of each token and its position in the sequence.
+  sequence_ids = components[0].value_rowids()
+  positions = math_ops.range(
+      array_ops.size(sequence_ids, out_type=dtypes.int64)) - (
+          array_ops.gather(components[0].row_splits, sequence_ids))
+  indices = array_ops.stack(
+      [array_ops.gather(rows, sequence_ids),
+       array_ops.gather(starts, sequence_ids) + positions], axis=1)
+
+  def scatter(values):
+    shape = array_ops.concat(
+        [[num_rows, row_length],
+         array_ops.shape(values, out_type=dtypes.int64)[1:]], axis=0)
+    return array_ops.scatter_nd(indices, values, shape)
+
+  packed = [scatter(component.flat_values) for component in components]
+  return (nest.pack_sequence_as(window, packed),
+          scatter(array_ops.gather(segments, sequence_ids)),
+          scatter(positions))
+
+
+def pack_sequences(row_length, packing_window=256):
+  """Packs consecutive variable-length sequences into fixed-length rows.
+
+  Short sequences are concatenated into rows of exactly `row_length` tokens,
+  which removes most of the padding of batches of variable-length sequences.
+  Each output element is a tuple `(packed, segment_ids, positions)`:
+
+    * `packed` has the structure of the input elements, with each component
+      of shape `[row_length, ...]`.
+    * `segment_ids` holds, for each token, the 1-based index of its sequence
+      within the row, and 0 for padding. It can be used to mask attention
+      between the sequences of a row.
+    * `positions` holds the position of each token within its sequence.
+
+  >>> dataset = tf.data.Dataset.from_generator(
+  ...     lambda: [[1, 2, 3], [4, 5], [6], [7, 8, 9, 10]],
+  ...     output_signature=tf.TensorSpec([None], tf.int32))
+  >>> dataset = dataset.apply(pack_sequences(row_length=6))
+  >>> for packed, segment_ids, positions in dataset.as_numpy_iterator():
+  ...   print(packed, segment_ids, positions)
+  [1 2 3 4 5 6] [1 1 1 2 2 3] [0 1 2 0 1 0]
+  [ 7  8  9 10  0  0] [1 1 1 1 0 0] [0 1 2 3 0 0]
+
+  Sequences are packed greedily, in order, among windows of
+  `packing_window` consecutive sequences; sequences longer than `row_length`
+  are truncated. Packed rows can then be batched with `batch`, e.g. to
+  `max_tokens // row_length` rows per batch.
+
+  Args:
+    row_length: The number of tokens of a row.
+    packing_window: (Optional.) The number of consecutive sequences packed
+      together.
+
+  Returns:
+    A `Dataset` transformation function, which can be passed to
+    `tf.data.Dataset.apply`.
+
+  Raises:
+    ValueError: If an argument is not positive.
+    TypeError: If the components of the elements are not dense tensors of
+      rank 1 or more with fixed inner dimensions.
+  """
+  if row_length < 1:
+    raise ValueError(f"`row_length` must be positive, got {row_length}.")
+  if packing_window < 1:
+    raise ValueError(
+        f"`packing_window` must be positive, got {packing_window}.")
+
+  def _apply_fn(dataset):  # pylint: disable=missing-docstring
+    for spec in nest.flatten(dataset.element_spec):
+      if (not isinstance(spec, tensor_spec.TensorSpec) or
+          spec.shape.rank in (None, 0) or
+          not spec.shape[1:].is_fully_defined()):
+        raise TypeError(f"`pack_sequences` requires elements of dense "
+                        f"sequences with fixed inner dimensions, found "
+                        f"{spec}.")
+    element_spec = dataset.element_spec
+
+    def set_shapes(packed, segment_ids, positions):
+      for component, spec in zip(
+          nest.flatten(packed), nest.flatten(element_spec)):
+        component.set_shape([row_length] + spec.shape[1:].as_list())
+      segment_ids.set_shape([row_length])
+      positions.set_shape([row_length])
+      return packed, segment_ids, positions
+
+    return dataset.ragged_batch(packing_window).map(
+        lambda *window: _pack_window(  # pylint: disable=g-long-lambda
+            window[0] if len(window) == 1 else window, row_length),
+        num_parallel_calls=dataset_ops.AUTOTUNE,
+        deterministic=True).unbatch().map(set_shapes)
+
+  return _apply_fn
+
+
 class _GroupByReducerDataset(dataset_ops.UnaryDataset):
   """A `Dataset` that groups its input and performs a reduction."""
 
@@ -0,0 +1,482 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""A shared-memory transport for the tf.data service on a single host.
+
+With `service="shm://<directory>"`, `tf.data.experimental.service.distribute`
+does not connect to a dispatcher. Instead, the processes on the host that
+consume the same job rendezvous in `<directory>`, which should be on a memory
+file system such as `/dev/shm`:
+
+* The first consumer of a job becomes its worker: it iterates the input
+  dataset in a background thread and publishes serialized elements to a ring
+  buffer memory-mapped from `<directory>/<job_name>.ring`.
+* Every consumer, including the worker, takes elements from the ring buffer
+  on a first-come first-served basis, so each element is produced once and
+  consumed once, as with the `"distributed_epoch"` processing mode.
+
+The ring buffer header is updated under an exclusive `flock` of the ring
+file, which works between unrelated processes, and of a lock shared by the
+threads of a process, which share the file descriptor of the `flock`. The
+elements are serialized as `TensorProto`s, which unlike pickles cannot run
+code when they are parsed. The header also counts the consumers
+attached to the job and records a heartbeat of the worker. The last consumer
+to detach from a job that ended deletes the job's files, so that the next run
+with the same job name starts a new job, and consumers fail the job when its
+worker stops beating, for example because its process died.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+
+from tensorflow.core.framework import tensor_pb2
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.data.util import nest
+from tensorflow.python.eager import context
+from tensorflow.python.framework import errors
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.framework import tensor_util
+from tensorflow.python.platform import tf_logging as logging
+
+try:
+  import fcntl  # pylint: disable=g-import-not-at-top
+except ImportError:
+  # Not available on Windows, where shared memory jobs are not supported.
+  fcntl = None
+
+SHARED_MEMORY_PROTOCOL = "shm"
+
+# The default size of a job's ring buffer.
+DEFAULT_BUFFER_BYTES = 256 * 1024 * 1024
+
+# Header: capacity, bytes written, bytes read, state, number of attached
+# consumers, whether the job files were deleted, and the time of the last
+# heartbeat of the worker.
+_HEADER = struct.Struct("<QQQQQQd")
+_DATA_OFFSET = 64
+_LENGTH = struct.Struct("<Q")
+# A length marking that the rest of the buffer is unused until it wraps.
+_WRAP_MARKER = 2**64 - 1
+
+_RUNNING = 0
+_FINISHED = 1
+_FAILED = 2
+_CANCELLED = 3
+
+_MIN_POLL_SECONDS = 1e-4
+_MAX_POLL_SECONDS = 1e-2
+
+# How often the worker of a job beats, and how long consumers wait for a
+# heartbeat before they consider the worker dead.
+_HEARTBEAT_INTERVAL_SECONDS = 1.0
+_HEARTBEAT_TIMEOUT_SECONDS = 60.0
+
+
+def _wait(attempt):
+  time.sleep(min(_MIN_POLL_SECONDS * 2**min(attempt, 10), _MAX_POLL_SECONDS))
+
+
+class _RingBuffer(object):
+  """A multi-process byte record queue in a memory-mapped file."""
+
+  def __init__(self, path):
+    self._fd = os.open(path, os.O_RDWR)
+    try:
+      self._map = mmap.mmap(self._fd, 0)
+    except BaseException:
+      os.close(self._fd)
+      raise
+    self._capacity = _HEADER.unpack_from(self._map, 0)[0]
+    # `flock` locks are held by the open file, so they do not exclude the
+    # threads of the process sharing `self._fd`, such as the heartbeat.
+    self._thread_lock = threading.Lock()
+
+  @classmethod
+  def create(cls, path, capacity):
+    """Atomically creates an empty ring buffer file at `path`."""
+    temp_path = "%s.tmp.%s" % (path, uuid.uuid4().hex)
+    with open(temp_path, "wb") as f:
+      f.truncate(_DATA_OFFSET + capacity)
+      f.write(_HEADER.pack(capacity, 0, 0, _RUNNING, 0, 0, time.time()))
+    os.rename(temp_path, path)
+    return cls(path)
+
+  def _lock(self):
+    self._thread_lock.acquire()
+    try:
+      fcntl.flock(self._fd, fcntl.LOCK_EX)
+    except BaseException:
+      self._thread_lock.release()
+      raise
+
+  def _unlock(self):
+    try:
+      fcntl.flock(self._fd, fcntl.LOCK_UN)
+    finally:
+      self._thread_lock.release()
+
+  def _header(self):
+    return _HEADER.unpack_from(self._map, 0)
+
+  def _update(self, **fields):
+    """Updates fields of the header. Must be called under the lock."""
+    header = dict(
+        zip(("capacity", "written", "read", "state", "consumers", "deleted",
+             "heartbeat"), self._header()))
+    header.update(fields)
+    _HEADER.pack_into(self._map, 0, header["capacity"], header["written"],
+                      header["read"], header["state"], header["consumers"],
+                      header["deleted"], header["heartbeat"])
+
+  def _is_worker_alive(self):
+    heartbeat = self._header()[6]
+    return time.time() - heartbeat < _HEARTBEAT_TIMEOUT_SECONDS
+
+  def _padding(self, position, length):
+    """Returns the bytes skipped before a record of `length` at `position`."""
+    remaining = self._capacity - position % self._capacity
+    return 0 if remaining >= _LENGTH.size + length else remaining
+
+  def put(self, record):
+    """Appends `record`, waiting for free space. Returns `False` if closed."""
+    size = _LENGTH.size + len(record)
+    if size > self._capacity:
+      raise ValueError(
+          f"An element of {len(record)} bytes does not fit in the shared "
+          f"memory buffer of {self._capacity} bytes. Increase `buffer_bytes`.")
+    attempt = 0
+    while True:
+      self._lock()
+      try:
+        capacity, written, read, state = self._header()[:4]
+        if state != _RUNNING:
+          return False
+        if written == read and written % capacity:
+          # The buffer is empty, so the next record can start at the
+          # beginning of the buffer. This guarantees that any record fitting
+          # in the buffer can eventually be written.
+          written = read = written + capacity - written % capacity
+        padding = self._padding(written, len(record))
+        if padding + size <= capacity - (written - read):
+          if padding >= _LENGTH.size:
+            _LENGTH.pack_into(self._map,
+                              _DATA_OFFSET + written % capacity, _WRAP_MARKER)
+          written += padding
+          start = _DATA_OFFSET + written % capacity
+          _LENGTH.pack_into(self._map, start, len(record))
+          self._map[start + _LENGTH.size:start + size] = record
+          self._update(written=written + size, read=read)
+          return True
+      finally:
+        self._unlock()
+      _wait(attempt)
+      attempt += 1
+
+  def get(self):
+    """Takes the oldest record, waiting for one. Returns `None` at the end."""
+    attempt = 0
+    while True:
+      self._lock()
+      try:
+        capacity, written, read, state = self._header()[:4]
+        if state in (_FAILED, _CANCELLED):
+          return None
+        if read < written:
+          start = read % capacity
+          if capacity - start < _LENGTH.size:
+            read += capacity - start
+            start = 0
+          (length,) = _LENGTH.unpack_from(self._map, _DATA_OFFSET + start)
+          if length == _WRAP_MARKER:
+            read += capacity - start
+            start = 0
+            (length,) = _LENGTH.unpack_from(self._map, _DATA_OFFSET)
+          begin = _DATA_OFFSET + start + _LENGTH.size
+          record = self._map[begin:begin + length]
+          self._update(read=read + _LENGTH.size + length)
+          return record
+        if state == _FINISHED:
+          return None
+        if not self._is_worker_alive():
+          logging.error("The worker of the tf.data shared memory job stopped "
+                        "sending heartbeats.")
+          self._update(state=_FAILED)
+          return None
+      finally:
+        self._unlock()
+      _wait(attempt)
+      attempt += 1
+
+  def state(self):
+    return self._header()[3]
+
+  def set_state(self, state):
+    self._lock()
+    try:
+      self._update(state=state)
+    finally:
+      self._unlock()
+
+  def beat(self):
+    """Records that the worker is alive."""
+    self._lock()
+    try:
+      self._update(heartbeat=time.time())
+    finally:
+      self._unlock()
+
+  def attach(self, job):
+    """Registers a consumer of `job`.
+
+    Args:
+      job: The `_LocalJob` whose ring buffer this is.
+
+    Returns:
+      Whether the consumer can read from the job. If not, the job ended and
+      its files are, or will be, deleted.
+    """
+    self._lock()
+    try:
+      _, written, read, state, consumers, deleted, _ = self._header()
+      if deleted:
+        return False
+      if ((state == _RUNNING and self._is_worker_alive()) or
+          (state == _FINISHED and read < written)):
+        self._update(consumers=consumers + 1)
+        return True
+      if state == _RUNNING:
+        logging.warning("Replacing tf.data shared memory job %s, whose "
+                        "worker stopped sending heartbeats.", job.ring_path)
+        self._update(state=_FAILED)
+      if not consumers or not self._is_worker_alive():
+        # Consumers that did not detach within the heartbeat timeout of the
+        # end of the job are assumed to be dead.
+        self._update(deleted=1)
+        job.delete()
+      return False
+    finally:
+      self._unlock()
+
+  def detach(self, job):
+    """Unregisters a consumer, deleting the files of `job` if it ended."""
+    self._lock()
+    try:
+      _, _, _, state, consumers, deleted, _ = self._header()
+      consumers = max(consumers - 1, 0)
+      self._update(consumers=consumers)
+      if state != _RUNNING and not consumers and not deleted:
+        self._update(deleted=1)
+        job.delete()
+    finally:
+      self._unlock()
+
+  def close(self):
+    self._map.close()
+    os.close(self._fd)
+
+
+class _LocalJob(object):
+  """The files through which the processes of a job rendezvous."""
+
+  def __init__(self, directory, job_name):
+    self.ring_path = os.path.join(directory, job_name + ".ring")
+    self.claim_path = os.path.join(directory, job_name + ".claim")
+    self.error_path = os.path.join(directory, job_name + ".error")
+
+  def claim(self):
+    """Returns whether this process won the election to be the job's worker."""
+    try:
+      os.close(os.open(self.claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+      return True
+    except FileExistsError:
+      return False
+
+  def _is_claim_stale(self):
+    """Whether the worker died between claiming the job and creating it."""
+    try:
+      claimed = os.stat(self.claim_path).st_mtime
+    except FileNotFoundError:
+      return False
+    return (not os.path.exists(self.ring_path) and
+            time.time() - claimed > _HEARTBEAT_TIMEOUT_SECONDS)
+
+  def _open(self):
+    try:
+      return _RingBuffer(self.ring_path)
+    except FileNotFoundError:
+      return None
+
+  def join(self, start_worker):
+    """Attaches to the job, first becoming its worker if nobody else is.
+
+    Args:
+      start_worker: A function starting the worker of the job, called when
+        this process wins the election to be the worker.
+
+    Returns:
+      The attached `_RingBuffer` of the job.
+    """
+    attempt = 0
+    while True:
+      if self.claim():
+        start_worker()
+      ring = self._open()
+      if ring is not None:
+        if ring.attach(self):
+          return ring
+        ring.close()
+      elif self._is_claim_stale():
+        logging.warning("Replacing tf.data shared memory job %s, whose "
+                        "worker did not start.", self.claim_path)
+        _remove(self.claim_path)
+      _wait(attempt)
+      attempt += 1
+
+  def error(self):
+    try:
+      with open(self.error_path) as f:
+        return f.read()
+    except FileNotFoundError:
+      return "The worker of the job failed or stopped responding."
+
+  def delete(self):
+    # The claim is removed last, so that a new worker can only claim the job
+    # once the files of the previous one are gone.
+    for path in (self.ring_path, self.error_path, self.claim_path):
+      _remove(path)
+
+
+def _remove(path):
+  try:
+    os.remove(path)
+  except FileNotFoundError:
+    pass
+
+
+def _serialize(element):
+  """Serializes the components of `element` as length-prefixed protos."""
+  chunks = []
+  for component in nest.flatten(element):
+    proto = tensor_util.make_tensor_proto(component.numpy())
+    serialized = proto.SerializeToString()
+    chunks.append(_LENGTH.pack(len(serialized)))
+    chunks.append(serialized)
+  return b"".join(chunks)
+
+
+def _deserialize(record):
+  """Returns the flat components of an element serialized by `_serialize`."""
+  components = []
+  position = 0
+  while position < len(record):
+    (length,) = _LENGTH.unpack_from(record, position)
+    position += _LENGTH.size
+    proto = tensor_pb2.TensorProto.FromString(
+        record[position:position + length])
+    components.append(tensor_util.MakeNdarray(proto))
+    position += length
+  return components
+
+
+def _beat(ring, done):
+  """Beats on behalf of the worker of a job until `done` is set."""
+  while not done.wait(_HEARTBEAT_INTERVAL_SECONDS):
+    ring.beat()
+
+
+def _produce(dataset, job, buffer_bytes):
+  """Publishes the elements of `dataset` to the ring buffer of `job`."""
+  ring = _RingBuffer.create(job.ring_path, buffer_bytes)
+  done = threading.Event()
+  heartbeat = threading.Thread(target=_beat, args=(ring, done), daemon=True)
+  heartbeat.start()
+  try:
+    for element in dataset:
+      if not ring.put(_serialize(element)):
+        return
+    ring.set_state(_FINISHED)
+  except Exception as e:  # pylint: disable=broad-except
+    logging.error("tf.data shared memory worker failed: %s", e)
+    with open(job.error_path, "w") as f:
+      f.write(str(e))
+    ring.set_state(_FAILED)
+  finally:
+    done.set()
+    heartbeat.join()
+    ring.close()
+
+
+def distribute(dataset, directory, job_name=None,
+               buffer_bytes=DEFAULT_BUFFER_BYTES):
+  """Returns a dataset reading `dataset` through a shared memory job.
+
+  Args:
+    dataset: The `tf.data.Dataset` to produce.
+    directory: The directory in which the processes of the job rendezvous.
+    job_name: (Optional.) The name of the job shared by the consumers. By
+      default, every iteration creates an anonymous job read by this process
+      only.
+    buffer_bytes: (Optional.) The size of the ring buffer of a job.
+
+  Returns:
+    A `tf.data.Dataset` with the same elements as `dataset`.
+
+  Raises:
+    NotImplementedError: If the platform does not support `flock`.
+    RuntimeError: If not executing eagerly.
+    TypeError: If the elements of `dataset` are not dense tensors.
+  """
+  if fcntl is None:
+    raise NotImplementedError("The shared memory tf.data service is not "
+                              "supported on this platform.")
+  if not context.executing_eagerly():
+    raise RuntimeError("The shared memory tf.data service is only supported "
+                       "in eager mode.")
+  element_spec = dataset.element_spec
+  for spec in nest.flatten(element_spec):
+    if not isinstance(spec, tensor_spec.TensorSpec):
+      raise TypeError(f"The shared memory tf.data service only supports "
+                      f"datasets of dense tensors, found {spec}.")
+  os.makedirs(directory, exist_ok=True)
+
+  def generator():
+    job = _LocalJob(directory, job_name or "anonymous_" + uuid.uuid4().hex)
+
+    def start_worker():
+      threading.Thread(
+          target=_produce, args=(dataset, job, buffer_bytes),
+          daemon=True).start()
+
+    ring = job.join(start_worker)
+    try:
+      while True:
+        record = ring.get()
+        if record is None:
+          break
+        yield nest.pack_sequence_as(element_spec, _deserialize(record))
+      if ring.state() == _FAILED:
+        raise errors.UnknownError(None, None, job.error())
+    finally:
+      if job_name is None:
+        # Stops the worker of an anonymous job that was not read to the end.
+        ring.set_state(_CANCELLED)
+      ring.detach(job)
+      ring.close()
+
+  return dataset_ops.Dataset.from_generator(
+      generator, output_signature=element_spec)
@@ -0,0 +1,249 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Python API for running Python map functions in worker processes."""
+
+from concurrent import futures
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import threading
+import weakref
+
+import numpy as np
+
+from tensorflow.python.data.util import nest
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.ops import script_ops
+
+# Arrays at least this large are passed to and from the workers through
+# shared memory instead of being pickled through a pipe.
+_SHARED_MEMORY_MIN_BYTES = 64 * 1024
+
+# The map function of the current worker process, set by `_init_worker`.
+_worker_map_func = None
+
+
+class _SharedArray(object):
+  """A NumPy array in a shared memory block, to be read once."""
+
+  def __init__(self, array):
+    self._shape = array.shape
+    self._dtype = array.dtype
+    block = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    try:
+      np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+    except BaseException:
+      block.close()
+      block.unlink()
+      raise
+    self._name = block.name
+    block.close()
+
+  def read(self):
+    """Returns a copy of the array and releases the shared memory block."""
+    block = shared_memory.SharedMemory(name=self._name)
+    try:
+      return np.array(
+          np.ndarray(self._shape, self._dtype, buffer=block.buf), copy=True)
+    finally:
+      block.close()
+      block.unlink()
+
+
+def _pack(arrays):
+  """Moves large numeric arrays of `arrays` to shared memory."""
+  return [
+      _SharedArray(array) if (array.dtype != np.object_ and
+                              array.nbytes >= _SHARED_MEMORY_MIN_BYTES)
+      else array for array in arrays
+  ]
+
+
+def _unpack(values):
+  return [v.read() if isinstance(v, _SharedArray) else v for v in values]
+
+
+def _init_worker(map_func):
+  global _worker_map_func
+  _worker_map_func = map_func
+
+
+def _run_in_worker(input_structure, packed_inputs, output_structure,
+                   output_dtypes):
+  """Applies the worker's map function to one element."""
+  inputs = nest.pack_sequence_as(input_structure, _unpack(packed_inputs))
+  # As in `tf.data.Dataset.map`, the components of tuples are passed as
+  # positional arguments.
+  if type(inputs) is tuple:  # pylint: disable=unidiomatic-typecheck
+    outputs = _worker_map_func(*inputs)
+  else:
+    outputs = _worker_map_func(inputs)
+  try:
+    flat_outputs = nest.flatten_up_to(output_structure, outputs)
+  except (TypeError, ValueError) as e:
+    raise TypeError(
+        f"`map_func` returned a value that did not match `output_signature`: "
+        f"{outputs}.") from e
+  arrays = []
+  for output, dtype in zip(flat_outputs, output_dtypes):
+    try:
+      arrays.append(np.asarray(output, dtype=dtype))
+    except (TypeError, ValueError) as e:
+      raise TypeError(
+          f"`map_func` returned a value that could not be converted to the "
+          f"type of `output_signature`. The expected type was "
+          f"{np.dtype(dtype).name}, but the value was {output}.") from e
+  return _pack(arrays)
+
+
+class _WorkerPool(object):
+  """A lazily started pool of processes running `map_func`."""
+
+  def __init__(self, map_func, num_workers, start_method):
+    self._map_func = map_func
+    self._num_workers = num_workers
+    self._start_method = start_method
+    self._executor = None
+    self._lock = threading.Lock()
+
+  def _get_executor(self):
+    with self._lock:
+      if self._executor is None:
+        self._executor = futures.ProcessPoolExecutor(
+            max_workers=self._num_workers,
+            mp_context=multiprocessing.get_context(self._start_method),
+            initializer=_init_worker,
+            initargs=(self._map_func,))
+        weakref.finalize(self, self._executor.shutdown, wait=False)
+      return self._executor
+
+  def run(self, input_structure, inputs, output_structure, output_dtypes):
+    """Runs `map_func` on `inputs` in a worker; releases the GIL to wait."""
+    packed_inputs = _pack(inputs)
+    future = self._get_executor().submit(_run_in_worker, input_structure,
+                                         packed_inputs, output_structure,
+                                         output_dtypes)
+    try:
+      return _unpack(future.result())
+    except BaseException:
+      # Make sure the shared memory of the inputs is released if the worker
+      # failed before reading them.
+      for value in packed_inputs:
+        if isinstance(value, _SharedArray):
+          try:
+            value.read()
+          except FileNotFoundError:
+            pass
+      raise
+
+
+def process_map(map_func,
+                output_signature,
+                num_workers=None,
+                deterministic=True,
+                start_method="spawn"):
+  """Maps a Python function over a dataset in a pool of worker processes.
+
+  Python functions run by `tf.data.Dataset.map` through `tf.py_function` or
+  `tf.numpy_function` hold the GIL, so they do not run faster with more
+  `num_parallel_calls`. `process_map` instead runs `map_func` in a pool of
+  `num_workers` processes. Each element is passed to `map_func` as NumPy
+  arrays, and its result is converted back to tensors of the types of
+  `output_signature`; large arrays move between processes through shared
+  memory.
+
+  ```python
+  def augment(image, label):
+    return heavy_numpy_augmentation(image), label
+
+  dataset = dataset.apply(
+      process_map(
+          augment,
+          output_signature=(tf.TensorSpec([224, 224, 3], tf.float32),
+                            tf.TensorSpec([], tf.int64)),
+          num_workers=8))
+  ```
+
+  `map_func` is sent to the workers by pickling, so it must be picklable,
+  e.g. a function defined at the top level of a module. With the default
+  `"spawn"` start method, the workers import the modules that `map_func`
+  needs but not the state of the calling process.
+
+  Args:
+    map_func: A Python function mapping the NumPy components of an element
+      to a (nested) structure of values convertible to NumPy arrays. If the
+      elements are tuples, their components are passed as positional
+      arguments.
+    output_signature: A (nested) structure of `tf.TensorSpec` objects
+      describing the output of `map_func`.
+    num_workers: (Optional.) The number of worker processes, which is also
+      the number of elements processed in parallel. Defaults to the number of
+      CPUs.
+    deterministic: (Optional.) Whether the outputs must be produced in the
+      order of the inputs. Defaults to `True`.
+    start_method: (Optional.) The `multiprocessing` start method of the
+      workers. Defaults to `"spawn"`, since forking a process running
+      TensorFlow threads is unsafe.
+
+  Returns:
+    A `Dataset` transformation function, which can be passed to
+    `tf.data.Dataset.apply`.
+
+  Raises:
+    TypeError: If the input elements or `output_signature` contain values
+      other than dense tensors.
+    ValueError: If `num_workers` is not positive.
+  """
+  if num_workers is None:
+    num_workers = os.cpu_count() or 1
+  if num_workers < 1:
+    raise ValueError(f"`num_workers` must be positive, got {num_workers}.")
+  for spec in nest.flatten(output_signature):
+    if not isinstance(spec, tensor_spec.TensorSpec):
+      raise TypeError(f"`output_signature` must only contain `tf.TensorSpec`s, "
+                      f"found {spec}.")
+  output_structure = nest.map_structure(lambda _: None, output_signature)
+  flat_output_specs = nest.flatten(output_signature)
+  output_dtypes = [spec.dtype.as_numpy_dtype for spec in flat_output_specs]
+  pool = _WorkerPool(map_func, num_workers, start_method)
+
+  def _apply_fn(dataset):  # pylint: disable=missing-docstring
+    element_spec = dataset.element_spec
+    for spec in nest.flatten(element_spec):
+      if not isinstance(spec, tensor_spec.TensorSpec):
+        raise TypeError(f"`process_map` only supports datasets of dense "
+                        f"tensors, found {spec}.")
+    input_structure = nest.map_structure(lambda _: None, element_spec)
+
+    def run(*flat_inputs):
+      return pool.run(input_structure, list(flat_inputs), output_structure,
+                      output_dtypes)
+
+    def map_fn(*args):
+      flat_outputs = script_ops.numpy_function(
+          run, nest.flatten(args), [spec.dtype for spec in flat_output_specs])
+      if not isinstance(flat_outputs, (list, tuple)):
+        flat_outputs = [flat_outputs]
+      for output, spec in zip(flat_outputs, flat_output_specs):
+        output.set_shape(spec.shape)
+      return nest.pack_sequence_as(output_signature, flat_outputs)
+
+    return dataset.map(
+        map_fn,
+        num_parallel_calls=num_workers,
+        deterministic=deterministic)
+
+  return _apply_fn
+
@@ -0,0 +1,365 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Python API for finding the bottleneck of an input pipeline."""
+
+import collections
+import json
+import time
+
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.eager import context
+from tensorflow.python.framework import tensor_util
+from tensorflow.python.platform import tf_logging as logging
+
+# A `get_next` call faster than this is assumed to have been served from a
+# buffer filled ahead of time.
+_BUFFER_HIT_SECONDS = 50e-6
+
+# Transformations that produce elements ahead of time into a buffer.
+_BUFFERED_KINDS = ("Prefetch", "ParallelMap", "ParallelInterleave",
+                   "ParallelBatch", "MapAndBatch")
+
+
+class StageProfile(
+    collections.namedtuple("StageProfile", [
+        "name", "kind", "num_elements", "elements_per_second",
+        "mean_latency", "p90_latency", "buffer_hit_rate", "self_time",
+        "cost_share"
+    ])):
+  """Measurements of a single transformation of an input pipeline.
+
+  Attributes:
+    name: A path such as `"Prefetch/ParallelMap/Batch"` identifying the
+      transformation by its position in the pipeline. Names are stable across
+      runs of the same pipeline, which makes profiles comparable.
+    kind: The kind of transformation, such as `"ParallelMap"`.
+    num_elements: The number of elements measured.
+    elements_per_second: Throughput of the pipeline up to and including this
+      transformation, when iterated on its own.
+    mean_latency: Mean duration of a `get_next` call, in seconds.
+    p90_latency: 90th percentile duration of a `get_next` call, in seconds.
+    buffer_hit_rate: For transformations that buffer elements, the fraction of
+      `get_next` calls that returned without waiting. `None` otherwise.
+    self_time: Estimated seconds per output element spent in this
+      transformation, excluding the time spent producing its inputs.
+    cost_share: Fraction of the estimated cost of one element of the whole
+      pipeline attributable to this transformation.
+  """
+
+
+class PipelineProfile(object):
+  """A report of the throughput of every transformation of a pipeline.
+
+  Profiles are plain data: `to_dict` and `to_json` produce a structured report
+  that can be stored, and `compare` reports the throughput change of every
+  transformation between two profiles of the same pipeline.
+  """
+
+  def __init__(self, stages, num_steps, wait_time, total_time):
+    self._stages = list(stages)
+    self._num_steps = num_steps
+    self._wait_time = wait_time
+    self._total_time = total_time
+
+  @property
+  def stages(self):
+    """The `StageProfile`s of all transformations, final one first."""
+    return list(self._stages)
+
+  @property
+  def num_steps(self):
+    """The number of elements consumed from the whole pipeline."""
+    return self._num_steps
+
+  @property
+  def wait_time(self):
+    """Total seconds the consumer spent waiting for elements."""
+    return self._wait_time
+
+  @property
+  def wait_fraction(self):
+    """Fraction of the consumer's time spent waiting for elements."""
+    return self._wait_time / self._total_time if self._total_time else 0.0
+
+  @property
+  def bottleneck(self):
+    """The `StageProfile` with the largest share of the pipeline's cost."""
+    if not self._stages:
+      return None
+    return max(self._stages, key=lambda stage: stage.cost_share)
+
+  def stage(self, name):
+    """Returns the `StageProfile` with the given name."""
+    for stage in self._stages:
+      if stage.name == name:
+        return stage
+    raise KeyError(f"No stage named {name!r} in the profile.")
+
+  def to_dict(self):
+    return {
+        "num_steps": self._num_steps,
+        "wait_time": self._wait_time,
+        "total_time": self._total_time,
+        "bottleneck": self.bottleneck.name if self._stages else None,
+        "stages": [stage._asdict() for stage in self._stages],
+    }
+
+  def to_json(self):
+    return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+  @classmethod
+  def from_dict(cls, report):
+    return cls([StageProfile(**stage) for stage in report["stages"]],
+               report["num_steps"], report["wait_time"], report["total_time"])
+
+  @classmethod
+  def from_json(cls, report):
+    return cls.from_dict(json.loads(report))
+
+  def compare(self, baseline):
+    """Compares the throughput of each transformation against `baseline`.
+
+    Args:
+      baseline: A `PipelineProfile` of an earlier run of the same pipeline.
+
+    Returns:
+      A dictionary mapping the name of every transformation present in both
+      profiles to the ratio of its throughput in this profile to its
+      throughput in `baseline`.
+    """
+    baseline_stages = {stage.name: stage for stage in baseline.stages}
+    ratios = {}
+    for stage in self._stages:
+      previous = baseline_stages.get(stage.name)
+      if previous is not None and previous.elements_per_second:
+        ratios[stage.name] = (
+            stage.elements_per_second / previous.elements_per_second)
+    return ratios
+
+  def __str__(self):
+    lines = ["%-50s %12s %10s %10s %8s" %
+             ("stage", "elements/s", "self(ms)", "p90(ms)", "share")]
+    for stage in self._stages:
+      lines.append("%-50s %12.1f %10.3f %10.3f %7.1f%%" %
+                   (stage.name, stage.elements_per_second,
+                    stage.self_time * 1e3, stage.p90_latency * 1e3,
+                    stage.cost_share * 100))
+    if self._stages:
+      lines.append("bottleneck: %s, consumer waited %.1f%% of the time" %
+                   (self.bottleneck.name, self.wait_fraction * 100))
+    return "\n".join(lines)
+
+
+def _kind(dataset):
+  """Returns a short name for the kind of transformation of `dataset`."""
+  # pylint: disable=protected-access
+  while isinstance(dataset, dataset_ops.DatasetV1Adapter):
+    dataset = dataset._dataset
+  name = type(dataset).__name__.lstrip("_")
+  if name.endswith("V2") or name.endswith("V1"):
+    name = name[:-2]
+  if name.endswith("Dataset") and name != "Dataset":
+    name = name[:-len("Dataset")]
+  return name
+
+
+def _cardinality(dataset):
+  cardinality = int(dataset.cardinality().numpy())
+  return cardinality if cardinality > 0 else None
+
+
+def _input_ratio(dataset, input_dataset):
+  """Estimates the input elements consumed per output element of `dataset`."""
+  output_cardinality = _cardinality(dataset)
+  input_cardinality = _cardinality(input_dataset)
+  if output_cardinality and input_cardinality:
+    return input_cardinality / output_cardinality
+  # pylint: disable=protected-access
+  batch_size = getattr(dataset, "_batch_size", None)
+  if batch_size is not None:
+    batch_size = tensor_util.constant_value(batch_size)
+    if batch_size is not None and batch_size > 0:
+      return float(batch_size)
+  return 1.0
+
+
+def _collect_stages(dataset):
+  """Returns `(name, dataset, [input indices])` for all upstream datasets."""
+  stages = []
+
+  def visit(ds, prefix):
+    kind = _kind(ds)
+    name = kind if not prefix else prefix + "/" + kind
+    index = len(stages)
+    entry = (name, ds, [])
+    stages.append(entry)
+    inputs = ds._inputs()  # pylint: disable=protected-access
+    for i, input_dataset in enumerate(inputs):
+      input_prefix = name if len(inputs) == 1 else "%s[%d]" % (name, i)
+      entry[2].append(visit(input_dataset, input_prefix))
+    return index
+
+  visit(dataset, "")
+  return stages
+
+
+def _skip(iterator, num_elements):
+  """Skips up to `num_elements` elements, returning how many were skipped."""
+  for skipped in range(num_elements):
+    try:
+      next(iterator)
+    except StopIteration:
+      return skipped
+  return num_elements
+
+
+def _measure(dataset, num_steps, warmup_steps):
+  """Returns the `get_next` latencies of up to `num_steps` elements.
+
+  At most half of the elements of a finite dataset are skipped for warmup, so
+  that the stages of small datasets are still measured.
+  """
+  cardinality = _cardinality(dataset)
+  if cardinality is not None:
+    warmup_steps = min(warmup_steps, cardinality // 2)
+  iterator = iter(dataset)
+  skipped = _skip(iterator, warmup_steps)
+  if skipped < warmup_steps:
+    logging.warning(
+        "Dataset %s has only %d elements, fewer than `warmup_steps`; only %d "
+        "elements are skipped for warmup.", _kind(dataset), skipped,
+        skipped // 2)
+    iterator = iter(dataset)
+    _skip(iterator, skipped // 2)
+  latencies = []
+  for _ in range(num_steps):
+    start = time.perf_counter()
+    try:
+      next(iterator)
+    except StopIteration:
+      break
+    latencies.append(time.perf_counter() - start)
+  return latencies
+
+
+def profile(dataset, num_steps, warmup_steps=10, step_fn=None):
+  """Runs an input pipeline and reports the throughput of each stage.
+
+  Every transformation of `dataset` is profiled by iterating the pipeline up
+  to and including it for `num_steps` elements. Comparing each stage with its
+  inputs estimates how much time the transformation itself adds per element
+  and which share of the cost of an element of `dataset` it accounts for. The
+  stage with the largest share is reported as the bottleneck: that is the
+  transformation whose `num_parallel_calls`, buffer size or implementation is
+  most worth tuning.
+
+  For example:
+
+  ```python
+  dataset = tf.data.TFRecordDataset(filenames).map(
+      parse, num_parallel_calls=4).batch(32).prefetch(1)
+  report = profile(dataset, num_steps=100)
+  print(report)
+  print(report.bottleneck.name)  # E.g. "Prefetch/Batch/ParallelMap".
+  ```
+
+  Finally, the whole pipeline is consumed by `step_fn` (if given) to measure
+  how long a training loop running at that speed would wait for input.
+
+  Note that the per-stage estimates assume that a transformation consumes its
+  inputs sequentially; parallel and prefetching stages that hide input latency
+  are reported with a self time of zero.
+
+  Args:
+    dataset: A `tf.data.Dataset`.
+    num_steps: The number of elements to measure for every stage.
+    warmup_steps: (optional) The number of elements to skip before measuring,
+      so that start-up costs such as opening files and filling buffers are
+      excluded. At most half of the elements of a stage are skipped.
+    step_fn: (optional) A function called on every element of `dataset` when
+      measuring the time spent waiting for input, for example a training step.
+
+  Returns:
+    A `PipelineProfile`.
+
+  Raises:
+    RuntimeError: If not executing eagerly.
+    ValueError: If `num_steps` is not positive.
+  """
+  if not context.executing_eagerly():
+    raise RuntimeError("`profile` is only supported in eager mode.")
+  if num_steps <= 0:
+    raise ValueError(f"`num_steps` must be positive, got {num_steps}.")
+
+  stages = _collect_stages(dataset)
+  latencies = [_measure(ds, num_steps, warmup_steps) for _, ds, _ in stages]
+  seconds_per_element = [
+      sum(values) / len(values) if values else 0.0 for values in latencies
+  ]
+
+  # Estimate the time each stage adds on top of its inputs, and how many of
+  # its elements one element of the final dataset needs.
+  self_times = []
+  for i, (_, ds, inputs) in enumerate(stages):
+    input_time = sum(seconds_per_element[j] * _input_ratio(ds, stages[j][1])
+                     for j in inputs)
+    self_times.append(max(seconds_per_element[i] - input_time, 0.0))
+  elements_per_output = [0.0] * len(stages)
+  elements_per_output[0] = 1.0
+  for i, (_, ds, inputs) in enumerate(stages):
+    for j in inputs:
+      elements_per_output[j] += (
+          elements_per_output[i] * _input_ratio(ds, stages[j][1]))
+  costs = [t * n for t, n in zip(self_times, elements_per_output)]
+  total_cost = sum(costs)
+
+  stage_profiles = []
+  for i, (name, ds, _) in enumerate(stages):
+    values = sorted(latencies[i])
+    kind = _kind(ds)
+    buffer_hit_rate = None
+    if values and kind in _BUFFERED_KINDS:
+      buffer_hit_rate = (
+          sum(1 for v in values if v < _BUFFER_HIT_SECONDS) / len(values))
+    stage_profiles.append(
+        StageProfile(
+            name=name,
+            kind=kind,
+            num_elements=len(values),
+            elements_per_second=(1.0 / seconds_per_element[i]
+                                 if seconds_per_element[i] else 0.0),
+            mean_latency=seconds_per_element[i],
+            p90_latency=values[int(0.9 * (len(values) - 1))] if values else 0.0,
+            buffer_hit_rate=buffer_hit_rate,
+            self_time=self_times[i],
+            cost_share=costs[i] / total_cost if total_cost else 0.0))
+
+  wait_time = 0.0
+  num_consumed = 0
+  start = time.perf_counter()
+  iterator = iter(dataset)
+  while num_consumed < num_steps:
+    wait_start = time.perf_counter()
+    try:
+      element = next(iterator)
+    except StopIteration:
+      break
+    wait_time += time.perf_counter() - wait_start
+    num_consumed += 1
+    if step_fn is not None:
+      step_fn(element)
+  total_time = time.perf_counter() - start
+
+  return PipelineProfile(stage_profiles, num_consumed, wait_time, total_time)
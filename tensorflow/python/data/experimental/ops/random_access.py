@@ -14,10 +14,44 @@
 # ==============================================================================
 """Python API for random indexing into a dataset."""
 
+import operator
+import weakref
+
+import numpy as np
+
+from tensorflow.python.data.ops import batch_op
+from tensorflow.python.data.ops import concatenate_op
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.data.ops import from_tensor_slices_op
+from tensorflow.python.data.ops import map_op
+from tensorflow.python.data.ops import range_op
+from tensorflow.python.data.ops import readers
+from tensorflow.python.data.ops import skip_op
+from tensorflow.python.data.ops import take_op
+from tensorflow.python.data.ops import zip_op
+from tensorflow.python.data.util import nest
 from tensorflow.python.data.util import structure
+from tensorflow.python.eager import context
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import errors
+from tensorflow.python.framework import ops
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.framework import tensor_util
+from tensorflow.python.lib.io import tf_record
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
 from tensorflow.python.ops import gen_experimental_dataset_ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import script_ops
+from tensorflow.python.ops.ragged import ragged_math_ops
+from tensorflow.python.platform import tf_logging as logging
 from tensorflow.python.util.tf_export import tf_export
 
+# The indexed readers of the TFRecord datasets read by `gather`, or `None` for
+# datasets whose files are not indexed.
+_tf_record_readers = weakref.WeakKeyDictionary()
+
 
 @tf_export("data.experimental.at", v1=[])
 def at(dataset, index):
@@ -71,3 +105,277 @@ def at(dataset, index):
           index,
           output_types=structure.get_flat_tensor_types(dataset.element_spec),
           output_shapes=structure.get_flat_tensor_shapes(dataset.element_spec)))
+
+
+def _unwrap(dataset):
+  while isinstance(dataset, dataset_ops.DatasetV1Adapter):
+    dataset = dataset._dataset  # pylint: disable=protected-access
+  return dataset
+
+
+# pylint: disable=protected-access
+def _tf_record_reader(dataset):
+  """Returns an indexed reader of a TFRecord dataset, or `None`."""
+  if (not context.executing_eagerly() or
+      not isinstance(dataset, readers.TFRecordDatasetV2) or
+      dataset._num_parallel_reads is not None or
+      dataset._compression_type not in (None, "")):
+    return None
+  if dataset in _tf_record_readers:
+    return _tf_record_readers[dataset]
+  paths = [path.decode() for path in dataset._filenames.as_numpy_iterator()]
+  try:
+    # Indices are not built here: writing sidecar files next to the input
+    # files is not something reading a dataset should do.
+    reader = tf_record.tf_record_indexed_reader(paths, build_index=False)
+  except (errors.NotFoundError, errors.FailedPreconditionError) as e:
+    logging.log_first_n(
+        logging.WARN, "Not reading TFRecords by record number: %s. Use "
+        "`tf_record.build_tf_record_index` to index the files.", 1, e.message)
+    reader = None
+  _tf_record_readers[dataset] = reader
+  return reader
+
+
+def _cardinality(dataset):
+  """Returns the cardinality of `dataset`, including indexed TFRecords."""
+  dataset = _unwrap(dataset)
+  reader = _tf_record_reader(dataset)
+  if reader is not None:
+    return constant_op.constant(len(reader), dtype=dtypes.int64)
+  if isinstance(dataset, (map_op._MapDataset, map_op._ParallelMapDataset)):
+    return _cardinality(dataset._input_dataset)
+  return dataset.cardinality()
+
+
+def _known_cardinality(dataset):
+  """Returns the cardinality of `dataset`, which must not be unknown."""
+  cardinality = _cardinality(dataset)
+  assert_known = control_flow_ops.Assert(
+      math_ops.not_equal(cardinality, dataset_ops.UNKNOWN),
+      ["Random access to a dataset requires the cardinality of its inputs "
+       "to be known."])
+  return control_flow_ops.with_dependencies([assert_known], cardinality)
+
+
+def _gather_map(dataset, gathered_input):
+  """Reapplies the traced map function of `dataset` to `gathered_input`."""
+  input_spec = dataset._input_dataset.element_spec
+  function = dataset._map_func.function
+
+  def apply(*args):
+    # `Dataset.map` passes the components of tuples as positional arguments.
+    element = nest.pack_sequence_as(input_spec, nest.flatten(args))
+    outputs = function(*structure.to_tensor_list(input_spec, element))
+    if not isinstance(outputs, (list, tuple)):
+      outputs = [outputs]
+    return structure.from_compatible_tensor_list(dataset.element_spec, outputs)
+
+  return gathered_input.map(
+      apply, num_parallel_calls=dataset_ops.AUTOTUNE, deterministic=True)
+
+
+def _gather_batches(dataset, indices):
+  """Gathers the batches of a batch dataset from its input elements."""
+  batch_size = dataset._batch_size
+  starts = indices * batch_size
+  ends = starts + batch_size
+  num_elements = _cardinality(dataset._input_dataset)
+  ends = array_ops.where_v2(num_elements >= 0,
+                            math_ops.minimum(ends, num_elements), ends)
+  element_indices = ragged_math_ops.range(starts, ends).flat_values
+  elements = _gather(dataset._input_dataset, element_indices)
+  if tensor_util.constant_value(dataset._drop_remainder):
+    # All batches are full, which keeps the static batch dimension.
+    return elements.batch(batch_size, drop_remainder=True)
+  # The last batch of the input may be partial and need not be the last one
+  # requested, so the elements are regrouped by the size of each batch. The
+  # trailing size is never used; it keeps the sizes non-empty.
+  batch_sizes = array_ops.concat(
+      [ends - starts, array_ops.reshape(batch_size, [1])], axis=0)
+  return elements.batch(batch_size).rebatch(batch_sizes)
+
+
+def _gather_concatenation(dataset, indices):
+  """Gathers from the two inputs of a concatenation and interleaves them."""
+  first = dataset._input_dataset
+  second = dataset._dataset_to_concatenate
+  num_first = _known_cardinality(first)
+  num_first = array_ops.where_v2(
+      math_ops.equal(num_first, dataset_ops.INFINITE), dtypes.int64.max,
+      num_first)
+  in_second = indices >= num_first
+  return dataset_ops.Dataset.choose_from_datasets(
+      [
+          _gather(first,
+                  array_ops.boolean_mask(indices,
+                                         math_ops.logical_not(in_second))),
+          _gather(second,
+                  array_ops.boolean_mask(indices, in_second) - num_first)
+      ],
+      dataset_ops.Dataset.from_tensor_slices(
+          math_ops.cast(in_second, dtypes.int64)))
+
+
+def _gather_records(reader, indices):
+  """Reads the records at `indices` with one call to `reader`."""
+
+  def read(indices):
+    return np.array([reader[int(i)] for i in indices], dtype=np.object_)
+
+  records = script_ops.numpy_function(
+      read, [indices], dtypes.string, stateful=False)
+  records.set_shape([None])
+  return dataset_ops.Dataset.from_tensor_slices(records)
+
+
+def _gather(dataset, indices):
+  """Returns a dataset of the elements of `dataset` at valid `indices`."""
+  dataset = _unwrap(dataset)
+  reader = _tf_record_reader(dataset)
+  if reader is not None:
+    return _gather_records(reader, indices)
+  if isinstance(dataset, from_tensor_slices_op._TensorSliceDataset) and all(
+      isinstance(spec, tensor_spec.TensorSpec)
+      for spec in nest.flatten(dataset.element_spec)):
+    return dataset_ops.Dataset.from_tensor_slices(
+        nest.pack_sequence_as(
+            dataset.element_spec,
+            [array_ops.gather(t, indices) for t in dataset._tensors]))
+  if isinstance(dataset, range_op._RangeDataset):
+    return dataset_ops.Dataset.from_tensor_slices(
+        math_ops.cast(dataset._start + indices * dataset._step,
+                      dataset._output_type))
+  if isinstance(dataset, (map_op._MapDataset, map_op._ParallelMapDataset)):
+    return _gather_map(dataset, _gather(dataset._input_dataset, indices))
+  if isinstance(dataset, skip_op._SkipDataset):
+    return _gather(dataset._input_dataset, indices + dataset._count)
+  if isinstance(dataset, take_op._TakeDataset):
+    return _gather(dataset._input_dataset, indices)
+  if isinstance(dataset, zip_op._ZipDataset):
+    return dataset_ops.Dataset.zip(
+        nest.pack_sequence_as(
+            dataset._datasets,
+            [_gather(ds, indices) for ds in nest.flatten(dataset._datasets)]))
+  if isinstance(dataset, concatenate_op._ConcatenateDataset):
+    return _gather_concatenation(dataset, indices)
+  if isinstance(dataset,
+                (batch_op._BatchDataset, batch_op._ParallelBatchDataset)):
+    return _gather_batches(dataset, indices)
+  # Other datasets are read element by element with `GetElementAtIndex`.
+  return dataset_ops.Dataset.from_tensor_slices(indices).map(
+      lambda index: at(dataset, index),
+      num_parallel_calls=dataset_ops.AUTOTUNE,
+      deterministic=True)
+# pylint: enable=protected-access
+
+
+def gather(dataset, indices):
+  """Returns a dataset of the elements of `dataset` at `indices`.
+
+  Unlike calling `at` once per index, `gather` rewrites the input pipeline
+  of `dataset` to produce only the requested elements in a single pass:
+
+     - `map` functions are applied to the gathered input elements only,
+     - `batch` gathers the elements of the requested batches,
+     - `skip`, `take`, `zip` and `concatenate` translate the indices for
+       their inputs,
+     - `from_tensor_slices` and `range` compute the elements directly, and
+     - uncompressed `tf.data.TFRecordDataset`s read sequentially are read by
+       record number through the offset indices of their files (see
+       `tf_record.build_tf_record_index`) when executing eagerly, provided
+       every file has an up-to-date index.
+
+  Other datasets are read with `at`.
+
+  ```python
+  dataset = tf.data.Dataset.range(100).map(lambda x: x * 2).batch(10)
+  gather(dataset, [3, 0])  # ==> [[60, 62, ..., 78], [0, 2, ..., 18]]
+  ```
+
+  Args:
+    dataset: A `tf.data.Dataset`.
+    indices: A `tf.int64` vector of indices into `dataset`. As for Python
+      sequences, negative indices count from the end of the dataset.
+
+  Returns:
+    A `tf.data.Dataset` of the elements at `indices`, in the order of
+    `indices`.
+
+  Raises:
+    InvalidArgumentError: If an index is out of range.
+    ValueError: If `indices` is not a vector.
+  """
+  indices = ops.convert_to_tensor(
+      indices, dtype_hint=dtypes.int64, name="indices")
+  indices = math_ops.cast(indices, dtypes.int64)
+  indices.shape.with_rank(1)
+  cardinality = _cardinality(dataset)
+  is_finite = cardinality >= 0
+  indices = array_ops.where_v2(
+      math_ops.logical_and(is_finite, indices < 0), indices + cardinality,
+      indices)
+  in_range = math_ops.logical_and(
+      indices >= 0,
+      math_ops.logical_or(math_ops.logical_not(is_finite),
+                          indices < cardinality))
+  assert_in_range = control_flow_ops.Assert(
+      math_ops.reduce_all(in_range),
+      ["Index out of range for a dataset of cardinality", cardinality])
+  indices = control_flow_ops.with_dependencies([assert_in_range], indices)
+  return _gather(dataset, indices)
+
+
+def _slice_indices(dataset, key):
+  """Returns the indices of `dataset` selected by the slice `key`."""
+  try:
+    start, stop, step = (
+        None if v is None else operator.index(v)
+        for v in (key.start, key.stop, key.step))
+  except TypeError as e:
+    raise TypeError(f"Dataset slice indices must be integers or `None`, got "
+                    f"{key}.") from e
+  if step is None:
+    step = 1
+  if step == 0:
+    raise ValueError("Dataset slice step cannot be zero.")
+  cardinality = _cardinality(dataset)
+  if (stop is None or step < 0 or (start is not None and start < 0) or
+      stop < 0):
+    assert_finite = control_flow_ops.Assert(
+        cardinality >= 0,
+        ["Slicing a dataset relative to its end requires a known and finite "
+         "cardinality."])
+    cardinality = control_flow_ops.with_dependencies([assert_finite],
+                                                     cardinality)
+  if step > 0:
+    lower, upper = 0, cardinality
+  else:
+    lower, upper = -1, cardinality - 1
+
+  def bound(value, default):
+    if value is None:
+      return default
+    if value < 0:
+      return math_ops.maximum(value + cardinality, lower)
+    return array_ops.where_v2(cardinality >= 0,
+                              math_ops.minimum(value, upper), value)
+
+  return math_ops.range(
+      bound(start, lower if step > 0 else upper),
+      bound(stop, upper if step > 0 else lower),
+      step,
+      dtype=dtypes.int64)
+
+
+def _getitem(dataset, key):
+  """Implements `tf.data.Dataset.__getitem__`."""
+  if isinstance(key, slice):
+    return dataset.gather(_slice_indices(dataset, key))
+  key = ops.convert_to_tensor(key, dtype_hint=dtypes.int64, name="key")
+  if not key.dtype.is_integer:
+    raise TypeError(f"Dataset indices must be integers or slices, got "
+                    f"{key.dtype.name}.")
+  if key.shape.rank == 0:
+    return dataset.gather(array_ops.reshape(key, [1])).get_single_element()
+  return dataset.gather(key)
@@ -15,6 +15,9 @@
 """Experimental shuffle ops."""
 
 import functools
+import random
+import weakref
+
 import numpy as np
 
 from tensorflow.python.data.experimental.ops import random_access
@@ -23,9 +26,15 @@ from tensorflow.python.data.util import random_seed
 from tensorflow.python.framework import constant_op
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
+from tensorflow.python.framework import random_seed as core_random_seed
+from tensorflow.python.framework import tensor_util
+from tensorflow.python.lib.io import tf_record
 from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
 from tensorflow.python.ops import gen_dataset_ops
+from tensorflow.python.ops import gen_random_index_shuffle_ops
 from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import script_ops
 from tensorflow.python.ops import stateless_random_ops
 from tensorflow.python.util import deprecation
 from tensorflow.python.util.tf_export import tf_export
@@ -270,3 +279,165 @@ def index_shuffle(file_infos,
       rerandomize_each_iteration=reshuffle_each_iteration)
   rng_ds = rng_ds.take(2).batch(2, drop_remainder=True)
   return rng_ds.flat_map(sequential_index_shuffle)
+
+
+def _global_shuffle_indices(num_elements, seed, num_epochs):
+  """Returns a dataset of `num_epochs` permutations of `[0, num_elements)`.
+
+  The permutation of epoch `e` is computed one index at a time by a stateless
+  pseudo-random bijection keyed by `(seed, seed2, e)`, so the dataset holds no
+  buffer and its iterator state is just a position.
+
+  Args:
+    num_elements: A `tf.int64` scalar, the number of elements to permute.
+    seed: (Optional.) The seed of the permutations. When neither `seed` nor
+      the global seed is set, a random seed is drawn once.
+    num_epochs: (Optional.) The number of permutations to produce, or `None`
+      for an infinite number of them.
+
+  Returns:
+    A `tf.data.Dataset` of `tf.int64` scalars.
+  """
+  if seed is None and core_random_seed.get_seed(None)[0] is None:
+    seed = random.getrandbits(63)
+  seed, seed2 = random_seed.get_seed(seed)
+  num_elements = ops.convert_to_tensor(
+      num_elements, dtype=dtypes.int64, name="num_elements")
+  max_index = num_elements - 1
+
+  def epoch_indices(epoch):
+
+    def shuffle_index(index):
+      # The raw op takes a 3-element seed, which lets the epoch be mixed in
+      # without colliding with the permutations of other seeds.
+      return gen_random_index_shuffle_ops.random_index_shuffle(
+          index,
+          seed=array_ops.stack([seed, seed2, epoch]),
+          max_index=max_index,
+          rounds=4)
+
+    return dataset_ops.Dataset.range(num_elements).map(shuffle_index)
+
+  if num_epochs is None:
+    epochs = dataset_ops.Dataset.counter()
+  else:
+    epochs = dataset_ops.Dataset.range(num_epochs)
+  return epochs.flat_map(epoch_indices)
+
+
+def global_shuffle(seed=None,
+                   num_epochs=1,
+                   num_parallel_calls=dataset_ops.AUTOTUNE):
+  """Shuffles all elements of a random-access dataset without a buffer.
+
+  `tf.data.Dataset.shuffle` can only permute elements within a buffer, so
+  shuffle quality comes at the price of memory. `global_shuffle()` instead
+  walks a pseudo-random permutation of all element indices, computed one
+  index at a time in O(1) memory, and reads each element with
+  `tf.data.experimental.at`. Every epoch uses a different permutation that is
+  fully determined by `seed` and the epoch number.
+
+  ```python
+  dataset = tf.data.Dataset.from_tensor_slices((images, labels))
+  dataset = dataset.apply(global_shuffle(seed=42, num_epochs=10))
+  ```
+
+  Since the transformation holds no buffer, saving and restoring its iterator
+  is cheap, and an iterator restored into a pipeline built with the same seed
+  resumes the same sequence of elements exactly.
+
+  The input dataset must have a known, finite cardinality and support random
+  access; see `tf.data.experimental.at` for the supported transformations.
+  Use `shuffled_tf_record_dataset` for TFRecords files.
+
+  Args:
+    seed: (Optional.) A `tf.int64` scalar, the seed of the permutations. Pass
+      a seed to make the order reproducible across runs. When neither `seed`
+      nor the global seed is set, a random seed is drawn once.
+    num_epochs: (Optional.) The number of epochs to produce, each with its own
+      permutation, or `None` to repeat indefinitely. Defaults to 1.
+    num_parallel_calls: (Optional.) The number of elements to read in
+      parallel. Defaults to autotuning.
+
+  Returns:
+    A `Dataset` transformation function, which can be passed to
+    `tf.data.Dataset.apply`.
+  """
+
+  def _apply_fn(dataset):  # pylint: disable=missing-docstring
+    num_elements = dataset.cardinality()
+    message = ("`global_shuffle` requires a dataset with a known, finite "
+               "cardinality. Use `tf.data.experimental.assert_cardinality` to "
+               "declare the cardinality of the input dataset.")
+    static_num_elements = tensor_util.constant_value(num_elements)
+    if static_num_elements is not None and static_num_elements < 0:
+      raise ValueError(message)
+    # In graph mode the cardinality is only known once the dataset is created.
+    assert_known = control_flow_ops.Assert(
+        math_ops.greater_equal(num_elements, 0), [message])
+    num_elements = control_flow_ops.with_dependencies([assert_known],
+                                                      num_elements)
+    indices = _global_shuffle_indices(num_elements, seed, num_epochs)
+    return indices.map(
+        lambda index: random_access.at(dataset, index),
+        num_parallel_calls=num_parallel_calls,
+        deterministic=True)
+
+  return _apply_fn
+
+
+def shuffled_tf_record_dataset(filenames,
+                               seed=None,
+                               num_epochs=1,
+                               num_parallel_calls=dataset_ops.AUTOTUNE,
+                               build_index=True):
+  """Reads records of TFRecords files in a global, buffer-free random order.
+
+  The files are made addressable by record number with their offset indices
+  (see `tf_record.tf_record_indexed_reader`), which are built on first use.
+  The records are then read in the order of a per-epoch pseudo-random
+  permutation as in `global_shuffle`, so the whole dataset is shuffled in O(1)
+  memory and its iterator can be saved and restored without any buffer state.
+
+  ```python
+  dataset = shuffled_tf_record_dataset(
+      tf.io.gfile.glob("/data/train-*"), seed=42, num_epochs=None)
+  dataset = dataset.map(parse_fn).batch(256)
+  ```
+
+  Reads are issued one record at a time at random offsets, so this suits
+  local or low-latency storage best.
+
+  Records are read by a Python function (see `tf.numpy_function`), which
+  holds the GIL while it runs and is owned by this process. The returned
+  dataset can therefore not be serialized, so it cannot be used with the
+  tf.data service or be distributed to other workers, and only the iterator
+  position is saved in checkpoints, not the files or their contents. The files
+  are closed when the returned dataset is garbage collected.
+
+  Args:
+    filenames: A list of paths to uncompressed TFRecords files.
+    seed: (Optional.) See `global_shuffle`.
+    num_epochs: (Optional.) See `global_shuffle`.
+    num_parallel_calls: (Optional.) The number of records to read in
+      parallel. Defaults to autotuning.
+    build_index: (Optional.) Whether to build missing or stale indices. If
+      `False`, every file must already have an up-to-date index.
+
+  Returns:
+    A `tf.data.Dataset` of `tf.string` scalars.
+  """
+  reader = tf_record.tf_record_indexed_reader(
+      filenames, build_index=build_index)
+
+  def read_record(index):
+    record = script_ops.numpy_function(
+        lambda i: reader[int(i)], [index], dtypes.string, stateful=False)
+    record.set_shape([])
+    return record
+
+  indices = _global_shuffle_indices(len(reader), seed, num_epochs)
+  dataset = indices.map(
+      read_record, num_parallel_calls=num_parallel_calls, deterministic=True)
+  weakref.finalize(dataset, reader.close)
+  return dataset
@@ -13,11 +13,19 @@
 # limitations under the License.
 # ==============================================================================
 """Dataset snapshot and related functionality."""
+import hashlib
+import uuid
+
+from tensorflow.python.data.experimental.ops import caching
 from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.eager import context
 from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import errors
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import random_seed
+from tensorflow.python.lib.io import file_io
 from tensorflow.python.ops import gen_experimental_dataset_ops as ged_ops
+from tensorflow.python.platform import tf_logging as logging
 from tensorflow.python.util import deprecation
 from tensorflow.python.util.tf_export import tf_export
 
@@ -25,6 +33,10 @@ COMPRESSION_GZIP = "GZIP"
 COMPRESSION_SNAPPY = "SNAPPY"
 COMPRESSION_NONE = None
 
+# The subdirectory of an incremental snapshot holding one saved dataset per
+# materialized input shard.
+_SHARDS_DIRECTORY = "shards"
+
 
 class _LegacySnapshotDataset(dataset_ops.UnaryUnchangedStructureDataset):
   """A Dataset that captures a snapshot or reads from a snapshot."""
@@ -274,3 +286,133 @@ def snapshot(path, compression="AUTO", reader_func=None, shard_func=None):
         shard_func=shard_func)
 
   return _apply_fn
+
+
+def _materialize_shard(dataset, shard_path, compression):
+  """Saves `dataset` to `shard_path`, which appears once fully written."""
+  temp_path = "%s.tmp.%s" % (shard_path, uuid.uuid4().hex)
+  dataset.save(temp_path, compression=compression)
+  try:
+    file_io.rename(temp_path, shard_path)
+  except errors.OpError:
+    # The shard was materialized concurrently by another job.
+    file_io.delete_recursively(temp_path)
+    if not file_io.file_exists(shard_path):
+      raise
+
+
+def _shard_key(dataset, filename, compression):
+  """Returns the name under which the shard of `filename` is materialized.
+
+  Shards are loaded with the compression of the snapshot, so the compression
+  they were saved with is part of the key.
+  """
+  fingerprint = caching.dataset_fingerprint(dataset, input_files=[filename])
+  return hashlib.sha256(
+      f"{fingerprint}:{compression}".encode("utf-8")).hexdigest()
+
+
+def _prune_shards(shards_path, keep):
+  """Deletes the materialized shards that are not in `keep`."""
+  for name in file_io.list_directory(shards_path):
+    name = name.rstrip("/")
+    if name not in keep and ".tmp." not in name:
+      logging.info("Deleting stale incremental snapshot shard %s.", name)
+      file_io.delete_recursively(file_io.join(shards_path, name))
+
+
+def incremental_snapshot(path,
+                         filenames,
+                         dataset_fn,
+                         compression=None,
+                         num_parallel_reads=None,
+                         prune=False):
+  """Snapshots a dataset per input file, materializing only new files.
+
+  `tf.data.Dataset.snapshot` fingerprints the whole input pipeline, so adding
+  an input file invalidates the entire snapshot. An incremental snapshot is
+  instead keyed by input shard: `dataset_fn(filename)` is saved separately for
+  each of `filenames`, under a fingerprint of its pipeline and of the name,
+  size and modification time of the files it reads (see
+  `caching.dataset_fingerprint`), and of the compression. When the snapshot
+  is opened again, only the shards whose file is new or changed, or whose
+  preprocessing changed, are materialized; the others are read from the
+  existing snapshot.
+
+  ```python
+  dataset = incremental_snapshot(
+      "/snapshots/train",
+      tf.io.gfile.glob("/data/train-*"),
+      lambda f: tf.data.TFRecordDataset(f).map(preprocess))
+  ```
+
+  Shards are materialized synchronously, when `incremental_snapshot` is
+  called. A shard only becomes visible once written completely, so jobs
+  sharing a snapshot directory never read partial shards.
+
+  Args:
+    path: The directory of the snapshot.
+    filenames: A list of input files, each of which is a shard.
+    dataset_fn: A function mapping a filename to the `tf.data.Dataset` of
+      the elements of that shard. It must produce datasets with the same
+      `element_spec` for all files.
+    compression: (Optional.) The compression of the materialized shards,
+      `"GZIP"` or `None`.
+    num_parallel_reads: (Optional.) The number of shards to read in parallel.
+      If `None`, the shards are read sequentially in the order of
+      `filenames`.
+    prune: (Optional.) Whether to delete the materialized shards that are
+      not part of this snapshot, e.g. those of removed or changed files.
+      Should not be set if other jobs share `path` with different
+      `filenames`.
+
+  Returns:
+    A `tf.data.Dataset` of the elements of all shards.
+
+  Raises:
+    RuntimeError: If not executing eagerly.
+    ValueError: If `filenames` is empty, or the pipeline of a shard cannot be
+      fingerprinted.
+  """
+  if not context.executing_eagerly():
+    raise RuntimeError("`incremental_snapshot` is only supported in eager "
+                       "mode.")
+  filenames = list(filenames)
+  if not filenames:
+    raise ValueError("`filenames` must not be empty.")
+  shards_path = file_io.join(path, _SHARDS_DIRECTORY)
+  file_io.recursive_create_dir(shards_path)
+  element_spec = None
+  fingerprints = []
+  shard_paths = []
+  num_materialized = 0
+  for filename in filenames:
+    dataset = dataset_fn(filename)
+    if element_spec is None:
+      element_spec = dataset.element_spec
+    fingerprint = _shard_key(dataset, filename, compression)
+    shard_path = file_io.join(shards_path, fingerprint)
+    if not file_io.file_exists(shard_path):
+      logging.info("Materializing incremental snapshot shard %s for %s.",
+                   fingerprint, filename)
+      _materialize_shard(dataset, shard_path, compression)
+      num_materialized += 1
+    fingerprints.append(fingerprint)
+    shard_paths.append(shard_path)
+  logging.info("Incremental snapshot %s: materialized %d of %d shards.", path,
+               num_materialized, len(filenames))
+  if prune:
+    _prune_shards(shards_path, keep=set(fingerprints))
+
+  def load(shard_path):
+    return dataset_ops.Dataset.load(
+        shard_path, element_spec=element_spec, compression=compression)
+
+  shards = dataset_ops.Dataset.from_tensor_slices(shard_paths)
+  if num_parallel_reads is None:
+    return shards.interleave(load, cycle_length=1)
+  return shards.interleave(
+      load,
+      cycle_length=num_parallel_reads,
+      num_parallel_calls=num_parallel_reads,
+      deterministic=True)
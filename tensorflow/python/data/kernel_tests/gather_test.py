@@ -0,0 +1,130 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for `tf.data.Dataset.gather()` and `tf.data.Dataset.__getitem__`."""
+import os
+
+from absl.testing import parameterized
+import numpy as np
+
+from tensorflow.python.data.experimental.ops import random_access
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.data.ops import readers
+from tensorflow.python.framework import combinations
+from tensorflow.python.framework import errors
+from tensorflow.python.lib.io import tf_record
+from tensorflow.python.ops import string_ops
+from tensorflow.python.platform import test
+
+
+class GatherTest(test_base.DatasetTestBase, parameterized.TestCase):
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testMapAndBatch(self):
+    dataset = dataset_ops.Dataset.range(25).map(lambda x: x * 2).batch(10)
+    self.assertDatasetProduces(
+        dataset.gather([2, 0, 2]),
+        [list(range(40, 50, 2)),
+         list(range(0, 20, 2)),
+         list(range(40, 50, 2))])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testBatchDropRemainder(self):
+    dataset = dataset_ops.Dataset.from_tensor_slices(np.arange(25)).batch(
+        10, drop_remainder=True)
+    gathered = dataset.gather([1])
+    self.assertEqual([10], gathered.element_spec.shape)
+    self.assertDatasetProduces(gathered, [list(range(10, 20))])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testZipConcatenateSkipTake(self):
+    first = dataset_ops.Dataset.range(10).skip(2).take(5)
+    second = dataset_ops.Dataset.range(100, 110)
+    dataset = dataset_ops.Dataset.zip(
+        (first.concatenate(second), dataset_ops.Dataset.range(20)))
+    self.assertDatasetProduces(
+        dataset.gather([6, 0, 4, 5]), [(101, 6), (2, 0), (6, 4), (100, 5)])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testNegativeIndices(self):
+    dataset = dataset_ops.Dataset.range(10).map(lambda x: x + 1)
+    self.assertDatasetProduces(dataset.gather([-1, -10]), [10, 1])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testOutOfRange(self):
+    dataset = dataset_ops.Dataset.range(10)
+    with self.assertRaisesRegex(errors.InvalidArgumentError, "out of range"):
+      self.getDatasetOutput(dataset.gather([3, 10]))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testFallsBackToAt(self):
+    # `gather` does not rewrite `prefetch`, so it reads the elements with `at`.
+    dataset = dataset_ops.Dataset.range(20).map(lambda x: x * 3).prefetch(2)
+    self.assertEqual(21, self.evaluate(random_access.at(dataset, 7)))
+    self.assertDatasetProduces(dataset.gather([7, 3, 11]), [21, 9, 33])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testGetItem(self):
+    dataset = dataset_ops.Dataset.range(10).map(lambda x: x * 2)
+    self.assertEqual(6, self.evaluate(dataset[3]))
+    self.assertEqual(18, self.evaluate(dataset[-1]))
+    self.assertDatasetProduces(dataset[2:5], [4, 6, 8])
+    self.assertDatasetProduces(dataset[7:], [14, 16, 18])
+    self.assertDatasetProduces(dataset[::-4], [18, 10, 2])
+    self.assertDatasetProduces(dataset[8:100], [16, 18])
+    self.assertDatasetProduces(dataset[[5, 1]], [10, 2])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testGetItemInvalidKey(self):
+    dataset = dataset_ops.Dataset.range(10)
+    with self.assertRaisesRegex(TypeError, "must be integers"):
+      dataset[1.5:]  # pylint: disable=pointless-statement
+    with self.assertRaisesRegex(ValueError, "cannot be zero"):
+      dataset[::0]  # pylint: disable=pointless-statement
+
+  def _write_tf_records(self):
+    filenames = []
+    for i in range(3):
+      filename = os.path.join(self.get_temp_dir(), "tf_record.%d" % i)
+      with tf_record.TFRecordWriter(filename) as writer:
+        for j in range(4):
+          writer.write(b"record %d of file %d" % (j, i))
+      filenames.append(filename)
+    return filenames
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testTFRecords(self):
+    filenames = self._write_tf_records()
+    for filename in filenames:
+      tf_record.build_tf_record_index(filename)
+    dataset = readers.TFRecordDatasetV2(filenames).map(string_ops.string_upper)
+    self.assertDatasetProduces(
+        dataset.gather([9, 2]), [b"RECORD 1 OF FILE 2", b"RECORD 2 OF FILE 0"])
+    self.assertEqual(b"RECORD 3 OF FILE 2", self.evaluate(dataset[-1]))
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testTFRecordsWithoutIndex(self):
+    filenames = self._write_tf_records()
+    dataset = readers.TFRecordDatasetV2(filenames).gather([9, 2])
+    # Unindexed files are not read by record number, and no index is built.
+    with self.assertRaises(errors.OpError):
+      self.getDatasetOutput(dataset)
+    for filename in filenames:
+      self.assertFalse(
+          os.path.exists(tf_record.tf_record_index_path(filename)))
+
+
+if __name__ == "__main__":
+  test.main()
@@ -0,0 +1,147 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for the process-wide memory budget of tf.data iterators."""
+import gc
+import time
+
+from absl.testing import parameterized
+
+from tensorflow.python.data.kernel_tests import test_base
+from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.data.ops import memory_budget
+from tensorflow.python.data.ops import options as options_lib
+from tensorflow.python.framework import combinations
+from tensorflow.python.platform import test
+
+_MB = 1024 * 1024
+
+
+class MemoryBudgetTest(test_base.DatasetTestBase, parameterized.TestCase):
+
+  def tearDown(self):
+    memory_budget.set_memory_budget(None)
+    memory_budget._peak_live = 0
+    gc.collect()
+    super(MemoryBudgetTest, self).tearDown()
+
+  def _dataset(self):
+    return dataset_ops.Dataset.range(10).prefetch(dataset_ops.AUTOTUNE)
+
+  def _ram_budgets(self):
+    allocation = memory_budget.get_memory_allocation()
+    return sorted(p.ram_budget for p in allocation.pipelines)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testNoBudget(self):
+    iterator = iter(self._dataset())
+    self.assertIsNone(memory_budget.get_memory_budget())
+    self.assertEmpty(memory_budget.get_memory_allocation().pipelines)
+    self.assertIsNone(iterator._dataset.options().autotune.ram_budget)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testSharesBudget(self):
+    memory_budget.set_memory_budget(600 * _MB, num_pipelines=3)
+    iterators = [iter(self._dataset()) for _ in range(3)]
+    self.assertEqual([200 * _MB] * 3, self._ram_budgets())
+    self.assertEqual(200 * _MB,
+                     iterators[0]._dataset.options().autotune.ram_budget)
+    allocation = memory_budget.get_memory_allocation()
+    self.assertEqual(600 * _MB, allocation.budget)
+    self.assertEqual(600 * _MB, allocation.allocated)
+    self.assertEqual(list(range(10)), [x.numpy() for x in iterators[0]])
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testLeavesShareForNextIterator(self):
+    memory_budget.set_memory_budget(600 * _MB)
+    iterators = [iter(self._dataset())]
+    self.assertEqual([300 * _MB], self._ram_budgets())
+    iterators.append(iter(self._dataset()))
+    self.assertEqual([200 * _MB, 300 * _MB], self._ram_budgets())
+    del iterators
+    gc.collect()
+    # With two concurrent iterators seen, new iterators get a third of the
+    # budget.
+    iterators = [iter(self._dataset()) for _ in range(2)]
+    self.assertEqual([200 * _MB] * 2, self._ram_budgets())
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testNeverExceedsBudget(self):
+    memory_budget.set_memory_budget(600 * _MB)
+    iterators = [iter(self._dataset()) for _ in range(20)]
+    self.assertLessEqual(memory_budget.get_memory_allocation().allocated,
+                         600 * _MB)
+    self.assertLen(iterators, 20)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testForgetsPeakAfterIdleSeconds(self):
+    memory_budget.set_memory_budget(600 * _MB, idle_seconds=0.5)
+    iterators = [iter(self._dataset()) for _ in range(2)]
+    del iterators
+    gc.collect()
+    time.sleep(1)
+    iterator = iter(self._dataset())
+    self.assertEqual(300 * _MB,
+                     iterator._dataset.options().autotune.ram_budget)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testReleasesDeletedIterators(self):
+    memory_budget.set_memory_budget(600 * _MB, num_pipelines=2)
+    iterator = iter(self._dataset())
+    self.assertLen(memory_budget.get_memory_allocation().pipelines, 1)
+    del iterator
+    gc.collect()
+    self.assertEmpty(memory_budget.get_memory_allocation().pipelines)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testReportsIdleIterators(self):
+    memory_budget.set_memory_budget(
+        600 * _MB, num_pipelines=2, idle_seconds=0.5)
+    active = iter(self._dataset())
+    idle = iter(self._dataset())
+    time.sleep(1)
+    next(active)
+    allocation = memory_budget.get_memory_allocation()
+    # Idle iterators keep their buffers, so their grants stay allocated.
+    self.assertEqual(600 * _MB, allocation.allocated)
+    self.assertEqual([False, True], [p.idle for p in allocation.pipelines])
+    iterator = iter(self._dataset())
+    self.assertEqual(memory_budget._EXHAUSTED_GRANT_BYTES,
+                     iterator._dataset.options().autotune.ram_budget)
+    del idle, iterator
+    gc.collect()
+    iterator = iter(self._dataset())
+    self.assertEqual(300 * _MB,
+                     iterator._dataset.options().autotune.ram_budget)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testKeepsExplicitRamBudget(self):
+    memory_budget.set_memory_budget(600 * _MB, num_pipelines=2)
+    options = options_lib.Options()
+    options.autotune.ram_budget = 100 * _MB
+    iterator = iter(self._dataset().with_options(options))
+    self.assertEqual(100 * _MB,
+                     iterator._dataset.options().autotune.ram_budget)
+    self.assertEqual([100 * _MB], self._ram_budgets())
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testInvalidArguments(self):
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      memory_budget.set_memory_budget(0)
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      memory_budget.set_memory_budget(_MB, num_pipelines=0)
+
+
+if __name__ == "__main__":
+  test.main()
@@ -423,6 +423,101 @@ class SnapshotTest(tf_record_test_base.TFRecordTestBase,
     self.assertDatasetProduces(dataset, [42])
 
 
+class IncrementalSnapshotTest(test_base.DatasetTestBase,
+                              parameterized.TestCase):
+
+  def setUp(self):
+    super(IncrementalSnapshotTest, self).setUp()
+    self._snapshot_dir = os.path.join(self.get_temp_dir(), "snapshot")
+    self._data_dir = os.path.join(self.get_temp_dir(), "data")
+    os.mkdir(self._data_dir)
+
+  def tearDown(self):
+    super(IncrementalSnapshotTest, self).tearDown()
+    shutil.rmtree(self._snapshot_dir, ignore_errors=True)
+    shutil.rmtree(self._data_dir)
+
+  def _writeFile(self, i, num_lines=3):
+    filename = os.path.join(self._data_dir, "file_%d.txt" % i)
+    with open(filename, "w") as f:
+      f.write("".join("%d-%d\n" % (i, j) for j in range(num_lines)))
+    return filename
+
+  def _shards(self):
+    return set(os.listdir(os.path.join(self._snapshot_dir, "shards")))
+
+  def _snapshot(self, filenames, dataset_fn=core_readers.TextLineDatasetV2,
+                **kwargs):
+    return snapshot.incremental_snapshot(self._snapshot_dir, filenames,
+                                         dataset_fn, **kwargs)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testReadsShardsInOrder(self):
+    filenames = [self._writeFile(i) for i in range(3)]
+    expected = [b"%d-%d" % (i, j) for i in range(3) for j in range(3)]
+    self.assertDatasetProduces(self._snapshot(filenames), expected)
+    shards = self._shards()
+    # The second time, the shards are read from the snapshot.
+    self.assertDatasetProduces(self._snapshot(filenames), expected)
+    self.assertEqual(shards, self._shards())
+    self.assertLen(shards, 3)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testMaterializesOnlyNewAndChangedFiles(self):
+    filenames = [self._writeFile(i) for i in range(3)]
+    self.getDatasetOutput(self._snapshot(filenames))
+    shards = self._shards()
+    self.assertLen(shards, 3)
+
+    filenames.append(self._writeFile(3))
+    dataset = self._snapshot(filenames)
+    self.assertLen(self._shards(), 4)
+    self.assertContainsSubset(shards, self._shards())
+    self.assertLen(self.getDatasetOutput(dataset), 12)
+
+    self._writeFile(0, num_lines=5)
+    dataset = self._snapshot(filenames, prune=True)
+    self.assertLen(self._shards(), 4)
+    self.assertLen(shards & self._shards(), 2)
+    self.assertLen(self.getDatasetOutput(dataset), 14)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testChangedPreprocessing(self):
+    filenames = [self._writeFile(i) for i in range(2)]
+    self.getDatasetOutput(self._snapshot(filenames))
+
+    def dataset_fn(filename):
+      return core_readers.TextLineDatasetV2(filename).map(
+          lambda line: string_ops.string_join([line, "!"]))
+
+    dataset = self._snapshot(filenames, dataset_fn)
+    self.assertLen(self._shards(), 4)
+    self.assertDatasetProduces(
+        dataset, [b"%d-%d!" % (i, j) for i in range(2) for j in range(3)])
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testChangedCompression(self):
+    filenames = [self._writeFile(i) for i in range(2)]
+    expected = [b"%d-%d" % (i, j) for i in range(2) for j in range(3)]
+    self.assertDatasetProduces(self._snapshot(filenames), expected)
+    dataset = self._snapshot(filenames, compression="GZIP")
+    self.assertLen(self._shards(), 4)
+    self.assertDatasetProduces(dataset, expected)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testParallelReads(self):
+    filenames = [self._writeFile(i) for i in range(4)]
+    dataset = self._snapshot(filenames, num_parallel_reads=2)
+    self.assertDatasetProduces(
+        dataset, [b"%d-%d" % (i, j) for i in range(4) for j in range(3)],
+        assert_items_equal=True)
+
+  @combinations.generate(test_base.graph_only_combinations())
+  def testGraphMode(self):
+    with self.assertRaisesRegex(RuntimeError, "eager mode"):
+      self._snapshot([self._writeFile(0)])
+
+
 class LegacySnapshotTest(tf_record_test_base.TFRecordTestBase,
                          parameterized.TestCase):
 
@@ -16,13 +16,30 @@
 
 import warnings
 
+from tensorflow.core.framework import graph_pb2
 from tensorflow.python.data.ops import dataset_ops
 from tensorflow.python.data.ops import debug_mode
+from tensorflow.python.data.ops import map_op
+from tensorflow.python.data.ops import options as options_lib
+from tensorflow.python.data.ops import structured_function
 from tensorflow.python.data.util import nest
+from tensorflow.python.eager import context
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
+from tensorflow.python.framework import tensor_spec
 from tensorflow.python.framework import tensor_util
 from tensorflow.python.ops import gen_dataset_ops
+from tensorflow.python.ops import gen_experimental_dataset_ops
+from tensorflow.python.platform import tf_logging as logging
+from tensorflow.python.types import core as core_types
+from tensorflow.python.util import compat
+from tensorflow.python.util import lazy_loader
+
+# Loaded lazily as `pfor` is only needed to vectorize map functions, and
+# `batch_op` is imported by `import tensorflow`.
+pfor_control_flow_ops = lazy_loader.LazyLoader(
+    "pfor_control_flow_ops", globals(),
+    "tensorflow.python.ops.parallel_for.control_flow_ops")
 
 
 def _batch(input_dataset,
@@ -47,6 +64,299 @@ def _batch(input_dataset,
         name=name)
 
 
+_BATCH_OPS = ("BatchDatasetV2", "ParallelBatchDataset")
+_MAP_OPS = ("MapDataset", "ParallelMapDatasetV2")
+_RETVAL_OP = "_Retval"
+# Maps the `deterministic` attribute back to the argument it was created from.
+_DETERMINISTIC = {"true": True, "false": False}
+
+
+def _unwrap(dataset):
+  # pylint: disable=protected-access
+  while isinstance(dataset, dataset_ops.DatasetV1Adapter):
+    dataset = dataset._dataset
+  return dataset
+
+
+def _map_and_batch_pairs(dataset):
+  """Returns the `(map, batch)` pairs of the datasets `dataset` depends on."""
+  # pylint: disable=protected-access
+  pairs = []
+  visited = set()
+  to_visit = [dataset]
+  while to_visit:
+    dataset = _unwrap(to_visit.pop())
+    if id(dataset) in visited:
+      continue
+    visited.add(id(dataset))
+    if isinstance(dataset, (_BatchDataset, _ParallelBatchDataset)):
+      input_dataset = _unwrap(dataset._input_dataset)
+      if isinstance(input_dataset,
+                    (map_op._MapDataset, map_op._ParallelMapDataset)):
+        pairs.append((input_dataset, dataset))
+    to_visit.extend(dataset._inputs())
+  return pairs
+
+
+def _captures_resources(dataset):
+  """Returns whether a function of `dataset` or its inputs captures resources.
+
+  Serializing the dataset graph replaces the captured resource variables by
+  constants holding their current value, so the rebuilt dataset would not see
+  later assignments to them.
+  """
+  # pylint: disable=protected-access
+  visited = set()
+  to_visit = [dataset]
+  while to_visit:
+    dataset = _unwrap(to_visit.pop())
+    if id(dataset) in visited:
+      continue
+    visited.add(id(dataset))
+    # Not every dataset lists the functions it calls in `_functions()`.
+    wrappers = list(dataset._functions()) + [
+        value for value in vars(dataset).values()
+        if isinstance(value, structured_function.StructuredFunctionWrapper)
+    ]
+    for wrapper in wrappers:
+      if any(captured.dtype == dtypes.resource
+             for captured in wrapper.function.captured_inputs):
+        return True
+    to_visit.extend(dataset._inputs())
+  return False
+
+
+def _vectorize_map_and_batch(map_dataset, batch_dataset):
+  """Builds `batch(n).map(vectorized f)` for `map(f).batch(n)`.
+
+  The function of the map transformation is converted with `pfor`, so that it
+  runs once per batch rather than once per element.
+
+  Args:
+    map_dataset: The map transformation that is the input of the batch.
+    batch_dataset: The batch transformation.
+
+  Returns:
+    The vectorized dataset, or `None` if the map function cannot be vectorized.
+  """
+  # pylint: disable=protected-access
+  map_func = map_dataset._map_func
+  input_dataset = map_dataset._input_dataset
+  input_structure = input_dataset.element_spec
+  output_structure = map_func.output_structure
+  function = map_func.function
+
+  # Only dense components are batched by stacking, which is what `pfor`
+  # produces. Stateful functions may depend on the order of evaluation.
+  if not isinstance(function, core_types.ConcreteFunction):
+    return None
+  # pylint: disable=unidiomatic-typecheck
+  if not all(
+      type(spec) is tensor_spec.TensorSpec
+      for spec in nest.flatten(input_structure) + nest.flatten(output_structure)
+  ):
+    return None
+  if any(op._is_stateful for op in function.graph.get_operations()):
+    return None
+
+  def vectorized_fn(*args):
+    # Mirrors how `StructuredFunctionWrapper` unpacks elements into arguments.
+    element = args if type(input_structure) is tuple else args[0]
+
+    def element_fn(components):
+      return function(*nest.flatten(components))
+
+    outputs = pfor_control_flow_ops.vectorized_map(
+        element_fn, element, fallback_to_while_loop=False)
+    return nest.pack_sequence_as(output_structure, outputs)
+
+  if isinstance(batch_dataset, _ParallelBatchDataset):
+    batched = _ParallelBatchDataset(
+        input_dataset,
+        batch_dataset._batch_size,
+        batch_dataset._drop_remainder,
+        batch_dataset._num_parallel_calls,
+        _DETERMINISTIC.get(batch_dataset._deterministic),
+        name=batch_dataset._name)
+  else:
+    batched = _BatchDataset(
+        input_dataset,
+        batch_dataset._batch_size,
+        batch_dataset._drop_remainder,
+        name=batch_dataset._name)
+  if isinstance(map_dataset, map_op._ParallelMapDataset):
+    return map_op._ParallelMapDataset(
+        batched,
+        vectorized_fn,
+        num_parallel_calls=map_dataset._num_parallel_calls,
+        deterministic=_DETERMINISTIC.get(map_dataset._deterministic),
+        use_inter_op_parallelism=map_dataset._use_inter_op_parallelism,
+        preserve_cardinality=map_dataset._preserve_cardinality,
+        name=map_dataset._name)
+  return map_op._MapDataset(
+      batched,
+      vectorized_fn,
+      use_inter_op_parallelism=map_dataset._use_inter_op_parallelism,
+      preserve_cardinality=map_dataset._preserve_cardinality,
+      name=map_dataset._name)
+
+
+def _serialize(dataset):
+  return graph_pb2.GraphDef.FromString(
+      dataset._as_serialized_graph(  # pylint: disable=protected-access
+          external_state_policy=options_lib.ExternalStatePolicy.IGNORE).numpy())
+
+
+def _node_name(node_input):
+  return node_input.lstrip("^").split(":")[0]
+
+
+def _find_batch_node(graph_def, map_dataset):
+  """Returns the name of the batch node consuming the map of `map_dataset`."""
+  function_name = compat.as_str(
+      map_dataset._map_func.function.name)  # pylint: disable=protected-access
+  map_nodes = {
+      node.name for node in graph_def.node
+      if node.op in _MAP_OPS and node.attr["f"].func.name == function_name
+  }
+  batch_nodes = [
+      node.name for node in graph_def.node
+      if node.op in _BATCH_OPS and _node_name(node.input[0]) in map_nodes
+  ]
+  return batch_nodes[0] if len(batch_nodes) == 1 else None
+
+
+def _graft(graph_def, batch_node, vectorized_graph_def, prefix):
+  """Replaces the outputs of `batch_node` by those of `vectorized_graph_def`."""
+
+  def rename(node_input):
+    if node_input.startswith("^"):
+      return "^" + prefix + node_input[1:]
+    return prefix + node_input
+
+  output = None
+  for node in vectorized_graph_def.node:
+    if node.op == _RETVAL_OP:
+      output = rename(node.input[0])
+      continue
+    new_node = graph_def.node.add()
+    new_node.CopyFrom(node)
+    new_node.name = prefix + node.name
+    new_node.input[:] = [rename(node_input) for node_input in node.input]
+  functions = {f.signature.name for f in graph_def.library.function}
+  for function in vectorized_graph_def.library.function:
+    if function.signature.name not in functions:
+      graph_def.library.function.add().CopyFrom(function)
+
+  for node in graph_def.node:
+    for i, node_input in enumerate(node.input):
+      if _node_name(node_input) != batch_node:
+        continue
+      if node_input.startswith("^"):
+        node.input[i] = "^" + _node_name(output)
+      else:
+        node.input[i] = output
+
+
+def _prune(graph_def):
+  """Removes the nodes that the output of `graph_def` does not depend on."""
+  nodes = {node.name: node for node in graph_def.node}
+  to_visit = [node.name for node in graph_def.node if node.op == _RETVAL_OP]
+  reachable = set()
+  while to_visit:
+    name = to_visit.pop()
+    if name in reachable:
+      continue
+    reachable.add(name)
+    to_visit.extend(_node_name(node_input) for node_input in nodes[name].input)
+  kept = [node for node in graph_def.node if node.name in reachable]
+  del graph_def.node[:]
+  graph_def.node.extend(kept)
+
+
+def _apply_map_vectorization(dataset):
+  """Vectorizes the `map(f).batch(n)` transformations `dataset` depends on.
+
+  The rewrite follows the final options of the dataset, so it is applied when
+  the dataset is finalized for iteration rather than when `batch` is called:
+  the serialized dataset graph is rebuilt with each `map(f).batch(n)` replaced
+  by `batch(n).map(pfor(f))`. Functions with stateful ops, non-dense components
+  or ops that `pfor` cannot convert keep the original transformations, and
+  datasets whose functions capture resources are not rewritten. The rewritten
+  dataset is reused by the later iterations of `dataset`.
+
+  Args:
+    dataset: The dataset to iterate.
+
+  Returns:
+    The rewritten dataset, or `dataset` if nothing was vectorized.
+  """
+  # pylint: disable=protected-access
+  if (debug_mode.DEBUG_MODE or
+      not dataset._options_attr.experimental_optimization.map_vectorization):
+    return dataset
+  if not context.executing_eagerly():
+    if _map_and_batch_pairs(dataset):
+      logging.log_first_n(
+          logging.WARN, "Map vectorization is only applied to datasets that "
+          "are iterated eagerly.", 1)
+    return dataset
+  rewritten = getattr(dataset, "_vectorized_dataset", None)
+  if rewritten is None:
+    rewritten = _vectorize(dataset)
+    dataset._vectorized_dataset = rewritten
+  return rewritten
+
+
+def _vectorize(dataset):
+  """Returns `dataset` rebuilt with its `map(f).batch(n)` vectorized."""
+  # pylint: disable=protected-access
+  pairs = _map_and_batch_pairs(dataset)
+  if not pairs:
+    return dataset
+  if _captures_resources(dataset):
+    logging.info("Not vectorizing the map transformations of a dataset whose "
+                 "functions capture resources.")
+    return dataset
+
+  try:
+    graph_def = _serialize(dataset)
+    num_vectorized = 0
+    for map_dataset, batch_dataset in pairs:
+      batch_node = _find_batch_node(graph_def, map_dataset)
+      if batch_node is None:
+        continue
+      try:
+        vectorized = _vectorize_map_and_batch(map_dataset, batch_dataset)
+      except Exception as e:  # pylint: disable=broad-except
+        logging.info("Not vectorizing map function %s: %s",
+                     map_dataset._map_func.function.name, e)
+        continue
+      if vectorized is None:
+        continue
+      _graft(graph_def, batch_node, _serialize(vectorized),
+             "vectorized_map_%d/" % num_vectorized)
+      num_vectorized += 1
+    if not num_vectorized:
+      return dataset
+    _prune(graph_def)
+    with ops.colocate_with(dataset._variant_tensor):
+      variant_tensor = gen_experimental_dataset_ops.dataset_from_graph(
+          graph_def.SerializeToString())
+    rewritten = dataset_ops._VariantDataset(variant_tensor,
+                                            dataset.element_spec)
+    rewritten = dataset_ops._OptionsDataset(rewritten, dataset._options_attr)
+    # The rewritten graph still calls the Python functions registered by the
+    # original datasets, for example by `from_generator`, which are released
+    # with them.
+    rewritten._original_dataset = dataset
+    return rewritten
+  except Exception as e:  # pylint: disable=broad-except
+    logging.warning("Not vectorizing the map transformations of the dataset: "
+                    "%s", e)
+    return dataset
+
+
 class _BatchDataset(dataset_ops.UnaryDataset):
   """A `Dataset` that batches contiguous elements from its input."""
 
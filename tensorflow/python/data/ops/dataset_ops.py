@@ -472,6 +472,14 @@ class DatasetV2(
     return self._options_attr
 
   def _apply_debug_options(self):
+    """Finalizes the dataset for iteration.
+
+    Applies debug mode, and the rewrites that depend on the final options of
+    the dataset rather than the options when a transformation was applied.
+
+    Returns:
+      The dataset to iterate.
+    """
     if debug_mode.DEBUG_MODE:
       # Disable autotuning and static optimizations that could introduce
       # parallelism or asynchrony.
@@ -482,7 +490,7 @@ class DatasetV2(
       options.experimental_optimization.map_parallelization = False
       dataset = _OptionsDataset(self, options)
     else:
-      dataset = self
+      dataset = batch_op._apply_map_vectorization(self)  # pylint: disable=protected-access
 
     return dataset
 
@@ -534,6 +542,38 @@ class DatasetV2(
       raise TypeError("The dataset length is unknown.")
     return length
 
+  def __getitem__(self, key):
+    """Returns the elements of this dataset at an index, indices or a slice.
+
+    >>> dataset = tf.data.Dataset.range(10).map(lambda x: x * 2)
+    >>> dataset[3].numpy()
+    6
+    >>> list(dataset[-3:].as_numpy_iterator())
+    [14, 16, 18]
+    >>> list(dataset[[5, 1]].as_numpy_iterator())
+    [10, 2]
+
+    Indexing uses `tf.data.Dataset.gather`. Slices relative to the end of the
+    dataset require its cardinality to be known and finite.
+
+    Args:
+      key: An integer, a vector of integers or a slice of integers.
+
+    Returns:
+      The element at `key` if `key` is a scalar, otherwise a `tf.data.Dataset`
+      of the elements at `key`.
+
+    Raises:
+      TypeError: If `key` is not an integer, a vector of integers or a slice
+        of integers.
+    """
+    # Loaded lazily due to a circular dependency (dataset_ops ->
+    # random_access -> dataset_ops).
+    # pylint: disable=g-import-not-at-top,protected-access
+    from tensorflow.python.data.experimental.ops import random_access
+    return random_access._getitem(self, key)
+    # pylint: enable=g-import-not-at-top,protected-access
+
   @abc.abstractproperty
   def element_spec(self):
     """The type specification of an element of this dataset.
@@ -2752,6 +2792,41 @@ name=None))
             output_types=structure.get_flat_tensor_types(state_structure),
             metadata=metadata.SerializeToString()))
 
+  def gather(self, indices):
+    """Creates a `Dataset` of the elements of this dataset at `indices`.
+
+    >>> dataset = tf.data.Dataset.range(100).map(lambda x: x * 2).batch(10)
+    >>> dataset = dataset.gather([3, 0])
+    >>> [b[:3] for b in dataset.as_numpy_iterator()]
+    [array([60, 62, 64]), array([0, 2, 4])]
+
+    Rather than iterating over the dataset, `gather` rewrites its input
+    pipeline to produce only the requested elements: `map` functions are
+    only applied to the gathered elements, `batch` gathers the elements of
+    the requested batches, `skip`, `take`, `zip` and `concatenate` forward
+    the indices to their inputs, and sources such as `from_tensor_slices`,
+    `range` and (in eager mode) uncompressed `tf.data.TFRecordDataset`s whose
+    files have offset indices read the requested elements directly. Other
+    transformations fall back to `tf.data.experimental.at` for each index.
+
+    Args:
+      indices: A `tf.int64` vector of indices. Negative indices count from
+        the end of the dataset, which requires its cardinality to be known.
+
+    Returns:
+      Dataset: A `Dataset` of the elements at `indices`, in the order of
+      `indices`.
+
+    Raises:
+      InvalidArgumentError: If an index is out of range.
+    """
+    # Loaded lazily due to a circular dependency (dataset_ops ->
+    # random_access -> dataset_ops).
+    # pylint: disable=g-import-not-at-top
+    from tensorflow.python.data.experimental.ops import random_access
+    return random_access.gather(self, indices)
+    # pylint: enable=g-import-not-at-top
+
   def get_single_element(self, name=None):
     """Returns the single element of the `dataset`.
 
@@ -4069,6 +4144,10 @@ class DatasetV1(DatasetV2):
   def skip(self, count, name=None):
     return DatasetV1Adapter(super(DatasetV1, self).skip(count, name=name))
 
+  @functools.wraps(DatasetV2.gather)
+  def gather(self, indices):
+    return DatasetV1Adapter(super(DatasetV1, self).gather(indices))
+
   @functools.wraps(DatasetV2.shard)
   def shard(self, num_shards, index, name=None):
     return DatasetV1Adapter(
@@ -30,7 +30,7 @@ from tensorflow.python.ops import script_ops
 
 
 def _from_generator(generator, output_types, output_shapes, args,
-                    output_signature, name):
+                    output_signature, name, batched=False):
   """Creates a `Dataset` whose elements are generated by `generator`.
 
   Note: The current implementation of `Dataset.from_generator()` uses
@@ -105,6 +105,10 @@ def _from_generator(generator, output_types, output_shapes, args,
       corresponding to each component of an element yielded by `generator`.
     name: (Optional.) A name for the tf.data operations used by
       `from_generator`.
+    batched: (Optional.) If `True`, every value yielded by `generator` is a
+      batch of elements, whose components have an additional leading
+      dimension, and the batches are split into elements by the dataset. Only
+      supported for `tf.TensorSpec` components.
 
   Returns:
     Dataset: A `Dataset`.
@@ -148,6 +152,9 @@ def _from_generator(generator, output_types, output_shapes, args,
         output_signature, [x.dtype for x in nest.flatten(output_signature)])
     output_shapes = nest.pack_sequence_as(
         output_signature, [x.shape for x in nest.flatten(output_signature)])
+  elif batched:
+    raise TypeError("A batched `generator` can only produce elements whose "
+                    "components are all `tf.TensorSpec`s.")
 
   if args is None:
     args = ()
@@ -190,6 +197,11 @@ def _from_generator(generator, output_types, output_shapes, args,
           dtypes.as_dtype(dt) for dt in nest.flatten(output_types)
       ]
       flattened_shapes = nest.flatten(output_shapes)
+      if batched:
+        flattened_shapes = [
+            tensor_shape.TensorShape([None]).concatenate(shape)
+            for shape in flattened_shapes
+        ]
 
       def generator_py_func(iterator_id):
         """A `py_func` that will be called to invoke the iterator."""
@@ -235,6 +247,12 @@ def _from_generator(generator, output_types, output_shapes, args,
             raise TypeError(
                 f"`generator` yielded an element of shape {ret_array.shape} "
                 f"where an element of shape {expected_shape} was expected.")
+        if batched:
+          batch_sizes = set(ret_array.shape[0] for ret_array in ret_arrays)
+          if len(batch_sizes) > 1:
+            raise TypeError(
+                f"`generator` yielded a batch whose components have "
+                f"different batch sizes: {sorted(batch_sizes)}.")
 
         return ret_arrays
 
@@ -298,6 +316,14 @@ def _from_generator(generator, output_types, output_shapes, args,
     return script_ops.numpy_function(finalize_py_func, [iterator_id_t],
                                      dtypes.int64)
 
+  if batched:
+    generator_signature = nest.map_structure(
+        lambda spec: tensor_spec.TensorSpec(
+            tensor_shape.TensorShape([None]).concatenate(spec.shape),
+            spec.dtype), output_signature)
+  else:
+    generator_signature = output_signature
+
   # This function associates each traversal of `generator` with a unique
   # iterator ID.
   def flat_map_fn(dummy_arg):
@@ -311,7 +337,7 @@ def _from_generator(generator, output_types, output_shapes, args,
         get_iterator_id_fn,
         generator_next_fn,
         finalize_fn,
-        output_signature,
+        generator_signature,
         name=name)
 
   # A single-element dataset that, each time it is evaluated, contains a
@@ -328,7 +354,11 @@ def _from_generator(generator, output_types, output_shapes, args,
   # into a flat_map here enables multiple repetitions and/or nested
   # versions of the returned dataset to be created, because it forces
   # the generation of a new ID for each version.
-  return id_dataset.flat_map(flat_map_fn, name=name)
+  dataset = id_dataset.flat_map(flat_map_fn, name=name)
+  if batched:
+    # Splitting the batches happens in the runtime, without holding the GIL.
+    dataset = dataset.unbatch(name=name)
+  return dataset
 
 
 class _GeneratorDataset(dataset_ops.DatasetSource):
@@ -18,6 +18,7 @@ import threading
 import warnings
 
 from tensorflow.python.checkpoint import saveable_compat
+from tensorflow.python.data.ops import memory_budget
 from tensorflow.python.data.ops import optional_ops
 from tensorflow.python.data.ops import options as options_lib
 from tensorflow.python.data.util import nest
@@ -689,6 +690,7 @@ class OwnedIterator(IteratorBase):
         `components` and `element_spec` is provided.
     """
     super(OwnedIterator, self).__init__()
+    self._memory_grant = None
 
     if dataset is None:
       if (components is None or element_spec is None):
@@ -714,6 +716,7 @@ class OwnedIterator(IteratorBase):
   def _create_iterator(self, dataset):
     # pylint: disable=protected-access
     dataset = dataset._apply_debug_options()
+    self._memory_grant, dataset = memory_budget._grant(self, dataset)
 
     # Store dataset reference to ensure that dataset is alive when this iterator
     # is being used. For example, `tf.data.Dataset.from_generator` registers
@@ -778,6 +781,8 @@ class OwnedIterator(IteratorBase):
           self._iterator_resource,
           output_types=self._flat_output_types,
           output_shapes=self._flat_output_shapes)
+      if self._memory_grant is not None:
+        self._memory_grant.touch()
 
       try:
         # Fast path for the case `self._structure` is not a nested structure.
@@ -0,0 +1,210 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""A process-wide memory budget for the buffers of tf.data iterators.
+
+By default, the autotuner of every iterator sizes its buffers (e.g. those of
+`prefetch(tf.data.AUTOTUNE)`) within its own RAM budget of half the available
+RAM, so several concurrent pipelines can together exceed the memory of the
+host. With `set_memory_budget`, the eager iterators of the process share a
+single budget instead: each new iterator is granted a share of the budget
+that is not used by the other active iterators, and becomes the RAM budget of
+its autotuner. The grants never add up to more than the budget.
+
+The autotuner reads its RAM budget when the iterator is created, so grants
+are arbitrated between iterators as they are created: the grants of iterators
+that are deleted are returned to the budget for the iterators created
+afterwards. The buffers of an iterator that is merely idle keep their memory,
+so its grant stays allocated; `get_memory_allocation` reports iterators that
+did not produce an element for `idle_seconds` so that they can be deleted.
+"""
+
+import collections
+import itertools
+import threading
+import time
+import weakref
+
+from tensorflow.python.data.ops import options as options_lib
+from tensorflow.python.eager import context
+from tensorflow.python.platform import tf_logging as logging
+
+# The default time after which an iterator that did not produce an element is
+# considered idle, and after which a peak number of iterators is forgotten.
+DEFAULT_IDLE_SECONDS = 60.0
+
+# The grant of iterators created while the budget is fully allocated, with
+# which their autotuner does not grow their buffers. A grant of zero would
+# fall back to the default RAM budget of the autotuner.
+_EXHAUSTED_GRANT_BYTES = 1
+
+PipelineAllocation = collections.namedtuple(
+    "PipelineAllocation", ["pipeline_id", "ram_budget", "idle"])
+
+MemoryAllocation = collections.namedtuple(
+    "MemoryAllocation", ["budget", "allocated", "pipelines"])
+
+_lock = threading.Lock()
+_budget = None
+_num_pipelines = None
+_idle_seconds = DEFAULT_IDLE_SECONDS
+# The largest number of concurrently live iterators seen in the last
+# `_idle_seconds`, and when it was last seen. One more than it is the default
+# number of shares of the budget.
+_peak_live = 0
+_peak_time = 0.0
+_grants = {}
+_grant_ids = itertools.count()
+
+
+class _Grant(object):
+  """The RAM budget granted to one iterator."""
+
+  __slots__ = ["pipeline_id", "ram_budget", "last_active"]
+
+  def __init__(self, pipeline_id, ram_budget):
+    self.pipeline_id = pipeline_id
+    self.ram_budget = ram_budget
+    self.last_active = time.monotonic()
+
+  def touch(self):
+    self.last_active = time.monotonic()
+
+  def is_idle(self, now):
+    return now - self.last_active > _idle_seconds
+
+
+def set_memory_budget(ram_budget, num_pipelines=None,
+                      idle_seconds=DEFAULT_IDLE_SECONDS):
+  """Sets the memory budget shared by the tf.data iterators of the process.
+
+  ```python
+  set_memory_budget(8 * 2**30, num_pipelines=6)
+  for task_dataset in task_datasets:
+    iterators.append(iter(task_dataset))
+  print(get_memory_allocation())
+  ```
+
+  The budget applies to the iterators created afterwards in eager mode, for
+  datasets with autotuning enabled and no explicit
+  `tf.data.experimental.AutotuneOptions.ram_budget`.
+
+  Args:
+    ram_budget: The budget in bytes, or `None` to let each iterator use its
+      own default budget.
+    num_pipelines: (Optional.) The expected number of concurrently live
+      iterators. A new iterator is granted `ram_budget / num_pipelines`
+      bytes, or the unallocated budget if that is smaller. Iterators created
+      once the budget is fully allocated do not grow their buffers. Defaults
+      to one more than the largest number of concurrently live iterators seen
+      in the last `idle_seconds`, so that a share of the budget is left for
+      the next iterator.
+    idle_seconds: (Optional.) The time after which an iterator that did not
+      produce an element is reported as idle.
+
+  Raises:
+    ValueError: If an argument is not positive.
+  """
+  global _budget, _num_pipelines, _idle_seconds
+  if ram_budget is not None and ram_budget <= 0:
+    raise ValueError(f"`ram_budget` must be positive, got {ram_budget}.")
+  if num_pipelines is not None and num_pipelines <= 0:
+    raise ValueError(
+        f"`num_pipelines` must be positive, got {num_pipelines}.")
+  if idle_seconds <= 0:
+    raise ValueError(f"`idle_seconds` must be positive, got {idle_seconds}.")
+  with _lock:
+    _budget = ram_budget
+    _num_pipelines = num_pipelines
+    _idle_seconds = idle_seconds
+
+
+def get_memory_budget():
+  """Returns the memory budget in bytes, or `None` if none is set."""
+  return _budget
+
+
+def get_memory_allocation():
+  """Returns the current allocation of the memory budget.
+
+  Returns:
+    A `MemoryAllocation` with the `budget`, the bytes `allocated` to live
+    iterators and a list of `PipelineAllocation`s with the `ram_budget`
+    granted to each live iterator and whether it is `idle`. Idle iterators
+    keep their buffers, so their grants count as allocated until they are
+    deleted.
+  """
+  with _lock:
+    now = time.monotonic()
+    pipelines = [
+        PipelineAllocation(g.pipeline_id, g.ram_budget, g.is_idle(now))
+        for g in _grants.values()
+    ]
+    return MemoryAllocation(_budget, sum(p.ram_budget for p in pipelines),
+                            pipelines)
+
+
+def _release(pipeline_id):
+  with _lock:
+    _grants.pop(pipeline_id, None)
+
+
+def _grant(iterator, dataset):
+  """Returns the grant for `iterator` of `dataset` and the dataset to use.
+
+  Args:
+    iterator: The new iterator, whose grant is released when it is deleted.
+    dataset: The dataset of `iterator`.
+
+  Returns:
+    A tuple of the `_Grant`, which is `None` if the iterator does not use the
+    budget, and `dataset` with the granted RAM budget.
+  """
+  global _peak_live, _peak_time
+  if _budget is None or not context.executing_eagerly():
+    return None, dataset
+  autotune = dataset.options().autotune
+  if autotune.enabled is False:  # pylint: disable=g-bool-id-comparison
+    return None, dataset
+  with _lock:
+    now = time.monotonic()
+    live = len(_grants) + 1
+    if live >= _peak_live or now - _peak_time > _idle_seconds:
+      _peak_live = live
+      _peak_time = now
+    pipeline_id = next(_grant_ids)
+    if autotune.ram_budget is not None:
+      # Explicit budgets are not overridden, but count as allocated.
+      ram_budget = autotune.ram_budget
+    else:
+      if _num_pipelines is None:
+        shares = _peak_live + 1
+      else:
+        shares = max(_num_pipelines, live)
+      unallocated = _budget - sum(g.ram_budget for g in _grants.values())
+      ram_budget = min(_budget // shares, unallocated)
+      if ram_budget <= 0:
+        logging.log_first_n(
+            logging.WARN, "The tf.data memory budget is fully allocated, so "
+            "new iterators do not grow their buffers. Delete idle iterators "
+            "or increase the budget.", 1)
+        ram_budget = _EXHAUSTED_GRANT_BYTES
+    grant = _Grant(pipeline_id, ram_budget)
+    _grants[pipeline_id] = grant
+  weakref.finalize(iterator, _release, pipeline_id)
+  if autotune.ram_budget is None:
+    options = options_lib.Options()
+    options.autotune.ram_budget = ram_budget
+    dataset = dataset.with_options(options)
+  return grant, dataset
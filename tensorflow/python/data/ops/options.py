@@ -362,6 +362,18 @@ class OptimizationOptions(options_lib.OptionsBase):
       docstring="Whether to fuse map transformations. If None, defaults to "
       "False.")
 
+  map_vectorization = options_lib.create_option(
+      name="map_vectorization",
+      ty=bool,
+      docstring=
+      "Whether to rewrite a map transformation followed by a batch "
+      "transformation into a batch followed by a map of the vectorized "
+      "function, so that the function runs once per batch instead of once per "
+      "element. Functions that cannot be vectorized are left unchanged, as are "
+      "datasets whose functions capture resources such as variables. The "
+      "rewrite follows the final options of the dataset and is applied when "
+      "the dataset is iterated eagerly. If None, defaults to False.")
+
   map_parallelization = options_lib.create_option(
       name="map_parallelization",
       ty=bool,
@@ -405,6 +417,8 @@ class OptimizationOptions(options_lib.OptionsBase):
       pb.map_fusion = self.map_fusion
     if self.map_parallelization is not None:
       pb.map_parallelization = self.map_parallelization
+    if self.map_vectorization is not None:
+      pb.map_vectorization = self.map_vectorization
     if self.noop_elimination is not None:
       pb.noop_elimination = self.noop_elimination
     if self.parallel_batch is not None:
@@ -430,6 +444,8 @@ class OptimizationOptions(options_lib.OptionsBase):
       self.map_fusion = pb.map_fusion
     if pb.WhichOneof("optional_map_parallelization") is not None:
       self.map_parallelization = pb.map_parallelization
+    if pb.WhichOneof("optional_map_vectorization") is not None:
+      self.map_vectorization = pb.map_vectorization
     if pb.WhichOneof("optional_noop_elimination") is not None:
       self.noop_elimination = pb.noop_elimination
     if pb.WhichOneof("optional_parallel_batch") is not None:
@@ -38,6 +38,7 @@ from tensorflow.python.eager import benchmarks_test_base
 from tensorflow.python.eager import context
 from tensorflow.python.eager import core
 from tensorflow.python.eager import def_function
+from tensorflow.python.eager import execute
 from tensorflow.python.eager import forwardprop
 from tensorflow.python.eager import test
 from tensorflow.python.framework import constant_op
@@ -372,6 +373,36 @@ class MicroBenchmarks(benchmarks_test_base.MicroBenchmarksBase):
 
     self._run(f, 30000)
 
+  # The benchmarks below measure the Python overhead of the eager fallback of
+  # the generated op wrappers, which infers and converts attrs in Python.
+  def benchmark_eager_fallback_tf_identity(self):
+    m = self._m_2
+    ctx = context.context()
+    self._run(
+        lambda: gen_array_ops.identity_eager_fallback(m, name=None, ctx=ctx),
+        30000)
+
+  def benchmark_eager_fallback_add_python_scalars(self):
+    ctx = context.context()
+
+    def f():
+      gen_math_ops.add_v2_eager_fallback(1.0, 2.0, name=None, ctx=ctx)
+
+    self._run(f, 30000)
+
+  def benchmark_args_to_matching_eager_python_scalars(self):
+    ctx = context.context()
+    allowed_dtypes = [dtypes.int32, dtypes.int64, dtypes.float32]
+    self._run(
+        lambda: execute.args_to_matching_eager([1, 2], ctx, allowed_dtypes),
+        30000)
+
+  def benchmark_make_shape_attr(self):
+    self._run(lambda: execute.make_shape([8, 128], "shape"), 30000)
+
+  def benchmark_make_type_attr(self):
+    self._run(lambda: execute.make_type(dtypes.float32, "T"), 30000)
+
   def benchmark_tf_gradient_function_identity(self):
     with context.device(CPU):
       m = gen_array_ops.identity(self._m_2)
@@ -23,6 +23,30 @@ from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_shape
 from tensorflow.python.util import compat
 
+# The maximum number of entries of each of the caches below. The caches are
+# keyed by the attr values and argument kinds seen at the call sites of the
+# generated op wrappers, which are few in practice; once full, new entries are
+# computed without being cached.
+_MAX_CACHE_SIZE = 1024
+
+# Maps the values of "type" attrs to their DataType enum.
+_datatype_enums = {}
+
+# Maps the values of "shape" attrs given as lists or tuples of ints and Nones,
+# as tuples, to their list of dimensions.
+_shape_dims = {}
+
+# Maps (allowed dtypes, default dtype, inference key of the first value) to the
+# dtype that `args_to_matching_eager` infers for inputs without a dtype.
+_inferred_dtypes = {}
+
+# Scalar types whose conversion to a tensor only depends on their type.
+_SCALAR_TYPES = frozenset([bool, float, complex, str, bytes])
+
+# The maximum length of the sequences for which a dtype inference key is
+# computed, so that computing the key stays cheap.
+_MAX_KEYED_SEQUENCE_LENGTH = 16
+
 
 def quick_execute(op_name, num_outputs, inputs, attrs, ctx, name=None):
   """Execute a TensorFlow operation.
@@ -178,12 +202,22 @@ def make_bool(v, arg_name):
 
 
 def make_type(v, arg_name):
+  """Convert v into a DataType enum."""
+  try:
+    return _datatype_enums[v]
+  except (KeyError, TypeError):
+    pass
   try:
-    v = dtypes.as_dtype(v).base_dtype
+    dtype = dtypes.as_dtype(v).base_dtype
   except TypeError:
     raise TypeError("Expected DataType for argument '%s' not %s." %
                     (arg_name, repr(v)))
-  i = v.as_datatype_enum
+  i = dtype.as_datatype_enum
+  if len(_datatype_enums) < _MAX_CACHE_SIZE:
+    try:
+      _datatype_enums[v] = i
+    except TypeError:
+      pass
   return i
 
 
@@ -196,6 +230,16 @@ def make_shape(v, arg_name):
   # Returns:
   #   None if the rank is unknown, otherwise a list of ints (or Nones in the
   #   position where the dimension is unknown).
+  key = None
+  # Only dimensions given as ints and Nones are cached, as e.g. `2.0` is equal
+  # to `2` but is not a valid dimension.
+  if type(v) in (list, tuple) and all(
+      type(d) is int or d is None for d in v):  # pylint: disable=unidiomatic-typecheck
+    key = tuple(v)
+    try:
+      return list(_shape_dims[key])
+    except KeyError:
+      pass
   try:
     shape = tensor_shape.as_shape(v)
   except TypeError as e:
@@ -205,8 +249,10 @@ def make_shape(v, arg_name):
                      (arg_name, e))
   if shape.ndims is None:
     return None
-  else:
-    return shape.as_list()
+  dims = shape.as_list()
+  if key is not None and len(_shape_dims) < _MAX_CACHE_SIZE:
+    _shape_dims[key] = tuple(dims)
+  return dims
 
 
 def make_tensor(v, arg_name):
@@ -222,6 +268,36 @@ def make_tensor(v, arg_name):
       (repr(v), arg_name))
 
 
+def _dtype_inference_key(value):
+  """Returns a key determining the dtype `value` converts to, or None.
+
+  Python scalars and short sequences of them convert to a dtype that only
+  depends on their types, and on whether integers fit in an int32.
+
+  Args:
+    value: A value passed to an op.
+
+  Returns:
+    A hashable key, or None if the dtype of `value` is not determined by a
+    cheap key.
+  """
+  value_type = type(value)
+  if value_type is int:
+    return value_type, -2**31 <= value < 2**31
+  if value_type in _SCALAR_TYPES:
+    return value_type
+  if (value_type in (list, tuple) and
+      len(value) <= _MAX_KEYED_SEQUENCE_LENGTH):
+    keys = []
+    for element in value:
+      key = _dtype_inference_key(element)
+      if key is None:
+        return None
+      keys.append(key)
+    return value_type, tuple(keys)
+  return None
+
+
 def args_to_matching_eager(l, ctx, allowed_dtypes, default_dtype=None):
   """Convert sequence `l` to eager same-type Tensors."""
   if (not l) and (default_dtype is not None):
@@ -240,6 +316,15 @@ def args_to_matching_eager(l, ctx, allowed_dtypes, default_dtype=None):
       dtype = t.dtype
       break
 
+  inference_key = None
+  if dtype is None:
+    # The dtype inferred from the first value below is cached for the values
+    # of the same kind passed to ops with the same allowed and default dtypes.
+    first_key = _dtype_inference_key(l[0])
+    if first_key is not None:
+      inference_key = (tuple(allowed_dtypes), default_dtype, first_key)
+      dtype = _inferred_dtypes.get(inference_key)
+
   if dtype is None:
     # Infer a dtype based on the first value, and use that dtype for the
     # remaining values.
@@ -265,6 +350,9 @@ def args_to_matching_eager(l, ctx, allowed_dtypes, default_dtype=None):
       ret.append(tensor)
       if dtype is None:
         dtype = tensor.dtype
+    if (inference_key is not None and
+        len(_inferred_dtypes) < _MAX_CACHE_SIZE):
+      _inferred_dtypes[inference_key] = dtype
   else:
     ret = [ops.convert_to_tensor(t, dtype, ctx=ctx) for t in l]
 
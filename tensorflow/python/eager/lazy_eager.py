@@ -0,0 +1,367 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Records the eager ops of Python functions and replays them as functions.
+
+`record_replay` wraps an imperative Python function. The first call for a
+given input signature runs the function eagerly, one op at a time, while an op
+callback records the ops it executes and how their inputs and outputs connect.
+The recorded op sequence is then built into a graph function, and the later
+calls with the same input signature replay it as a single function call
+without running the Python function, which avoids the per-op dispatch cost of
+eager execution.
+
+Unlike `tf.function`, the Python function always runs eagerly when recorded,
+so it needs no AutoGraph conversion. As with `tf.function` tracing, the Python
+values computed during the recording are baked into the replayed ops. A
+function that reads the value of a tensor into Python, e.g. to branch on it,
+is not replayed, since the recorded ops may not hold for other values.
+"""
+
+import collections
+import threading
+import weakref
+
+from tensorflow.core.function import trace_type
+from tensorflow.python.eager import context
+from tensorflow.python.eager.polymorphic_function import monomorphic_function
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import func_graph as func_graph_module
+from tensorflow.python.framework import op_callbacks
+from tensorflow.python.framework import op_def_library
+from tensorflow.python.framework import op_def_registry
+from tensorflow.python.framework import ops
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.ops import handle_data_util
+from tensorflow.python.ops import resource_variable_ops
+from tensorflow.python.platform import tf_logging as logging
+from tensorflow.python.util import nest
+from tensorflow.python.util import tf_decorator
+
+# Ops whose recording cannot be replayed: replaying them would create new
+# resources on every call.
+_UNREPLAYABLE_OPS = frozenset(["VarHandleOp", "VarIsInitializedOp"])
+
+# The default maximum number of input signatures recorded per function.
+_DEFAULT_MAX_RECORDINGS = 16
+
+_RecordedOp = collections.namedtuple(
+    "_RecordedOp",
+    ["op_type", "op_def", "attrs", "inputs", "output_dtypes", "device"])
+
+
+class _Recorder(object):
+  """An op callback recording the eager ops executed by a Python function."""
+
+  def __init__(self, inputs):
+    self.ops = []
+    self.unreplayable_reason = None
+    self._thread_id = threading.get_ident()
+    # Maps the id of every tensor seen to its source: ("input", index),
+    # ("op", op_index, output_index) or ("external", tensor). The tensors are
+    # kept alive until the recording is built so that their ids stay unique.
+    self._sources = {}
+    self._tensors = []
+    for i, tensor in enumerate(inputs):
+      self._add_source(tensor, ("input", i))
+
+  def _add_source(self, tensor, source):
+    self._sources[id(tensor)] = source
+    self._tensors.append(tensor)
+
+  def source(self, tensor):
+    """Returns the source of `tensor`, treating unknown ones as external."""
+    source = self._sources.get(id(tensor))
+    if source is None:
+      source = ("external", tensor)
+      self._add_source(tensor, source)
+    return source
+
+  def observe(self, tensor):
+    """Called with the tensors whose value is read into Python."""
+    del tensor  # Unused.
+    if (self.unreplayable_reason is None and
+        threading.get_ident() == self._thread_id):
+      self.unreplayable_reason = "it reads the value of a tensor"
+
+  def __call__(self, op_type, inputs, attrs, outputs, op_name=None,
+               graph=None):
+    del op_name  # Unused.
+    if graph is not None or self.unreplayable_reason is not None:
+      # Ops created in graphs belong to functions traced by the recorded
+      # function, which run as function ops recorded on their own.
+      return None
+    op_type = op_type.decode() if isinstance(op_type, bytes) else op_type
+    op_def = op_def_registry.get(op_type)
+    if op_def is None:
+      self.unreplayable_reason = f"it calls the function {op_type}"
+      return None
+    if op_type in _UNREPLAYABLE_OPS or any(
+        "func" in attr.type for attr in op_def.attr):
+      self.unreplayable_reason = f"it executes a {op_type} op"
+      return None
+    op_inputs = [self.source(tensor) for tensor in inputs]
+    index = len(self.ops)
+    self.ops.append(
+        _RecordedOp(op_type, op_def, attrs or (), op_inputs,
+                    [tensor.dtype for tensor in outputs],
+                    context.context().device_name))
+    for i, tensor in enumerate(outputs):
+      self._add_source(tensor, ("op", index, i))
+    return None
+
+
+def _attr_values(recorded_op):
+  """Returns the `AttrValue`s of a recorded op, by name."""
+  attr_types = {attr.name: attr.type for attr in recorded_op.op_def.attr}
+  attrs = recorded_op.attrs
+  return {
+      name: op_def_library.value_to_attr_value(value, attr_types[name], name)
+      for name, value in zip(attrs[::2], attrs[1::2])
+  }
+
+
+# A recorded op sequence built into a concrete function. `flat_outputs` are the
+# flattened outputs of `structure` returned by the recording, with None in
+# place of the tensors, which are the outputs of the function at
+# `output_indices`.
+_Recording = collections.namedtuple(
+    "_Recording",
+    ["concrete_function", "structure", "flat_outputs", "output_indices"])
+
+
+def _input_tensor(value):
+  if isinstance(value, resource_variable_ops.BaseResourceVariable):
+    return value.handle
+  return value
+
+
+def _inputs(args, kwargs):
+  """Returns the tensors and variables fed to a recording.
+
+  As with `tf.function`, variables are fed by handle so that a recording is
+  replayed with the variables of the call. A variable passed more than once is
+  fed once.
+
+  Args:
+    args: The positional arguments of the call.
+    kwargs: The keyword arguments of the call.
+
+  Returns:
+    A list of `EagerTensor`s and `BaseResourceVariable`s.
+  """
+  values = []
+  for value in nest.flatten((args, kwargs)):
+    if isinstance(value, resource_variable_ops.BaseResourceVariable):
+      values.append(value)
+    else:
+      values.extend(nest.flatten(value, expand_composites=True))
+  inputs = []
+  handle_ids = set()
+  for value in values:
+    tensor = _input_tensor(value)
+    if not isinstance(tensor, ops.EagerTensor):
+      continue
+    if tensor.dtype == dtypes.resource:
+      if id(tensor) in handle_ids:
+        continue
+      handle_ids.add(id(tensor))
+    inputs.append(value)
+  return inputs
+
+
+def _build_recording(name, recorder, input_tensors, outputs):
+  """Builds the ops recorded by `recorder` into a `_Recording`."""
+  flat_outputs = nest.flatten(outputs, expand_composites=True)
+  output_indices = [
+      i for i, output in enumerate(flat_outputs)
+      if isinstance(output, ops.EagerTensor)
+  ]
+  output_sources = [recorder.source(flat_outputs[i]) for i in output_indices]
+  for i in output_indices:
+    flat_outputs[i] = None
+  attr_values = [_attr_values(recorded_op) for recorded_op in recorder.ops]
+
+  def replay(*placeholders):
+    graph = ops.get_default_graph()
+    values = {}
+    for tensor, placeholder in zip(input_tensors, placeholders):
+      handle_data_util.copy_handle_data(tensor, placeholder)
+
+    def resolve(source):
+      if source[0] == "input":
+        return placeholders[source[1]]
+      if source[0] == "op":
+        return values[source[1:]]
+      return source[1]
+
+    for i, recorded_op in enumerate(recorder.ops):
+      with ops.device(recorded_op.device or None):
+        op = graph._create_op_internal(  # pylint: disable=protected-access
+            recorded_op.op_type,
+            [resolve(source) for source in recorded_op.inputs],
+            dtypes=recorded_op.output_dtypes,
+            attrs=attr_values[i],
+            op_def=recorded_op.op_def)
+      for j, output in enumerate(op.outputs):
+        values[(i, j)] = output
+    return [resolve(source) for source in output_sources]
+
+  input_specs = [
+      tensor_spec.TensorSpec(tensor.shape, tensor.dtype)
+      for tensor in input_tensors
+  ]
+  func_graph = func_graph_module.func_graph_from_py_func(
+      name, replay, input_specs, {})
+  return _Recording(
+      monomorphic_function.ConcreteFunction(func_graph), outputs, flat_outputs,
+      output_indices)
+
+
+class RecordReplayFunction(object):
+  """A Python function whose eager ops are recorded and replayed.
+
+  See `record_replay`.
+  """
+
+  def __init__(self, python_function, max_recordings=_DEFAULT_MAX_RECORDINGS):
+    self._python_function = python_function
+    self._name = getattr(python_function, "__name__", "function")
+    self._max_recordings = max_recordings
+    self._lock = threading.Lock()
+    # Maps input signatures to their `_Recording`, or to None if the function
+    # cannot be replayed for them.
+    self._recordings = collections.OrderedDict()
+    # Maps the instances a method is bound to to their `RecordReplayFunction`.
+    self._descriptor_cache = weakref.WeakKeyDictionary()
+
+  @property
+  def python_function(self):
+    return self._python_function
+
+  @property
+  def num_recordings(self):
+    """The number of input signatures replayed from a recording."""
+    with self._lock:
+      return sum(recording is not None
+                 for recording in self._recordings.values())
+
+  def __call__(self, *args, **kwargs):
+    if not context.executing_eagerly():
+      return self._python_function(*args, **kwargs)
+    try:
+      key = trace_type.from_value((args, kwargs))
+      hash(key)
+    except (TypeError, ValueError):
+      return self._python_function(*args, **kwargs)
+
+    with self._lock:
+      recorded = key in self._recordings
+      recording = self._recordings.get(key)
+    if recording is not None:
+      return self._replay(recording, _inputs(args, kwargs))
+    if recorded or len(self._recordings) >= self._max_recordings:
+      return self._python_function(*args, **kwargs)
+    return self._record(key, args, kwargs)
+
+  def _record(self, key, args, kwargs):
+    """Runs the function eagerly while recording its ops."""
+    input_tensors = [_input_tensor(value) for value in _inputs(args, kwargs)]
+    recorder = _Recorder(input_tensors)
+    op_callbacks.add_op_callback(recorder)
+    ops._eager_value_read_callbacks.append(recorder.observe)  # pylint: disable=protected-access
+    try:
+      outputs = self._python_function(*args, **kwargs)
+    finally:
+      ops._eager_value_read_callbacks.remove(recorder.observe)  # pylint: disable=protected-access
+      op_callbacks.remove_op_callback(recorder)
+
+    recording = None
+    if recorder.unreplayable_reason is None:
+      try:
+        recording = _build_recording(self._name, recorder, input_tensors,
+                                     outputs)
+      except (TypeError, ValueError) as e:
+        recorder.unreplayable_reason = f"its ops cannot be rebuilt: {e}"
+    if recorder.unreplayable_reason is not None:
+      logging.vlog(1, "Not replaying %s, as %s.", self._name,
+                   recorder.unreplayable_reason)
+    with self._lock:
+      self._recordings[key] = recording
+    return outputs
+
+  def _replay(self, recording, inputs):
+    """Replays a recording as a single function call."""
+    concrete_function = recording.concrete_function
+    replayed = concrete_function._call_flat(  # pylint: disable=protected-access
+        inputs, captured_inputs=concrete_function.captured_inputs)
+    if not isinstance(replayed, (list, tuple)):
+      replayed = [replayed] if replayed is not None else []
+    flat_outputs = list(recording.flat_outputs)
+    for index, tensor in zip(recording.output_indices, replayed):
+      flat_outputs[index] = tensor
+    return nest.pack_sequence_as(recording.structure, flat_outputs,
+                                 expand_composites=True)
+
+  def __get__(self, instance, owner):
+    """Makes it possible to decorate instance methods."""
+    del owner
+    if instance is None:
+      return self
+    if instance not in self._descriptor_cache:
+      self._descriptor_cache[instance] = tf_decorator.make_decorator(
+          self._python_function,
+          RecordReplayFunction(
+              self._python_function.__get__(instance), self._max_recordings))
+    return self._descriptor_cache[instance]
+
+
+def record_replay(func=None, max_recordings=_DEFAULT_MAX_RECORDINGS):
+  """Records the eager ops of `func` and replays them as one function call.
+
+  The first call of the returned function for an input signature, as defined
+  by the `tf.types.experimental.TraceType` of its arguments, runs `func`
+  eagerly while recording the ops it executes. The later calls with the same
+  input signature replay the recorded ops as a single function call, without
+  running `func` again:
+
+  >>> v = tf.Variable(0.)
+  >>> @record_replay
+  ... def step(x):
+  ...   v.assign_add(tf.reduce_sum(x * 2.))
+  ...   return v + 1.
+  >>> step(tf.constant([1., 2.])).numpy()   # Runs eagerly and records.
+  7.0
+  >>> step(tf.constant([3., 4.])).numpy()   # Replays.
+  21.0
+
+  Only the tensors and variables passed as arguments and the resources used by
+  the ops are read again on replay: Python values, and tensors created in
+  Python during the recording, keep their recorded value. Functions that read
+  the value of a tensor into Python, e.g. with `numpy()`, `bool()` or `int()`,
+  create variables, call `tf.function`s or use control flow ops are run
+  eagerly on every call instead of being replayed.
+
+  Args:
+    func: The Python function to wrap.
+    max_recordings: The maximum number of input signatures recorded. Calls
+      with other signatures run `func` eagerly.
+
+  Returns:
+    A `RecordReplayFunction`, or a decorator creating one if `func` is None.
+  """
+  if func is None:
+    return lambda func: record_replay(func, max_recordings)
+  return tf_decorator.make_decorator(
+      func, RecordReplayFunction(func, max_recordings))
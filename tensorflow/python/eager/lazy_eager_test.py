@@ -0,0 +1,185 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for recording and replaying eager ops."""
+
+from tensorflow.python.eager import backprop
+from tensorflow.python.eager import def_function
+from tensorflow.python.eager import lazy_eager
+from tensorflow.python.eager import test
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import resource_variable_ops
+
+
+class RecordReplayTest(test.TestCase):
+
+  def testReplaysOps(self):
+    calls = []
+
+    @lazy_eager.record_replay
+    def f(x, y):
+      calls.append(None)
+      return {'sum': math_ops.reduce_sum(x * y), 'scale': 2, 'y': y}
+
+    out = f(constant_op.constant([1., 2.]), constant_op.constant([3., 4.]))
+    self.assertAllEqual(11., out['sum'])
+    out = f(constant_op.constant([5., 6.]), constant_op.constant([1., 2.]))
+    self.assertAllEqual(17., out['sum'])
+    self.assertAllEqual([1., 2.], out['y'])
+    self.assertEqual(2, out['scale'])
+    self.assertLen(calls, 1)
+    self.assertEqual(1, f.num_recordings)
+
+  def testRecordsPerInputSignature(self):
+    calls = []
+
+    @lazy_eager.record_replay
+    def f(x, power):
+      calls.append(None)
+      return x**power
+
+    self.assertAllEqual([1., 4.], f(constant_op.constant([1., 2.]), 2))
+    self.assertAllEqual([1., 8.], f(constant_op.constant([1., 2.]), 3))
+    self.assertAllEqual([9.], f(constant_op.constant([3.]), 2))
+    self.assertAllEqual([4., 9.], f(constant_op.constant([2., 3.]), 2))
+    self.assertAllEqual([1, 4], f(constant_op.constant([1, 2]), 2))
+    self.assertLen(calls, 4)
+    self.assertEqual(4, f.num_recordings)
+
+  def testReplaysVariableUpdates(self):
+    v = resource_variable_ops.ResourceVariable(0.)
+
+    @lazy_eager.record_replay
+    def step(x):
+      v.assign_add(math_ops.reduce_sum(x))
+      return v.read_value() * 2.
+
+    self.assertAllEqual(6., step(constant_op.constant([1., 2.])))
+    self.assertAllEqual(20., step(constant_op.constant([3., 4.])))
+    self.assertAllEqual(10., v)
+
+  def testReplaysVariableArguments(self):
+    calls = []
+    v1 = resource_variable_ops.ResourceVariable(1.)
+    v2 = resource_variable_ops.ResourceVariable(2.)
+
+    @lazy_eager.record_replay
+    def step(v, x):
+      calls.append(None)
+      v.assign_add(x)
+      return v.read_value()
+
+    self.assertAllEqual(2., step(v1, constant_op.constant(1.)))
+    self.assertAllEqual(3., step(v2, constant_op.constant(1.)))
+    self.assertAllEqual(2., v1)
+    self.assertAllEqual(3., v2)
+    self.assertLen(calls, 1)
+    self.assertEqual(1, step.num_recordings)
+
+  def testVariableArgumentGradients(self):
+
+    @lazy_eager.record_replay
+    def f(v, x):
+      return v * x
+
+    v = resource_variable_ops.ResourceVariable(3.)
+    f(v, constant_op.constant(1.))
+    with backprop.GradientTape() as tape:
+      y = f(v, constant_op.constant(2.))
+    self.assertAllEqual(6., y)
+    self.assertAllEqual(2., tape.gradient(y, v))
+    self.assertEqual(1, f.num_recordings)
+
+  def testRunsFunctionsReadingValuesEagerly(self):
+    calls = []
+
+    @lazy_eager.record_replay
+    def f(x):
+      calls.append(None)
+      if x[0] > 0:
+        return x + 1
+      return x - 1
+
+    self.assertAllEqual([2.], f(constant_op.constant([1.])))
+    self.assertAllEqual([-2.], f(constant_op.constant([-1.])))
+    self.assertLen(calls, 2)
+    self.assertEqual(0, f.num_recordings)
+
+  def testGradients(self):
+
+    @lazy_eager.record_replay
+    def f(x):
+      return x * x
+
+    f(constant_op.constant(3.))
+    x = constant_op.constant(4.)
+    with backprop.GradientTape() as tape:
+      tape.watch(x)
+      y = f(x)
+    self.assertAllEqual(16., y)
+    self.assertAllEqual(8., tape.gradient(y, x))
+
+  def testRunsUnreplayableFunctionsEagerly(self):
+    calls = []
+    add = def_function.function(math_ops.add)
+
+    @lazy_eager.record_replay
+    def f(x):
+      calls.append(None)
+      return add(x, x)
+
+    for _ in range(3):
+      self.assertAllEqual(2., f(constant_op.constant(1.)))
+    self.assertLen(calls, 3)
+    self.assertEqual(0, f.num_recordings)
+
+  def testMaxRecordings(self):
+    calls = []
+
+    @lazy_eager.record_replay(max_recordings=1)
+    def f(x):
+      calls.append(None)
+      return array_ops.identity(x)
+
+    for _ in range(2):
+      f(constant_op.constant(1))
+      f(constant_op.constant(1, dtype=dtypes.int64))
+    self.assertLen(calls, 3)
+    self.assertEqual(1, f.num_recordings)
+
+  def testMethod(self):
+
+    class Model(object):
+
+      def __init__(self, scale):
+        self.scale = scale
+        self.calls = 0
+
+      @lazy_eager.record_replay
+      def apply(self, x):
+        self.calls += 1
+        return x * self.scale
+
+    model = Model(2.)
+    self.assertAllEqual(2., model.apply(constant_op.constant(1.)))
+    self.assertAllEqual(4., model.apply(constant_op.constant(2.)))
+    self.assertEqual(1, model.calls)
+    self.assertAllEqual(3., Model(3.).apply(constant_op.constant(1.)))
+
+
+if __name__ == '__main__':
+  test.main()
@@ -362,6 +362,45 @@ class OpsTest(test_util.TensorFlowTestCase, parameterized.TestCase):
     self.assertEqual(t, dtypes.string)
     self.assertEqual(r[0].dtype, dtypes.string)
 
+  def testArgsToMatchingEagerCachedDtype(self):
+    ctx = context.context()
+    allowed_dtypes = [dtypes.int32, dtypes.int64, dtypes.float32]
+    for _ in range(2):
+      t, r = execute.args_to_matching_eager([3, 4], ctx, allowed_dtypes,
+                                            dtypes.float32)
+      self.assertEqual(t, dtypes.int32)
+      self.assertAllEqual([3, 4], r)
+      t, r = execute.args_to_matching_eager([2**40], ctx, allowed_dtypes,
+                                            dtypes.float32)
+      self.assertEqual(t, dtypes.int64)
+      t, r = execute.args_to_matching_eager([[1.0, 2]], ctx, allowed_dtypes,
+                                            dtypes.int32)
+      self.assertEqual(t, dtypes.float32)
+      self.assertAllEqual([[1.0, 2.0]], r[0])
+    # A value of another kind is not given the cached dtype.
+    t, r = execute.args_to_matching_eager([3.5], ctx, allowed_dtypes,
+                                          dtypes.float32)
+    self.assertEqual(t, dtypes.float32)
+
+  def testMakeAttrsCached(self):
+    for _ in range(2):
+      dims = execute.make_shape([2, None], 'shape')
+      self.assertEqual([2, None], dims)
+      dims.append(3)
+      self.assertIsNone(execute.make_shape(None, 'shape'))
+      self.assertEqual(dtypes.int64.as_datatype_enum,
+                       execute.make_type(dtypes.int64_ref, 'T'))
+      self.assertEqual(dtypes.float32.as_datatype_enum,
+                       execute.make_type('float32', 'T'))
+    with self.assertRaisesRegex(TypeError, 'Expected DataType'):
+      execute.make_type([], 'T')
+
+  def testMakeShapeCachedByType(self):
+    self.assertEqual([2], execute.make_shape([2], 'shape'))
+    # Equal to the cached `[2]`, but floats are not valid dimensions.
+    with self.assertRaisesRegex(TypeError, 'Error converting shape'):
+      execute.make_shape([2.0], 'shape')
+
   def testFlattenLayer(self):
     flatten_layer = core.Flatten()
     x = constant_op.constant([[[-10, -20], [-30, -40]], [[10, 20], [30, 40]]])
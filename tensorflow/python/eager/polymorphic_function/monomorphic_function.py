@@ -1348,6 +1348,9 @@ class ConcreteFunction(core.ConcreteFunction, trackable.Trackable):
               captured=self._captured_inputs))
     self._output_shapes = tuple(
         output.shape for output in self._func_graph.outputs)
+    # The structured outputs compiled by `_build_call_outputs`, with the
+    # `nest.StructurePlan` packing them and the indices of their tensors.
+    self._structured_outputs_plan = None
     self._attrs = _parse_func_attrs(attrs or {})
 
     if shared_func_graph:
@@ -2105,21 +2108,28 @@ class ConcreteFunction(core.ConcreteFunction, trackable.Trackable):
       The actual call output.
     """
     # TODO(jlchu): call C++ version in function.cc when speed is improved
-    if self._func_graph.structured_outputs is None:
+    structured_outputs = self._func_graph.structured_outputs
+    if structured_outputs is None:
       return result
 
+    # The output structure is compiled once, as it is packed on every call.
+    # It is compiled again if the graph's structured outputs are replaced.
+    if (self._structured_outputs_plan is None or
+        self._structured_outputs_plan[0].structure is not structured_outputs):
+      plan = nest.StructurePlan(structured_outputs, expand_composites=True)
+      output_indices = [
+          i for i, o in enumerate(plan.flatten(structured_outputs))
+          if o is not None
+      ]
+      self._structured_outputs_plan = (plan, output_indices)
+    plan, output_indices = self._structured_outputs_plan
+
     # Replace outputs with results, skipping over any 'None' values.
-    outputs_list = nest.flatten(
-        self._func_graph.structured_outputs, expand_composites=True)
-    j = 0
-    for i, o in enumerate(outputs_list):
-      if o is not None:
-        handle_data_util.copy_handle_data(self.outputs[j], result[j])
-        outputs_list[i] = result[j]
-        j += 1
-    ret = nest.pack_sequence_as(self._func_graph.structured_outputs,
-                                outputs_list, expand_composites=True)
-    return ret
+    outputs_list = [None] * plan.num_leaves
+    for j, i in enumerate(output_indices):
+      handle_data_util.copy_handle_data(self.outputs[j], result[j])
+      outputs_list[i] = result[j]
+    return plan.pack(outputs_list)
 
   @property
   def _as_name_attr_list(self):
@@ -0,0 +1,507 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""A persistent cache of the concrete functions traced by `tf.function`.
+
+Tracing a `tf.function` runs its Python code, which can take minutes for large
+models. Once `enable_persistent_cache(directory)` is called, the concrete
+functions traced by `tf.function`s are serialized to `directory`, and revived
+by later processes instead of being traced again.
+
+An entry of the cache is keyed by a fingerprint of the TensorFlow version, the
+code of the Python function, the options of the `tf.function` and the
+`FunctionType` of the call. The fingerprint follows the globals, closure cells
+and default values that the function reads: literal values are hashed, and so
+are, transitively, the code of the functions and the methods of the classes
+defined outside of installed libraries. Library functions, classes and modules
+are hashed by name and by the version of their package. The variables that a
+concrete function captures are saved as their paths in the object graph of the
+instance of a method or of the trackable objects in the closure of the
+function, as in checkpoints. An entry is discarded, and the function traced
+again, if one of the paths does not resolve to a variable of the same dtype
+and shape.
+
+Note that:
+
+* Only calls executing eagerly, outside of distribution strategies and device
+  scopes, are cached. So are only concrete functions whose captures are all
+  variables, and whose arguments have serializable `TraceType`s.
+* Calls of functions that read other Python objects, such as NumPy arrays or
+  dictionaries, are not cached. Neither the attributes of the instance of a
+  method nor the class attributes other than methods and literals are
+  fingerprinted, nor are the functions called through the attributes of
+  objects other than modules and classes. The directory should be cleared
+  when they change.
+* The Python side effects of a function do not run when it is revived.
+"""
+
+import hashlib
+import os
+import sys
+import sysconfig
+import types as types_lib
+import uuid
+
+from tensorflow.core.framework import function_pb2
+from tensorflow.core.function.polymorphism import function_type as function_type_lib
+from tensorflow.core.function.polymorphism import function_type_pb2
+from tensorflow.core.protobuf import saved_object_graph_pb2
+from tensorflow.core.protobuf import struct_pb2
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.framework import versions
+from tensorflow.python.lib.io import file_io
+from tensorflow.python.platform import tf_logging as logging
+from tensorflow.python.util import compat
+from tensorflow.python.util import lazy_loader
+from tensorflow.python.util import object_identity
+from tensorflow.python.util import tf_decorator
+
+# Loaded lazily due to circular dependencies (saved_model->tf.function).
+function_deserialization = lazy_loader.LazyLoader(
+    "function_deserialization", globals(),
+    "tensorflow.python.saved_model.function_deserialization")
+function_serialization = lazy_loader.LazyLoader(
+    "function_serialization", globals(),
+    "tensorflow.python.saved_model.function_serialization")
+nested_structure_coder = lazy_loader.LazyLoader(
+    "nested_structure_coder", globals(),
+    "tensorflow.python.saved_model.nested_structure_coder")
+resource_variable_ops = lazy_loader.LazyLoader(
+    "resource_variable_ops", globals(),
+    "tensorflow.python.ops.resource_variable_ops")
+saved_model_utils = lazy_loader.LazyLoader(
+    "saved_model_utils", globals(),
+    "tensorflow.python.eager.polymorphic_function.saved_model_utils")
+tracing_compiler = lazy_loader.LazyLoader(
+    "tracing_compiler", globals(),
+    "tensorflow.python.eager.polymorphic_function.tracing_compiler")
+trackable_base = lazy_loader.LazyLoader(
+    "trackable_base", globals(), "tensorflow.python.trackable.base")
+trackable_view = lazy_loader.LazyLoader(
+    "trackable_view", globals(), "tensorflow.python.checkpoint.trackable_view")
+
+_LIBRARY_FILENAME = "function_library.pb"
+_OBJECT_GRAPH_FILENAME = "object_graph.pb"
+_FUNCTION_TYPE_FILENAME = "function_type.pb"
+_CAPTURES_FILENAME = "captures.pb"
+
+_LITERAL_TYPES = (bool, int, float, complex, str, bytes, type(None))
+# Top-level packages whose code is fingerprinted by the TensorFlow version.
+_TENSORFLOW_PACKAGES = ("tensorflow", "keras", "tf_keras")
+# Directories of the standard library and of the installed packages.
+_LIBRARY_PATHS = tuple(
+    os.path.join(os.path.realpath(path), "")
+    for key, path in sysconfig.get_paths().items()
+    if key in ("stdlib", "platstdlib", "purelib", "platlib"))
+
+_directory = None
+
+
+def enable_persistent_cache(directory):
+  """Caches the concrete functions traced by `tf.function`s in `directory`.
+
+  ```python
+  enable_persistent_cache("/tmp/tf_function_cache")
+  model = MyModel()
+  model.train_step(batch)  # Traced on the first run, revived afterwards.
+  ```
+
+  Args:
+    directory: The local directory of the cache, shared by the processes
+      running the same program.
+  """
+  global _directory
+  file_io.recursive_create_dir(directory)
+  _directory = directory
+
+
+def disable_persistent_cache():
+  """Stops caching and reviving traced concrete functions."""
+  global _directory
+  _directory = None
+
+
+def is_enabled():
+  return _directory is not None
+
+
+def _update_with_code(hasher, code):
+  """Updates `hasher` with the code object `code` and its nested code."""
+  hasher.update(code.co_code)
+  hasher.update(repr((code.co_names, code.co_varnames, code.co_freevars,
+                      code.co_cellvars)).encode())
+  for const in code.co_consts:
+    if isinstance(const, types_lib.CodeType):
+      _update_with_code(hasher, const)
+    elif isinstance(const, frozenset):
+      hasher.update(repr(sorted(repr(c) for c in const)).encode())
+    else:
+      hasher.update(repr(const).encode())
+
+
+def _names(code):
+  """Returns the sorted global and attribute names read by `code`."""
+  names = set(code.co_names)
+  for const in code.co_consts:
+    if isinstance(const, types_lib.CodeType):
+      names.update(_names(const))
+  return sorted(names)
+
+
+def _is_literal(value):
+  if isinstance(value, (tuple, list)):
+    return all(_is_literal(v) for v in value)
+  return isinstance(value, _LITERAL_TYPES)
+
+
+def _is_library(module_name):
+  """Returns whether `module_name` is part of Python or of a library."""
+  if not module_name:
+    return False
+  if (module_name.split(".")[0] in _TENSORFLOW_PACKAGES or
+      module_name in sys.builtin_module_names):
+    return True
+  path = getattr(sys.modules.get(module_name), "__file__", None)
+  return path is not None and os.path.realpath(path).startswith(
+      _LIBRARY_PATHS)
+
+
+def _library_version(module_name):
+  package = sys.modules.get((module_name or "").split(".")[0])
+  return str(getattr(package, "__version__", ""))
+
+
+def _update_with_value(hasher, name, value, visited):
+  """Updates `hasher` with a value read by a traced function.
+
+  Args:
+    hasher: The hasher of the cache key.
+    name: The name under which the value is read.
+    value: The value.
+    visited: The ids of the functions, classes and modules already hashed.
+
+  Returns:
+    `False` if the value cannot be fingerprinted.
+  """
+  _, value = tf_decorator.unwrap(value)
+  if _is_literal(value):
+    hasher.update(compat.as_bytes(f"{name}={value!r}"))
+    return True
+  if isinstance(value, trackable_base.Trackable):
+    # Variables are resolved by path, other state is not cached.
+    return True
+  if isinstance(value, types_lib.MethodType):
+    if not isinstance(value.__self__, (trackable_base.Trackable, type)):
+      return False
+    value = value.__func__
+  if id(value) in visited:
+    hasher.update(compat.as_bytes(name))
+    return True
+  if isinstance(value, types_lib.ModuleType):
+    visited.add(id(value))
+    hasher.update(compat.as_bytes(
+        f"{name}=module {value.__name__} {_library_version(value.__name__)}"))
+    return True
+  if not isinstance(value, (types_lib.FunctionType, type,
+                            types_lib.BuiltinFunctionType)):
+    return False
+  visited.add(id(value))
+  module_name = getattr(value, "__module__", None)
+  if (isinstance(value, types_lib.BuiltinFunctionType) or
+      _is_library(module_name)):
+    hasher.update(compat.as_bytes(
+        f"{name}={module_name}.{value.__qualname__} "
+        f"{_library_version(module_name)}"))
+    return True
+  if isinstance(value, types_lib.FunctionType):
+    hasher.update(compat.as_bytes(f"{name}=function"))
+    return _update_with_function(hasher, value, visited)
+  hasher.update(compat.as_bytes(
+      f"{name}=class {module_name}.{value.__qualname__}"))
+  for attr_name, attr in sorted(vars(value).items(), key=lambda kv: kv[0]):
+    if isinstance(attr, (staticmethod, classmethod)):
+      attr = attr.__func__
+    elif isinstance(attr, property):
+      attr = attr.fget
+    _, attr = tf_decorator.unwrap(attr)
+    if isinstance(attr, types_lib.FunctionType) or _is_literal(attr):
+      if not _update_with_value(hasher, f"{name}.{attr_name}", attr, visited):
+        return False
+  return all(
+      _update_with_value(hasher, f"{name}.__bases__", base, visited)
+      for base in value.__bases__)
+
+
+def _update_with_function(hasher, function, visited):
+  """Updates `hasher` with `function` and the values that it reads.
+
+  Args:
+    hasher: The hasher of the cache key.
+    function: A Python function defined outside of the libraries.
+    visited: The ids of the functions, classes and modules already hashed.
+
+  Returns:
+    `False` if a value read by the function cannot be fingerprinted.
+  """
+  visited.add(id(function))
+  code = function.__code__
+  hasher.update(compat.as_bytes(
+      f"{function.__module__}.{function.__qualname__}"))
+  _update_with_code(hasher, code)
+  values = [(f"default{i}", v) for i, v in enumerate(function.__defaults__
+                                                     or ())]
+  values.extend(sorted((function.__kwdefaults__ or {}).items()))
+  for name, cell in zip(code.co_freevars, function.__closure__ or ()):
+    try:
+      values.append((name, cell.cell_contents))
+    except ValueError:  # Empty cell.
+      continue
+  names = _names(code)
+  for name in names:
+    if name in function.__globals__:
+      values.append((name, function.__globals__[name]))
+  for name, value in values:
+    if not _update_with_value(hasher, name, value, visited):
+      logging.vlog(1, "Not caching a function reading %s=%r.", name, value)
+      return False
+    if (isinstance(value, types_lib.ModuleType) and
+        not _is_library(value.__name__)):
+      # Attributes of modules, such as `utils.f`, are read by name.
+      attributes = vars(value)
+      for attr_name in names:
+        if attr_name in attributes:
+          _update_with_value(hasher, f"{name}.{attr_name}",
+                             attributes[attr_name], visited)
+  return True
+
+
+def _unwrap(python_function):
+  """Returns the plain Python function of `python_function` and its instance.
+
+  Args:
+    python_function: The function traced by a `TracingCompiler`.
+
+  Returns:
+    A tuple of the Python function, or `None` if it is not a plain function,
+    and the `Trackable` to which it is bound as a method, if any.
+  """
+  _, target = tf_decorator.unwrap(python_function)
+  instance = None
+  if isinstance(target, types_lib.MethodType):
+    instance = target.__self__
+    if isinstance(instance, tracing_compiler.TfMethodTarget):
+      instance = instance.target
+    target = target.__func__
+  if not isinstance(target, types_lib.FunctionType):
+    return None, None
+  if not isinstance(instance, (trackable_base.Trackable, type(None))):
+    return None, None
+  return target, instance
+
+
+def _roots(python_function):
+  """Returns the trackable roots of the variables of `python_function`."""
+  target, instance = _unwrap(python_function)
+  roots = {}
+  if instance is not None:
+    roots["self"] = instance
+  for name, cell in zip(target.__code__.co_freevars, target.__closure__ or ()):
+    try:
+      value = cell.cell_contents
+    except ValueError:  # Empty cell.
+      continue
+    if isinstance(value, trackable_base.Trackable):
+      roots[name] = value
+  return roots
+
+
+def _variables_by_path(roots):
+  """Returns a dict of the resource variables reachable from `roots`."""
+  variables = {}
+  for root_name, root in roots.items():
+    view = trackable_view.TrackableView(root)
+    _, paths = view._descendants_with_paths()  # pylint: disable=protected-access
+    for node, path in paths.items():
+      if resource_variable_ops.is_resource_variable(node):
+        variables.setdefault(
+            "/".join([root_name] + [ref.name for ref in path]), node)
+  return variables
+
+
+def make_key(python_function, options, func_context, func_type):
+  """Returns the cache key of a call of a `tf.function`.
+
+  Args:
+    python_function: The function traced by the `TracingCompiler`.
+    options: A string describing the options of the `TracingCompiler` that
+      affect tracing.
+    func_context: The `FunctionContext` of the call.
+    func_type: The `FunctionType` of the call.
+
+  Returns:
+    The hexadecimal key, or `None` if the call cannot be cached.
+  """
+  ctx = func_context.context
+  if (ctx.parent_graph is not None or ctx.device_functions or
+      ctx.colocation_stack or ctx.in_cross_replica_context or
+      ctx.variable_policy is not None or ctx.xla_context_id):
+    return None
+  if func_type.captures:
+    return None
+  target, instance = _unwrap(python_function)
+  if target is None:
+    return None
+
+  hasher = hashlib.sha256()
+  hasher.update(compat.as_bytes(versions.__version__))
+  hasher.update(compat.as_bytes(versions.__git_version__))
+  hasher.update(compat.as_bytes(options))
+  visited = set()
+  if not _update_with_function(hasher, target, visited):
+    return None
+  if instance is not None and not _update_with_value(
+      hasher, "self", type(instance), visited):
+    return None
+  try:
+    hasher.update(func_type.to_proto().SerializeToString(deterministic=True))
+  except (TypeError, ValueError) as e:
+    logging.vlog(1, "Not caching %r: %s", target, e)
+    return None
+  return hasher.hexdigest()
+
+
+def _write_proto(directory, filename, proto):
+  file_io.write_string_to_file(
+      os.path.join(directory, filename), proto.SerializeToString())
+
+
+def _read_proto(directory, filename, proto):
+  proto.ParseFromString(
+      file_io.read_file_to_string(os.path.join(directory, filename), True))
+  return proto
+
+
+def save(key, python_function, concrete_function, func_type):
+  """Saves a traced concrete function under `key`, if it can be revived.
+
+  Args:
+    key: The key returned by `make_key`.
+    python_function: The function traced by the `TracingCompiler`.
+    concrete_function: The traced `ConcreteFunction`.
+    func_type: The `FunctionType` under which `concrete_function` is cached.
+  """
+  if func_type.captures:
+    return
+  variables = _variables_by_path(_roots(python_function))
+  paths_by_handle = object_identity.ObjectIdentityDictionary()
+  for variable_path, variable in variables.items():
+    if variable.handle not in paths_by_handle:
+      paths_by_handle[variable.handle] = (variable_path, variable)
+  node_ids = object_identity.ObjectIdentityDictionary()
+  captures = []
+  for capture in concrete_function.captured_inputs:
+    if capture not in paths_by_handle:
+      logging.vlog(1, "Not caching %s, which captures %r.",
+                   concrete_function.name, capture)
+      return
+    variable_path, variable = paths_by_handle[capture]
+    node_ids[capture] = len(captures)
+    captures.append((variable_path,
+                     tensor_spec.TensorSpec(variable.shape, variable.dtype)))
+
+  library = function_pb2.FunctionDefLibrary()
+  names = set()
+  for fdef in [concrete_function.function_def] + list(
+      concrete_function.graph.as_graph_def().library.function):
+    if fdef.signature.name not in names:
+      names.add(fdef.signature.name)
+      library.function.add().CopyFrom(fdef)
+  for fdef in library.function:
+    if any("_gradient_op_type" in node.attr for node in fdef.node_def):
+      # Custom gradients are registered in Python and cannot be revived.
+      return
+  object_graph = saved_object_graph_pb2.SavedObjectGraph()
+  name = compat.as_str(concrete_function.name)
+  object_graph.concrete_functions[name].CopyFrom(
+      function_serialization.serialize_concrete_function(
+          concrete_function, node_ids))
+
+  path = os.path.join(_directory, key)
+  temp_path = "%s.tmp.%s" % (path, uuid.uuid4().hex)
+  try:
+    file_io.recursive_create_dir(temp_path)
+    _write_proto(temp_path, _LIBRARY_FILENAME, library)
+    _write_proto(temp_path, _OBJECT_GRAPH_FILENAME, object_graph)
+    _write_proto(temp_path, _FUNCTION_TYPE_FILENAME, func_type.to_proto())
+    _write_proto(temp_path, _CAPTURES_FILENAME,
+                 nested_structure_coder.encode_structure(tuple(captures)))
+    if file_io.file_exists(path):
+      # The entry was discarded when loading it.
+      file_io.delete_recursively(path)
+    file_io.rename(temp_path, path)
+  except Exception as e:  # pylint: disable=broad-except
+    logging.warning("Failed to save %s to the persistent tf.function cache: "
+                    "%s", concrete_function.name, e)
+    if file_io.file_exists(temp_path):
+      file_io.delete_recursively(temp_path)
+
+
+def load(key, python_function, function_spec):
+  """Revives the concrete function saved under `key`.
+
+  Args:
+    key: The key returned by `make_key`.
+    python_function: The function traced by the `TracingCompiler`, whose
+      variables the revived function captures.
+    function_spec: The `FunctionSpec` of the `TracingCompiler`.
+
+  Returns:
+    A tuple of the revived `ConcreteFunction` and the `FunctionType` under
+    which it should be cached, or `None` if there is no valid entry.
+  """
+  path = os.path.join(_directory, key)
+  if not file_io.file_exists(path):
+    return None
+  try:
+    captures = nested_structure_coder.decode_proto(
+        _read_proto(path, _CAPTURES_FILENAME, struct_pb2.StructuredValue()))
+    variables = _variables_by_path(_roots(python_function))
+    bound_variables = []
+    for variable_path, spec in captures:
+      variable = variables.get(variable_path)
+      if (variable is None or variable.dtype != spec.dtype or
+          not spec.shape.is_compatible_with(variable.shape)):
+        logging.vlog(1, "Discarding the cached function %s, which captures "
+                     "the missing variable %s.", key, variable_path)
+        return None
+      bound_variables.append(variable)
+
+    object_graph = _read_proto(path, _OBJECT_GRAPH_FILENAME,
+                               saved_object_graph_pb2.SavedObjectGraph())
+    functions = function_deserialization.load_function_def_library(
+        _read_proto(path, _LIBRARY_FILENAME,
+                    function_pb2.FunctionDefLibrary()),
+        saved_object_graph=object_graph)
+    (name,) = object_graph.concrete_functions.keys()
+    concrete_function = functions[name]
+    saved_model_utils.restore_captures(concrete_function, bound_variables)
+    concrete_function._set_function_spec(function_spec)  # pylint: disable=protected-access
+    func_type = function_type_lib.FunctionType.from_proto(
+        _read_proto(path, _FUNCTION_TYPE_FILENAME,
+                    function_type_pb2.FunctionType()))
+  except Exception as e:  # pylint: disable=broad-except
+    logging.warning("Failed to revive %s from the persistent tf.function "
+                    "cache, tracing it instead: %s", path, e)
+    return None
+  return concrete_function, func_type
@@ -0,0 +1,149 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for the persistent cache of traced concrete functions."""
+
+import os
+import sys
+from unittest import mock
+
+from tensorflow.python.eager.polymorphic_function import persistent_cache
+from tensorflow.python.eager.polymorphic_function import polymorphic_function
+from tensorflow.python.framework import constant_op
+from tensorflow.python.module import module
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import variables
+from tensorflow.python.platform import test
+
+
+def _make_affine(scale):
+
+  def affine(x):
+    return x * scale + 1.0
+
+  return affine
+
+
+_OFFSET = 1.0
+_TABLE = {"scale": 2.0}
+
+
+def _offset(x):
+  return x + _OFFSET
+
+
+def _shifted(x):
+  return _offset(x * 2.0)
+
+
+def _scaled_offset(x):
+  return x * 2.0 + _OFFSET
+
+
+def _lookup(x):
+  return x * _TABLE["scale"]
+
+
+class _Dense(module.Module):
+
+  def __init__(self, kernel):
+    super().__init__()
+    self.kernel = variables.Variable(kernel)
+
+  @polymorphic_function.function
+  def __call__(self, x):
+    return math_ops.matmul(x, self.kernel)
+
+
+class PersistentCacheTest(test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self._directory = os.path.join(self.get_temp_dir(), self._testMethodName)
+    persistent_cache.enable_persistent_cache(self._directory)
+
+  def tearDown(self):
+    persistent_cache.disable_persistent_cache()
+    super().tearDown()
+
+  def testRevivesFunction(self):
+    # Each `tf.function` of the same code stands for a new process.
+    f = polymorphic_function.function(_make_affine(2.0))
+    self.assertAllEqual(5.0, f(constant_op.constant(2.0)))
+    self.assertEqual(1, f.experimental_get_tracing_count())
+    self.assertLen(os.listdir(self._directory), 1)
+
+    revived = polymorphic_function.function(_make_affine(2.0))
+    self.assertAllEqual(7.0, revived(constant_op.constant(3.0)))
+    self.assertEqual(0, revived.experimental_get_tracing_count())
+    self.assertLen(revived.get_concrete_function(
+        constant_op.constant(1.0)).graph.inputs, 1)
+
+  def testInvalidatesChangedClosure(self):
+    polymorphic_function.function(_make_affine(2.0))(constant_op.constant(1.0))
+    f = polymorphic_function.function(_make_affine(3.0))
+    self.assertAllEqual(7.0, f(constant_op.constant(2.0)))
+    self.assertEqual(1, f.experimental_get_tracing_count())
+
+  def testKeysByArgumentType(self):
+    polymorphic_function.function(_make_affine(2.0))(constant_op.constant(1.0))
+    f = polymorphic_function.function(_make_affine(2.0))
+    self.assertAllEqual([3.0, 5.0], f(constant_op.constant([1.0, 2.0])))
+    self.assertEqual(1, f.experimental_get_tracing_count())
+
+  def testCapturesVariablesByPath(self):
+    layer = _Dense([[1.0], [2.0]])
+    self.assertAllEqual([[5.0]], layer(constant_op.constant([[1.0, 2.0]])))
+    self.assertEqual(1, layer.__call__.experimental_get_tracing_count())
+
+    revived = _Dense([[3.0], [4.0]])
+    self.assertAllEqual([[11.0]], revived(constant_op.constant([[1.0, 2.0]])))
+    self.assertEqual(0, revived.__call__.experimental_get_tracing_count())
+    revived.kernel.assign([[1.0], [1.0]])
+    self.assertAllEqual([[3.0]], revived(constant_op.constant([[1.0, 2.0]])))
+
+  def testInvalidatesChangedVariables(self):
+    _Dense([[1.0], [2.0]])(constant_op.constant([[1.0, 2.0]]))
+    changed = _Dense([[1.0, 0.0], [2.0, 1.0]])
+    self.assertAllEqual([[5.0, 2.0]],
+                        changed(constant_op.constant([[1.0, 2.0]])))
+    self.assertEqual(1, changed.__call__.experimental_get_tracing_count())
+
+  def testInvalidatesChangedGlobals(self):
+    polymorphic_function.function(_shifted)(constant_op.constant(1.0))
+    with mock.patch.object(sys.modules[__name__], "_OFFSET", 2.0):
+      f = polymorphic_function.function(_shifted)
+      self.assertAllEqual(4.0, f(constant_op.constant(1.0)))
+      self.assertEqual(1, f.experimental_get_tracing_count())
+
+  def testInvalidatesChangedCallees(self):
+    polymorphic_function.function(_shifted)(constant_op.constant(1.0))
+    with mock.patch.object(sys.modules[__name__], "_offset", _scaled_offset):
+      f = polymorphic_function.function(_shifted)
+      self.assertAllEqual(5.0, f(constant_op.constant(1.0)))
+      self.assertEqual(1, f.experimental_get_tracing_count())
+
+  def testDoesNotCacheUnhashableGlobals(self):
+    f = polymorphic_function.function(_lookup)
+    self.assertAllEqual(4.0, f(constant_op.constant(2.0)))
+    self.assertEmpty(os.listdir(self._directory))
+
+  def testDisabled(self):
+    persistent_cache.disable_persistent_cache()
+    polymorphic_function.function(_make_affine(2.0))(constant_op.constant(1.0))
+    self.assertEmpty(os.listdir(self._directory))
+
+
+if __name__ == "__main__":
+  test.main()
@@ -60,6 +60,7 @@ ops above and associated assignment operations), tf.function traces a second
 time if it sees variables on the first call.
 """
 
+from concurrent import futures
 import functools
 import os
 import threading
@@ -77,6 +78,7 @@ from tensorflow.python.eager import monitoring
 from tensorflow.python.eager.polymorphic_function import attributes as attributes_lib
 from tensorflow.python.eager.polymorphic_function import function_spec as function_spec_lib
 from tensorflow.python.eager.polymorphic_function import tracing_compiler
+from tensorflow.python.eager.polymorphic_function import tracing_stats
 from tensorflow.python.framework import composite_tensor
 from tensorflow.python.framework import errors
 from tensorflow.python.framework import func_graph as func_graph_module
@@ -127,7 +129,7 @@ class _FrequentTracingDetector(object):
     self._total_warning_count = 0
     self._call_count = 0
 
-  def called_with_tracing(self, function_name, omit_warning):
+  def called_with_tracing(self, function_name, omit_warning, retrace=None):
     """Updates the list of most recent calls' tracing information.
 
     Warns the user when recent calls caused retracing too often.
@@ -136,6 +138,8 @@ class _FrequentTracingDetector(object):
       function_name: the python function being traced.
       omit_warning: If 'True', this call will not warn the user even if
         retracing happens too often.
+      retrace: (Optional.) The `Retrace` of this call, reported in the
+        warning.
     """
     self._call_count += 1
     self._calls_per_tracings.append(1)
@@ -163,8 +167,10 @@ class _FrequentTracingDetector(object):
           "retracing. For (3), please refer to "
           "https://www.tensorflow.org/guide/function#controlling_retracing"
           " and https://www.tensorflow.org/api_docs/python/tf/function for "
-          " more details.".format(
-              len(self._calls_per_tracings), self._call_count, function_name))
+          " more details.{}".format(
+              len(self._calls_per_tracings), self._call_count, function_name,
+              "" if retrace is None else
+              " The last retracing was caused by {}.".format(retrace)))
 
   def called_without_tracing(self):
     # We don't count tracing when users load a concrete function directly or
@@ -194,10 +200,11 @@ class _FrequentTracingDetectorManager(object):
       detector = self._get_detector(key)
       detector.called_without_tracing()
 
-  def called_with_tracing(self, key, function_name, omit_warning):
+  def called_with_tracing(self, key, function_name, omit_warning,
+                          retrace=None):
     with self._lock:
       detector = self._get_detector(key)
-      detector.called_with_tracing(function_name, omit_warning)
+      detector.called_with_tracing(function_name, omit_warning, retrace)
 
 
 _frequent_tracing_detector_manager = _FrequentTracingDetectorManager()
@@ -746,6 +753,13 @@ class Function(core.GenericFunction, trackable.Trackable):
     self._variable_creation_fn = self._compiler_with_scope(
         variable_capturing_scope)
     self._variable_creation_fn._name = self._name  # pylint: disable=protected-access
+    # Only the traces that create no variables can be revived from the
+    # persistent cache, since reviving them does not create the variables.
+    # pylint: disable=protected-access
+    self._variable_creation_fn._persistent_cache_scope = "variable_creation"
+    self._variable_creation_fn._persistent_cache_filter = (
+        lambda: not created_variables)
+    # pylint: enable=protected-access
     # Force the definition of the function for these arguments
     self._lifted_initializer_graph = lifted_initializer_graph
     self._graph_deleter = FunctionDeleter(self._lifted_initializer_graph)
@@ -766,6 +780,8 @@ class Function(core.GenericFunction, trackable.Trackable):
     self._no_variable_creation_fn = self._compiler_with_scope(
         invalid_creator_scope)
     self._no_variable_creation_fn._name = self._name  # pylint: disable=protected-access
+    self._no_variable_creation_fn._persistent_cache_scope = (  # pylint: disable=protected-access
+        "no_variable_creation")
 
   def _clone(self, python_function):
     """Clone the function with different python function."""
@@ -849,6 +865,99 @@ class Function(core.GenericFunction, trackable.Trackable):
     result += self._variable_creation_fn.tracing_count if self._variable_creation_fn else 0
     return result
 
+  def experimental_get_tracing_stats(self):
+    """Returns statistics of the traces and function cache of the function.
+
+    Each trace is recorded with the argument that caused it: the first
+    argument whose `tf.types.experimental.TraceType` differs from the
+    closest concrete function traced before.
+
+    >>> @tf.function
+    ... def double(a):
+    ...   return a + a
+    >>> _ = double(tf.constant(1))
+    >>> _ = double(tf.constant(2))
+    >>> _ = double(tf.constant([1, 2]))
+    >>> stats = double.experimental_get_tracing_stats()
+    >>> stats.cache_hits, stats.cache_misses, stats.num_concrete_functions
+    (1, 2, 2)
+    >>> stats.retraces[-1].path
+    'a'
+
+    Returns:
+      A `TracingStats` named tuple with the number of `cache_hits` and
+      `cache_misses` of the calls, the `tracing_time_secs`, the
+      `num_concrete_functions` and their size `concrete_function_bytes`, and
+      the most recent `retraces`, each a `Retrace` with the `path` of the
+      argument that caused it and its `cached_type` and `new_type`.
+    """
+    compilers = [
+        compiler for compiler in (self._variable_creation_fn,
+                                  self._no_variable_creation_fn) if compiler
+    ]
+    concrete_functions = []
+    for compiler in compilers:
+      concrete_functions.extend(compiler._list_all_concrete_functions())  # pylint: disable=protected-access
+    return tracing_stats.merge_stats(
+        [compiler.tracing_recorder for compiler in compilers],
+        concrete_functions)
+
+  def _last_retrace(self):
+    """Returns the most recent `Retrace` of the function, if any."""
+    compiler = self._no_variable_creation_fn or self._variable_creation_fn
+    if compiler is None or not compiler.tracing_recorder.retraces:
+      return None
+    return compiler.tracing_recorder.retraces[-1]
+
+  def experimental_pretrace(self, signatures, max_workers=None):
+    """Traces the function for `signatures` in parallel background threads.
+
+    This warms up the function cache ahead of time, e.g. for the bucketed
+    input shapes of a serving model, while the first calls proceed. A call
+    that needs a concrete function still being traced waits for it instead of
+    tracing it again.
+
+    >>> @tf.function
+    ... def double(a):
+    ...   return a + a
+    >>> traces = double.experimental_pretrace(
+    ...     [(tf.TensorSpec([None, n]),) for n in (16, 32, 64)])
+    >>> concrete_functions = [trace.result() for trace in traces]
+    >>> double.experimental_get_tracing_count()
+    3
+
+    Unlike calls, which trace one signature at a time, the signatures are
+    traced concurrently, so the Python function must be safe to trace from
+    several threads. They are traced in the default context of new threads,
+    that is outside of any `tf.device` or `tf.Graph` scope of the caller.
+
+    Args:
+      signatures: A list of the arguments to trace the function for, each
+        either a tuple of positional arguments or a dict of keyword arguments,
+        as passed to `get_concrete_function`.
+      max_workers: The maximum number of threads tracing concurrently. Defaults
+        to the default of `concurrent.futures.ThreadPoolExecutor`.
+
+    Returns:
+      A list of `concurrent.futures.Future`s, one per signature, resolving to
+      its `ConcreteFunction` or raising the error of its trace.
+    """
+    executor = futures.ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix=f"pretrace_{self._name}")
+    try:
+      return [
+          executor.submit(self._pretrace, signature) for signature in signatures
+      ]
+    finally:
+      # The traces keep running after the executor is shut down.
+      executor.shutdown(wait=False)
+
+  def _pretrace(self, signature):
+    with tracing_compiler.parallel_tracing():
+      if isinstance(signature, dict):
+        return self.get_concrete_function(**signature)
+      return self.get_concrete_function(*signature)
+
   @property
   def _run_functions_eagerly(self):
     return RUN_FUNCTIONS_EAGERLY
@@ -896,7 +1005,7 @@ class Function(core.GenericFunction, trackable.Trackable):
       else:
         _frequent_tracing_detector_manager.called_with_tracing(
             self._key_for_call_stats, self._python_function,
-            self._omit_frequent_tracing_warning)
+            self._omit_frequent_tracing_warning, self._last_retrace())
 
     return result
 
@@ -20,6 +20,7 @@ import multiprocessing.pool
 import pickle
 import re
 import sys
+import threading
 import time
 import unittest
 import weakref
@@ -4169,6 +4170,7 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
 
     self.assertLen(logs.output, 1)
     self.assertIn('Tracing is expensive', logs.output[0])
+    self.assertIn('The last retracing was caused by `x`', logs.output[0])
 
   def test_frequent_retracing_warning_lambda(self):
     if sys.version_info[0] < 3:
@@ -4369,6 +4371,142 @@ class FunctionTest(test.TestCase, parameterized.TestCase):
     self.assertAllEqual(obj2.testDouble.experimental_get_tracing_count(), 3)
     self.assertAllEqual(obj1.testDouble.experimental_get_tracing_count(), 2)
 
+  def test_experimental_get_tracing_stats(self):
+
+    @polymorphic_function.function
+    def f(x, y):
+      return x['a'] + y
+
+    f({'a': constant_op.constant(1)}, 1)
+    f({'a': constant_op.constant(2)}, 1)
+    f({'a': constant_op.constant([1, 2])}, 1)
+    f({'a': constant_op.constant([1, 2])}, 2)
+    stats = f.experimental_get_tracing_stats()
+    self.assertEqual(1, stats.cache_hits)
+    self.assertEqual(3, stats.cache_misses)
+    self.assertEqual(3, stats.num_concrete_functions)
+    self.assertGreater(stats.tracing_time_secs, 0)
+    self.assertGreater(stats.concrete_function_bytes, 0)
+    self.assertEqual([None, "x['a']", 'y'],
+                     [retrace.path for retrace in stats.retraces])
+    self.assertEqual([], stats.retraces[1].cached_type.shape)
+    self.assertEqual([2], stats.retraces[1].new_type.shape)
+    self.assertIn("`x['a']`", str(stats.retraces[1]))
+
+  def test_experimental_get_tracing_stats_method(self):
+
+    class TestClass():
+
+      @polymorphic_function.function
+      def testDouble(self, a):
+        return a + a
+
+    obj = TestClass()
+    obj.testDouble(constant_op.constant(1))
+    obj.testDouble(constant_op.constant(1.1))
+    stats = obj.testDouble.experimental_get_tracing_stats()
+    self.assertEqual(2, stats.cache_misses)
+    self.assertEqual([None, 'a'], [r.path for r in stats.retraces])
+    self.assertEqual(
+        0, TestClass().testDouble.experimental_get_tracing_stats().cache_misses)
+
+  def test_experimental_pretrace(self):
+
+    @polymorphic_function.function
+    def f(x, y=1):
+      return x + y
+
+    traces = f.experimental_pretrace([
+        (tensor_spec.TensorSpec([None, 2], dtypes.float32),),
+        (tensor_spec.TensorSpec([None, 4], dtypes.float32),),
+        {'x': tensor_spec.TensorSpec([None, 4], dtypes.float32), 'y': 2},
+    ], max_workers=2)
+    concrete_functions = [trace.result() for trace in traces]
+    self.assertEqual([[None, 2], [None, 4], [None, 4]], [
+        cf.structured_outputs.shape.as_list() for cf in concrete_functions
+    ])
+    self.assertEqual(3, f.experimental_get_tracing_count())
+    self.assertAllEqual([[2.0, 3.0]], f(constant_op.constant([[1.0, 2.0]])))
+    self.assertEqual(3, f.experimental_get_tracing_count())
+
+  def test_experimental_pretrace_error(self):
+
+    @polymorphic_function.function(
+        input_signature=[tensor_spec.TensorSpec([], dtypes.int32)])
+    def f(x):
+      return x
+
+    (trace,) = f.experimental_pretrace(
+        [(tensor_spec.TensorSpec([], dtypes.float32),)])
+    with self.assertRaises((TypeError, ValueError)):
+      trace.result()
+
+  def test_concurrent_calls_wait_for_inflight_trace(self):
+    tracing = threading.Event()
+    release = threading.Event()
+
+    @polymorphic_function.function
+    def f(x):
+      if x.shape.rank == 0:
+        tracing.set()
+        release.wait()
+      return x + 1
+
+    f.get_concrete_function(tensor_spec.TensorSpec([3], dtypes.int32))
+    pool = multiprocessing.pool.ThreadPool(1)
+    scalar = tensor_spec.TensorSpec([], dtypes.int32)
+    (first,) = f.experimental_pretrace([(scalar,)])
+    tracing.wait()
+    second = pool.apply_async(f.get_concrete_function, (scalar,))
+    # Other signatures are pretraced while the first trace is in progress.
+    (other,) = f.experimental_pretrace(
+        [(tensor_spec.TensorSpec([2], dtypes.int32),)])
+    other.result()
+    release.set()
+    self.assertIs(first.result(), second.get())
+    self.assertEqual(3, f.experimental_get_tracing_count())
+
+  def test_concurrent_calls_trace_one_at_a_time(self):
+    tracing = threading.Event()
+    release = threading.Event()
+    traced_vector = threading.Event()
+
+    @polymorphic_function.function
+    def f(x):
+      if x.shape.rank == 0:
+        tracing.set()
+        release.wait()
+      else:
+        traced_vector.set()
+      return x + 1
+
+    pool = multiprocessing.pool.ThreadPool(2)
+    first = pool.apply_async(f.get_concrete_function,
+                             (tensor_spec.TensorSpec([], dtypes.int32),))
+    tracing.wait()
+    second = pool.apply_async(f.get_concrete_function,
+                              (tensor_spec.TensorSpec([2], dtypes.int32),))
+    self.assertFalse(traced_vector.wait(0.5))
+    release.set()
+    first.get()
+    second.get()
+    self.assertEqual(2, f.experimental_get_tracing_count())
+
+  def test_experimental_pretrace_generalized_types(self):
+
+    @polymorphic_function.function(reduce_retracing=True)
+    def f(x):
+      return x + 1
+
+    f.get_concrete_function(tensor_spec.TensorSpec([2], dtypes.int32))
+    traces = f.experimental_pretrace([
+        (tensor_spec.TensorSpec([n], dtypes.int32),) for n in (3, 4, 5)
+    ], max_workers=3)
+    for trace in traces:
+      self.assertEqual([None],
+                       trace.result().structured_outputs.shape.as_list())
+    self.assertEqual(2, f.experimental_get_tracing_count())
+
   def test_recursive_tf_function(self):
 
     @polymorphic_function.function
@@ -0,0 +1,226 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Policies relaxing the shapes of the tensors a `tf.function` is traced for.
+
+A `ShapeRelaxationPolicy` passed as `reduce_retracing` to `tf.function` is
+applied to the type of every call before the function cache lookup: it
+decides, for every dimension of every tensor argument, whether the concrete
+function keeps the static size of the call or is traced for any size
+(`None`). All the calls whose sizes are relaxed then share a concrete
+function, which bounds the number of traces for variable-length inputs while
+the other dimensions stay static.
+
+For example, with `PowerOfTwoRelaxation()` a function called with sequences of
+every length from 1 to 100 is traced at most 8 times: once for each of the
+lengths 1, 2, 4, ..., 64, and once for all the other lengths.
+"""
+
+from tensorflow.core.function.polymorphism import function_type as function_type_lib
+from tensorflow.core.function.trace_type import default_types
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import tensor_shape
+from tensorflow.python.framework import tensor_spec
+
+
+class ShapeRelaxationPolicy(object):
+  """Decides which dimensions of the traced tensor shapes are relaxed.
+
+  Subclasses implement `relax_dimension`. Policies can be shared by several
+  functions: the sizes traced so far are kept by each function. A function
+  caches the relaxed type of each call type, so `relax_dimension` must keep
+  returning the same result for a size once it has returned it.
+  """
+
+  def __init__(self, axes=None):
+    """Initializes the policy.
+
+    Args:
+      axes: The axes that the policy applies to, e.g. `(1,)` for the time axis
+        of batched sequences. Negative axes count from the last dimension. If
+        `None`, the policy applies to all the axes, and the sizes of the other
+        axes are always kept static.
+    """
+    self._axes = None if axes is None else tuple(axes)
+
+  def applies_to(self, axis, rank):
+    """Returns whether the policy applies to `axis` of shapes of `rank`."""
+    return (self._axes is None or axis in self._axes or
+            axis - rank in self._axes)
+
+  def relax_dimension(self, path, axis, size, traced_sizes):
+    """Returns the size of a dimension to trace for, or `None` to relax it.
+
+    Args:
+      path: The path of the tensor in the arguments, e.g. `"x[0]['ids']"`.
+      axis: The axis of the dimension.
+      size: The static size of the dimension in the call.
+      traced_sizes: The set of static sizes of this dimension traced before.
+
+    Returns:
+      Either `size` to trace a concrete function for this size only, or
+      `None` to trace one for any size.
+    """
+    raise NotImplementedError
+
+
+class PowerOfTwoRelaxation(ShapeRelaxationPolicy):
+  """Keeps the sizes that are powers of two static and relaxes the others.
+
+  This suits inputs padded to power-of-two buckets: each bucket gets its own
+  concrete function with static shapes, and the sizes between the buckets
+  share a single relaxed one.
+  """
+
+  def relax_dimension(self, path, axis, size, traced_sizes):
+    return size if size > 0 and size & (size - 1) == 0 else None
+
+
+class BucketRelaxation(ShapeRelaxationPolicy):
+  """Keeps the sizes in a list of buckets static and relaxes the others."""
+
+  def __init__(self, bucket_sizes, axes=None):
+    """Initializes the policy.
+
+    Args:
+      bucket_sizes: The sizes kept static, e.g. the sequence lengths that the
+        inputs are padded to.
+      axes: See `ShapeRelaxationPolicy`.
+    """
+    super(BucketRelaxation, self).__init__(axes)
+    self._bucket_sizes = frozenset(bucket_sizes)
+
+  def relax_dimension(self, path, axis, size, traced_sizes):
+    return size if size in self._bucket_sizes else None
+
+
+class DistinctSizesRelaxation(ShapeRelaxationPolicy):
+  """Relaxes a dimension once it was traced for a number of distinct sizes."""
+
+  def __init__(self, max_distinct_sizes, axes=None):
+    """Initializes the policy.
+
+    Args:
+      max_distinct_sizes: The number of static sizes of a dimension that are
+        traced before the other sizes are relaxed.
+      axes: See `ShapeRelaxationPolicy`.
+
+    Raises:
+      ValueError: If `max_distinct_sizes` is negative.
+    """
+    if max_distinct_sizes < 0:
+      raise ValueError("`max_distinct_sizes` must be non-negative, got "
+                       f"{max_distinct_sizes}.")
+    super(DistinctSizesRelaxation, self).__init__(axes)
+    self._max_distinct_sizes = max_distinct_sizes
+
+  def relax_dimension(self, path, axis, size, traced_sizes):
+    if size in traced_sizes or len(traced_sizes) < self._max_distinct_sizes:
+      return size
+    return None
+
+
+def _relax_shape(path, shape, policy, traced_sizes):
+  """Returns `shape` relaxed by `policy`, recording the static sizes."""
+  if shape.rank is None:
+    return shape
+  dims = shape.as_list()
+  relaxed = False
+  for axis, size in enumerate(dims):
+    if size is None or not policy.applies_to(axis, len(dims)):
+      continue
+    sizes = traced_sizes.setdefault((path, axis), set())
+    new_size = policy.relax_dimension(path, axis, size, frozenset(sizes))
+    if new_size is None:
+      dims[axis] = None
+      relaxed = True
+    elif new_size == size:
+      sizes.add(size)
+    else:
+      raise ValueError(
+          f"{type(policy).__name__}.relax_dimension must return the size of "
+          f"the dimension or None, got {new_size} for axis {axis} of `{path}` "
+          f"of size {size}.")
+  return tensor_shape.TensorShape(dims) if relaxed else shape
+
+
+def _relax_type(path, trace_type, policy, traced_sizes):
+  """Returns `trace_type` with the shapes of its tensors relaxed."""
+  # Subclasses of TensorSpec carry more constraints than the shape, and the
+  # handle data of resources and variants is keyed by their TensorSpec.
+  if (type(trace_type) is tensor_spec.TensorSpec and  # pylint: disable=unidiomatic-typecheck
+      trace_type.dtype not in (dtypes.resource, dtypes.variant)):
+    shape = _relax_shape(path, trace_type.shape, policy, traced_sizes)
+    if shape is trace_type.shape:
+      return trace_type
+    return tensor_spec.TensorSpec(shape, trace_type.dtype, trace_type.name)
+
+  # pylint: disable=protected-access
+  if isinstance(trace_type, default_types.Tuple):
+    return default_types.Tuple(*[
+        _relax_type(f"{path}[{i}]", component, policy, traced_sizes)
+        for i, component in enumerate(trace_type.components)
+    ])
+  if isinstance(trace_type, default_types.List):
+    return default_types.List(*[
+        _relax_type(f"{path}[{i}]", component, policy, traced_sizes)
+        for i, component in enumerate(trace_type.components_tuple.components)
+    ])
+  if isinstance(trace_type, default_types.NamedTuple):
+    return default_types.NamedTuple(
+        trace_type.type_name, trace_type.attribute_names, [
+            _relax_type(f"{path}.{name}", attribute, policy, traced_sizes)
+            for name, attribute in zip(trace_type.attribute_names,
+                                       trace_type.attributes.components)
+        ], trace_type._placeholder_type)
+  if isinstance(trace_type, default_types.Attrs):
+    named_attributes = trace_type.named_attributes
+    return default_types.Attrs(
+        named_attributes.type_name, named_attributes.attribute_names, [
+            _relax_type(f"{path}.{name}", attribute, policy, traced_sizes)
+            for name, attribute in zip(named_attributes.attribute_names,
+                                       named_attributes.attributes.components)
+        ], trace_type._placeholder_type)
+  if isinstance(trace_type, default_types.Dict):
+    return default_types.Dict(
+        {
+            key: _relax_type(f"{path}[{key!r}]", value, policy, traced_sizes)
+            for key, value in trace_type.mapping.items()
+        }, trace_type._placeholder_type)
+  # pylint: enable=protected-access
+  return trace_type
+
+
+def relax_function_type(function_type, policy, traced_sizes):
+  """Returns `function_type` with its tensor shapes relaxed by `policy`.
+
+  Args:
+    function_type: The `FunctionType` of a call that missed the function cache.
+    policy: A `ShapeRelaxationPolicy`.
+    traced_sizes: A dict mapping `(path, axis)` to the set of static sizes
+      traced for that dimension, updated with the sizes kept static.
+
+  Returns:
+    A `FunctionType` that `function_type` is a subtype of, with the relaxed
+    dimensions set to `None`.
+  """
+  parameters = []
+  for parameter in function_type.parameters.values():
+    if parameter.type_constraint is not None:
+      parameter = function_type_lib.Parameter(
+          parameter.name, parameter.kind, parameter.optional,
+          _relax_type(parameter.name, parameter.type_constraint, policy,
+                      traced_sizes))
+    parameters.append(parameter)
+  return function_type_lib.FunctionType(parameters, function_type.captures)
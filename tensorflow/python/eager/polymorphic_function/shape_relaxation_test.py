@@ -0,0 +1,153 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for the shape relaxation policies of tf.function."""
+
+from tensorflow.python.eager.polymorphic_function import polymorphic_function
+from tensorflow.python.eager.polymorphic_function import shape_relaxation
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import tensor_spec
+from tensorflow.python.ops import array_ops
+from tensorflow.python.platform import test
+
+
+def _traced_shape(f, shape):
+  return f.get_concrete_function(
+      tensor_spec.TensorSpec(shape, dtypes.float32)).output_shapes.as_list()
+
+
+class ShapeRelaxationTest(test.TestCase):
+
+  def testPowerOfTwoRelaxation(self):
+
+    @polymorphic_function.function(
+        reduce_retracing=shape_relaxation.PowerOfTwoRelaxation())
+    def f(x):
+      return x * 2
+
+    for length in range(1, 11):
+      self.assertAllEqual([2.0] * length, f(array_ops.ones([length])))
+    # Traced for the sizes 1, 2, 4 and 8, and once for all the other sizes.
+    self.assertEqual(5, f.experimental_get_tracing_count())
+    self.assertEqual([8], _traced_shape(f, [8]))
+    self.assertEqual([None], _traced_shape(f, [5]))
+    self.assertEqual(5, f.experimental_get_tracing_count())
+
+  def testBucketRelaxationAxes(self):
+
+    @polymorphic_function.function(
+        reduce_retracing=shape_relaxation.BucketRelaxation([16, 32], axes=(1,)))
+    def f(x):
+      return x + 1
+
+    for length in (16, 20, 32, 25, 16):
+      f(array_ops.ones([2, length]))
+    self.assertEqual(3, f.experimental_get_tracing_count())
+    self.assertEqual([2, 32], _traced_shape(f, [2, 32]))
+    self.assertEqual([2, None], _traced_shape(f, [2, 25]))
+    # The batch axis is not relaxed.
+    self.assertEqual([3, None], _traced_shape(f, [3, 25]))
+
+  def testDistinctSizesRelaxation(self):
+
+    @polymorphic_function.function(
+        reduce_retracing=shape_relaxation.DistinctSizesRelaxation(2))
+    def f(x):
+      return x + 1
+
+    for length in (3, 4, 5, 6, 3):
+      f(array_ops.ones([length]))
+    self.assertEqual(3, f.experimental_get_tracing_count())
+    self.assertEqual([4], _traced_shape(f, [4]))
+    self.assertEqual([None], _traced_shape(f, [6]))
+
+  def testNestedArguments(self):
+
+    @polymorphic_function.function(
+        reduce_retracing=shape_relaxation.BucketRelaxation([4]))
+    def f(inputs, scale):
+      return inputs['ids'] * scale, inputs['mask']
+
+    ids, mask = f({'ids': array_ops.ones([3]), 'mask': array_ops.ones([4])},
+                  2.0)
+    self.assertEqual([None], ids.shape.as_list())
+    concrete = f.get_concrete_function(
+        {
+            'ids': tensor_spec.TensorSpec([5], dtypes.float32),
+            'mask': tensor_spec.TensorSpec([4], dtypes.float32)
+        }, 2.0)
+    self.assertEqual([[None], [4]],
+                     [shape.as_list() for shape in concrete.output_shapes])
+    self.assertEqual(1, f.experimental_get_tracing_count())
+
+  def testSharedPolicy(self):
+    policy = shape_relaxation.DistinctSizesRelaxation(1)
+
+    @polymorphic_function.function(reduce_retracing=policy)
+    def f(x):
+      return x + 1
+
+    @polymorphic_function.function(reduce_retracing=policy)
+    def g(x):
+      return x - 1
+
+    self.assertEqual([3], _traced_shape(f, [3]))
+    self.assertEqual([4], _traced_shape(g, [4]))
+    self.assertEqual([None], _traced_shape(f, [4]))
+
+  def testCachesRelaxedTypes(self):
+
+    class CountingRelaxation(shape_relaxation.PowerOfTwoRelaxation):
+
+      def __init__(self):
+        super().__init__()
+        self.num_calls = 0
+
+      def relax_dimension(self, path, axis, size, traced_sizes):
+        self.num_calls += 1
+        return super().relax_dimension(path, axis, size, traced_sizes)
+
+    policy = CountingRelaxation()
+
+    @polymorphic_function.function(reduce_retracing=policy)
+    def f(x):
+      return x + 1
+
+    for _ in range(3):
+      f(array_ops.ones([3]))
+      f(array_ops.ones([4]))
+    self.assertEqual(2, policy.num_calls)
+    self.assertEqual(2, f.experimental_get_tracing_count())
+
+  def testInvalidRelaxation(self):
+
+    class RoundUpRelaxation(shape_relaxation.ShapeRelaxationPolicy):
+
+      def relax_dimension(self, path, axis, size, traced_sizes):
+        return size + 1
+
+    @polymorphic_function.function(reduce_retracing=RoundUpRelaxation())
+    def f(x):
+      return x
+
+    with self.assertRaisesRegex(ValueError, 'must return the size'):
+      f(array_ops.ones([3]))
+
+  def testInvalidDistinctSizes(self):
+    with self.assertRaisesRegex(ValueError, 'must be non-negative'):
+      shape_relaxation.DistinctSizesRelaxation(-1)
+
+
+if __name__ == '__main__':
+  test.main()
@@ -15,7 +15,9 @@
 """Tracing Compiler implementation."""
 
 import collections
+import contextlib
 import threading
+import time
 import types as types_lib
 from typing import List
 import weakref
@@ -29,6 +31,9 @@ from tensorflow.python.eager.polymorphic_function import attributes as attribute
 from tensorflow.python.eager.polymorphic_function import function_context
 from tensorflow.python.eager.polymorphic_function import function_spec
 from tensorflow.python.eager.polymorphic_function import monomorphic_function
+from tensorflow.python.eager.polymorphic_function import persistent_cache
+from tensorflow.python.eager.polymorphic_function import shape_relaxation
+from tensorflow.python.eager.polymorphic_function import tracing_stats
 from tensorflow.python.framework import func_graph as func_graph_module
 from tensorflow.python.platform import tf_logging as logging
 from tensorflow.python.profiler import trace
@@ -48,6 +53,38 @@ _graph_building_time_counter = monitoring.Counter(
     "/tensorflow/core/tf_function/graph_building_time_usecs",
     "Time for tf.function to build a graph (us).")
 
+# A trace in progress, with the id of the thread tracing and the event set once
+# it is done.
+_InflightTrace = collections.namedtuple("_InflightTrace",
+                                        ["thread_id", "done"])
+
+# The maximum number of call types whose relaxed type is cached.
+_MAX_RELAXED_FUNC_TYPES = 1024
+
+# Whether the current thread may trace concurrently with the other traces of a
+# `TracingCompiler`.
+_parallel_tracing = threading.local()
+
+
+@contextlib.contextmanager
+def parallel_tracing():
+  """Lets the calls made in this scope trace concurrently with other threads.
+
+  A `TracingCompiler` traces one call at a time by default. The calls made in
+  this scope, such as the ones of `Function.experimental_pretrace`, are traced
+  concurrently with the other traces of the same function instead, while the
+  functions that they call when tracing are still traced one at a time.
+
+  Yields:
+    Nothing.
+  """
+  enabled = getattr(_parallel_tracing, "enabled", False)
+  _parallel_tracing.enabled = True
+  try:
+    yield
+  finally:
+    _parallel_tracing.enabled = enabled
+
 
 # TODO(fmuham): Revamp the API of this class to be 100% compiler-focused.
 class TracingCompiler:
@@ -62,7 +99,10 @@ class TracingCompiler:
   `TracingCompiler` class is thread-compatible meaning that minimal usage of
   tf.function (defining and calling) is thread-safe, but if users call other
   methods or invoke the base `python_function` themselves, external
-  synchronization is necessary.
+  synchronization is necessary. Calls are traced one at a time, except in a
+  `parallel_tracing` scope, where different input signatures are traced in
+  parallel. A call waits for a trace of the same signature in progress in
+  another thread instead of tracing it again.
 
   In addition, TracingCompiler is not reentrant, so recursive functions need
   to call the wrapped function, not the wrapper.
@@ -95,7 +135,9 @@ class TracingCompiler:
         information.
       reduce_retracing: When True, `tf.function` uses
         `tf.types.experimental.TraceType` to trace supertypes of arguments to
-        reduce the number of traces.
+        reduce the number of traces. Can also be a
+        `shape_relaxation.ShapeRelaxationPolicy` deciding which dimensions of
+        the tensor arguments are relaxed when tracing.
       capture_by_value: Experimental. Whether to capture resource variables by
         value or reference. If None, will inherit from a parent context or
         default to False.
@@ -114,7 +156,17 @@ class TracingCompiler:
     self._autograph = autograph
     self._autograph_options = autograph_options
     self._reduce_retracing = reduce_retracing
+    if isinstance(reduce_retracing, shape_relaxation.ShapeRelaxationPolicy):
+      self._relaxation_policy = reduce_retracing
+    else:
+      self._relaxation_policy = None
+    # Maps (path, axis) of the dimensions of the tensor arguments to the static
+    # sizes traced for them under the relaxation policy.
+    self._traced_sizes = {}
+    # Maps the most recent call types to their type relaxed by the policy.
+    self._relaxed_func_types = collections.OrderedDict()
     self._function_cache = function_cache.FunctionCache()
+    self._tracing_recorder = tracing_stats.TracingRecorder()
 
     self._function_attributes = attributes or {}
     for attribute in self._function_attributes:
@@ -129,17 +181,29 @@ class TracingCompiler:
     # to get runtime values for all captures during ConcreteFunction dispatch,
     self._func_captures = capture_container.FunctionCaptures()
     self._lock = threading.RLock()
+    # Serializes the calls made outside of a `parallel_tracing` scope, while
+    # `_lock` only guards the function cache and captures.
+    self._tracing_lock = threading.RLock()
+    # Maps the (FunctionContext, FunctionType) traced by each trace in
+    # progress to its `_InflightTrace`, so that concurrent calls wait for it
+    # instead of tracing the same concrete function again.
+    self._inflight_traces = {}
     # _descriptor_cache is a of instance of a class to an instance-specific
     # `TracingCompiler`, used to make sure tf.function-decorated methods
     # create different functions for each instance.
     self._descriptor_cache = weakref.WeakKeyDictionary()
     self._jit_compile = jit_compile
+    # The scope of the concrete functions of this `TracingCompiler` in the
+    # persistent cache, or None if they are not cached across processes. The
+    # optional filter returns whether the concrete function just traced can be
+    # cached.
+    self._persistent_cache_scope = None
+    self._persistent_cache_filter = None
 
   def __call__(self, *args, **kwargs):
     """Calls a graph function specialized to the inputs."""
-    with self._lock:
-      (concrete_function,
-       filtered_flat_args) = self._maybe_define_function(args, kwargs)
+    (concrete_function,
+     filtered_flat_args) = self._maybe_define_function(args, kwargs)
     return concrete_function._call_flat(
         filtered_flat_args, captured_inputs=concrete_function.captured_inputs)  # pylint: disable=protected-access
 
@@ -157,6 +221,11 @@ class TracingCompiler:
     """Returns the input signature."""
     return self._function_spec.input_signature
 
+  @property
+  def tracing_recorder(self):
+    """Returns the `TracingRecorder` of the function cache."""
+    return self._tracing_recorder
+
   def _maybe_define_concrete_function(self, args, kwargs):
     if self.input_signature and not args and not kwargs:
       # TODO(b/215596825): Throw error here if multiple entries are defined.
@@ -167,8 +236,7 @@ class TracingCompiler:
 
   def _get_concrete_function_internal_garbage_collected(self, *args, **kwargs):
     """Returns a concrete function which cleans up its graph function."""
-    with self._lock:
-      concrete_function, _ = self._maybe_define_concrete_function(args, kwargs)
+    concrete_function, _ = self._maybe_define_concrete_function(args, kwargs)
     return concrete_function
 
   def _get_concrete_function_internal(self, *args, **kwargs):
@@ -197,8 +265,8 @@ class TracingCompiler:
     if self.input_signature:
       self._function_spec.validate_inputs_with_signature(args, kwargs)
 
+    concrete_function, _ = self._maybe_define_concrete_function(args, kwargs)
     with self._lock:
-      concrete_function, _ = self._maybe_define_concrete_function(args, kwargs)
       seen_names = set()
       concrete_function._arg_keywords = []  # pylint: disable=protected-access
       prefix_counts = {}
@@ -273,7 +341,8 @@ class TracingCompiler:
 
   def _create_concrete_function(self, args, kwargs, func_graph):
     """Create a `ConcreteFunction` from `args`, `kwargs`, and `func_graph`."""
-    self.tracing_count += 1
+    with self._lock:
+      self.tracing_count += 1
 
     arglen = len(args)
     base_arg_names = self._function_spec.arg_names[:arglen]
@@ -310,7 +379,10 @@ class TracingCompiler:
   def _maybe_define_function(self, args, kwargs):
     """Gets a function for these inputs, defining it if necessary.
 
-    Caller must hold self._lock.
+    Calls are serialized by self._tracing_lock, unless made in a
+    `parallel_tracing` scope. The function cache is guarded by self._lock, but
+    the tracing itself runs without it: concurrent calls that need the same new
+    concrete function wait for the thread tracing it.
 
     Args:
       args: The varargs for the Python function.
@@ -327,28 +399,120 @@ class TracingCompiler:
       RuntimeError: If there's an internal bug (inconsistency) in handling
         shape relaxation retracing.
     """
+    if getattr(_parallel_tracing, "enabled", False):
+      # The functions called when tracing are traced one at a time.
+      _parallel_tracing.enabled = False
+      try:
+        return self._lookup_or_define_function(args, kwargs)
+      finally:
+        _parallel_tracing.enabled = True
+    with self._tracing_lock:
+      return self._lookup_or_define_function(args, kwargs)
+
+  def _lookup_or_define_function(self, args, kwargs):
+    """Implements `_maybe_define_function`."""
     args, kwargs, filtered_flat_args = (
         self._function_spec.canonicalize_function_inputs(args, kwargs))
 
     if self.input_signature is not None:
       args = (*self.input_signature, *args[len(self.input_signature):])
 
-    # Get runtime values of captures
-    captures = self._func_captures.get_by_ref_snapshot()
-
     current_func_context = function_context.make_function_context()
 
-    # cache_key_deletion_observer is useless here. It's based on all captures.
-    # A new cache key will be built later when saving ConcreteFunction because
-    # only active captures should be saved.
-    lookup_func_type, lookup_func_context = (
-        self._function_spec.make_canonicalized_monomorphic_type(
-            args, kwargs, captures))
-    concrete_function = self._function_cache.lookup(current_func_context,
-                                                    lookup_func_type)
-    if concrete_function is not None:
-      return concrete_function, filtered_flat_args
+    while True:
+      with self._lock:
+        # Get runtime values of captures
+        captures = self._func_captures.get_by_ref_snapshot()
+
+        # cache_key_deletion_observer is useless here. It's based on all
+        # captures. A new cache key will be built later when saving
+        # ConcreteFunction because only active captures should be saved.
+        lookup_func_type, lookup_func_context = (
+            self._function_spec.make_canonicalized_monomorphic_type(
+                args, kwargs, captures))
+        if (self._relaxation_policy is not None and
+            self.input_signature is None):
+          # Relaxed before the lookup, so that sizes kept static dispatch to
+          # their own concrete function rather than a relaxed one.
+          lookup_func_type = self._relax_function_type(lookup_func_type)
+        concrete_function = self._function_cache.lookup(current_func_context,
+                                                        lookup_func_type)
+        if concrete_function is not None:
+          self._tracing_recorder.record_hit()
+          return concrete_function, filtered_flat_args
+
+        if (self.input_signature is None and self._reduce_retracing and
+            self._relaxation_policy is None):
+          target_func_type = self._function_cache.generalize(
+              current_func_context, lookup_func_type)
+        else:
+          target_func_type = lookup_func_type
+        # Keyed by the generalized type, which concurrent calls of different
+        # types may share.
+        trace_key = (current_func_context, target_func_type)
+        inflight = self._inflight_traces.get(trace_key)
+        if inflight is None:
+          inflight = _InflightTrace(threading.get_ident(), threading.Event())
+          self._inflight_traces[trace_key] = inflight
+          break
+        if inflight.thread_id == threading.get_ident():
+          # A call made while tracing the same function type, which is traced
+          # again as it would be without the concurrent calls.
+          inflight = None
+          break
+      # Another thread is tracing this function type. The cache is looked up
+      # again once it is done, and a new trace is started if it failed.
+      inflight.done.wait()
+
+    try:
+      concrete_function = self._define_function(args, kwargs,
+                                                current_func_context,
+                                                lookup_func_type,
+                                                lookup_func_context,
+                                                target_func_type)
+    finally:
+      if inflight is not None:
+        with self._lock:
+          del self._inflight_traces[trace_key]
+        inflight.done.set()
+    return concrete_function, filtered_flat_args
+
+  def _relax_function_type(self, func_type):
+    """Returns `func_type` relaxed by the policy, under self._lock."""
+    relaxed_func_type = self._relaxed_func_types.get(func_type)
+    if relaxed_func_type is None:
+      relaxed_func_type = shape_relaxation.relax_function_type(
+          func_type, self._relaxation_policy, self._traced_sizes)
+      if len(self._relaxed_func_types) >= _MAX_RELAXED_FUNC_TYPES:
+        self._relaxed_func_types.popitem(last=False)
+      self._relaxed_func_types[func_type] = relaxed_func_type
+    else:
+      self._relaxed_func_types.move_to_end(func_type)
+    return relaxed_func_type
+
+  def _define_function(self, args, kwargs, current_func_context,
+                       lookup_func_type, lookup_func_context,
+                       target_func_type):
+    """Traces, or revives from the persistent cache, a new concrete function."""
+    persistent_cache_key = self._persistent_cache_key(current_func_context,
+                                                      lookup_func_type)
+    if persistent_cache_key is not None:
+      revived = persistent_cache.load(persistent_cache_key,
+                                      self._python_function,
+                                      self._function_spec)
+      if revived is not None:
+        concrete_function, traced_func_type = revived
+        with self._lock:
+          self._function_cache.add(current_func_context, traced_func_type,
+                                   lookup_func_context.deletion_observer,
+                                   concrete_function)
+        self._tracing_recorder.record_hit()
+        return concrete_function
 
+    with self._lock:
+      cached_func_types = self._function_cache.function_types(
+          current_func_context)
+    start_time = time.time()
     with monitoring.MonitoredTimer(_graph_building_time_counter.get_cell()):
       with trace.Trace("tf.function-graph_building"):
         logging.vlog(
@@ -363,11 +527,6 @@ class TracingCompiler:
             status=ag_status, options=self._autograph_options):
           func_graph = func_graph_module.FuncGraph(
               self._name, capture_by_value=self._capture_by_value)
-          if self.input_signature is None and self._reduce_retracing:
-            target_func_type = self._function_cache.generalize(
-                current_func_context, lookup_func_type)
-          else:
-            target_func_type = lookup_func_type
           handledata_mapping = lookup_func_context.get_handledata_mapping()
           placeholder_mapping = lookup_func_context.get_placeholder_mapping()
           placeholder_context = trace_type.InternalPlaceholderContext(
@@ -387,8 +546,6 @@ class TracingCompiler:
 
           # TODO(b/263520817): Remove access to private attribute.
           graph_capture_container = concrete_function.graph._function_captures  # pylint: disable=protected-access
-          # Maintain the list of all captures
-          self._func_captures.merge_by_ref_with(graph_capture_container)
           # Get current active captures snapshot
           captures = graph_capture_container.get_by_ref_snapshot()
 
@@ -397,11 +554,35 @@ class TracingCompiler:
           traced_func_type = _insert_capture_type(
               target_func_type, captures, lookup_func_context)
 
-          self._function_cache.add(current_func_context, traced_func_type,
-                                   traced_func_deletion_observer,
-                                   concrete_function)
+          with self._lock:
+            # Maintain the list of all captures
+            self._func_captures.merge_by_ref_with(graph_capture_container)
+            self._function_cache.add(current_func_context, traced_func_type,
+                                     traced_func_deletion_observer,
+                                     concrete_function)
+
+    retrace = self._tracing_recorder.record_trace(
+        cached_func_types, lookup_func_type, time.time() - start_time)
+    logging.vlog(1, "Traced Python function %r, caused by %s",
+                 self._python_function, retrace)
+    if persistent_cache_key is not None and (
+        self._persistent_cache_filter is None or
+        self._persistent_cache_filter()):
+      persistent_cache.save(persistent_cache_key, self._python_function,
+                            concrete_function, traced_func_type)
+    return concrete_function
 
-          return concrete_function, filtered_flat_args
+  def _persistent_cache_key(self, func_context, func_type):
+    """Returns the key of a call in the persistent cache, or None."""
+    if (self._persistent_cache_scope is None or
+        not persistent_cache.is_enabled()):
+      return None
+    options = repr((self._persistent_cache_scope, self._autograph,
+                    self._autograph_options, self._capture_by_value,
+                    self._jit_compile,
+                    sorted(self._function_attributes.items())))
+    return persistent_cache.make_key(self._python_function, options,
+                                     func_context, func_type)
 
 
 # When a method is bound to objects of this type, it allows AutoGraph to
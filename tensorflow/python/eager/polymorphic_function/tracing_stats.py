@@ -0,0 +1,203 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Statistics of the function cache of a `tf.function`.
+
+Every `TracingCompiler` keeps a `TracingRecorder` counting the lookups of its
+function cache. When a lookup misses, the recorder compares the `FunctionType`
+of the call with the types of the concrete functions already traced in the
+same context, and records the argument that differs from the closest one as
+the reason of the retrace.
+"""
+
+import collections
+import threading
+
+from tensorflow.core.function.trace_type import default_types
+
+# The number of most recent retraces kept by a `TracingRecorder`.
+MAX_RECORDED_RETRACES = 32
+
+
+class Retrace(
+    collections.namedtuple(
+        "Retrace", ["path", "cached_type", "new_type", "tracing_time_secs"])):
+  """A trace of a `tf.function` and the argument that caused it.
+
+  Attributes:
+    path: The path of the argument that did not match the closest traced
+      concrete function, e.g. `"x[0]['mask']"`, or `None` if no concrete
+      function was traced before in the same context, or if none of them
+      differs in an argument.
+    cached_type: The `TraceType` of the argument for the closest traced
+      concrete function, or `None` if the argument is new.
+    new_type: The `TraceType` of the argument in the call, or `None` if the
+      argument is missing.
+    tracing_time_secs: The time spent tracing, in seconds.
+  """
+
+  __slots__ = ()
+
+  def __str__(self):
+    if self.path is None:
+      return "no concrete function traced in this context"
+    return f"`{self.path}`: {self.cached_type} -> {self.new_type}"
+
+
+TracingStats = collections.namedtuple("TracingStats", [
+    "cache_hits", "cache_misses", "tracing_time_secs",
+    "num_concrete_functions", "concrete_function_bytes", "retraces"
+])
+TracingStats.__doc__ = """Statistics of the function cache of a `tf.function`.
+
+Attributes:
+  cache_hits: The number of calls that reused a traced concrete function.
+  cache_misses: The number of calls that traced a new concrete function.
+  tracing_time_secs: The total time spent tracing, in seconds.
+  num_concrete_functions: The number of traced concrete functions.
+  concrete_function_bytes: The size of the `FunctionDef`s of the traced
+    concrete functions, in bytes.
+  retraces: A list of the most recent `Retrace`s, oldest first.
+"""
+
+
+def _type_differences(path, cached_type, new_type):
+  """Yields `(path, cached_type, new_type)` for the mismatched leaves."""
+  if cached_type is None or new_type is None:
+    if cached_type is not new_type:
+      yield path, cached_type, new_type
+    return
+  if new_type.is_subtype_of(cached_type):
+    return
+  if isinstance(cached_type, default_types.List) and isinstance(
+      new_type, default_types.List):
+    cached_type = cached_type.components_tuple
+    new_type = new_type.components_tuple
+  if isinstance(cached_type, default_types.Attrs) and isinstance(
+      new_type, default_types.Attrs):
+    cached_type = cached_type.named_attributes
+    new_type = new_type.named_attributes
+
+  if (isinstance(cached_type, default_types.Tuple) and
+      isinstance(new_type, default_types.Tuple) and
+      len(cached_type.components) == len(new_type.components)):
+    for i, (cached, new) in enumerate(
+        zip(cached_type.components, new_type.components)):
+      yield from _type_differences(f"{path}[{i}]", cached, new)
+  elif (isinstance(cached_type, default_types.NamedTuple) and
+        isinstance(new_type, default_types.NamedTuple) and
+        cached_type.type_name == new_type.type_name and
+        cached_type.attribute_names == new_type.attribute_names):
+    for name, cached, new in zip(cached_type.attribute_names,
+                                 cached_type.attributes.components,
+                                 new_type.attributes.components):
+      yield from _type_differences(f"{path}.{name}", cached, new)
+  elif (isinstance(cached_type, default_types.Dict) and
+        isinstance(new_type, default_types.Dict) and
+        cached_type.mapping.keys() == new_type.mapping.keys()):
+    for key in cached_type.mapping:
+      yield from _type_differences(f"{path}[{key!r}]",
+                                   cached_type.mapping[key],
+                                   new_type.mapping[key])
+  else:
+    yield path, cached_type, new_type
+
+
+def function_type_differences(cached_type, new_type):
+  """Returns the arguments of `new_type` that do not match `cached_type`.
+
+  Args:
+    cached_type: The `FunctionType` of a traced concrete function.
+    new_type: The `FunctionType` of a call.
+
+  Returns:
+    A list of `(path, cached_type, new_type)` tuples, with the path of each
+    mismatched argument or capture and its `TraceType`s.
+  """
+  differences = []
+  cached_parameters = cached_type.parameters
+  new_parameters = new_type.parameters
+  for name in list(cached_parameters) + [
+      name for name in new_parameters if name not in cached_parameters
+  ]:
+    cached = cached_parameters.get(name)
+    new = new_parameters.get(name)
+    differences.extend(
+        _type_differences(name, cached and cached.type_constraint,
+                          new and new.type_constraint))
+  # Captures are only compared when both types have them, since the types of
+  # traced functions only include the captures that they use.
+  for name, cached in cached_type.captures.items():
+    if name in new_type.captures:
+      differences.extend(
+          _type_differences(f"<capture {name}>", cached,
+                            new_type.captures[name]))
+  return differences
+
+
+class TracingRecorder(object):
+  """Records the cache hits, misses and retraces of a `TracingCompiler`."""
+
+  __slots__ = ["_lock", "cache_hits", "cache_misses", "tracing_time_secs",
+               "retraces"]
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.cache_hits = 0
+    self.cache_misses = 0
+    self.tracing_time_secs = 0.0
+    self.retraces = collections.deque(maxlen=MAX_RECORDED_RETRACES)
+
+  def record_hit(self):
+    with self._lock:
+      self.cache_hits += 1
+
+  def record_trace(self, cached_types, new_type, tracing_time_secs):
+    """Records a trace of `new_type` and returns its `Retrace`.
+
+    Args:
+      cached_types: The `FunctionType`s of the concrete functions traced
+        before in the context of the call.
+      new_type: The `FunctionType` of the call.
+      tracing_time_secs: The time spent tracing, in seconds.
+
+    Returns:
+      The `Retrace` explaining the trace.
+    """
+    closest = None
+    for cached_type in cached_types:
+      differences = function_type_differences(cached_type, new_type)
+      if differences and (closest is None or len(differences) < len(closest)):
+        closest = differences
+    if closest:
+      retrace = Retrace(*closest[0], tracing_time_secs)
+    else:
+      retrace = Retrace(None, None, None, tracing_time_secs)
+    with self._lock:
+      self.cache_misses += 1
+      self.tracing_time_secs += tracing_time_secs
+      self.retraces.append(retrace)
+    return retrace
+
+
+def merge_stats(recorders, concrete_functions):
+  """Returns the `TracingStats` of `recorders` and their functions."""
+  return TracingStats(
+      cache_hits=sum(r.cache_hits for r in recorders),
+      cache_misses=sum(r.cache_misses for r in recorders),
+      tracing_time_secs=sum(r.tracing_time_secs for r in recorders),
+      num_concrete_functions=len(concrete_functions),
+      concrete_function_bytes=sum(
+          f.function_def.ByteSize() for f in concrete_functions),
+      retraces=[retrace for r in recorders for retrace in r.retraces])
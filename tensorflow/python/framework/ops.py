@@ -1045,6 +1045,12 @@ class Tensor(internal.NativeObject, core_tf_types.Tensor):
     return spec
 
 
+# Callbacks called with each EagerTensor whose value is read into Python, e.g.
+# by `numpy()`, `bool()` or `int()`. Used by `lazy_eager.record_replay` to
+# detect the functions whose Python code depends on the value of tensors.
+_eager_value_read_callbacks = []
+
+
 # TODO(agarwal): consider getting rid of this.
 # TODO(mdan): This object should not subclass ops.Tensor.
 class _EagerTensorBase(Tensor):
@@ -1122,6 +1128,9 @@ class _EagerTensorBase(Tensor):
     raise NotImplementedError()
 
   def _numpy(self):
+    if _eager_value_read_callbacks:
+      for callback in list(_eager_value_read_callbacks):
+        callback(self)
     try:
       return self._numpy_internal()
     except core._NotOkStatusException as e:  # pylint: disable=protected-access
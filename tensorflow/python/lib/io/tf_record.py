@@ -15,7 +15,14 @@
 
 """For reading and writing TFRecords files."""
 
+import bisect
+import mmap
+import random
+import struct
+
+from tensorflow.python.framework import errors_impl
 from tensorflow.python.lib.io import _pywrap_record_io
+from tensorflow.python.lib.io import file_io
 from tensorflow.python.util import compat
 from tensorflow.python.util import deprecation
 from tensorflow.python.util.tf_export import tf_export
@@ -208,6 +215,348 @@ def tf_record_random_reader(path):
   return _pywrap_record_io.RandomRecordReader(path)
 
 
+# A TFRecord is laid out as `uint64 length`, `uint32 masked_crc32(length)`,
+# `byte data[length]`, `uint32 masked_crc32(data)`.
+_RECORD_HEADER = struct.Struct("<QI")
+_RECORD_FOOTER_SIZE = 4
+
+# The sidecar index stores a fixed header followed by `num_records + 1`
+# little-endian uint64 offsets; the last offset is the end of the final record.
+_INDEX_SUFFIX = ".tfrindex"
+_INDEX_MAGIC = b"TFRIDX01"
+_INDEX_HEADER = struct.Struct("<8sQQ")  # magic, data file size, num records.
+_INDEX_OFFSET = struct.Struct("<Q")
+
+
+def tf_record_index_path(path):
+  """Returns the path of the sidecar offset index for the TFRecords `path`."""
+  return compat.as_str_any(path) + _INDEX_SUFFIX
+
+
+def build_tf_record_index(path, index_path=None):
+  """Scans an uncompressed TFRecords file once and writes its offset index.
+
+  Only record headers are read: the payload of every record is skipped, so
+  building the index costs one seek per record rather than a full decode. The
+  index is written atomically next to the shard (or to `index_path`) and
+  records the size of the data file so that stale indices can be detected.
+
+  Args:
+    path: The path to an uncompressed TFRecords file.
+    index_path: (optional) Where to write the index. Defaults to
+      `tf_record_index_path(path)`.
+
+  Returns:
+    The path of the written index.
+
+  Raises:
+    IOError: If `path` cannot be opened for reading.
+    tf.errors.DataLossError: If the file ends in the middle of a record.
+  """
+  path = compat.as_str_any(path)
+  if index_path is None:
+    index_path = tf_record_index_path(path)
+  file_size = file_io.stat(path).length
+
+  offsets = [0]
+  with file_io.FileIO(path, "rb") as f:
+    offset = 0
+    while offset < file_size:
+      header = f.read(_RECORD_HEADER.size)
+      if len(header) != _RECORD_HEADER.size:
+        raise errors_impl.DataLossError(
+            None, None, "Truncated record header at offset %d in %s" %
+            (offset, path))
+      length, _ = _RECORD_HEADER.unpack(header)
+      offset += _RECORD_HEADER.size + length + _RECORD_FOOTER_SIZE
+      if offset > file_size:
+        raise errors_impl.DataLossError(
+            None, None, "Truncated record ending at offset %d in %s of size %d"
+            % (offset, path, file_size))
+      f.seek(offset)
+      offsets.append(offset)
+
+  contents = bytearray(
+      _INDEX_HEADER.pack(_INDEX_MAGIC, file_size, len(offsets) - 1))
+  contents += struct.pack("<%dQ" % len(offsets), *offsets)
+  file_io.atomic_write_string_to_file(index_path, bytes(contents))
+  return index_path
+
+
+class TFRecordIndex(object):
+  """A memory-mapped sidecar index of record offsets in a TFRecords file.
+
+  Lookups decode a single offset from the mapped buffer, so opening an index
+  and resolving `index.span(i)` is O(1) regardless of the number of records.
+  Indices on non-local filesystems are read into memory instead of mapped.
+  """
+
+  def __init__(self, index_path):
+    """Opens the index stored at `index_path`.
+
+    Args:
+      index_path: The path of an index written by `build_tf_record_index`.
+
+    Raises:
+      IOError: If `index_path` cannot be opened for reading.
+      tf.errors.DataLossError: If `index_path` is not a valid index.
+    """
+    self._index_path = compat.as_str_any(index_path)
+    self._file = None
+    if "://" in self._index_path:
+      self._buffer = file_io.read_file_to_string(
+          self._index_path, binary_mode=True)
+    else:
+      self._file = open(self._index_path, "rb")
+      self._buffer = mmap.mmap(
+          self._file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(self._buffer) < _INDEX_HEADER.size:
+      self.close()
+      raise errors_impl.DataLossError(
+          None, None, "Truncated TFRecord index %s" % self._index_path)
+    magic, self._data_size, self._num_records = _INDEX_HEADER.unpack_from(
+        self._buffer)
+    expected_size = (_INDEX_HEADER.size +
+                     (self._num_records + 1) * _INDEX_OFFSET.size)
+    if magic != _INDEX_MAGIC or len(self._buffer) != expected_size:
+      self.close()
+      raise errors_impl.DataLossError(
+          None, None, "Invalid TFRecord index %s" % self._index_path)
+
+  @property
+  def data_size(self):
+    """The size in bytes of the indexed TFRecords file."""
+    return self._data_size
+
+  def __len__(self):
+    return self._num_records
+
+  def _offset(self, i):
+    return _INDEX_OFFSET.unpack_from(
+        self._buffer, _INDEX_HEADER.size + i * _INDEX_OFFSET.size)[0]
+
+  def span(self, i):
+    """Returns the `(start, end)` byte offsets of record `i`."""
+    if i < 0:
+      i += self._num_records
+    if not 0 <= i < self._num_records:
+      raise IndexError("Record index %d out of range for %d records" %
+                       (i, self._num_records))
+    return self._offset(i), self._offset(i + 1)
+
+  def close(self):
+    """Releases the mapped index."""
+    if isinstance(self._buffer, mmap.mmap):
+      self._buffer.close()
+    self._buffer = None
+    if self._file is not None:
+      self._file.close()
+      self._file = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, unused_type, unused_value, unused_traceback):
+    self.close()
+
+
+def _open_tf_record_index(path, build_index):
+  """Opens the index for `path`, (re)building it if missing or stale."""
+  index_path = tf_record_index_path(path)
+  if not file_io.file_exists(index_path):
+    if not build_index:
+      raise errors_impl.NotFoundError(
+          None, None, "No TFRecord index found for %s" % path)
+    build_tf_record_index(path, index_path)
+  index = TFRecordIndex(index_path)
+  if index.data_size != file_io.stat(path).length:
+    index.close()
+    if not build_index:
+      raise errors_impl.FailedPreconditionError(
+          None, None, "TFRecord index %s is stale for %s" % (index_path, path))
+    build_tf_record_index(path, index_path)
+    index = TFRecordIndex(index_path)
+  return index
+
+
+_MASK_64 = (1 << 64) - 1
+_FEISTEL_ROUNDS = 4
+
+
+def _mix64(x):
+  """The splitmix64 finalizer, a bijective mixing of 64-bit integers."""
+  x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9 & _MASK_64
+  x = (x ^ (x >> 27)) * 0x94d049bb133111eb & _MASK_64
+  return x ^ (x >> 31)
+
+
+class _IndexPermutation(object):
+  """A seeded bijection of `[0, n)` evaluated one index at a time.
+
+  A balanced Feistel network permutes the smallest domain of `2 * half_bits`
+  bits holding `n` values, and cycle walking maps the values outside `[0, n)`
+  back into it. Unlike shuffling a list of indices, it takes O(1) memory.
+  """
+
+  def __init__(self, n, seed):
+    self._n = n
+    self._half_bits = max(1, ((n - 1).bit_length() + 1) // 2)
+    self._half_mask = (1 << self._half_bits) - 1
+    self._keys = [
+        _mix64((seed + i * 0x9e3779b97f4a7c15) & _MASK_64)
+        for i in range(_FEISTEL_ROUNDS)
+    ]
+
+  def _encrypt(self, x):
+    left, right = x >> self._half_bits, x & self._half_mask
+    for key in self._keys:
+      left, right = right, left ^ (_mix64(right ^ key) & self._half_mask)
+    return (left << self._half_bits) | right
+
+  def __call__(self, i):
+    x = self._encrypt(i)
+    while x >= self._n:
+      x = self._encrypt(x)
+    return x
+
+
+class IndexedTFRecordReader(object):
+  """Random access by record number over one or more TFRecords files.
+
+  Records of all shards are numbered consecutively in the order of `paths`, so
+  `reader[i]` is the `i`-th record of the concatenated shards. Lookups resolve
+  the shard with a binary search over cumulative record counts and the byte
+  offset through the shard's memory-mapped index, then issue a single read.
+
+  Usage example:
+  ```py
+  reader = tf_record_indexed_reader(["shard-0", "shard-1"])
+  first, last = reader[0], reader[-1]
+  subset = reader[1000:2000]
+  for record in reader.shuffled(seed=epoch):
+    ...
+  ```
+  """
+
+  def __init__(self, paths, build_index=True):
+    """Opens `paths` for indexed reading.
+
+    Args:
+      paths: A path or list of paths to uncompressed TFRecords files.
+      build_index: If `True`, missing or stale indices are (re)built by
+        scanning the corresponding shard once. If `False`, a missing or stale
+        index is an error.
+
+    Raises:
+      IOError: If a shard cannot be opened for reading.
+      tf.errors.NotFoundError: If `build_index` is `False` and an index is
+        missing.
+      tf.errors.FailedPreconditionError: If `build_index` is `False` and an
+        index does not match its shard.
+    """
+    if isinstance(paths, (str, bytes)):
+      paths = [paths]
+    self._paths = [compat.as_str_any(path) for path in paths]
+    self._indices = []
+    self._readers = []
+    self._starts = [0]
+    try:
+      for path in self._paths:
+        index = _open_tf_record_index(path, build_index)
+        self._indices.append(index)
+        self._readers.append(_pywrap_record_io.RandomRecordReader(path))
+        self._starts.append(self._starts[-1] + len(index))
+    except Exception:
+      self.close()
+      raise
+
+  @property
+  def paths(self):
+    """The list of indexed TFRecords files."""
+    return list(self._paths)
+
+  def __len__(self):
+    return self._starts[-1]
+
+  def locate(self, i):
+    """Returns `(shard, local_index)` for the global record number `i`."""
+    if i < 0:
+      i += len(self)
+    if not 0 <= i < len(self):
+      raise IndexError("Record index %d out of range for %d records" %
+                       (i, len(self)))
+    shard = bisect.bisect_right(self._starts, i) - 1
+    return shard, i - self._starts[shard]
+
+  def _read(self, i):
+    shard, local_index = self.locate(i)
+    start, _ = self._indices[shard].span(local_index)
+    record, _ = self._readers[shard].read(start)
+    return record
+
+  def __getitem__(self, key):
+    """Returns a record, or a list of records if `key` is a slice."""
+    if isinstance(key, slice):
+      return [self._read(i) for i in range(*key.indices(len(self)))]
+    return self._read(key)
+
+  def __iter__(self):
+    for i in range(len(self)):
+      yield self._read(i)
+
+  def shuffled(self, seed=None):
+    """Iterates over all records of all shards in a global random order.
+
+    Args:
+      seed: (optional) Seed of the permutation. The same seed always yields
+        the same order.
+
+    Yields:
+      Serialized records.
+    """
+    if seed is None:
+      seed = random.getrandbits(64)
+    permutation = _IndexPermutation(len(self), seed)
+    for i in range(len(self)):
+      yield self._read(permutation(i))
+
+  def close(self):
+    """Closes all shards and releases their indices."""
+    for reader in self._readers:
+      reader.close()
+    for index in self._indices:
+      index.close()
+    self._readers = []
+    self._indices = []
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, unused_type, unused_value, unused_traceback):
+    self.close()
+
+
+def tf_record_indexed_reader(paths, build_index=True):
+  """Creates a reader that reads TFRecords by record number.
+
+  Each shard gets a sidecar offset index (see `build_tf_record_index`) which
+  is built on first use and memory-mapped afterwards, so later jobs can look
+  up `reader[i]`, slice `reader[i:j]` or iterate `reader.shuffled(seed)`
+  without scanning the shards again. Only uncompressed files are supported.
+
+  Args:
+    paths: A path or list of paths to uncompressed TFRecords files.
+    build_index: If `True`, missing or stale indices are built on open.
+
+  Returns:
+    An `IndexedTFRecordReader`.
+
+  Raises:
+    IOError: If a shard cannot be opened for reading.
+  """
+  return IndexedTFRecordReader(paths, build_index=build_index)
+
+
 @tf_export(
     "io.TFRecordWriter", v1=["io.TFRecordWriter", "python_io.TFRecordWriter"])
 @deprecation.deprecated_endpoints("python_io.TFRecordWriter")
@@ -0,0 +1,300 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Parallel scanning and validation of many TFRecords files."""
+
+import bisect
+import collections
+from concurrent import futures
+import os
+
+from tensorflow.python.framework import errors_impl
+from tensorflow.python.lib.io import _pywrap_record_io
+from tensorflow.python.lib.io import file_io
+from tensorflow.python.lib.io import tf_record
+from tensorflow.python.util import compat
+
+# Upper bounds (exclusive) of the record size histogram buckets, in bytes. The
+# last bucket collects all records of at least `2**26` bytes.
+DEFAULT_BUCKET_BOUNDARIES = tuple(2**i for i in range(4, 27, 2))
+
+_RECORD_HEADER = tf_record._RECORD_HEADER  # pylint: disable=protected-access
+_RECORD_OVERHEAD = (
+    _RECORD_HEADER.size + tf_record._RECORD_FOOTER_SIZE)  # pylint: disable=protected-access
+
+
+class CorruptRecord(
+    collections.namedtuple("CorruptRecord", ["path", "offset", "message"])):
+  """Location of a record that failed validation.
+
+  Attributes:
+    path: The TFRecords file containing the record.
+    offset: The byte offset of the record for uncompressed files, or the
+      number of records successfully read before it for compressed files.
+    message: The error reported by the reader.
+  """
+
+
+class TFRecordShardStats(
+    collections.namedtuple("TFRecordShardStats", [
+        "path", "file_bytes", "num_records", "record_bytes", "min_record_bytes",
+        "max_record_bytes", "histogram", "corrupt_records"
+    ])):
+  """Statistics for a single TFRecords file.
+
+  Attributes:
+    path: The scanned file.
+    file_bytes: The size of the file on disk.
+    num_records: The number of valid records.
+    record_bytes: The total payload size of the valid records.
+    min_record_bytes: The smallest valid record, or 0 if there are none.
+    max_record_bytes: The largest valid record, or 0 if there are none.
+    histogram: Number of valid records per size bucket; see
+      `TFRecordScanStats.bucket_boundaries`.
+    corrupt_records: A list of `CorruptRecord`s.
+  """
+
+
+class TFRecordScanStats(object):
+  """Aggregate statistics over a set of scanned TFRecords files."""
+
+  def __init__(self, shards, bucket_boundaries):
+    self._shards = list(shards)
+    self._bucket_boundaries = tuple(bucket_boundaries)
+
+  @property
+  def shards(self):
+    """The `TFRecordShardStats` of every file, in the order scanned."""
+    return list(self._shards)
+
+  @property
+  def bucket_boundaries(self):
+    """Exclusive upper bounds of all but the last histogram bucket."""
+    return self._bucket_boundaries
+
+  @property
+  def num_records(self):
+    """The total number of valid records.
+
+    For a `tf.data.TFRecordDataset` over the same files this is the value to
+    pass to `tf.data.experimental.assert_cardinality`.
+    """
+    return sum(shard.num_records for shard in self._shards)
+
+  @property
+  def file_bytes(self):
+    return sum(shard.file_bytes for shard in self._shards)
+
+  @property
+  def record_bytes(self):
+    return sum(shard.record_bytes for shard in self._shards)
+
+  @property
+  def histogram(self):
+    """Number of valid records per size bucket across all files."""
+    totals = [0] * (len(self._bucket_boundaries) + 1)
+    for shard in self._shards:
+      for i, count in enumerate(shard.histogram):
+        totals[i] += count
+    return totals
+
+  @property
+  def corrupt_records(self):
+    return [r for shard in self._shards for r in shard.corrupt_records]
+
+  def cardinalities(self):
+    """Returns a dict mapping each file path to its number of valid records."""
+    return {shard.path: shard.num_records for shard in self._shards}
+
+  def __repr__(self):
+    return ("TFRecordScanStats(num_files=%d, num_records=%d, record_bytes=%d, "
+            "num_corrupt_records=%d)" %
+            (len(self._shards), self.num_records, self.record_bytes,
+             len(self.corrupt_records)))
+
+
+def _read_header_length(path, offset):
+  """Returns the payload length stored in the record header at `offset`."""
+  with file_io.FileIO(path, "rb") as f:
+    f.seek(offset)
+    header = f.read(_RECORD_HEADER.size)
+  if len(header) != _RECORD_HEADER.size:
+    return None
+  return _RECORD_HEADER.unpack(header)[0]
+
+
+def _scan_headers(path, file_bytes, add, corrupt_records):
+  """Reads the record headers of an uncompressed file, seeking over payloads."""
+  offset = 0
+  with file_io.FileIO(path, "rb") as f:
+    while offset < file_bytes:
+      header = f.read(_RECORD_HEADER.size)
+      length = None
+      if len(header) == _RECORD_HEADER.size:
+        length = _RECORD_HEADER.unpack(header)[0]
+      if length is None or offset + _RECORD_OVERHEAD + length > file_bytes:
+        corrupt_records.append(CorruptRecord(path, offset, "Truncated record"))
+        return
+      add(length)
+      offset += _RECORD_OVERHEAD + length
+      f.seek(offset)
+
+
+def _scan_shard(path, compression_type, bucket_boundaries, stop_on_error,
+                verify_records):
+  """Scans a single file and returns its `TFRecordShardStats`."""
+  file_bytes = file_io.stat(path).length
+  histogram = [0] * (len(bucket_boundaries) + 1)
+  corrupt_records = []
+  num_records = 0
+  record_bytes = 0
+  min_record_bytes = None
+  max_record_bytes = 0
+
+  def add(size):
+    nonlocal num_records, record_bytes, min_record_bytes, max_record_bytes
+    num_records += 1
+    record_bytes += size
+    if min_record_bytes is None or size < min_record_bytes:
+      min_record_bytes = size
+    max_record_bytes = max(max_record_bytes, size)
+    histogram[bisect.bisect_right(bucket_boundaries, size)] += 1
+
+  if compression_type:
+    # Compressed files can only be read sequentially, so a corrupt record ends
+    # the scan of the file.
+    iterator = _pywrap_record_io.RecordIterator(path, compression_type)
+    try:
+      for record in iterator:
+        add(len(record))
+    except errors_impl.DataLossError as e:
+      corrupt_records.append(CorruptRecord(path, num_records, e.message))
+    finally:
+      iterator.close()
+  elif not verify_records:
+    _scan_headers(path, file_bytes, add, corrupt_records)
+  else:
+    # Uncompressed files are read by offset so that the scan can skip over a
+    # record whose payload is corrupt but whose header is intact.
+    reader = _pywrap_record_io.RandomRecordReader(path)
+    offset = 0
+    try:
+      while offset < file_bytes:
+        try:
+          record, offset = reader.read(offset)
+        except errors_impl.DataLossError as e:
+          corrupt_records.append(CorruptRecord(path, offset, e.message))
+          length = _read_header_length(path, offset)
+          next_offset = (
+              None if length is None else offset + _RECORD_OVERHEAD + length)
+          if stop_on_error or next_offset is None or next_offset > file_bytes:
+            break
+          offset = next_offset
+          continue
+        except IndexError:
+          corrupt_records.append(
+              CorruptRecord(path, offset, "Truncated record"))
+          break
+        add(len(record))
+    finally:
+      reader.close()
+
+  return TFRecordShardStats(
+      path=path,
+      file_bytes=file_bytes,
+      num_records=num_records,
+      record_bytes=record_bytes,
+      min_record_bytes=min_record_bytes or 0,
+      max_record_bytes=max_record_bytes,
+      histogram=histogram,
+      corrupt_records=corrupt_records)
+
+
+def scan_tf_records(paths,
+                    options=None,
+                    num_workers=None,
+                    use_processes=False,
+                    bucket_boundaries=None,
+                    stop_on_error=False,
+                    verify_records=True):
+  """Counts, validates and measures the records of many TFRecords files.
+
+  Every record is read and its CRCs are checked, with one file per worker.
+  Record reads release the GIL, so threads scale with the available I/O; pass
+  `use_processes=True` when many small records make the per-record Python
+  overhead dominate. When only the statistics are needed, pass
+  `verify_records=False` to read the record headers of uncompressed files and
+  seek over their payloads instead.
+
+  Usage example:
+  ```py
+  stats = scan_tf_records(tf.io.gfile.glob("/data/train-*"), num_workers=64)
+  for corrupt in stats.corrupt_records:
+    print(corrupt.path, corrupt.offset, corrupt.message)
+  dataset = tf.data.TFRecordDataset(filenames).apply(
+      tf.data.experimental.assert_cardinality(stats.num_records))
+  ```
+
+  Args:
+    paths: A path or list of paths to TFRecords files.
+    options: (optional) String specifying compression type,
+      `TFRecordCompressionType`, or `TFRecordOptions` object.
+    num_workers: (optional) The number of files scanned concurrently. Defaults
+      to the number of CPUs.
+    use_processes: If `True`, scan in a pool of processes instead of threads.
+    bucket_boundaries: (optional) Sorted exclusive upper bounds, in bytes, of
+      the record size histogram buckets. Defaults to
+      `DEFAULT_BUCKET_BOUNDARIES`.
+    stop_on_error: If `True`, stop scanning a file at its first corrupt record.
+      Otherwise corrupt records of uncompressed files are skipped whenever
+      their header is intact.
+    verify_records: If `False`, the payloads and CRCs of uncompressed files are
+      not read, so only truncated records are reported as corrupt. Compressed
+      files are always read in full.
+
+  Returns:
+    A `TFRecordScanStats`.
+
+  Raises:
+    IOError: If a file cannot be opened for reading.
+    ValueError: If `num_workers` is not positive or `bucket_boundaries` is not
+      sorted.
+  """
+  if isinstance(paths, (str, bytes)):
+    paths = [paths]
+  paths = [compat.as_str_any(path) for path in paths]
+  compression_type = tf_record.TFRecordOptions.get_compression_type_string(
+      options)
+  if bucket_boundaries is None:
+    bucket_boundaries = DEFAULT_BUCKET_BOUNDARIES
+  bucket_boundaries = tuple(bucket_boundaries)
+  if list(bucket_boundaries) != sorted(bucket_boundaries):
+    raise ValueError("`bucket_boundaries` must be sorted, got %s." %
+                     (bucket_boundaries,))
+  if num_workers is None:
+    num_workers = os.cpu_count() or 1
+  if num_workers < 1:
+    raise ValueError("`num_workers` must be positive, got %d." % num_workers)
+  num_workers = min(num_workers, max(len(paths), 1))
+
+  executor_cls = (
+      futures.ProcessPoolExecutor if use_processes else
+      futures.ThreadPoolExecutor)
+  with executor_cls(max_workers=num_workers) as executor:
+    shards = list(
+        executor.map(
+            _scan_shard, paths, [compression_type] * len(paths),
+            [bucket_boundaries] * len(paths), [stop_on_error] * len(paths),
+            [verify_records] * len(paths)))
+  return TFRecordScanStats(shards, bucket_boundaries)
@@ -0,0 +1,116 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for tf_record_stats.scan_tf_records."""
+
+import os
+
+from tensorflow.python.lib.io import tf_record
+from tensorflow.python.lib.io import tf_record_stats
+from tensorflow.python.platform import test
+
+
+class ScanTFRecordsTest(test.TestCase):
+
+  def _WriteRecordsToFile(self, records, name, options=None):
+    fn = os.path.join(self.get_temp_dir(), name)
+    with tf_record.TFRecordWriter(fn, options=options) as writer:
+      for r in records:
+        writer.write(r)
+    return fn
+
+  def _CreateFiles(self, num_files, options=None):
+    files = []
+    for i in range(num_files):
+      records = [b"x" * (i * 10 + j) for j in range(i + 1)]
+      files.append(
+          self._WriteRecordsToFile(records, "tfrecord.%d" % i, options))
+    return files
+
+  def testCountsAndHistogram(self):
+    files = self._CreateFiles(4)
+    stats = tf_record_stats.scan_tf_records(
+        files, num_workers=2, bucket_boundaries=[10, 30])
+    self.assertEqual(1 + 2 + 3 + 4, stats.num_records)
+    self.assertEqual([1, 2, 3, 4], [s.num_records for s in stats.shards])
+    self.assertEqual(dict(zip(files, [1, 2, 3, 4])), stats.cardinalities())
+    # Record sizes are 0 | 10, 11 | 20, 21, 22 | 30, 31, 32, 33.
+    self.assertEqual([1, 5, 4], stats.histogram)
+    self.assertEqual(0, stats.shards[0].max_record_bytes)
+    self.assertEqual(30, stats.shards[3].min_record_bytes)
+    self.assertEqual(33, stats.shards[3].max_record_bytes)
+    self.assertEqual(
+        sum(os.path.getsize(f) for f in files), stats.file_bytes)
+    self.assertEmpty(stats.corrupt_records)
+
+  def testCompressedFiles(self):
+    files = self._CreateFiles(3, options="GZIP")
+    stats = tf_record_stats.scan_tf_records(files, options="GZIP")
+    self.assertEqual(6, stats.num_records)
+    self.assertEmpty(stats.corrupt_records)
+
+  def testCorruptRecordIsSkipped(self):
+    records = [b"record %d" % i for i in range(5)]
+    fn = self._WriteRecordsToFile(records, "tfrecord")
+    record_size = 12 + len(records[0]) + 4
+    with open(fn, "r+b") as f:
+      # Flip a payload byte of the third record.
+      f.seek(2 * record_size + 12)
+      f.write(b"X")
+
+    stats = tf_record_stats.scan_tf_records(fn)
+    self.assertEqual(4, stats.num_records)
+    self.assertLen(stats.corrupt_records, 1)
+    self.assertEqual(fn, stats.corrupt_records[0].path)
+    self.assertEqual(2 * record_size, stats.corrupt_records[0].offset)
+
+    stats = tf_record_stats.scan_tf_records(fn, stop_on_error=True)
+    self.assertEqual(2, stats.num_records)
+
+  def testTruncatedFile(self):
+    records = [b"record %d" % i for i in range(5)]
+    fn = self._WriteRecordsToFile(records, "tfrecord")
+    with open(fn, "rb") as f:
+      contents = f.read()
+    with open(fn, "wb") as f:
+      f.write(contents[:-2])
+    stats = tf_record_stats.scan_tf_records(fn)
+    self.assertEqual(4, stats.num_records)
+    self.assertLen(stats.corrupt_records, 1)
+
+  def testWithoutVerifyingRecords(self):
+    files = self._CreateFiles(4)
+    with open(files[1], "r+b") as f:
+      # Flip a payload byte, which is only detected when verifying records.
+      f.seek(12)
+      f.write(b"X")
+    with open(files[3], "ab") as f:
+      f.write(b"truncated")
+    stats = tf_record_stats.scan_tf_records(
+        files, bucket_boundaries=[10, 30], verify_records=False)
+    self.assertEqual(1 + 2 + 3 + 4, stats.num_records)
+    self.assertEqual([1, 5, 4], stats.histogram)
+    self.assertLen(stats.corrupt_records, 1)
+    self.assertEqual(files[3], stats.corrupt_records[0].path)
+    self.assertEqual(
+        os.path.getsize(files[3]) - len(b"truncated"),
+        stats.corrupt_records[0].offset)
+
+  def testUnsortedBucketBoundaries(self):
+    with self.assertRaisesRegex(ValueError, "sorted"):
+      tf_record_stats.scan_tf_records([], bucket_boundaries=[10, 5])
+
+
+if __name__ == "__main__":
+  test.main()
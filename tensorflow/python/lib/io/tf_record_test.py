@@ -569,6 +569,91 @@ class TFRecordRandomReaderTest(TFCompressionTestCase):
       reader.read(0)
 
 
+class TFRecordIndexedReaderTest(TFCompressionTestCase):
+
+  def testBuildIndexRecordsOffsets(self):
+    records = [self._Record(0, i) for i in range(self._num_records)]
+    fn = self._WriteRecordsToFile(records, "uncompressed_records")
+    index_path = tf_record.build_tf_record_index(fn)
+    self.assertEqual(index_path, tf_record.tf_record_index_path(fn))
+
+    reader = tf_record.tf_record_random_reader(fn)
+    with tf_record.TFRecordIndex(index_path) as index:
+      self.assertLen(index, self._num_records)
+      for i in range(self._num_records):
+        start, end = index.span(i)
+        record, offset = reader.read(start)
+        self.assertEqual(records[i], record)
+        self.assertEqual(end, offset)
+      with self.assertRaises(IndexError):
+        index.span(self._num_records)
+
+  def testGetItemAcrossShards(self):
+    files = self._CreateFiles()
+    expected = [
+        self._Record(i, j)
+        for i in range(self._num_files)
+        for j in range(self._num_records)
+    ]
+    with tf_record.tf_record_indexed_reader(files) as reader:
+      self.assertLen(reader, len(expected))
+      for i, record in enumerate(expected):
+        self.assertEqual(record, reader[i])
+      self.assertEqual(expected[-1], reader[-1])
+      self.assertEqual(expected[3:10], reader[3:10])
+      self.assertEqual(expected[::-2], reader[::-2])
+      self.assertEqual((1, 2), reader.locate(self._num_records + 2))
+      with self.assertRaises(IndexError):
+        reader[len(expected)]  # pylint: disable=pointless-statement
+
+  def testShuffledIsDeterministicPermutation(self):
+    files = self._CreateFiles()
+    with tf_record.tf_record_indexed_reader(files) as reader:
+      first = list(reader.shuffled(seed=7))
+      second = list(reader.shuffled(seed=7))
+      self.assertEqual(first, second)
+      self.assertCountEqual(list(reader), first)
+
+  def testIndexPermutationIsBijective(self):
+    for n in (1, 2, 7, 64, 1000):
+      permutation = tf_record._IndexPermutation(n, seed=3)
+      self.assertCountEqual(range(n), [permutation(i) for i in range(n)])
+
+  def testEmptyShard(self):
+    empty = self._WriteRecordsToFile([], "empty_records")
+    records = [self._Record(0, i) for i in range(self._num_records)]
+    fn = self._WriteRecordsToFile(records, "uncompressed_records")
+    with tf_record.tf_record_indexed_reader([empty, fn, empty]) as reader:
+      self.assertEqual(records, list(reader))
+
+  def testMissingIndexWithoutBuild(self):
+    records = [self._Record(0, i) for i in range(self._num_records)]
+    fn = self._WriteRecordsToFile(records, "uncompressed_records")
+    with self.assertRaises(errors_impl.NotFoundError):
+      tf_record.tf_record_indexed_reader(fn, build_index=False)
+
+  def testStaleIndexIsRebuilt(self):
+    records = [self._Record(0, i) for i in range(self._num_records)]
+    fn = self._WriteRecordsToFile(records, "uncompressed_records")
+    tf_record.build_tf_record_index(fn)
+    records.append(b"appended")
+    fn = self._WriteRecordsToFile(records, "uncompressed_records")
+    with self.assertRaises(errors_impl.FailedPreconditionError):
+      tf_record.tf_record_indexed_reader(fn, build_index=False)
+    with tf_record.tf_record_indexed_reader(fn) as reader:
+      self.assertEqual(b"appended", reader[-1])
+
+  def testTruncatedFileRaisesDataLoss(self):
+    records = [self._Record(0, i) for i in range(self._num_records)]
+    fn = self._WriteRecordsToFile(records, "uncompressed_records")
+    with open(fn, "rb") as f:
+      contents = f.read()
+    with open(fn, "wb") as f:
+      f.write(contents[:-3])
+    with self.assertRaisesRegex(errors_impl.DataLossError, "Truncated"):
+      tf_record.build_tf_record_index(fn)
+
+
 class TFRecordWriterCloseAndFlushTests(test.TestCase):
   """TFRecordWriter close and flush tests"""
 
@@ -69,7 +69,8 @@ def gen_api_init_files(
         output_package = "tensorflow",
         output_dir = "",
         root_file_name = "__init__.py",
-        proxy_module_root = None):
+        proxy_module_root = None,
+        loading = "default"):
     """Creates API directory structure and __init__.py files.
 
     Creates a genrule that generates a directory structure with __init__.py
@@ -107,6 +108,10 @@ def gen_api_init_files(
       proxy_module_root: Module root for proxy-import format. If specified, proxy files with content
         like `from proxy_module_root.proxy_module import *` will be created to enable import
         resolution under TensorFlow.
+      loading: How the generated __init__.py files load the exported symbols:
+        "lazy" to load them when first used, "static" to import them all in
+        the __init__.py files, or "default" for the default of
+        create_python_api.py.
     """
     root_init_template_flag = ""
     if root_init_template:
@@ -166,6 +171,8 @@ def gen_api_init_files(
     # copybara:uncomment_end_and_comment_begin
     loading_value = "default"
     # copybara:comment_end
+    if loading != "default":
+        loading_value = loading
 
     native.genrule(
         name = name,
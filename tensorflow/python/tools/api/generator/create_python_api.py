@@ -20,6 +20,7 @@ import os
 import sys
 
 from tensorflow.python.tools.api.generator import doc_srcs
+from tensorflow.python.util import lazy_loader
 from tensorflow.python.util import tf_decorator
 from tensorflow.python.util import tf_export
 
@@ -520,6 +521,20 @@ def get_api_init_text(packages,
   return module_code_builder.build()
 
 
+def load_lazy_modules(package):
+  """Imports the modules that `package` loads lazily.
+
+  The API is generated from the modules in `sys.modules`, so the modules that
+  a package only imports on first use need to be imported explicitly.
+
+  Args:
+    package: A Python package module.
+  """
+  for attr in list(vars(package).values()):
+    if isinstance(attr, lazy_loader.LazyLoader):
+      attr._load()  # pylint: disable=protected-access
+
+
 def get_module(dir_path, relative_to_dir):
   """Get module that corresponds to path relative to relative_to_dir.
 
@@ -827,7 +842,7 @@ def main():
   # Populate `sys.modules` with modules containing tf_export().
   packages = args.packages.split(',')
   for package in packages:
-    importlib.import_module(package)
+    load_lazy_modules(importlib.import_module(package))
   packages_to_ignore = args.packages_to_ignore.split(',')
 
   # Determine if the modules shall be loaded lazily or statically.
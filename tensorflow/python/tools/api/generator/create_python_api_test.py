@@ -20,6 +20,7 @@ import sys
 
 from tensorflow.python.platform import test
 from tensorflow.python.tools.api.generator import create_python_api
+from tensorflow.python.util import lazy_loader
 from tensorflow.python.util.tf_export import tf_export
 
 
@@ -161,6 +162,13 @@ class CreatePythonApiTest(test.TestCase):
     self.assertIn('compat.v2.compat.v2', imports,
                   msg='compat.v2.compat.v2 not in %s' % str(imports.keys()))
 
+  def testLazyModulesAreLoaded(self):
+    package = imp.new_module('tensorflow.python.test_package')
+    package.test_module = lazy_loader.LazyLoader(
+        'test_module', vars(package), _MODULE_NAME)
+    create_python_api.load_lazy_modules(package)
+    self.assertIs(sys.modules[_MODULE_NAME], package.test_module)
+
   def testProxyAPIFileIsGenerated(self):
     save_dir = self.get_temp_dir()
     proxy_module_root = 'keras.api._v2'
@@ -84,6 +84,7 @@ should be recursive. The behavior is undefined if there is a cycle.
 """
 
 import collections as _collections
+import itertools as _itertools
 
 import six as _six
 import wrapt as _wrapt
@@ -1732,6 +1733,206 @@ def list_to_tuple(structure):
                            sequence_fn=sequence_fn)
 
 
+def _compile_packer(structure, is_nested_fn):
+  """Returns a function packing the atoms of an iterator like `structure`.
+
+  The returned function consumes the atoms of a single `structure` from the
+  iterator it is called with, and returns them packed like `_pack_sequence_as`
+  would.
+
+  Args:
+    structure: The structure to pack atoms like.
+    is_nested_fn: Function used to test if a value should be treated as a
+      nested structure.
+
+  Returns:
+    A function taking an iterator over atoms.
+  """
+  if not is_nested_fn(structure):
+    return next
+  children = [
+      _compile_packer(child, is_nested_fn) for child in _yield_value(structure)
+  ]
+  structure_type = type(structure)
+  if structure_type in (list, tuple):
+    if all(child is next for child in children):
+      num_children = len(children)
+      return lambda atoms: structure_type(  # pylint: disable=g-long-lambda
+          _itertools.islice(atoms, num_children))
+    return lambda atoms: structure_type([child(atoms) for child in children])
+  if structure_type is dict:
+    sorted_keys = _sorted(structure)
+    keys = list(structure)
+
+    def pack_dict(atoms):
+      values = dict(zip(sorted_keys, [child(atoms) for child in children]))
+      return {key: values[key] for key in keys}
+
+    return pack_dict
+  if (is_namedtuple(structure) and
+      not isinstance(structure, _wrapt.ObjectProxy)):
+    return lambda atoms: structure_type(*[child(atoms) for child in children])
+  return lambda atoms: _sequence_like(  # pylint: disable=g-long-lambda
+      structure, [child(atoms) for child in children])
+
+
+class StructurePlan(object):
+  """A structure compiled to flatten and pack structures of the same shape.
+
+  `flatten`, `pack_sequence_as` and `map_structure` inspect the types of all
+  the nested structures, and sort the keys of all the dicts, on every call.
+  A `StructurePlan` does this once, when it is created, and records how to
+  build the structure back from its atoms, so that packing atoms into the same
+  structure again only calls the recorded constructors:
+
+  >>> plan = nest.StructurePlan({"b": (1, 2), "a": 3})
+  >>> plan.num_leaves
+  3
+  >>> plan.paths
+  (('a',), ('b', 0), ('b', 1))
+  >>> plan.pack([4, 5, 6])
+  {'b': (5, 6), 'a': 4}
+  >>> plan.map_structure(lambda x, y: x + y, {"a": 1, "b": (2, 3)},
+  ...                    {"a": 10, "b": (20, 30)})
+  {'b': (22, 33), 'a': 11}
+
+  Plans do not copy the compiled structure, which must not be modified.
+  """
+
+  __slots__ = ["_structure", "_expand_composites", "_paths", "_packer"]
+
+  def __init__(self, structure, expand_composites=False):
+    """Compiles `structure`.
+
+    Args:
+      structure: An atom or a nested structure.
+      expand_composites: If true, then composite tensors such as
+        `tf.sparse.SparseTensor` and `tf.RaggedTensor` are expanded into their
+        component tensors.
+
+    Raises:
+      TypeError: The structure is or contains a dict with non-sortable keys.
+    """
+    self._structure = structure
+    self._expand_composites = bool(expand_composites)
+    is_nested_fn = (
+        _is_nested_or_composite if self._expand_composites else _is_nested)
+    self._paths = tuple(
+        yield_flat_paths(structure, expand_composites=self._expand_composites))
+    self._packer = _compile_packer(structure, is_nested_fn)
+
+  @property
+  def structure(self):
+    """The compiled structure."""
+    return self._structure
+
+  @property
+  def expand_composites(self):
+    return self._expand_composites
+
+  @property
+  def num_leaves(self):
+    """The number of atoms in the compiled structure."""
+    return len(self._paths)
+
+  @property
+  def paths(self):
+    """The tuple paths of the atoms, as given by `yield_flat_paths`."""
+    return self._paths
+
+  def flatten(self, structure):
+    """Returns the atoms of `structure`, which has the compiled structure.
+
+    Args:
+      structure: A structure with the same number of atoms as the compiled
+        structure.
+
+    Returns:
+      A Python list, the flattened version of `structure`.
+
+    Raises:
+      ValueError: If `structure` has a different number of atoms.
+    """
+    flat = flatten(structure, expand_composites=self._expand_composites)
+    if len(flat) != len(self._paths):
+      raise ValueError(
+          "The input structure has %d atoms, but the compiled structure has "
+          "%d.  Input structure: %s, compiled structure: %s." %
+          (len(flat), len(self._paths), structure, self._structure))
+    return flat
+
+  def pack(self, flat_sequence):
+    """Returns `flat_sequence` packed into the compiled structure.
+
+    This is equivalent to `pack_sequence_as(self.structure, flat_sequence,
+    self.expand_composites)`.
+
+    Args:
+      flat_sequence: A flat sequence of `num_leaves` atoms.
+
+    Returns:
+      `flat_sequence` converted to have the compiled structure.
+
+    Raises:
+      TypeError: If `flat_sequence` is not a sequence.
+      ValueError: If `flat_sequence` does not have `num_leaves` items.
+    """
+    if not _is_nested(flat_sequence):
+      raise TypeError(
+          "Attempted to pack value of type `{}` into a structure, but "
+          "expected a sequence.".format(type(flat_sequence)))
+    if len(flat_sequence) != len(self._paths):
+      raise ValueError(
+          "Could not pack sequence. Structure had %d atoms, but "
+          "flat_sequence had %d items.  Structure: %s, flat_sequence: %s." %
+          (len(self._paths), len(flat_sequence), self._structure,
+           flat_sequence))
+    return self._packer(iter(flat_sequence))
+
+  def map_structure(self, func, *structure, check_types=True):
+    """Applies `func` to the atoms of structures with the compiled structure.
+
+    This is equivalent to `map_structure(func, *structure)`, with the results
+    packed into the compiled structure.
+
+    Args:
+      func: A callable that accepts as many arguments as there are structures.
+      *structure: Structures with the compiled structure.
+      check_types: If true, the types of the nested structures must match the
+        compiled structure. See `assert_same_structure`.
+
+    Returns:
+      The results of `func` packed into the compiled structure.
+
+    Raises:
+      ValueError: If a structure is nested differently than the compiled
+        structure.
+      TypeError: If `check_types` is true and a structure has different types
+        than the compiled structure.
+    """
+    for other in structure:
+      self.assert_same_structure(other, check_types=check_types)
+    flat = [
+        flatten(other, expand_composites=self._expand_composites)
+        for other in structure
+    ]
+    return self._packer(iter([func(*atoms) for atoms in zip(*flat)]))
+
+  def assert_same_structure(self, structure, check_types=True):
+    """Asserts that `structure` is nested like the compiled structure.
+
+    Args:
+      structure: An atom or a nested structure.
+      check_types: See `assert_same_structure`.
+
+    Raises:
+      ValueError: If `structure` is nested differently.
+      TypeError: If `check_types` is true and `structure` has different types.
+    """
+    assert_same_structure(self._structure, structure, check_types=check_types,
+                          expand_composites=self._expand_composites)
+
+
 _pywrap_utils.RegisterType("Mapping", _collections_abc.Mapping)
 _pywrap_utils.RegisterType("MutableMapping", _collections_abc.MutableMapping)
 _pywrap_utils.RegisterType("Sequence", _collections_abc.Sequence)
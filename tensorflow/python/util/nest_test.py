@@ -290,6 +290,74 @@ class NestTest(parameterized.TestCase, test.TestCase):
         ValueError, "Structure had 2 atoms, but flat_sequence had 1 items."):
       nest.pack_sequence_as(val, [val], expand_composites=True)
 
+  @parameterized.named_parameters(
+      ("Atom", 5),
+      ("Nested", [1, (2, 3), {"b": 4, "a": [5, 6]}]),
+      ("Empty", [(), [], {}]),
+      ("Namedtuple", PointXY(x=1, y=(2, 3))),
+      ("OrderedDict", collections.OrderedDict([("b", 1), ("a", 2)])),
+      ("DefaultDict", collections.defaultdict(list, {"b": 1, "a": 2})),
+      ("CustomMapping", _CustomMapping(b=1, a=2)),
+      ("CustomList", _CustomList([1, [2, 3]])),
+      ("MappingView", {"b": 1, "a": 2}.values()),
+  )
+  def testStructurePlan(self, structure):
+    plan = nest.StructurePlan(structure)
+    flat = nest.flatten(structure)
+    self.assertEqual(flat, plan.flatten(structure))
+    self.assertLen(flat, plan.num_leaves)
+    self.assertEqual(tuple(nest.yield_flat_paths(structure)), plan.paths)
+
+    atoms = [str(i) for i in range(plan.num_leaves)]
+    expected = nest.pack_sequence_as(structure, atoms)
+    packed = plan.pack(atoms)
+    self.assertIs(type(expected), type(packed))
+    self.assertEqual(expected, packed)
+    if isinstance(expected, collections.abc.Mapping):
+      self.assertEqual(list(expected), list(packed))
+
+  def testStructurePlanCompositeTensor(self):
+    rt = ragged_tensor.RaggedTensor.from_row_splits(
+        values=[1, 2, 3], row_splits=[0, 1, 3])
+    structure = {"rt": rt, "x": 1}
+    plan = nest.StructurePlan(structure, expand_composites=True)
+    self.assertEqual(3, plan.num_leaves)
+    packed = plan.pack(plan.flatten(structure))
+    self.assertAllEqual(rt, packed["rt"])
+    self.assertEqual(1, packed["x"])
+    self.assertEqual(2, nest.StructurePlan(structure).num_leaves)
+
+  def testStructurePlanMapStructure(self):
+    plan = nest.StructurePlan({"a": 1, "b": [2, 3]})
+    self.assertEqual(
+        {"a": 11, "b": [22, 33]},
+        plan.map_structure(lambda x, y: x + y, {"a": 1, "b": [2, 3]},
+                           {"a": 10, "b": [20, 30]}))
+    # The results are packed into the compiled structure.
+    self.assertEqual(
+        {"a": 2, "b": [4, 6]},
+        plan.map_structure(lambda x: 2 * x, {"a": 1, "b": (2, 3)},
+                           check_types=False))
+    with self.assertRaises(TypeError):
+      plan.map_structure(lambda x: x, {"a": 1, "b": (2, 3)})
+    with self.assertRaises(ValueError):
+      plan.map_structure(lambda x: x, {"a": 1, "b": [2]})
+
+  def testStructurePlanErrors(self):
+    plan = nest.StructurePlan([1, (2, 3)])
+    with self.assertRaisesRegex(
+        ValueError, "Structure had 3 atoms, but flat_sequence had 2 items."):
+      plan.pack([1, 2])
+    with self.assertRaisesRegex(TypeError, "expected a sequence"):
+      plan.pack("abc")
+    with self.assertRaisesRegex(ValueError, "has 2 atoms"):
+      plan.flatten([1, 2])
+    with self.assertRaises(ValueError):
+      plan.assert_same_structure([1, 2, 3])
+    with self.assertRaises(TypeError):
+      plan.assert_same_structure((1, (2, 3)))
+    plan.assert_same_structure(["a", ("b", "c")])
+
   @test_util.assert_no_new_pyobjects_executing_eagerly
   def testIsNested(self):
     self.assertFalse(nest.is_nested("1234"))
@@ -1336,6 +1404,30 @@ class NestBenchmark(test.Benchmark):
     s2 = ((("foo1", "foo2"), "foo3"), "foo4", ("foo5", "foo6")) * 10
     self.run_and_report(s1, s2, "assert_same_structure_60_elem")
 
+  def _run_and_report_pack(self, pack, flat, name):
+    burn_iter, test_iter = 100, 30000
+
+    for _ in range(burn_iter):
+      pack(flat)
+
+    t0 = time.time()
+    for _ in range(test_iter):
+      pack(flat)
+    t1 = time.time()
+
+    self.report_benchmark(iters=test_iter, wall_time=(t1 - t0) / test_iter,
+                          name=name)
+
+  def benchmark_pack_sequence_as(self):
+    structure = [{"a": (1, 2), "b": [3, {"c": 4, "d": 5}]}] * 10
+    flat = nest.flatten(structure)
+    self._run_and_report_pack(
+        lambda flat: nest.pack_sequence_as(structure, flat), flat,
+        "pack_sequence_as_50_elem")
+    self._run_and_report_pack(
+        nest.StructurePlan(structure).pack, flat,
+        "structure_plan_pack_50_elem")
+
 
 if __name__ == "__main__":
   test.main()
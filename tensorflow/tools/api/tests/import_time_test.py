@@ -0,0 +1,108 @@
+# Copyright 2023 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Checks the time taken by `import tensorflow` in a new Python process."""
+
+import json
+import os
+import subprocess
+import sys
+
+from tensorflow.python.platform import test
+
+# The modules that `import tensorflow` cannot avoid: the native library and the
+# core framework. Their import time is the baseline of the budget.
+_BASELINE_MODULE = "tensorflow.python.framework.ops"
+# The time that `import tensorflow` may take on top of the baseline, in
+# seconds. It can be overridden with the TF_IMPORT_TIME_MARGIN_SECONDS
+# environment variable.
+_DEFAULT_MARGIN_SECONDS = 2.0
+_NUM_IMPORTS = 3
+
+# The modules bound with `LazyLoader` in tensorflow/python/__init__.py.
+_LAZY_MODULES = (
+    "tensorflow.python.data",
+    "tensorflow.python.distribute",
+    "tensorflow.python.ops.numpy_ops",
+    "tensorflow.python.profiler.profiler_client",
+    "tensorflow.python.profiler.profiler_v2",
+    "tensorflow.python.profiler.trace",
+)
+
+_IMPORT = """
+import json
+import sys
+import time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "lazy_modules_loaded": [m for m in {lazy_modules!r} if m in sys.modules],
+}}))
+"""
+
+
+def _import(module):
+  """Imports `module` in a new process and returns its time and modules."""
+  output = subprocess.check_output([
+      sys.executable, "-c",
+      _IMPORT.format(module=module, lazy_modules=_LAZY_MODULES)
+  ])
+  return json.loads(output.splitlines()[-1])
+
+
+def _import_time(module, num_imports):
+  # The fastest import is the least affected by the load of the machine.
+  return min(_import(module)["seconds"] for _ in range(num_imports))
+
+
+def _margin_seconds():
+  return float(
+      os.environ.get("TF_IMPORT_TIME_MARGIN_SECONDS", _DEFAULT_MARGIN_SECONDS))
+
+
+class ImportTimeTest(test.TestCase):
+
+  def testImportTimeWithinBudget(self):
+    baseline = _import_time(_BASELINE_MODULE, _NUM_IMPORTS)
+    import_time = _import_time("tensorflow", _NUM_IMPORTS)
+    self.assertLessEqual(
+        import_time, baseline + _margin_seconds(),
+        f"`import tensorflow` took {import_time:.2f}s, more than "
+        f"{_margin_seconds():.2f}s over the {baseline:.2f}s of importing "
+        f"{_BASELINE_MODULE}. Modules that are not needed to use the public "
+        "API should be imported lazily, see "
+        "tensorflow/python/util/lazy_loader.py.")
+
+
+class ImportTimeBenchmark(test.Benchmark):
+
+  def benchmark_import_tensorflow(self):
+    baseline = _import_time(_BASELINE_MODULE, _NUM_IMPORTS)
+    imports = sorted((_import("tensorflow") for _ in range(_NUM_IMPORTS)),
+                     key=lambda result: result["seconds"])
+    self.report_benchmark(
+        iters=len(imports),
+        wall_time=imports[len(imports) // 2]["seconds"],
+        name="import_tensorflow",
+        extras={
+            "min_wall_time": imports[0]["seconds"],
+            "baseline_wall_time": baseline,
+            # The lazily loaded modules that other modules import anyway.
+            "lazy_modules_loaded": ",".join(imports[0]["lazy_modules_loaded"]),
+        })
+
+
+if __name__ == "__main__":
+  test.main()